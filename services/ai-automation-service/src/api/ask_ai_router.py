@@ -31,6 +31,7 @@ import yaml as yaml_lib
 from ..database import get_db
 from ..config import settings
 from ..clients.ha_client import HomeAssistantClient
+from ..clients.ha_state_mirror import HAStateMirror, get_state_mirror
 from ..clients.device_intelligence_client import DeviceIntelligenceClient
 from ..entity_extraction import extract_entities_from_query, EnhancedEntityExtractor, MultiModelEntityExtractor
 from ..model_services.orchestrator import ModelOrchestrator
@@ -235,9 +236,27 @@ async def get_reverse_engineering_analytics(
 ha_client = None
 openai_client = None
 
+
+def _shared_state_mirror() -> Optional[HAStateMirror]:
+    """Get the process-wide HA state mirror shared by all Ask AI HA clients (None if disabled)"""
+    if not settings.ha_state_mirror_enabled or not (settings.ha_url and settings.ha_token):
+        return None
+    return get_state_mirror(
+        settings.ha_url,
+        settings.ha_token,
+        ttl_seconds=settings.ha_state_mirror_ttl_seconds,
+        use_websocket=settings.ha_state_mirror_websocket,
+        timeout=settings.ha_timeout
+    )
+
+
 if settings.ha_url and settings.ha_token:
     try:
-        ha_client = HomeAssistantClient(settings.ha_url, access_token=settings.ha_token)
+        ha_client = HomeAssistantClient(
+            settings.ha_url,
+            access_token=settings.ha_token,
+            state_mirror=_shared_state_mirror()
+        )
         logger.info("✅ Home Assistant client initialized for Ask AI")
     except Exception as e:
         logger.error(f"❌ Failed to initialize HA client: {e}")
@@ -475,26 +494,14 @@ async def verify_entities_exist_in_ha(
             logger.warning(f"⚠️ Ensemble validation failed, falling back to HA API check: {e}")
             # Fall through to simple HA API check
     
-    # Fallback: Simple HA API verification (parallel for performance)
-    import asyncio
-    async def verify_one(entity_id: str) -> tuple[str, bool]:
-        try:
-            state = await ha_client.get_entity_state(entity_id)
-            return (entity_id, state is not None)
-        except Exception:
-            return (entity_id, False)
-    
-    tasks = [verify_one(eid) for eid in entity_ids]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    verified = {}
-    for result in results:
-        if isinstance(result, Exception):
-            continue
-        entity_id, exists = result
-        verified[entity_id] = exists
+    # Fallback: Simple HA API verification (state mirror lookup or parallel REST calls)
+    try:
+        states = await ha_client.get_entity_states(list(entity_ids))
+    except Exception as e:
+        logger.warning(f"⚠️ HA entity verification failed: {e}")
+        return {eid: False for eid in entity_ids}
     
-    return verified
+    return {entity_id: state is not None for entity_id, state in states.items()}
 
 
 async def map_devices_to_entities(
@@ -952,7 +959,8 @@ async def generate_automation_yaml(
         data_api_client = DataAPIClient()
         ha_client = HomeAssistantClient(
             ha_url=settings.ha_url,
-            access_token=settings.ha_token
+            access_token=settings.ha_token,
+            state_mirror=_shared_state_mirror()
         ) if settings.ha_url and settings.ha_token else None
         entity_validator = EntityValidator(data_api_client, db_session=db_session, ha_client=ha_client)
         logger.info("✅ Entity validator initialized")
@@ -1039,7 +1047,8 @@ IMPORTANT SERVICE MAPPING:
                 # Initialize HA client
                 ha_client = HomeAssistantClient(
                     ha_url=settings.ha_url,
-                    access_token=settings.ha_token
+                    access_token=settings.ha_token,
+                    state_mirror=_shared_state_mirror()
                 )
                 
                 # Get entity IDs from mapping
@@ -1538,7 +1547,8 @@ Generate ONLY the YAML content, no explanations or markdown code blocks. Use ONL
             try:
                 validation_ha_client = HomeAssistantClient(
                     ha_url=settings.ha_url,
-                    access_token=settings.ha_token
+                    access_token=settings.ha_token,
+                    state_mirror=_shared_state_mirror()
                 )
             except Exception as e:
                 logger.warning(f"⚠️ Could not create HA client for validation: {e}")
@@ -2014,7 +2024,8 @@ async def generate_suggestions_from_query(
             # Initialize HA client and entity validator
             ha_client = HomeAssistantClient(
                 ha_url=settings.ha_url,
-                access_token=settings.ha_token
+                access_token=settings.ha_token,
+                state_mirror=_shared_state_mirror()
             ) if settings.ha_url and settings.ha_token else None
             
             if ha_client:
@@ -2170,7 +2181,8 @@ async def generate_suggestions_from_query(
                     ha_client_for_mapping = ha_client if 'ha_client' in locals() else (
                         HomeAssistantClient(
                             ha_url=settings.ha_url,
-                            access_token=settings.ha_token
+                            access_token=settings.ha_token,
+                            state_mirror=_shared_state_mirror()
                         ) if settings.ha_url and settings.ha_token else None
                     )
                     validated_entities = await map_devices_to_entities(
@@ -2580,22 +2592,26 @@ async def capture_entity_states(
     """
     states = {}
     
-    for entity_id in entity_ids:
-        try:
-            state = await ha_client.get_entity_state(entity_id)
-            if state:
-                states[entity_id] = {
-                    'state': state.get('state'),
-                    'attributes': state.get('attributes', {}),
-                    'timestamp': datetime.now().isoformat()
-                }
-        except Exception as e:
-            logger.warning(f"Failed to capture state for {entity_id}: {e}")
+    try:
+        # Must reflect the state right before execution (REST if the mirror is not live)
+        current_states = await ha_client.get_entity_states(entity_ids, max_age=0)
+    except Exception as e:
+        logger.warning(f"Failed to capture states for {entity_ids}: {e}")
+        current_states = {}
+        for entity_id in entity_ids:
             states[entity_id] = {
                 'error': str(e),
                 'timestamp': datetime.now().isoformat()
             }
     
+    for entity_id, state in current_states.items():
+        if state:
+            states[entity_id] = {
+                'state': state.get('state'),
+                'attributes': state.get('attributes', {}),
+                'timestamp': datetime.now().isoformat()
+            }
+    
     logger.info(f"📸 Captured states for {len(states)} entities")
     return states
 
@@ -2630,7 +2646,7 @@ async def validate_state_changes(
         for entity_id in entity_ids:
             if entity_id not in validation_results:
                 try:
-                    after_state = await ha_client.get_entity_state(entity_id)
+                    after_state = await ha_client.get_entity_state(entity_id, max_age=0)
                     before_state_data = before_states.get(entity_id, {})
                     before_state = before_state_data.get('state')
                     
@@ -2948,7 +2964,8 @@ async def test_suggestion_from_query(
             data_api_client = DataAPIClient()
             ha_client = HomeAssistantClient(
                 ha_url=settings.ha_url,
-                access_token=settings.ha_token
+                access_token=settings.ha_token,
+                state_mirror=_shared_state_mirror()
             ) if settings.ha_url and settings.ha_token else None
             entity_validator = EntityValidator(data_api_client, db_session=db, ha_client=ha_client)
             resolved_entities = await entity_validator.map_query_to_entities(query.original_query, devices_involved)
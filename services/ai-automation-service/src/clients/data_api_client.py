@@ -72,7 +72,8 @@ class DataAPIClient:
         entity_id: Optional[str] = None,
         device_id: Optional[str] = None,
         event_type: Optional[str] = None,
-        limit: int = 10000
+        limit: Optional[int] = 10000,
+        columnar: bool = False
     ) -> pd.DataFrame:
         """
         Fetch historical events from Data API.
@@ -83,7 +84,8 @@ class DataAPIClient:
             entity_id: Optional filter for specific entity
             device_id: Optional filter for specific device
             event_type: Optional filter for event type (e.g., 'state_changed')
-            limit: Maximum number of events to return
+            limit: Maximum number of events to return (None = no limit, columnar mode only)
+            columnar: Stream typed columns page by page instead of building per-record dicts
         
         Returns:
             pandas DataFrame with columns: timestamp, entity_id, event_type, old_state, new_state, attributes, tags
@@ -115,12 +117,20 @@ class DataAPIClient:
             logger.info(f"Fetching events from InfluxDB: start={start_time}, end={end_time}, limit={limit}")
             
             # Query InfluxDB directly for events
-            df = await self.influxdb_client.fetch_events(
-                start_time=start_time,
-                end_time=end_time,
-                entity_id=entity_id,
-                limit=limit
-            )
+            if columnar:
+                df = await self.influxdb_client.fetch_events_columnar(
+                    start_time=start_time,
+                    end_time=end_time,
+                    entity_id=entity_id,
+                    limit=limit
+                )
+            else:
+                df = await self.influxdb_client.fetch_events(
+                    start_time=start_time,
+                    end_time=end_time,
+                    entity_id=entity_id,
+                    limit=limit
+                )
             
             if df.empty:
                 logger.warning(f"No events returned from InfluxDB for period {start_time} to {end_time}")
@@ -14,6 +14,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 import yaml
 
+from .ha_state_mirror import HAStateMirror
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +33,8 @@ class HomeAssistantClient:
         access_token: str,
         max_retries: int = 3,
         retry_delay: float = 1.0,
-        timeout: int = 10
+        timeout: int = 10,
+        state_mirror: Optional[HAStateMirror] = None
     ):
         """
         Initialize HA client.
@@ -42,6 +45,7 @@ class HomeAssistantClient:
             max_retries: Maximum number of retry attempts for failed requests
             retry_delay: Initial delay between retries (exponential backoff applied)
             timeout: Request timeout in seconds
+            state_mirror: Shared local state mirror for entity/domain lookups (None = REST per call)
         """
         self.ha_url = ha_url.rstrip('/')
         self.access_token = access_token
@@ -55,6 +59,7 @@ class HomeAssistantClient:
         self._session: Optional[aiohttp.ClientSession] = None
         self._version_info: Optional[Dict[str, Any]] = None
         self._last_health_check: Optional[datetime] = None
+        self.state_mirror = state_mirror
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """
@@ -748,15 +753,35 @@ class HomeAssistantClient:
                 "error": str(e)
             }
     
-    async def get_entity_state(self, entity_id: str) -> Optional[Dict[str, Any]]:
+    async def _mirror_available(self, max_age: Optional[float] = None) -> bool:
+        """
+        Check whether lookups can be served from the state mirror.
+        
+        Args:
+            max_age: Maximum accepted age of mirrored states when the mirror is not
+                live (None = mirror TTL)
+        
+        Returns:
+            True if a state mirror is configured, loaded and fresh enough
+        """
+        if self.state_mirror is None:
+            return False
+        if not await self.state_mirror.ensure_loaded():
+            return False
+        return self.state_mirror.is_current(max_age)
+    
+    async def get_entity_state(self, entity_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Get current state and attributes for an entity from Home Assistant.
         
-        This is a passthrough to HA's /api/states/{entity_id} endpoint.
+        Served from the state mirror when one is configured, otherwise a
+        passthrough to HA's /api/states/{entity_id} endpoint.
         Returns the full state object including attributes like is_hue_group.
         
         Args:
             entity_id: Entity ID to lookup (e.g., 'light.office')
+            max_age: Maximum accepted age of mirrored states in seconds when the
+                mirror is not live (older states are fetched from HA)
             
         Returns:
             Entity state dict with attributes, or None if not found
@@ -766,6 +791,9 @@ class HomeAssistantClient:
             if state and state.get('attributes', {}).get('is_hue_group'):
                 print("This is a Hue room group!")
         """
+        if await self._mirror_available(max_age):
+            return self.state_mirror.get_state(entity_id)
+        
         try:
             session = await self._get_session()
             url = f"{self.ha_url}/api/states/{entity_id}"
@@ -785,11 +813,37 @@ class HomeAssistantClient:
             logger.error(f"Error getting entity state for {entity_id}: {e}")
             return None
     
+    async def get_entity_states(
+        self,
+        entity_ids: List[str],
+        max_age: Optional[float] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get current states for several entities.
+        
+        Served from the state mirror in one pass when available, otherwise the
+        entities are fetched from HA concurrently.
+        
+        Args:
+            entity_ids: Entity IDs to lookup
+            max_age: Maximum accepted age of mirrored states in seconds when the
+                mirror is not live
+            
+        Returns:
+            Dictionary mapping entity_id -> state dict (None if not found)
+        """
+        if await self._mirror_available(max_age):
+            return self.state_mirror.get_states(entity_ids)
+        
+        states = await asyncio.gather(*(self.get_entity_state(entity_id, max_age) for entity_id in entity_ids))
+        return dict(zip(entity_ids, states))
+    
     async def get_entities_by_domain(self, domain: str) -> List[str]:
         """
         Get all entity IDs for a specific domain from Home Assistant.
         
-        Queries HA's /api/states endpoint and filters by domain prefix.
+        Served from the state mirror's domain index when available, otherwise
+        queries HA's /api/states endpoint and filters by domain prefix.
         
         Args:
             domain: Domain name (e.g., 'wled', 'light', 'binary_sensor')
@@ -801,6 +855,11 @@ class HomeAssistantClient:
             wled_entities = await ha_client.get_entities_by_domain('wled')
             # Returns: ['wled.office', 'wled.kitchen']
         """
+        if await self._mirror_available():
+            domain_entities = self.state_mirror.get_entities_by_domain(domain)
+            logger.debug(f"Found {len(domain_entities)} mirrored entities for domain '{domain}'")
+            return domain_entities
+        
         try:
             session = await self._get_session()
             url = f"{self.ha_url}/api/states"
@@ -0,0 +1,486 @@
+"""
+Home Assistant State Mirror
+
+In-process mirror of Home Assistant entity states for the Ask AI flows.
+
+Bulk-loads /api/states once and keeps itself current through the HA
+WebSocket API (subscribe_events for state_changed). If the WebSocket is not
+available the mirror falls back to re-loading /api/states after a short TTL.
+Entity, domain and area lookups are served from indexed dicts instead of one
+REST round-trip per entity.
+"""
+
+import aiohttp
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Any, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HAStateMirror:
+    """
+    Indexed local copy of Home Assistant states.
+
+    Callers await ensure_loaded() before the (synchronous) lookups: the first
+    call loads all states, later calls are free while the WebSocket
+    subscription is live (or the last bulk load is younger than ttl_seconds).
+    """
+
+    def __init__(
+        self,
+        ha_url: str,
+        access_token: str,
+        ttl_seconds: float = 30.0,
+        use_websocket: bool = True,
+        timeout: int = 10,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0
+    ):
+        """
+        Initialize the state mirror.
+
+        Args:
+            ha_url: Home Assistant URL (e.g., "http://homeassistant:8123")
+            access_token: Long-lived access token from HA
+            ttl_seconds: Maximum age of a bulk load while the WebSocket is not live
+            use_websocket: Keep the mirror current via HA WebSocket state_changed events
+            timeout: Request timeout in seconds
+            reconnect_delay: Initial WebSocket reconnect delay (exponential backoff applied)
+            max_reconnect_delay: Upper bound for the reconnect delay
+        """
+        self.ha_url = ha_url.rstrip('/')
+        self.access_token = access_token
+        self.ttl_seconds = ttl_seconds
+        self.use_websocket = use_websocket
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # entity_id -> state object (as returned by /api/states)
+        self._states: Dict[str, Dict[str, Any]] = {}
+        # domain -> entity IDs, area_id -> entity IDs
+        self._by_domain: Dict[str, Set[str]] = {}
+        self._by_area: Dict[str, Set[str]] = {}
+        # entity_id -> area_id (from the entity/device registries), area name -> area_id
+        self._entity_areas: Dict[str, str] = {}
+        self._area_names: Dict[str, str] = {}
+
+        self._loaded_at: Optional[float] = None
+        self._retry_at: Optional[float] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws_live = False
+
+        self._stats = {
+            'bulk_loads': 0,
+            'bulk_load_failures': 0,
+            'events_applied': 0,
+            'websocket_connects': 0,
+            'websocket_failures': 0,
+            'lookups': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Lookups (call ensure_loaded() first)
+    # ------------------------------------------------------------------
+
+    def get_state(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the mirrored state object for an entity.
+
+        Args:
+            entity_id: Entity ID to lookup (e.g., 'light.office')
+
+        Returns:
+            Entity state dict with attributes, or None if the entity does not exist
+        """
+        self._stats['lookups'] += 1
+        return self._copy_state(self._states.get(entity_id))
+
+    def get_states(self, entity_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get mirrored state objects for several entities at once.
+
+        Args:
+            entity_ids: Entity IDs to lookup
+
+        Returns:
+            Dictionary mapping entity_id -> state dict (None if not found)
+        """
+        return {entity_id: self.get_state(entity_id) for entity_id in entity_ids}
+
+    def get_entities_by_domain(self, domain: str) -> List[str]:
+        """
+        Get all entity IDs for a domain.
+
+        Args:
+            domain: Domain name (e.g., 'wled', 'light', 'binary_sensor')
+
+        Returns:
+            Sorted list of entity IDs in the domain
+        """
+        self._stats['lookups'] += 1
+        return sorted(self._by_domain.get(domain, ()))
+
+    def get_entities_by_area(self, area: str) -> List[str]:
+        """
+        Get all entity IDs assigned to an area.
+
+        Areas come from the HA entity and device registries, which are only
+        available over the WebSocket API.
+
+        Args:
+            area: Area ID or area name (case insensitive, e.g., 'office' or 'Living Room')
+
+        Returns:
+            Sorted list of entity IDs in the area
+        """
+        self._stats['lookups'] += 1
+        key = area.lower()
+        area_id = key if key in self._by_area else self._area_names.get(key, key)
+        return sorted(self._by_area.get(area_id, ()))
+
+    def is_current(self, max_age: Optional[float] = None) -> bool:
+        """
+        Check whether mirrored states can be served without a reload.
+
+        Args:
+            max_age: Maximum accepted age of the bulk load (defaults to ttl_seconds)
+
+        Returns:
+            True if the WebSocket is live or the last bulk load is recent enough
+        """
+        if self._loaded_at is None:
+            return False
+        if self._ws_live:
+            return True
+        limit = self.ttl_seconds if max_age is None else max_age
+        return (time.monotonic() - self._loaded_at) < limit
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def ensure_loaded(self) -> bool:
+        """
+        Load states on first use and re-load them once the TTL expired (if not live).
+
+        After a failed load no new attempt is made for ttl_seconds, so callers
+        can fall back to the REST API without hammering an unreachable HA.
+
+        Returns:
+            True if the mirror can serve lookups
+        """
+        if self.use_websocket:
+            self._start_websocket()
+        if self.is_current():
+            return True
+        if self._retry_at is not None and time.monotonic() < self._retry_at:
+            return False
+
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            # Another caller may have loaded while we waited for the lock
+            if self.is_current():
+                return True
+            if self._retry_at is not None and time.monotonic() < self._retry_at:
+                return False
+            return await self.refresh()
+
+    async def refresh(self) -> bool:
+        """
+        Bulk-load all states from /api/states and rebuild the indexes.
+
+        Returns:
+            True if the load succeeded (a failed load invalidates the mirror)
+        """
+        try:
+            session = await self._get_session()
+            url = f"{self.ha_url}/api/states"
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                states = await response.json()
+            if not isinstance(states, list):
+                raise RuntimeError(f"Unexpected states response type: {type(states)}")
+        except Exception as e:
+            self._stats['bulk_load_failures'] += 1
+            self._loaded_at = None
+            self._retry_at = time.monotonic() + self.ttl_seconds
+            logger.warning(f"⚠️ HA state mirror load failed: {e}")
+            return False
+
+        previous = self._states
+        self._states = {}
+        for state in states:
+            if isinstance(state, dict) and isinstance(state.get('entity_id'), str):
+                entity_id = state['entity_id']
+                current = previous.get(entity_id)
+                # Events received while the request was in flight may be newer
+                if current is not None and _is_newer(current, state):
+                    state = current
+                self._states[entity_id] = state
+        self._rebuild_indexes()
+        self._loaded_at = time.monotonic()
+        self._retry_at = None
+        self._stats['bulk_loads'] += 1
+        logger.info(f"✅ HA state mirror loaded {len(self._states)} entities")
+        return True
+
+    def apply_state_changed(self, event_data: Dict[str, Any]) -> None:
+        """
+        Apply the data of a state_changed event to the mirror.
+
+        Args:
+            event_data: Event data with entity_id and new_state (None = entity removed)
+        """
+        entity_id = event_data.get('entity_id')
+        if not isinstance(entity_id, str):
+            return
+
+        new_state = event_data.get('new_state')
+        domain = entity_id.split('.', 1)[0]
+        if new_state is None:
+            self._states.pop(entity_id, None)
+            self._by_domain.get(domain, set()).discard(entity_id)
+            area_id = self._entity_areas.get(entity_id)
+            if area_id:
+                self._by_area.get(area_id, set()).discard(entity_id)
+        else:
+            current = self._states.get(entity_id)
+            if current is not None and _is_newer(current, new_state):
+                return
+            self._states[entity_id] = new_state
+            self._by_domain.setdefault(domain, set()).add(entity_id)
+            area_id = self._entity_areas.get(entity_id)
+            if area_id:
+                self._by_area.setdefault(area_id, set()).add(entity_id)
+        self._stats['events_applied'] += 1
+
+    def apply_registries(
+        self,
+        entities: List[Dict[str, Any]],
+        devices: List[Dict[str, Any]],
+        areas: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Resolve entity areas from the HA registries and rebuild the area index.
+
+        An entity's own area overrides the area of its device.
+
+        Args:
+            entities: Result of config/entity_registry/list
+            devices: Result of config/device_registry/list
+            areas: Result of config/area_registry/list
+        """
+        device_areas = {
+            device['id']: device['area_id']
+            for device in devices
+            if isinstance(device, dict) and device.get('id') and device.get('area_id')
+        }
+        entity_areas = {}
+        for entity in entities:
+            if not isinstance(entity, dict) or not entity.get('entity_id'):
+                continue
+            area_id = entity.get('area_id') or device_areas.get(entity.get('device_id'))
+            if area_id:
+                entity_areas[entity['entity_id']] = area_id
+
+        self._entity_areas = entity_areas
+        self._area_names = {
+            area['name'].lower(): area['area_id']
+            for area in areas
+            if isinstance(area, dict) and isinstance(area.get('name'), str) and area.get('area_id')
+        }
+        self._rebuild_area_index()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the domain and area indexes from the state dict"""
+        by_domain: Dict[str, Set[str]] = {}
+        for entity_id in self._states:
+            by_domain.setdefault(entity_id.split('.', 1)[0], set()).add(entity_id)
+        self._by_domain = by_domain
+        self._rebuild_area_index()
+
+    def _rebuild_area_index(self) -> None:
+        """Rebuild the area index for the mirrored entities"""
+        by_area: Dict[str, Set[str]] = {}
+        for entity_id, area_id in self._entity_areas.items():
+            if entity_id in self._states:
+                by_area.setdefault(area_id, set()).add(entity_id)
+        self._by_area = by_area
+
+    @staticmethod
+    def _copy_state(state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Copy a state so callers cannot modify the mirror"""
+        if state is None:
+            return None
+        return {**state, 'attributes': dict(state.get('attributes') or {})}
+
+    # ------------------------------------------------------------------
+    # WebSocket subscription
+    # ------------------------------------------------------------------
+
+    def _start_websocket(self) -> None:
+        """Start the WebSocket task (if not running) on the current event loop"""
+        if self._ws_task is None or self._ws_task.done():
+            self._ws_task = asyncio.get_running_loop().create_task(self._run_websocket())
+
+    async def _run_websocket(self) -> None:
+        """Keep a state_changed subscription open, reconnecting with backoff"""
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._listen_websocket()
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats['websocket_failures'] += 1
+                logger.warning(f"⚠️ HA state mirror WebSocket error: {e}, reconnecting in {delay:.1f}s")
+            finally:
+                self._ws_live = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _listen_websocket(self) -> None:
+        """Authenticate, subscribe to state_changed and apply events until the socket closes"""
+        session = await self._get_session()
+        ws_url = self.ha_url.replace('http://', 'ws://', 1).replace('https://', 'wss://', 1) + '/api/websocket'
+
+        async with session.ws_connect(ws_url, heartbeat=30) as ws:
+            message = await ws.receive_json()
+            if message.get('type') == 'auth_required':
+                await ws.send_json({'type': 'auth', 'access_token': self.access_token})
+                message = await ws.receive_json()
+            if message.get('type') != 'auth_ok':
+                raise RuntimeError(f"Authentication failed: {message.get('message', message.get('type'))}")
+
+            await ws.send_json({'id': 1, 'type': 'subscribe_events', 'event_type': 'state_changed'})
+            registry_requests = {
+                2: 'config/entity_registry/list',
+                3: 'config/device_registry/list',
+                4: 'config/area_registry/list'
+            }
+            for request_id, request_type in registry_requests.items():
+                await ws.send_json({'id': request_id, 'type': request_type})
+            registries: Dict[int, List[Dict[str, Any]]] = {}
+
+            self._stats['websocket_connects'] += 1
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+                    continue
+
+                message = msg.json()
+                message_type = message.get('type')
+                if message_type == 'event':
+                    event = message.get('event', {})
+                    if event.get('event_type') == 'state_changed':
+                        self.apply_state_changed(event.get('data', {}))
+                elif message_type == 'result':
+                    request_id = message.get('id')
+                    if not message.get('success'):
+                        raise RuntimeError(f"Request {request_id} failed: {message.get('error')}")
+                    if request_id == 1:
+                        # Subscribed: a bulk load now cannot miss any change
+                        await self.refresh()
+                        self._ws_live = True
+                        logger.info("✅ HA state mirror subscribed to state_changed events")
+                    elif request_id in registry_requests:
+                        registries[request_id] = message.get('result') or []
+                        if len(registries) == len(registry_requests):
+                            self.apply_registries(registries[2], registries[3], registries[4])
+
+        logger.info("HA state mirror WebSocket closed")
+
+    # ------------------------------------------------------------------
+    # Lifecycle / statistics
+    # ------------------------------------------------------------------
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the client session used for REST and WebSocket"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                },
+                timeout=aiohttp.ClientTimeout(total=None, connect=5, sock_read=None),
+                raise_for_status=False
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Stop the WebSocket subscription and close the session"""
+        if self._ws_task is not None:
+            self._ws_task.cancel()
+            try:
+                await self._ws_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._ws_task = None
+        self._ws_live = False
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def get_mirror_statistics(self) -> Dict[str, Any]:
+        """
+        Get state mirror statistics.
+
+        Returns:
+            Dictionary with entity counts, freshness and load/event counters
+        """
+        return {
+            'entities': len(self._states),
+            'domains': len(self._by_domain),
+            'areas': len(self._by_area),
+            'websocket_live': self._ws_live,
+            'age_seconds': (time.monotonic() - self._loaded_at) if self._loaded_at is not None else None,
+            **self._stats
+        }
+
+
+def _is_newer(current: Dict[str, Any], candidate: Dict[str, Any]) -> bool:
+    """Check whether current was updated after candidate (HA ISO timestamps compare as strings)"""
+    current_updated = current.get('last_updated')
+    candidate_updated = candidate.get('last_updated')
+    if not isinstance(current_updated, str) or not isinstance(candidate_updated, str):
+        return False
+    return current_updated > candidate_updated
+
+
+# Process-wide mirrors (one per HA instance), shared by all HomeAssistantClient instances
+_mirrors: Dict[Tuple[str, str], HAStateMirror] = {}
+
+
+def get_state_mirror(ha_url: str, access_token: str, **kwargs) -> HAStateMirror:
+    """
+    Get the shared state mirror for a Home Assistant instance.
+
+    Args:
+        ha_url: Home Assistant URL
+        access_token: Long-lived access token from HA
+        **kwargs: HAStateMirror options (only used when the mirror is created)
+
+    Returns:
+        Shared HAStateMirror instance
+    """
+    key = (ha_url.rstrip('/'), access_token)
+    mirror = _mirrors.get(key)
+    if mirror is None:
+        mirror = HAStateMirror(ha_url, access_token, **kwargs)
+        _mirrors[key] = mirror
+    return mirror
+
+
+async def close_state_mirrors() -> None:
+    """Close all shared state mirrors"""
+    for mirror in list(_mirrors.values()):
+        await mirror.close()
+    _mirrors.clear()
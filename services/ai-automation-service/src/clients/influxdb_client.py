@@ -5,13 +5,31 @@ Direct query to InfluxDB for historical event data
 
 from influxdb_client import InfluxDBClient as InfluxClient, Point
 from influxdb_client.client.query_api import QueryApi
+from influxdb_client.domain.dialect import Dialect
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
+from pandas.api.types import union_categoricals
+import numpy as np
 import pandas as pd
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns kept by the columnar query (CSV column -> output column)
+COLUMNAR_CSV_COLUMNS = {
+    '_time': '_time',
+    '_value': 'state',
+    'entity_id': 'entity_id',
+    'device_id': 'device_id',
+    'attr_friendly_name': 'friendly_name',
+    'event_type': 'event_type'
+}
+
+# Plain CSV without annotation rows, streamed by pandas
+COLUMNAR_CSV_DIALECT = Dialect(header=True, annotations=[], delimiter=',', date_time_format='RFC3339')
+
 
 class InfluxDBEventClient:
     """Client for querying Home Assistant events from InfluxDB"""
@@ -42,6 +60,49 @@ class InfluxDBEventClient:
         
         logger.info(f"InfluxDB client initialized: {url}, org={org}, bucket={bucket}")
     
+    def _build_events_query(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        entity_id: Optional[str] = None,
+        domain: Optional[str] = None
+    ) -> str:
+        """
+        Build the base Flux query for state_changed events (without sort/limit).
+        
+        Args:
+            start_time: Start of time range (inclusive)
+            end_time: End of time range (exclusive)
+            entity_id: Filter by specific entity ID
+            domain: Filter by domain
+        
+        Returns:
+            Flux query string
+        """
+        # Build Flux query
+        # Query the home_assistant_events measurement, filter for state field only
+        flux_query = f'''
+            from(bucket: "{self.bucket}")
+              |> range(start: {start_time.isoformat()}, stop: {end_time.isoformat()})
+              |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
+              |> filter(fn: (r) => r["_field"] == "state")
+              |> filter(fn: (r) => r["event_type"] == "state_changed")
+        '''
+        
+        # Add entity_id filter
+        if entity_id:
+            flux_query += f'''
+              |> filter(fn: (r) => r["entity_id"] == "{entity_id}")
+            '''
+        
+        # Add domain filter (if entity_id contains domain)
+        if domain:
+            flux_query += f'''
+              |> filter(fn: (r) => contains(value: "{domain}.", set: r["entity_id"]))
+            '''
+        
+        return flux_query
+    
     async def fetch_events(
         self,
         start_time: Optional[datetime] = None,
@@ -70,27 +131,7 @@ class InfluxDBEventClient:
             if end_time is None:
                 end_time = datetime.now(timezone.utc)
             
-            # Build Flux query
-            # Query the home_assistant_events measurement, filter for state field only
-            flux_query = f'''
-                from(bucket: "{self.bucket}")
-                  |> range(start: {start_time.isoformat()}, stop: {end_time.isoformat()})
-                  |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
-                  |> filter(fn: (r) => r["_field"] == "state")
-                  |> filter(fn: (r) => r["event_type"] == "state_changed")
-            '''
-            
-            # Add entity_id filter
-            if entity_id:
-                flux_query += f'''
-                  |> filter(fn: (r) => r["entity_id"] == "{entity_id}")
-                '''
-            
-            # Add domain filter (if entity_id contains domain)
-            if domain:
-                flux_query += f'''
-                  |> filter(fn: (r) => contains(value: "{domain}.", set: r["entity_id"]))
-                '''
+            flux_query = self._build_events_query(start_time, end_time, entity_id, domain)
             
             # Sort and limit
             flux_query += f'''
@@ -149,6 +190,170 @@ class InfluxDBEventClient:
             logger.error(f"❌ Failed to fetch events from InfluxDB: {e}", exc_info=True)
             raise
     
+    async def fetch_events_columnar(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        entity_id: Optional[str] = None,
+        domain: Optional[str] = None,
+        limit: Optional[int] = None,
+        page_hours: int = 24,
+        chunk_rows: int = 50000
+    ) -> pd.DataFrame:
+        """
+        Fetch events as typed columns, paging through the time range.
+        
+        Each page is streamed as CSV and parsed in chunks straight into
+        datetime64/category columns, so no per-record Python objects are
+        built and no result limit is needed for long histories.
+        
+        Args:
+            start_time: Start of time range (default: 30 days ago)
+            end_time: End of time range (default: now)
+            entity_id: Filter by specific entity ID
+            domain: Filter by domain (e.g., 'light', 'switch')
+            limit: Optional maximum number of events (None = all events in range)
+            page_hours: Time range covered by each query
+            chunk_rows: CSV rows parsed per chunk
+        
+        Returns:
+            DataFrame with the same columns as fetch_events, sorted by _time
+        """
+        try:
+            if start_time is None:
+                start_time = datetime.now(timezone.utc) - timedelta(days=30)
+            if end_time is None:
+                end_time = datetime.now(timezone.utc)
+            
+            logger.info(f"Querying InfluxDB for events (columnar): {start_time} to {end_time}, "
+                        f"page={page_hours}h, limit={limit}")
+            
+            chunks: List[pd.DataFrame] = []
+            total_rows = 0
+            page_start = start_time
+            page_size = timedelta(hours=page_hours)
+            
+            while page_start < end_time:
+                page_end = min(page_start + page_size, end_time)
+                flux_query = self._build_events_query(page_start, page_end, entity_id, domain)
+                flux_query += f'''
+                  |> keep(columns: {json.dumps(list(COLUMNAR_CSV_COLUMNS))})
+                  |> group()
+                  |> sort(columns: ["_time"])
+                '''
+                
+                # Blocking HTTP read + CSV parse runs off the event loop
+                page_chunks = await asyncio.to_thread(self._read_csv_chunks, flux_query, chunk_rows)
+                for chunk in page_chunks:
+                    chunks.append(chunk)
+                    total_rows += len(chunk)
+                
+                if limit is not None and total_rows >= limit:
+                    break
+                page_start = page_end
+            
+            if not chunks:
+                logger.warning(f"No events found in InfluxDB for period {start_time} to {end_time}")
+                return pd.DataFrame()
+            
+            df = self._concat_event_chunks(chunks)
+            if limit is not None:
+                df = df.iloc[:limit]
+            
+            logger.info(f"✅ Fetched {len(df)} events from InfluxDB (columnar, "
+                        f"{df.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB)")
+            
+            return df
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch events from InfluxDB (columnar): {e}", exc_info=True)
+            raise
+    
+    def _read_csv_chunks(self, flux_query: str, chunk_rows: int) -> List[pd.DataFrame]:
+        """
+        Execute a query and parse the streamed CSV response into typed chunks.
+        
+        Args:
+            flux_query: Flux query returning the COLUMNAR_CSV_COLUMNS
+            chunk_rows: CSV rows parsed per chunk
+        
+        Returns:
+            List of typed event chunks
+        """
+        response = self.query_api.query_raw(flux_query, org=self.org, dialect=COLUMNAR_CSV_DIALECT)
+        try:
+            reader = pd.read_csv(
+                response,
+                usecols=lambda col: col in COLUMNAR_CSV_COLUMNS,
+                dtype=str,
+                na_filter=False,
+                chunksize=chunk_rows
+            )
+            return [self._typed_event_chunk(chunk) for chunk in reader if not chunk.empty]
+        except pd.errors.EmptyDataError:
+            return []
+        finally:
+            response.close()
+    
+    @staticmethod
+    def _typed_event_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert a raw CSV chunk (all strings) to typed event columns.
+        
+        Args:
+            chunk: CSV chunk with COLUMNAR_CSV_COLUMNS
+        
+        Returns:
+            DataFrame with datetime64 _time and categorical string columns
+        """
+        chunk = chunk.rename(columns=COLUMNAR_CSV_COLUMNS)
+        empty = pd.Series('', index=chunk.index)
+        
+        entity_ids = chunk['entity_id'].astype('category')
+        
+        # Domain is derived per category, not per row
+        categories = entity_ids.cat.categories
+        category_domains = [e.split('.')[0] if '.' in e else '' for e in categories]
+        domain_codes, domains = pd.factorize(pd.Index(category_domains, dtype=object))
+        codes = entity_ids.cat.codes.to_numpy()
+        domain = pd.Categorical.from_codes(
+            np.where(codes >= 0, domain_codes[codes], -1), categories=domains
+        )
+        
+        friendly_names = chunk.get('friendly_name', empty)
+        friendly_names = friendly_names.where(friendly_names != '', chunk['entity_id'])
+        
+        return pd.DataFrame({
+            '_time': pd.to_datetime(chunk['_time'], utc=True, format='ISO8601'),
+            'entity_id': entity_ids,
+            'state': chunk['state'].astype('category'),
+            'domain': domain,
+            'friendly_name': friendly_names.astype('category'),
+            'device_id': chunk.get('device_id', empty).astype('category'),
+            'event_type': chunk.get('event_type', empty).replace('', 'state_changed').astype('category')
+        })
+    
+    @staticmethod
+    def _concat_event_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenate typed chunks, merging categorical columns without object fallback.
+        
+        Args:
+            chunks: Typed event chunks in time order
+        
+        Returns:
+            Events DataFrame with timestamp/last_changed aliases for pattern detectors
+        """
+        columns = {'_time': pd.concat([chunk['_time'] for chunk in chunks], ignore_index=True)}
+        for col in chunks[0].columns.drop('_time'):
+            columns[col] = pd.Series(union_categoricals([chunk[col] for chunk in chunks]))
+        
+        df = pd.DataFrame(columns)
+        # Pattern detectors expect 'timestamp' and 'last_changed'
+        df['timestamp'] = df['_time']
+        df['last_changed'] = df['_time']
+        return df
+    
     def close(self):
         """Close the InfluxDB client connection"""
         if self.client:
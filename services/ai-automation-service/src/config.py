@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     ha_max_retries: int = 3  # Maximum retry attempts for HA API calls
     ha_retry_delay: float = 1.0  # Initial retry delay in seconds
     ha_timeout: int = 10  # Request timeout in seconds
+    ha_state_mirror_enabled: bool = True  # Serve Ask AI entity/domain lookups from a local state mirror
+    ha_state_mirror_websocket: bool = True  # Keep the mirror current via HA WebSocket state_changed events
+    ha_state_mirror_ttl_seconds: float = 30.0  # Re-load /api/states after this age while the WebSocket is not live
     
     # MQTT
     mqtt_broker: str
@@ -47,9 +50,16 @@ class Settings(BaseSettings):
     # Scheduling
     analysis_schedule: str = "0 3 * * *"  # 3 AM daily (cron format)
     
+    # Pattern Detection Performance
+    co_occurrence_engine: str = "vectorized"  # vectorized (NumPy) or python (legacy row loop)
+    sequence_engine: str = "streaming"  # streaming (single-pass deque window) or python (legacy per-row windows)
+    pattern_detection_workers: int = 4  # Process pool size for ML detectors (0/1 = sequential)
+    columnar_event_fetch: bool = True  # Daily analysis streams typed columns by time page (no event limit)
+    
     # Database
     database_path: str = "/app/data/ai_automation.db"
     database_url: str = "sqlite+aiosqlite:///data/ai_automation.db"
+    synergy_candidate_store_path: str = "data/synergy_candidates.json"  # Persisted compatible pair candidates (synergy detection)
     
     # Logging
     log_level: str = "INFO"
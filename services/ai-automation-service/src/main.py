@@ -28,6 +28,7 @@ from .database.models import init_db
 from .api import health_router, data_router, pattern_router, suggestion_router, analysis_router, suggestion_management_router, deployment_router, nl_generation_router, conversational_router, ask_ai_router, devices_router, set_device_intelligence_client
 from .clients.data_api_client import DataAPIClient
 from .clients.device_intelligence_client import DeviceIntelligenceClient
+from .clients.ha_state_mirror import close_state_mirrors
 from .api.synergy_router import router as synergy_router  # Epic AI-3, Story AI3.8
 from .api.analysis_router import set_scheduler
 from .api.health import set_capability_listener
@@ -249,6 +250,13 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"❌ Device Intelligence client shutdown failed: {e}")
     
+    # Close HA state mirrors (WebSocket subscriptions)
+    try:
+        await close_state_mirrors()
+        logger.info("✅ HA state mirrors closed")
+    except Exception as e:
+        logger.error(f"❌ HA state mirror shutdown failed: {e}")
+    
     # Stop scheduler
     try:
         scheduler.stop()
@@ -22,12 +22,14 @@ __author__ = "AI Automation Team"
 from .descriptor_builder import DeviceDescriptorBuilder
 from .embedding_model import DeviceEmbeddingModel
 from .embedding_cache import EmbeddingCache
+from .embedding_store import EmbeddingStore
 from .device_embedding_generator import DeviceEmbeddingGenerator
 
 __all__ = [
     'DeviceDescriptorBuilder',
     'DeviceEmbeddingModel',
     'EmbeddingCache',
+    'EmbeddingStore',
     'DeviceEmbeddingGenerator',
 ]
 
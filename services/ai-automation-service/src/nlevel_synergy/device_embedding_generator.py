@@ -12,11 +12,13 @@ Responsibilities:
 - Batch processing for efficiency
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 import numpy as np
 
+from .embedding_store import EmbeddingStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,6 +61,7 @@ class DeviceEmbeddingGenerator:
         self.data_api = data_api_client
         self.capability_service = capability_service
         self.cache_days = cache_days
+        self._embedding_store: Optional[EmbeddingStore] = None  # Built on first similarity query
         
         # Initialize components
         from .descriptor_builder import DeviceDescriptorBuilder
@@ -327,6 +330,10 @@ class DeviceEmbeddingGenerator:
         )
         self.db.commit()
         
+        # Keep an already built similarity store current
+        if self._embedding_store is not None:
+            self._embedding_store.add([entity_id], embedding)
+        
         logger.debug(
             f"Stored embedding for {entity_id}: "
             f"norm={embedding_norm:.4f}, "
@@ -384,6 +391,68 @@ class DeviceEmbeddingGenerator:
             logger.error(f"Failed to retrieve all embeddings: {e}")
             return {}
     
+    def get_embedding_store(self, refresh: bool = False, dtype: str = 'float32') -> EmbeddingStore:
+        """
+        Get all embeddings as one EmbeddingStore for batched similarity search.
+        
+        The store is loaded from the database once (one contiguous matrix)
+        and kept current by _store_embedding().
+        
+        Args:
+            refresh: Reload from the database
+            dtype: Storage type for a newly loaded store ('float32', 'float16', 'int8')
+        
+        Returns:
+            EmbeddingStore with all device embeddings
+        """
+        if self._embedding_store is not None and not refresh:
+            return self._embedding_store
+        
+        store = EmbeddingStore(dim=self.embedding_model.EMBEDDING_DIM, dtype=dtype)
+        try:
+            results = self.db.execute(
+                "SELECT entity_id, embedding FROM device_embeddings"
+            ).fetchall()
+            
+            row_bytes = store.dim * 4
+            valid = [(entity_id, blob) for entity_id, blob in results if len(blob) == row_bytes]
+            if len(valid) < len(results):
+                logger.warning(f"Skipped {len(results) - len(valid)} embeddings with unexpected size")
+            if valid:
+                matrix = np.frombuffer(b''.join(blob for _, blob in valid), dtype=np.float32).reshape(len(valid), store.dim)
+                store.add([entity_id for entity_id, _ in valid], matrix)
+            
+            logger.info(f"Loaded {len(store)} embeddings into similarity store")
+        except Exception as e:
+            logger.error(f"Failed to load embedding store: {e}")
+        
+        self._embedding_store = store
+        return store
+    
+    def find_similar_devices(
+        self,
+        entity_id: str,
+        top_k: int = 10,
+        min_similarity: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the devices most similar to an entity by embedding.
+        
+        Args:
+            entity_id: Entity identifier
+            top_k: Number of results (excluding the entity itself)
+            min_similarity: Minimum cosine similarity
+        
+        Returns:
+            List of (entity_id, cosine similarity), best first
+        """
+        store = self.get_embedding_store()
+        query = store.get(entity_id)
+        if query is None:
+            return []
+        results = store.top_k(query, k=top_k + 1, min_score=min_similarity)
+        return [(other_id, score) for other_id, score in results if other_id != entity_id][:top_k]
+    
     def get_stats(self) -> Dict:
         """
         Get embedding generation statistics.
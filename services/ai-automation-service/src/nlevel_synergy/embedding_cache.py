@@ -8,14 +8,18 @@ Features:
 - LRU eviction when cache full
 - Batch loading by area
 - Memory limit enforcement (200MB default)
+- Contiguous EmbeddingStore backing (batched top-k similarity search)
 """
 
-from typing import Dict, List, Optional, Set
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
 import torch
 import numpy as np
 import logging
 from datetime import datetime, timedelta
 
+from .embedding_store import EmbeddingStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,7 +36,8 @@ class EmbeddingCache:
         >>> cache.load_area("kitchen")  # Batch load entire area
     """
     
-    EMBEDDING_SIZE_BYTES = 384 * 4  # 384 floats * 4 bytes = 1536 bytes
+    EMBEDDING_DIM = 384
+    EMBEDDING_SIZE_BYTES = EMBEDDING_DIM * 4  # 384 floats * 4 bytes = 1536 bytes
     
     def __init__(self, db_session, max_cache_mb: int = 200):
         """
@@ -46,9 +51,14 @@ class EmbeddingCache:
         self.max_cache_mb = max_cache_mb
         self.max_cache_entries = int((max_cache_mb * 1024 * 1024) / self.EMBEDDING_SIZE_BYTES)
         
-        self._cache: Dict[str, torch.Tensor] = {}
+        # Raw (unnormalized) vectors so cached embeddings equal the stored ones
+        self._store = EmbeddingStore(
+            dim=self.EMBEDDING_DIM,
+            normalize=False,
+            initial_capacity=min(1024, max(1, self.max_cache_entries))
+        )
         self._loaded_areas: Set[str] = set()
-        self._access_order: List[str] = []  # For LRU eviction
+        self._access_order: OrderedDict = OrderedDict()  # For LRU eviction (oldest first)
         
         logger.info(
             f"Embedding cache initialized: max {max_cache_mb}MB "
@@ -80,36 +90,31 @@ class EmbeddingCache:
         to_load = []
         
         # Check cache first
+        hits = []
         for entity_id in entity_ids:
-            if entity_id in self._cache:
-                embeddings[entity_id] = self._cache[entity_id]
+            if entity_id in self._store:
+                hits.append(entity_id)
                 self._update_access(entity_id)  # Update LRU
             else:
                 to_load.append(entity_id)
         
+        if hits:
+            found, matrix = self._store.get_many(hits)
+            for entity_id, embedding_np in zip(found, matrix):
+                embeddings[entity_id] = torch.from_numpy(embedding_np) if convert_to_tensor else embedding_np
+        
         # Load missing embeddings from database
         if to_load:
             loaded = self._load_from_db(to_load)
             
-            for entity_id, embedding_bytes in loaded.items():
-                # Convert bytes to numpy array
-                embedding_np = np.frombuffer(embedding_bytes, dtype=np.float32)
-                
+            for entity_id, embedding_np in self._add_to_cache(loaded).items():
                 # Convert to tensor if requested
-                if convert_to_tensor:
-                    embedding = torch.from_numpy(embedding_np)
-                else:
-                    embedding = embedding_np
-                
-                # Cache if space available (with LRU eviction)
-                self._add_to_cache(entity_id, embedding)
-                
-                embeddings[entity_id] = embedding
+                embeddings[entity_id] = torch.from_numpy(embedding_np) if convert_to_tensor else embedding_np
         
         logger.debug(
-            f"Embedding cache: {len(self._cache)} cached, "
+            f"Embedding cache: {len(self._store)} cached, "
             f"{len(to_load)} loaded from DB, "
-            f"hit rate: {len(embeddings) - len(to_load)}/{len(entity_ids)}"
+            f"hit rate: {len(hits)}/{len(entity_ids)}"
         )
         
         return embeddings
@@ -140,13 +145,8 @@ class EmbeddingCache:
         ).fetchall()
         
         # Cache all (with LRU eviction if needed)
-        loaded_count = 0
-        for entity_id, embedding_bytes in results:
-            if entity_id not in self._cache:
-                embedding_np = np.frombuffer(embedding_bytes, dtype=np.float32)
-                embedding = torch.from_numpy(embedding_np)
-                self._add_to_cache(entity_id, embedding)
-                loaded_count += 1
+        new = {entity_id: embedding_bytes for entity_id, embedding_bytes in results if entity_id not in self._store}
+        loaded_count = len(self._add_to_cache(new))
         
         self._loaded_areas.add(area_id)
         logger.info(f"Loaded {loaded_count} embeddings for area '{area_id}'")
@@ -169,21 +169,38 @@ class EmbeddingCache:
         
         return {entity_id: embedding for entity_id, embedding in results}
     
-    def _add_to_cache(self, entity_id: str, embedding: torch.Tensor):
+    def _add_to_cache(self, loaded: Dict[str, bytes]) -> Dict[str, np.ndarray]:
         """
-        Add embedding to cache with LRU eviction.
+        Add embeddings to cache in one batch, with LRU eviction.
         
         Args:
-            entity_id: Entity identifier
-            embedding: Embedding tensor
+            loaded: Dict mapping entity_id to embedding bytes
+        
+        Returns:
+            Dict mapping entity_id to embedding array (all valid embeddings,
+            including any that did not fit in the cache)
         """
+        embeddings = {}
+        for entity_id, embedding_bytes in loaded.items():
+            embedding_np = np.frombuffer(embedding_bytes, dtype=np.float32)
+            if embedding_np.shape[0] != self.EMBEDDING_DIM:
+                logger.warning(f"Skipping embedding for {entity_id}: {embedding_np.shape[0]} dims")
+                continue
+            embeddings[entity_id] = embedding_np
+        
+        # Only the most recent max_cache_entries fit
+        to_cache = list(embeddings)[-self.max_cache_entries:] if self.max_cache_entries > 0 else []
+        
         # Evict if cache full
-        while len(self._cache) >= self.max_cache_entries:
+        while self._access_order and len(self._store) + len(to_cache) > self.max_cache_entries:
             self._evict_lru()
         
         # Add to cache
-        self._cache[entity_id] = embedding
-        self._access_order.append(entity_id)
+        if to_cache:
+            self._store.add(to_cache, np.stack([embeddings[entity_id] for entity_id in to_cache]))
+            for entity_id in to_cache:
+                self._access_order[entity_id] = None
+        return embeddings
     
     def _update_access(self, entity_id: str):
         """
@@ -192,17 +209,42 @@ class EmbeddingCache:
         Args:
             entity_id: Entity identifier
         """
-        if entity_id in self._access_order:
-            self._access_order.remove(entity_id)
-        self._access_order.append(entity_id)
+        self._access_order.move_to_end(entity_id)
     
     def _evict_lru(self):
         """Evict least recently used embedding."""
         if self._access_order:
-            lru_entity = self._access_order.pop(0)
-            if lru_entity in self._cache:
-                del self._cache[lru_entity]
-                logger.debug(f"Evicted LRU embedding: {lru_entity}")
+            lru_entity, _ = self._access_order.popitem(last=False)
+            self._store.remove([lru_entity])
+            logger.debug(f"Evicted LRU embedding: {lru_entity}")
+    
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        entity_ids: Optional[List[str]] = None,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the cached embeddings most similar to a query embedding.
+        
+        Args:
+            query: Query embedding (numpy array or tensor)
+            k: Number of results
+            entity_ids: Restrict the search to these (cached) entities
+            min_score: Minimum cosine similarity
+        
+        Returns:
+            List of (entity_id, cosine similarity), best first
+        """
+        if isinstance(query, torch.Tensor):
+            query = query.detach().cpu().numpy()
+        return self._store.top_k(query, k=k, ids=entity_ids, min_score=min_score)
+    
+    @property
+    def store(self) -> EmbeddingStore:
+        """Backing EmbeddingStore (for batched similarity queries)"""
+        return self._store
     
     def get_cache_stats(self) -> Dict:
         """
@@ -211,20 +253,21 @@ class EmbeddingCache:
         Returns:
             Dict with cache stats
         """
-        current_mb = len(self._cache) * self.EMBEDDING_SIZE_BYTES / (1024 * 1024)
+        cached = len(self._store)
+        current_mb = cached * self.EMBEDDING_SIZE_BYTES / (1024 * 1024)
         
         return {
-            'cached_embeddings': len(self._cache),
+            'cached_embeddings': cached,
             'max_embeddings': self.max_cache_entries,
             'current_size_mb': current_mb,
             'max_size_mb': self.max_cache_mb,
-            'utilization': len(self._cache) / self.max_cache_entries if self.max_cache_entries > 0 else 0,
+            'utilization': cached / self.max_cache_entries if self.max_cache_entries > 0 else 0,
             'loaded_areas': list(self._loaded_areas)
         }
     
     def clear(self):
         """Clear cache."""
-        self._cache.clear()
+        self._store.clear()
         self._loaded_areas.clear()
         self._access_order.clear()
         logger.debug("Embedding cache cleared")
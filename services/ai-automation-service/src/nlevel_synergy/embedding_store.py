@@ -0,0 +1,555 @@
+"""
+Embedding Store
+
+Epic AI-4, Story AI4.6: Performance Optimization
+Contiguous embedding matrix with batched top-k cosine search.
+
+Features:
+- One contiguous (rows x dim) matrix with an entity_id -> row index
+- float32, float16 or int8 (per-row scale) storage
+- Batched top-k search (matrix multiply + argpartition)
+- Memory-mapped persistence (np.save / np.load(mmap_mode='r'))
+- Optional HNSW index (hnswlib) for large homes
+"""
+
+from typing import Dict, List, Optional, Iterable, Sequence, Tuple, Union
+from pathlib import Path
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+
+class EmbeddingStore:
+    """
+    Contiguous embedding matrix for vectorized similarity search.
+
+    Scores are cosine similarities. Rows are stored L2-normalized when
+    normalize=True (the default), otherwise row norms are kept and applied
+    at query time so get() returns the original vectors.
+
+    Usage:
+        >>> store = EmbeddingStore(dim=384)
+        >>> store.add(["light.kitchen", "sensor.motion"], embeddings)
+        >>> store.top_k(query_embedding, k=5)
+        [('light.kitchen', 0.91), ('sensor.motion', 0.42)]
+        >>> store.save("data/embeddings")
+        >>> store = EmbeddingStore.load("data/embeddings")  # memory-mapped
+    """
+
+    DTYPES = ('float32', 'float16', 'int8')
+    SEARCH_BLOCK_ROWS = 16384  # Rows dequantized per step (bounds temporary memory)
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        dtype: str = 'float32',
+        normalize: bool = True,
+        initial_capacity: int = 256,
+        hnsw_min_size: Optional[int] = None,
+        hnsw_ef: int = 64
+    ):
+        """
+        Initialize embedding store.
+
+        Args:
+            dim: Embedding dimension (None = taken from the first added vectors)
+            dtype: Storage type: 'float32', 'float16' or 'int8' (quantized)
+            normalize: Store L2-normalized rows
+            initial_capacity: Rows allocated up front (grows by doubling)
+            hnsw_min_size: Use an HNSW index (if hnswlib is installed) from this
+                many rows on (None = always exact search)
+            hnsw_ef: HNSW query-time ef (recall/speed trade-off)
+        """
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}', expected one of {self.DTYPES}")
+
+        self.dim = dim
+        self.dtype = dtype
+        self.normalize = normalize
+        self.hnsw_min_size = hnsw_min_size
+        self.hnsw_ef = hnsw_ef
+
+        self._capacity = max(1, initial_capacity)
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None  # int8 only: per-row dequantization scale
+        self._norms: Optional[np.ndarray] = None
+        self._mmapped = False
+        self._hnsw = None
+        self._hnsw_dirty = True
+
+        if dim is not None:
+            self._allocate(self._capacity)
+
+    # ------------------------------------------------------------------
+    # Container
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        """Entity IDs in row order"""
+        return list(self._ids)
+
+    def add(self, ids: Sequence[str], vectors: Union[np.ndarray, Sequence]) -> None:
+        """
+        Add or replace embeddings.
+
+        Args:
+            ids: Entity IDs (one per vector)
+            vectors: (n x dim) array-like (or one vector if one ID)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} IDs for {len(vectors)} vectors")
+        if not len(ids):
+            return
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._allocate(self._capacity)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+        self._ensure_writable()
+
+        # Later duplicates win, like repeated single adds
+        rows = []
+        for entity_id in ids:
+            row = self._rows.get(entity_id)
+            if row is None:
+                if self._size == self._capacity:
+                    self._allocate(self._capacity * 2)
+                row = self._size
+                self._size += 1
+                self._rows[entity_id] = row
+                self._ids.append(entity_id)
+            rows.append(row)
+
+        self._write_rows(np.asarray(rows, dtype=np.int64), vectors)
+        self._hnsw_dirty = True
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """
+        Remove embeddings (the last row moves into the freed row).
+
+        Args:
+            ids: Entity IDs to remove
+
+        Returns:
+            Number of removed embeddings
+        """
+        removed = 0
+        for entity_id in ids:
+            row = self._rows.pop(entity_id, None)
+            if row is None:
+                continue
+            self._ensure_writable()
+            last = self._size - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._vectors[row] = self._vectors[last]
+                self._norms[row] = self._norms[last]
+                if self._scales is not None:
+                    self._scales[row] = self._scales[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            self._size -= 1
+            removed += 1
+        if removed:
+            self._hnsw_dirty = True
+        return removed
+
+    def clear(self) -> None:
+        """Remove all embeddings (keeps dim and dtype)"""
+        self._size = 0
+        self._ids.clear()
+        self._rows.clear()
+        self._mmapped = False
+        self._hnsw = None
+        self._hnsw_dirty = True
+        if self.dim is not None:
+            self._allocate(self._capacity, keep=False)
+
+    def get(self, entity_id: str) -> Optional[np.ndarray]:
+        """
+        Get one embedding as a float32 copy.
+
+        Args:
+            entity_id: Entity identifier
+
+        Returns:
+            Embedding vector, or None if not stored
+        """
+        row = self._rows.get(entity_id)
+        if row is None:
+            return None
+        return self._dequantize(np.asarray([row]))[0]
+
+    def get_many(self, ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Get several embeddings as one float32 matrix.
+
+        Args:
+            ids: Entity IDs (unknown IDs are skipped)
+
+        Returns:
+            Tuple of (found IDs, (len(found) x dim) matrix)
+        """
+        found = [entity_id for entity_id in ids if entity_id in self._rows]
+        rows = np.asarray([self._rows[entity_id] for entity_id in found], dtype=np.int64)
+        if not len(rows):
+            return [], np.empty((0, self.dim or 0), dtype=np.float32)
+        return found, self._dequantize(rows)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def similarity(
+        self,
+        queries: Union[np.ndarray, Sequence],
+        ids: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """
+        Cosine similarity of queries against stored embeddings.
+
+        Args:
+            queries: (m x dim) query vectors (or one vector)
+            ids: Restrict to these entity IDs (column order); None = all rows in row order
+
+        Returns:
+            (m x n) float32 similarity matrix
+        """
+        queries = self._prepare_queries(queries)
+        if ids is None:
+            rows = None
+        else:
+            missing = [entity_id for entity_id in ids if entity_id not in self._rows]
+            if missing:
+                raise KeyError(f"Embeddings not stored: {missing[:5]}")
+            rows = np.asarray([self._rows[entity_id] for entity_id in ids], dtype=np.int64)
+        return self._scores(queries, rows)
+
+    def search(
+        self,
+        queries: Union[np.ndarray, Sequence],
+        k: int = 10,
+        ids: Optional[Sequence[str]] = None,
+        min_score: Optional[float] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Batched top-k cosine search.
+
+        Exact search uses one matrix multiply and argpartition per query
+        batch; ties are broken by row order. Without an ID restriction, stores
+        of at least hnsw_min_size rows use the HNSW index when available.
+
+        Args:
+            queries: (m x dim) query vectors (or one vector)
+            k: Results per query
+            ids: Restrict the search to these entity IDs
+            min_score: Drop results below this similarity
+
+        Returns:
+            One list of (entity_id, similarity) per query, best first
+        """
+        queries = self._prepare_queries(queries)
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if ids is None and self._use_hnsw():
+            results = self._search_hnsw(queries, k)
+        else:
+            if ids is None:
+                candidate_ids, rows = self._ids, None
+            else:
+                candidate_ids = [entity_id for entity_id in dict.fromkeys(ids) if entity_id in self._rows]
+                rows = np.asarray([self._rows[entity_id] for entity_id in candidate_ids], dtype=np.int64)
+                if not len(rows):
+                    return [[] for _ in range(len(queries))]
+            scores = self._scores(queries, rows)
+            top = self._top_k_indices(scores, k)
+            results = [
+                [(candidate_ids[column], float(scores[query_index, column])) for column in columns]
+                for query_index, columns in enumerate(top)
+            ]
+
+        if min_score is not None:
+            results = [[(entity_id, score) for entity_id, score in result if score >= min_score] for result in results]
+        return results
+
+    def top_k(
+        self,
+        query: Union[np.ndarray, Sequence],
+        k: int = 10,
+        ids: Optional[Sequence[str]] = None,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k cosine search for a single query vector.
+
+        Args:
+            query: Query vector
+            k: Number of results
+            ids: Restrict the search to these entity IDs
+            min_score: Drop results below this similarity
+
+        Returns:
+            List of (entity_id, similarity), best first
+        """
+        return self.search(np.asarray(query, dtype=np.float32).reshape(1, -1), k=k, ids=ids, min_score=min_score)[0]
+
+    def similar_pairs(self, min_score: float, ids: Optional[Sequence[str]] = None) -> List[Tuple[str, str, float]]:
+        """
+        All pairs of stored embeddings with similarity >= min_score.
+
+        Replaces nested loops over device pairs with blocked matrix products.
+
+        Args:
+            min_score: Minimum cosine similarity
+            ids: Restrict to these entity IDs (default: all)
+
+        Returns:
+            List of (entity_id_a, entity_id_b, similarity) with a before b in row order
+        """
+        candidate_ids = self._ids if ids is None else [entity_id for entity_id in dict.fromkeys(ids) if entity_id in self._rows]
+        if len(candidate_ids) < 2:
+            return []
+        rows = np.asarray([self._rows[entity_id] for entity_id in candidate_ids], dtype=np.int64)
+
+        pairs = []
+        block = max(1, self.SEARCH_BLOCK_ROWS // 8)
+        for start in range(0, len(rows), block):
+            block_vectors = self._dequantize(rows[start:start + block]) / self._norms[rows[start:start + block], None]
+            scores = self._scores(block_vectors, rows)
+            block_index, column = np.nonzero(scores >= min_score)
+            keep = column > block_index + start  # upper triangle only
+            for i, j in zip(block_index[keep], column[keep]):
+                pairs.append((candidate_ids[start + i], candidate_ids[j], float(scores[i, j])))
+        return pairs
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the store to a directory (vectors.npy, norms.npy, scales.npy, ids.json).
+
+        Files are written next to the target and renamed into place.
+
+        Args:
+            path: Target directory
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            'vectors': self._vectors[:self._size] if self._vectors is not None else np.empty((0, 0), np.float32),
+            'norms': self._norms[:self._size] if self._norms is not None else np.empty(0, np.float32),
+        }
+        if self._scales is not None:
+            arrays['scales'] = self._scales[:self._size]
+        for name, array in arrays.items():
+            tmp = path / f"{name}.npy.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp, path / f"{name}.npy")
+
+        meta = {'dim': self.dim, 'dtype': self.dtype, 'normalize': self.normalize, 'ids': self._ids}
+        tmp = path / "ids.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, path / "ids.json")
+        logger.info(f"Saved {self._size} embeddings ({self.dtype}) to {path}")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True, **kwargs) -> 'EmbeddingStore':
+        """
+        Load a store saved with save().
+
+        With mmap=True the matrix is memory-mapped read-only; the first
+        modification copies it into memory.
+
+        Args:
+            path: Directory written by save()
+            mmap: Memory-map the matrix instead of reading it
+            **kwargs: Extra constructor options (e.g., hnsw_min_size)
+
+        Returns:
+            Loaded EmbeddingStore
+        """
+        path = Path(path)
+        meta = json.loads((path / "ids.json").read_text())
+        store = cls(dim=None, dtype=meta['dtype'], normalize=meta['normalize'], **kwargs)
+        mmap_mode = 'r' if mmap else None
+        ids = meta['ids']
+        store.dim = meta['dim']
+        store._ids = list(ids)
+        store._rows = {entity_id: row for row, entity_id in enumerate(ids)}
+        store._size = len(ids)
+        store._capacity = max(1, len(ids))
+        store._vectors = np.load(path / "vectors.npy", mmap_mode=mmap_mode)
+        store._norms = np.load(path / "norms.npy", mmap_mode=mmap_mode)
+        store._scales = np.load(path / "scales.npy", mmap_mode=mmap_mode) if meta['dtype'] == 'int8' else None
+        store._mmapped = mmap
+        if store.dim is None:
+            store._allocate(store._capacity)
+        logger.info(f"Loaded {store._size} embeddings ({store.dtype}, mmap={mmap}) from {path}")
+        return store
+
+    def get_store_statistics(self) -> Dict:
+        """
+        Get store statistics.
+
+        Returns:
+            Dict with size, dtype, memory use and index state
+        """
+        nbytes = 0
+        for array in (self._vectors, self._norms, self._scales):
+            if array is not None:
+                nbytes += array[:self._size].nbytes
+        return {
+            'embeddings': self._size,
+            'dim': self.dim,
+            'dtype': self.dtype,
+            'capacity': self._capacity,
+            'size_mb': nbytes / (1024 * 1024),
+            'mmapped': self._mmapped,
+            'hnsw_enabled': self._use_hnsw(),
+            'hnsw_built': self._hnsw is not None and not self._hnsw_dirty
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _allocate(self, capacity: int, keep: bool = True) -> None:
+        """(Re)allocate storage for capacity rows, keeping existing rows"""
+        storage_dtype = np.int8 if self.dtype == 'int8' else np.dtype(self.dtype)
+        vectors = np.zeros((capacity, self.dim), dtype=storage_dtype)
+        norms = np.ones(capacity, dtype=np.float32)
+        scales = np.ones(capacity, dtype=np.float32) if self.dtype == 'int8' else None
+        if keep and self._vectors is not None and self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+            norms[:self._size] = self._norms[:self._size]
+            if scales is not None:
+                scales[:self._size] = self._scales[:self._size]
+        self._vectors, self._norms, self._scales = vectors, norms, scales
+        self._capacity = capacity
+        self._mmapped = False
+
+    def _ensure_writable(self) -> None:
+        """Copy memory-mapped arrays into memory before the first modification"""
+        if self._mmapped:
+            self._allocate(max(self._capacity, self._size, 1))
+
+    def _write_rows(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Normalize/quantize vectors into rows"""
+        norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+        norms[norms == 0] = 1.0
+        if self.normalize:
+            vectors = vectors / norms[:, None]
+            norms = np.ones_like(norms)
+        self._norms[rows] = norms
+
+        if self.dtype == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._scales[rows] = scales
+            self._vectors[rows] = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        else:
+            self._vectors[rows] = vectors
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        """Stored rows as float32 (original scale)"""
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self._scales is not None:
+            vectors = vectors * self._scales[rows, None]
+        return vectors
+
+    def _prepare_queries(self, queries) -> np.ndarray:
+        """Queries as a normalized float32 (m x dim) matrix"""
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if self.dim is not None and queries.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim queries, got {queries.shape[1]}")
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return queries / norms
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Cosine scores (m x n) for normalized queries against rows (None = all)"""
+        count = self._size if rows is None else len(rows)
+        if self.dtype == 'float32':
+            vectors = self._vectors[:self._size] if rows is None else self._vectors[rows]
+            scores = queries @ np.asarray(vectors).T
+        else:
+            # Dequantize block-wise to bound temporary memory
+            scores = np.empty((len(queries), count), dtype=np.float32)
+            for start in range(0, count, self.SEARCH_BLOCK_ROWS):
+                block_rows = (np.arange(start, min(start + self.SEARCH_BLOCK_ROWS, count))
+                              if rows is None else rows[start:start + self.SEARCH_BLOCK_ROWS])
+                block = np.asarray(self._vectors[block_rows], dtype=np.float32)
+                scores[:, start:start + len(block_rows)] = queries @ block.T
+                if self._scales is not None:
+                    scores[:, start:start + len(block_rows)] *= self._scales[block_rows]
+        if not self.normalize:
+            norms = self._norms[:self._size] if rows is None else self._norms[rows]
+            scores = scores / norms
+        return scores
+
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, k: int) -> List[np.ndarray]:
+        """Column indices of the k best scores per row, best first (ties: lower column)"""
+        count = scores.shape[1]
+        if k < count:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(count), scores.shape)
+        results = []
+        for query_index, columns in enumerate(candidates):
+            order = np.lexsort((columns, -scores[query_index, columns]))
+            results.append(columns[order])
+        return results
+
+    def _use_hnsw(self) -> bool:
+        """Check whether searches go through the HNSW index"""
+        return HNSWLIB_AVAILABLE and self.hnsw_min_size is not None and self._size >= self.hnsw_min_size
+
+    def _search_hnsw(self, queries: np.ndarray, k: int) -> List[List[Tuple[str, float]]]:
+        """Approximate top-k search with hnswlib (index rebuilt after modifications)"""
+        if self._hnsw is None or self._hnsw_dirty:
+            index = hnswlib.Index(space='cosine', dim=self.dim)
+            index.init_index(max_elements=self._size, ef_construction=200, M=16)
+            index.add_items(self._dequantize(np.arange(self._size)), np.arange(self._size))
+            self._hnsw = index
+            self._hnsw_dirty = False
+            logger.info(f"Built HNSW index over {self._size} embeddings")
+
+        k = min(k, self._size)
+        self._hnsw.set_ef(max(self.hnsw_ef, k))
+        labels, distances = self._hnsw.knn_query(queries, k=k)
+        return [
+            [(self._ids[int(label)], float(1.0 - distance)) for label, distance in zip(row_labels, row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
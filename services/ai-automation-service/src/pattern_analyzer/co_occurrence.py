@@ -5,17 +5,27 @@ Detects devices that are frequently used together within a time window.
 Uses simple sliding window approach with association rule mining concepts.
 
 Story AI5.3: Converted to incremental processing with aggregate storage.
+
+Two engines are available:
+    - "python": original row-by-row sliding window (O(n²) in Python)
+    - "vectorized": NumPy two-pointer windows over int64 timestamps and
+      categorical device codes, with pair counts accumulated as packed int64 keys
 """
 
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 from datetime import datetime, timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+ENGINES = ("python", "vectorized")
+
+# Upper bound on (event, neighbour) pairs expanded at once by the vectorized engine
+MAX_PAIRS_PER_CHUNK = 2_000_000
+
 
 class CoOccurrencePatternDetector:
     """
@@ -33,7 +43,8 @@ class CoOccurrencePatternDetector:
         window_minutes: int = 5,
         min_support: int = 5,
         min_confidence: float = 0.7,
-        aggregate_client=None
+        aggregate_client=None,
+        engine: str = "python"
     ):
         """
         Initialize co-occurrence detector.
@@ -43,14 +54,20 @@ class CoOccurrencePatternDetector:
             min_support: Minimum number of co-occurrences (default: 5)
             min_confidence: Minimum confidence threshold 0.0-1.0 (default: 0.7)
             aggregate_client: PatternAggregateClient for storing daily aggregates (Story AI5.3)
+            engine: Counting engine, "python" (default) or "vectorized"
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown co-occurrence engine '{engine}', expected one of {ENGINES}")
+        
         self.window_minutes = window_minutes
         self.min_support = min_support
         self.min_confidence = min_confidence
         self.aggregate_client = aggregate_client
+        self.engine = engine
         logger.info(
             f"CoOccurrencePatternDetector initialized: "
-            f"window={window_minutes}min, min_support={min_support}, min_confidence={min_confidence}"
+            f"window={window_minutes}min, min_support={min_support}, min_confidence={min_confidence}, "
+            f"engine={engine}"
         )
     
     def detect_patterns(self, events: pd.DataFrame) -> List[Dict]:
@@ -92,6 +109,9 @@ class CoOccurrencePatternDetector:
         events = events.sort_values('timestamp').copy()
         events = events.reset_index(drop=True)
         
+        if self.engine == "vectorized":
+            return self._detect_patterns_vectorized(events)
+        
         # 2. Find co-occurrences using sliding window
         co_occurrences = defaultdict(int)
         device_event_counts = defaultdict(int)
@@ -126,6 +146,152 @@ class CoOccurrencePatternDetector:
         
         logger.info(f"Found {len(co_occurrences)} unique device pairs")
         
+        return self._build_patterns(
+            events,
+            co_occurrences,
+            device_event_counts,
+            lambda device1, device2: self._calculate_avg_time_delta(
+                events, device1, device2, self.window_minutes
+            )
+        )
+    
+    def _detect_patterns_vectorized(self, events: pd.DataFrame) -> List[Dict]:
+        """
+        Vectorized co-occurrence counting over time-sorted events.
+        
+        Produces the same pairs and counts as the Python engine: for every event,
+        each later event (strictly after, within window) from a different device
+        counts once towards the unordered device pair.
+        
+        Args:
+            events: Events sorted by timestamp with a reset index
+        
+        Returns:
+            List of co-occurrence pattern dictionaries
+        """
+        timestamps = events['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        codes, devices = pd.factorize(events['device_id'])
+        codes = codes.astype(np.int64)
+        n_devices = len(devices)
+        window_ns = np.int64(self.window_minutes * 60 * 1_000_000_000)
+        
+        # Two-pointer window bounds: neighbours of i are [lo[i], hi[i])
+        lo = np.searchsorted(timestamps, timestamps, side='right')
+        hi = np.searchsorted(timestamps, timestamps + window_ns, side='right')
+        counts = hi - lo
+        
+        pair_keys, pair_counts = self._count_pairs(codes, lo, counts, n_devices)
+        
+        device_counts = np.bincount(codes, minlength=n_devices)
+        device_event_counts = {devices[i]: int(device_counts[i]) for i in range(n_devices)}
+        
+        co_occurrences = {}
+        for key, count in zip(pair_keys.tolist(), pair_counts.tolist()):
+            code_a, code_b = divmod(key, n_devices)
+            pair = tuple(sorted([devices[code_a], devices[code_b]]))
+            co_occurrences[pair] = count
+        
+        logger.info(f"Found {len(co_occurrences)} unique device pairs (vectorized)")
+        
+        # Per-device sorted timestamps for time-delta calculation
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.concatenate(([0], np.cumsum(device_counts)))
+        code_of = {device: i for i, device in enumerate(devices)}
+        
+        def device_times(device: str) -> np.ndarray:
+            code = code_of[device]
+            return timestamps[order[boundaries[code]:boundaries[code + 1]]]
+        
+        def avg_time_delta(device1: str, device2: str) -> Optional[float]:
+            times1 = device_times(device1)
+            times2 = device_times(device2)
+            nearest = np.searchsorted(times2, times1, side='right')
+            valid = nearest < len(times2)
+            deltas = times2[nearest[valid]] - times1[valid]
+            deltas = deltas[deltas <= window_ns]
+            if len(deltas) == 0:
+                return None
+            return float(np.mean(deltas / 1e9))
+        
+        return self._build_patterns(events, co_occurrences, device_event_counts, avg_time_delta)
+    
+    def _count_pairs(
+        self,
+        codes: np.ndarray,
+        lo: np.ndarray,
+        counts: np.ndarray,
+        n_devices: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expand (event, neighbour) index pairs in bounded chunks and count them
+        by packed unordered device key (min_code * n_devices + max_code).
+        
+        Returns:
+            Tuple of (unique packed keys, counts)
+        """
+        cumulative = np.cumsum(counts)
+        total_pairs = int(cumulative[-1]) if len(cumulative) else 0
+        if total_pairs == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        # Split event rows so each chunk expands at most MAX_PAIRS_PER_CHUNK pairs
+        split_targets = np.arange(MAX_PAIRS_PER_CHUNK, total_pairs, MAX_PAIRS_PER_CHUNK)
+        splits = np.unique(np.searchsorted(cumulative, split_targets, side='left'))
+        bounds = [0] + [int(x) for x in splits if 0 < x < len(counts)] + [len(counts)]
+        
+        chunk_keys = []
+        chunk_counts = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            chunk_sizes = counts[start:end]
+            chunk_total = int(chunk_sizes.sum())
+            if chunk_total == 0:
+                continue
+            
+            rows = np.repeat(np.arange(start, end), chunk_sizes)
+            offsets = np.arange(chunk_total) - np.repeat(np.cumsum(chunk_sizes) - chunk_sizes, chunk_sizes)
+            neighbours = lo[rows] + offsets
+            
+            code_a = codes[rows]
+            code_b = codes[neighbours]
+            different = code_a != code_b
+            code_a = code_a[different]
+            code_b = code_b[different]
+            
+            keys = np.minimum(code_a, code_b) * n_devices + np.maximum(code_a, code_b)
+            unique_keys, unique_counts = np.unique(keys, return_counts=True)
+            chunk_keys.append(unique_keys)
+            chunk_counts.append(unique_counts)
+        
+        if not chunk_keys:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        # Merge per-chunk counts
+        all_keys = np.concatenate(chunk_keys)
+        all_counts = np.concatenate(chunk_counts)
+        merged_keys, inverse = np.unique(all_keys, return_inverse=True)
+        merged_counts = np.bincount(inverse, weights=all_counts).astype(np.int64)
+        
+        return merged_keys, merged_counts
+    
+    def _build_patterns(
+        self,
+        events: pd.DataFrame,
+        co_occurrences: Dict[Tuple[str, str], int],
+        device_event_counts: Dict[str, int],
+        avg_time_delta_fn: Callable[[str, str], Optional[float]]
+    ) -> List[Dict]:
+        """
+        Filter pair counts by support/confidence and build pattern dictionaries.
+        
+        Args:
+            events: Time-sorted events
+            co_occurrences: Unordered device pair -> co-occurrence count
+            device_event_counts: Device -> event count
+            avg_time_delta_fn: Computes average seconds between device1 and device2 events
+        
+        Returns:
+            List of co-occurrence pattern dictionaries
+        """
         # 3. Filter for significant patterns
         patterns = []
         total_events = len(events)
@@ -147,9 +313,7 @@ class CoOccurrencePatternDetector:
             # Filter by thresholds
             if count >= self.min_support and confidence >= self.min_confidence:
                 # Calculate additional statistics
-                avg_time_delta = self._calculate_avg_time_delta(
-                    events, device1, device2, self.window_minutes
-                )
+                avg_time_delta = avg_time_delta_fn(device1, device2)
                 
                 pattern = {
                     'pattern_type': 'co_occurrence',
@@ -249,7 +413,10 @@ class CoOccurrencePatternDetector:
     
     def detect_patterns_optimized(self, events: pd.DataFrame) -> List[Dict]:
         """
-        Optimized version for large event counts using intelligent sampling.
+        Optimized version for large event counts.
+        
+        The vectorized engine handles the full dataset directly; the Python
+        engine falls back to intelligent sampling above 50k events.
         
         Args:
             events: DataFrame with columns [device_id, timestamp, state]
@@ -257,6 +424,9 @@ class CoOccurrencePatternDetector:
         Returns:
             List of co-occurrence patterns
         """
+        if self.engine == "vectorized":
+            return self.detect_patterns(events)
+        
         # If too many events, sample intelligently
         if len(events) > 50000:
             logger.info(f"Large dataset detected ({len(events)} events), applying sampling")
@@ -24,6 +24,10 @@ from .day_type_detector import DayTypeDetector
 from .seasonal_detector import SeasonalDetector
 from .anomaly_detector import AnomalyDetector
 
+# Shared preprocessing and parallel execution
+from .analysis_frame import AnalysisFrame
+from .parallel_runner import ParallelDetectorRunner
+
 __all__ = [
     # Base classes
     'MLPatternDetector',
@@ -42,5 +46,9 @@ __all__ = [
     'DurationDetector',
     'DayTypeDetector',
     'SeasonalDetector',
-    'AnomalyDetector'
+    'AnomalyDetector',
+    
+    # Shared preprocessing and parallel execution
+    'AnalysisFrame',
+    'ParallelDetectorRunner'
 ]
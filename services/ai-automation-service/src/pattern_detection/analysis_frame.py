@@ -0,0 +1,191 @@
+"""
+Shared Analysis Frame
+
+Preprocesses the daily events DataFrame once so every pattern detector can
+reuse the same sorted order, categorical codes, time features and per-entity
+group index instead of recomputing them (and copying the frame) per detector.
+
+Detectors must treat the prepared frame as read-only: they add their own
+columns to a shallow copy and never modify the shared columns in place.
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Marker stored in DataFrame.attrs once a frame has been prepared
+PREPARED_ATTR = 'analysis_frame'
+
+# Candidate source columns for the canonical 'time' column, in priority order
+TIME_SOURCE_COLUMNS = ('time', '_time', 'timestamp', 'last_changed')
+
+CATEGORICAL_COLUMNS = ('entity_id', 'state', 'area')
+
+SEASONS = {
+    12: 'winter', 1: 'winter', 2: 'winter',
+    3: 'spring', 4: 'spring', 5: 'spring',
+    6: 'summer', 7: 'summer', 8: 'summer',
+    9: 'fall', 10: 'fall', 11: 'fall'
+}
+
+# Time features shared by the detectors, computed from the 'time' column
+TIME_FEATURES: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'hour': lambda t: t.dt.hour,
+    'dayofweek': lambda t: t.dt.dayofweek,
+    'dayofyear': lambda t: t.dt.dayofyear,
+    'month': lambda t: t.dt.month,
+    'quarter': lambda t: t.dt.quarter,
+    'date': lambda t: t.dt.date,
+    'is_weekend': lambda t: t.dt.dayofweek.isin([5, 6]).astype(int),
+    'season': lambda t: t.dt.month.map(SEASONS),
+}
+
+
+def is_prepared(events_df: pd.DataFrame) -> bool:
+    """Check whether a DataFrame was prepared by AnalysisFrame."""
+    return bool(events_df.attrs.get(PREPARED_ATTR, False))
+
+
+def ensure_time_features(df: pd.DataFrame, *columns: str) -> pd.DataFrame:
+    """
+    Add the requested time features to df unless they are already present.
+
+    Args:
+        df: DataFrame with a datetime 'time' column (modified in place)
+        *columns: Names from TIME_FEATURES
+
+    Returns:
+        The same DataFrame
+    """
+    for col in columns:
+        if col not in df.columns:
+            df[col] = TIME_FEATURES[col](df['time'])
+    return df
+
+
+class AnalysisFrame:
+    """
+    Events DataFrame preprocessed once for all pattern detectors.
+
+    Attributes:
+        df: Events sorted by time with categorical entity/state columns,
+            entity_code/state_code columns and the TIME_FEATURES columns
+        entity_categories: Entity IDs indexed by entity_code
+        entity_order: Row positions grouped by entity (time-ordered within each group)
+        entity_offsets: entity_order[entity_offsets[c]:entity_offsets[c + 1]] are the rows of entity c
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        entity_order: np.ndarray,
+        entity_offsets: np.ndarray
+    ):
+        self.df = df
+        self.entity_order = entity_order
+        self.entity_offsets = entity_offsets
+
+    @classmethod
+    def from_events(cls, events_df: pd.DataFrame) -> 'AnalysisFrame':
+        """
+        Build an analysis frame from raw events.
+
+        Args:
+            events_df: Events DataFrame with entity_id, state and a time column
+                ('time', '_time', 'timestamp' or 'last_changed')
+
+        Returns:
+            Prepared AnalysisFrame
+        """
+        start = pd.Timestamp.utcnow()
+        df = events_df.copy()
+
+        if 'time' not in df.columns:
+            source = next((col for col in TIME_SOURCE_COLUMNS if col in df.columns), None)
+            if source is not None:
+                df['time'] = df[source]
+
+        if 'time' in df.columns:
+            df['time'] = pd.to_datetime(df['time'])
+            df = df.sort_values('time', kind='stable').reset_index(drop=True)
+            ensure_time_features(df, *TIME_FEATURES)
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        if 'entity_id' in df.columns:
+            df['entity_code'] = df['entity_id'].cat.codes.astype(np.int32)
+        if 'state' in df.columns:
+            df['state_code'] = df['state'].cat.codes.astype(np.int32)
+
+        entity_order, entity_offsets = cls._build_group_index(df)
+        df.attrs[PREPARED_ATTR] = True
+
+        elapsed = (pd.Timestamp.utcnow() - start).total_seconds()
+        logger.info(f"Analysis frame prepared: {len(df)} events, "
+                    f"{max(len(entity_offsets) - 1, 0)} entities in {elapsed:.2f}s")
+
+        return cls(df, entity_order, entity_offsets)
+
+    @staticmethod
+    def _build_group_index(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Build a read-only CSR-style row index grouped by entity_code."""
+        if 'entity_code' not in df.columns or df.empty:
+            order = np.empty(0, dtype=np.int64)
+            offsets = np.zeros(1, dtype=np.int64)
+        else:
+            codes = df['entity_code'].to_numpy()
+            # Stable sort keeps rows time-ordered inside each entity group
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(df['entity_id'].cat.categories))
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            # Rows with a missing entity_id (code -1) sort first; skip them
+            order = order[np.count_nonzero(codes < 0):]
+
+        order.setflags(write=False)
+        offsets.setflags(write=False)
+        return order, offsets
+
+    @property
+    def entity_categories(self) -> pd.Index:
+        """Entity IDs indexed by entity_code."""
+        if 'entity_id' not in self.df.columns:
+            return pd.Index([])
+        return self.df['entity_id'].cat.categories
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def entity_rows(self, entity_id: str) -> Optional[np.ndarray]:
+        """
+        Get the row positions of one entity.
+
+        Args:
+            entity_id: Entity ID
+
+        Returns:
+            Time-ordered row positions, or None if the entity is unknown
+        """
+        categories = self.entity_categories
+        if entity_id not in categories:
+            return None
+        code = categories.get_loc(entity_id)
+        return self.entity_order[self.entity_offsets[code]:self.entity_offsets[code + 1]]
+
+    def groupby_entity(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Iterate over per-entity slices without a pandas groupby.
+
+        Yields:
+            (entity_id, time-ordered events of that entity)
+        """
+        for code, entity_id in enumerate(self.entity_categories):
+            start, end = self.entity_offsets[code], self.entity_offsets[code + 1]
+            if start == end:
+                continue
+            yield entity_id, self.df.iloc[self.entity_order[start:end]]
@@ -18,6 +18,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import DBSCAN
 
 from .ml_pattern_detector import MLPatternDetector
+from .analysis_frame import ensure_time_features
 
 logger = logging.getLogger(__name__)
 
@@ -192,12 +193,10 @@ class AnomalyDetector(MLPatternDetector):
         Returns:
             DataFrame with anomaly features
         """
-        df = events_df.copy()
+        df = events_df.copy(deep=False)
         
-        # Time-based features
-        df['hour'] = df['time'].dt.hour
-        df['dayofweek'] = df['time'].dt.dayofweek
-        df['dayofyear'] = df['time'].dt.dayofyear
+        # Time-based features (reused when precomputed by the analysis frame)
+        ensure_time_features(df, 'hour', 'dayofweek', 'dayofyear')
         df['is_weekend'] = df['dayofweek'].isin([5, 6])
         df['is_night'] = (df['hour'] >= 22) | (df['hour'] <= 6)
         df['is_work_hours'] = (df['hour'] >= 9) & (df['hour'] <= 17)
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 
 from .ml_pattern_detector import MLPatternDetector
+from .analysis_frame import ensure_time_features
 
 logger = logging.getLogger(__name__)
 
@@ -132,7 +133,7 @@ class ContextualDetector(MLPatternDetector):
         Returns:
             DataFrame with contextual features
         """
-        features_df = events_df.copy()
+        features_df = events_df.copy(deep=False)
         
         # Time-based features
         features_df = self._add_time_features(features_df)
@@ -150,11 +151,7 @@ class ContextualDetector(MLPatternDetector):
     
     def _add_time_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add time-based contextual features."""
-        df['hour'] = df['time'].dt.hour
-        df['dayofweek'] = df['time'].dt.dayofweek
-        df['dayofyear'] = df['time'].dt.dayofyear
-        df['month'] = df['time'].dt.month
-        df['is_weekend'] = df['dayofweek'].isin([5, 6]).astype(int)
+        ensure_time_features(df, 'hour', 'dayofweek', 'dayofyear', 'month', 'is_weekend')
         df['is_workday'] = (df['dayofweek'] < 5).astype(int)
         
         # Time of day categories
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 
 from .ml_pattern_detector import MLPatternDetector
+from .analysis_frame import ensure_time_features
 
 logger = logging.getLogger(__name__)
 
@@ -184,11 +185,10 @@ class DayTypeDetector(MLPatternDetector):
         Returns:
             DataFrame with day type features
         """
-        df = events_df.copy()
+        df = events_df.copy(deep=False)
         
-        # Basic day type features
-        df['dayofweek'] = df['time'].dt.dayofweek
-        df['is_weekend'] = df['dayofweek'].isin([5, 6]).astype(int)
+        # Basic day type features (reused when precomputed by the analysis frame)
+        ensure_time_features(df, 'dayofweek', 'is_weekend')
         df['is_weekday'] = (df['dayofweek'] < 5).astype(int)
         
         # Work hours
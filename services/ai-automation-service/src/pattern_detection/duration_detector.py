@@ -5,6 +5,10 @@ Detects duration-based patterns using statistical analysis and ML clustering.
 Identifies patterns in device usage duration, auto-off timers, and efficiency patterns.
 
 Story AI5.3: Converted to incremental processing with aggregate storage.
+
+Events are split by entity in one pass over the sorted frame and each
+entity's on/off pairs are computed once with searchsorted; all duration
+analyses of a run reuse them.
 """
 
 import logging
@@ -61,6 +65,10 @@ class DurationDetector(MLPatternDetector):
         self.auto_off_tolerance_minutes = auto_off_tolerance_minutes
         self.aggregate_client = aggregate_client
         
+        # Per-run caches (see _device_groups / _on_off_pairs)
+        self._groups_cache: Optional[Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]] = None
+        self._pairs_cache: Dict[int, Tuple[pd.DataFrame, Tuple[pd.DatetimeIndex, np.ndarray]]] = {}
+        
         logger.info(f"DurationDetector initialized: min_duration={min_duration_seconds}s, max_duration={max_duration_hours}h")
     
     def detect_patterns(self, events_df: pd.DataFrame) -> List[Dict]:
@@ -84,25 +92,32 @@ class DurationDetector(MLPatternDetector):
         # Detect different types of duration patterns
         patterns = []
         
-        # 1. Device usage duration patterns
-        usage_duration_patterns = self._detect_usage_duration_patterns(events_df)
-        patterns.extend(usage_duration_patterns)
-        
-        # 2. Auto-off timer patterns
-        auto_off_patterns = self._detect_auto_off_patterns(events_df)
-        patterns.extend(auto_off_patterns)
-        
-        # 3. Efficiency patterns
-        efficiency_patterns = self._detect_efficiency_patterns(events_df)
-        patterns.extend(efficiency_patterns)
-        
-        # 4. Duration clustering patterns
-        duration_cluster_patterns = self._detect_duration_clusters(events_df)
-        patterns.extend(duration_cluster_patterns)
-        
-        # 5. Statistical duration patterns
-        statistical_patterns = self._detect_statistical_duration_patterns(events_df)
-        patterns.extend(statistical_patterns)
+        try:
+            # Split by entity once; every analysis below reuses the groups and their on/off pairs
+            self._device_groups(events_df)
+            
+            # 1. Device usage duration patterns
+            usage_duration_patterns = self._detect_usage_duration_patterns(events_df)
+            patterns.extend(usage_duration_patterns)
+            
+            # 2. Auto-off timer patterns
+            auto_off_patterns = self._detect_auto_off_patterns(events_df)
+            patterns.extend(auto_off_patterns)
+            
+            # 3. Efficiency patterns
+            efficiency_patterns = self._detect_efficiency_patterns(events_df)
+            patterns.extend(efficiency_patterns)
+            
+            # 4. Duration clustering patterns
+            duration_cluster_patterns = self._detect_duration_clusters(events_df)
+            patterns.extend(duration_cluster_patterns)
+            
+            # 5. Statistical duration patterns
+            statistical_patterns = self._detect_statistical_duration_patterns(events_df)
+            patterns.extend(statistical_patterns)
+        finally:
+            self._groups_cache = None
+            self._pairs_cache = {}
         
         # Cluster similar duration patterns using ML
         if self.enable_ml and len(patterns) > 2:
@@ -183,7 +198,7 @@ class DurationDetector(MLPatternDetector):
         patterns = []
         
         # Group by device and analyze usage durations
-        for entity_id, device_events in events_df.groupby('entity_id'):
+        for entity_id, device_events in self._device_groups(events_df).items():
             if len(device_events) < self.min_occurrences:
                 continue
             
@@ -248,7 +263,7 @@ class DurationDetector(MLPatternDetector):
         patterns = []
         
         # Group by device and find auto-off patterns
-        for entity_id, device_events in events_df.groupby('entity_id'):
+        for entity_id, device_events in self._device_groups(events_df).items():
             if len(device_events) < self.min_occurrences:
                 continue
             
@@ -300,7 +315,7 @@ class DurationDetector(MLPatternDetector):
         patterns = []
         
         # Group by device and analyze efficiency
-        for entity_id, device_events in events_df.groupby('entity_id'):
+        for entity_id, device_events in self._device_groups(events_df).items():
             if len(device_events) < self.min_occurrences:
                 continue
             
@@ -411,7 +426,7 @@ class DurationDetector(MLPatternDetector):
         patterns = []
         
         # Group by device and analyze statistical patterns
-        for entity_id, device_events in events_df.groupby('entity_id'):
+        for entity_id, device_events in self._device_groups(events_df).items():
             if len(device_events) < self.min_occurrences:
                 continue
             
@@ -463,23 +478,70 @@ class DurationDetector(MLPatternDetector):
         Returns:
             List of usage durations in seconds
         """
-        durations = []
-        events_sorted = device_events.sort_values('time')
-        
-        # Find on/off pairs
-        on_events = events_sorted[events_sorted['state'] == 'on']
-        off_events = events_sorted[events_sorted['state'] == 'off']
+        _, durations = self._on_off_pairs(device_events)
+        return durations.tolist()
+    
+    def _device_groups(self, events_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Split events by entity in one pass (cached for the current run).
         
-        for _, on_event in on_events.iterrows():
-            # Find next off event
-            next_off = off_events[off_events['time'] > on_event['time']]
+        Args:
+            events_df: Time-sorted events DataFrame
             
-            if not next_off.empty:
-                next_off_event = next_off.iloc[0]
-                duration = (next_off_event['time'] - on_event['time']).total_seconds()
-                durations.append(duration)
+        Returns:
+            Time-ordered events per entity ID, in entity ID order
+        """
+        if self._groups_cache is not None and self._groups_cache[0] is events_df:
+            return self._groups_cache[1]
+        
+        groups = {}
+        if not events_df.empty:
+            codes, entity_ids = pd.factorize(events_df['entity_id'], sort=True)
+            # Stable sort keeps each entity's events in time order
+            order = np.argsort(codes, kind='stable')
+            order = order[np.count_nonzero(codes < 0):]  # drop missing entity IDs
+            offsets = np.zeros(len(entity_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes[codes >= 0], minlength=len(entity_ids)), out=offsets[1:])
+            
+            for code, entity_id in enumerate(entity_ids):
+                groups[entity_id] = events_df.iloc[order[offsets[code]:offsets[code + 1]]]
+        
+        self._groups_cache = (events_df, groups)
+        return groups
+    
+    def _on_off_pairs(self, device_events: pd.DataFrame) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Pair every 'on' event with the first later 'off' event of the device.
+        
+        Pairs are found with one searchsorted over the sorted off times and
+        cached per device frame for the current run.
         
-        return durations
+        Args:
+            device_events: Device events DataFrame
+            
+        Returns:
+            Tuple of (on times of the paired events, durations in seconds)
+        """
+        cached = self._pairs_cache.get(id(device_events))
+        if cached is not None and cached[0] is device_events:
+            return cached[1]
+        
+        times = pd.DatetimeIndex(device_events['time']).as_unit('ns')
+        states = device_events['state'].to_numpy()
+        order = np.argsort(times.asi8, kind='stable')
+        
+        on_rows = order[states[order] == 'on']
+        off_ns = times.asi8[order[states[order] == 'off']]
+        on_ns = times.asi8[on_rows]
+        
+        # First off strictly after each on
+        next_off = np.searchsorted(off_ns, on_ns, side='right')
+        paired = next_off < len(off_ns)
+        durations = (off_ns[next_off[paired]] - on_ns[paired]) / 1e9
+        
+        pairs = (times[on_rows[paired]], durations)
+        self._pairs_cache[id(device_events)] = (device_events, pairs)
+        return pairs
     
     def _analyze_duration_patterns(self, durations: List[float]) -> Dict[str, Any]:
         """
@@ -623,27 +685,18 @@ class DurationDetector(MLPatternDetector):
             List of auto-off events
         """
         auto_off_events = []
-        events_sorted = device_events.sort_values('time')
         
         # Find on/off pairs with consistent duration
-        on_events = events_sorted[events_sorted['state'] == 'on']
-        off_events = events_sorted[events_sorted['state'] == 'off']
+        on_times, durations = self._on_off_pairs(device_events)
         
-        for _, on_event in on_events.iterrows():
-            # Find next off event
-            next_off = off_events[off_events['time'] > on_event['time']]
-            
-            if not next_off.empty:
-                next_off_event = next_off.iloc[0]
-                duration = (next_off_event['time'] - on_event['time']).total_seconds()
-                
-                # Check if duration is consistent with auto-off timer
-                if self._is_auto_off_duration(duration):
-                    auto_off_events.append({
-                        'time': on_event['time'],
-                        'duration_seconds': duration,
-                        'duration_minutes': duration / 60
-                    })
+        for on_time, duration in zip(on_times, durations.tolist()):
+            # Check if duration is consistent with auto-off timer
+            if self._is_auto_off_duration(duration):
+                auto_off_events.append({
+                    'time': on_time,
+                    'duration_seconds': duration,
+                    'duration_minutes': duration / 60
+                })
         
         return auto_off_events
     
@@ -895,7 +948,7 @@ class DurationDetector(MLPatternDetector):
         features = []
         
         # Group by device and extract features
-        for entity_id, device_events in events_df.groupby('entity_id'):
+        for entity_id, device_events in self._device_groups(events_df).items():
             durations = self._calculate_usage_durations(device_events)
             valid_durations = [
                 d for d in durations 
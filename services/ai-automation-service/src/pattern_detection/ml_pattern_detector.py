@@ -13,6 +13,8 @@ from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 import uuid
 
+from .analysis_frame import ensure_time_features, is_prepared
+
 # Scikit-learn imports
 from sklearn.cluster import DBSCAN, KMeans, SpectralClustering, MiniBatchKMeans
 from sklearn.neighbors import LocalOutlierFactor
@@ -265,14 +267,11 @@ class MLPatternDetector(ABC):
         Returns:
             DataFrame with time features
         """
-        features_df = events_df.copy()
+        # Shallow copy: new columns stay local, shared columns are never modified in place
+        features_df = events_df.copy(deep=False)
         
-        # Extract time components
-        features_df['hour'] = features_df['time'].dt.hour
-        features_df['dayofweek'] = features_df['time'].dt.dayofweek
-        features_df['dayofyear'] = features_df['time'].dt.dayofyear
-        features_df['month'] = features_df['time'].dt.month
-        features_df['is_weekend'] = features_df['dayofweek'].isin([5, 6]).astype(int)
+        # Extract time components (reused when precomputed by the analysis frame)
+        ensure_time_features(features_df, 'hour', 'dayofweek', 'dayofyear', 'month', 'is_weekend')
         
         # Time since last event
         features_df['time_since_last'] = features_df['time'].diff().dt.total_seconds()
@@ -339,6 +338,11 @@ class MLPatternDetector(ABC):
         Returns:
             Optimized DataFrame
         """
+        # Frames prepared by AnalysisFrame are already typed and sorted; they are
+        # shared with other detectors, so work on a shallow copy instead of mutating
+        if is_prepared(events_df):
+            return events_df.copy(deep=False)
+        
         # Convert categorical columns to category dtype for memory efficiency
         categorical_columns = ['entity_id', 'state', 'area']
         for col in categorical_columns:
@@ -377,6 +381,26 @@ class MLPatternDetector(ABC):
         
         return True
     
+    def store_aggregates(self, patterns: List[Dict], events_df: pd.DataFrame) -> None:
+        """
+        Store aggregates for patterns detected without an aggregate client.
+        
+        Used when detection runs in a worker process and aggregate storage
+        has to happen in the parent, which owns the aggregate client.
+        
+        Args:
+            patterns: List of detected patterns
+            events_df: Events DataFrame the patterns were detected in
+        """
+        if not getattr(self, 'aggregate_client', None) or not patterns:
+            return
+        
+        for method_name in ('_store_daily_aggregates', '_store_weekly_aggregates', '_store_monthly_aggregates'):
+            store = getattr(self, method_name, None)
+            if store is not None:
+                store(patterns, events_df)
+                return
+    
     def get_detection_stats(self) -> Dict[str, Any]:
         """Get pattern detection statistics."""
         return self.detection_stats.copy()
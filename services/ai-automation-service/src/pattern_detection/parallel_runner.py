@@ -0,0 +1,172 @@
+"""
+Parallel Detector Runner
+
+Runs independent ML pattern detectors over one shared AnalysisFrame in a
+process pool. The prepared frame is handed to each worker once (pool
+initializer) instead of once per detector, and detectors run with
+aggregate_client=None in the workers; aggregate storage happens afterwards
+in the parent process, which owns the InfluxDB client.
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .analysis_frame import AnalysisFrame
+from .ml_pattern_detector import MLPatternDetector
+from .sequence_detector import SequenceDetector
+from .contextual_detector import ContextualDetector
+from .room_based_detector import RoomBasedDetector
+from .session_detector import SessionDetector
+from .duration_detector import DurationDetector
+from .day_type_detector import DayTypeDetector
+from .seasonal_detector import SeasonalDetector
+from .anomaly_detector import AnomalyDetector
+
+logger = logging.getLogger(__name__)
+
+DETECTOR_CLASSES = {
+    'sequence': SequenceDetector,
+    'contextual': ContextualDetector,
+    'room_based': RoomBasedDetector,
+    'session': SessionDetector,
+    'duration': DurationDetector,
+    'day_type': DayTypeDetector,
+    'seasonal': SeasonalDetector,
+    'anomaly': AnomalyDetector,
+}
+
+# Prepared events DataFrame of the current worker process (set by _init_worker)
+_worker_events_df: Optional[pd.DataFrame] = None
+
+
+def _init_worker(events_df: pd.DataFrame) -> None:
+    """Process pool initializer: receive the shared frame once per worker."""
+    global _worker_events_df
+    _worker_events_df = events_df
+
+
+def _detect(name: str, kwargs: Dict[str, Any], events_df: pd.DataFrame) -> Tuple[List[Dict], float]:
+    """Build a detector without aggregate client and run it on events_df."""
+    detector = DETECTOR_CLASSES[name](**kwargs)
+    start = time.perf_counter()
+    patterns = detector.detect_patterns(events_df)
+    return patterns, time.perf_counter() - start
+
+
+def _run_in_worker(name: str, kwargs: Dict[str, Any]) -> Tuple[List[Dict], float]:
+    """Process pool task: run one detector on the worker's shared frame."""
+    return _detect(name, kwargs, _worker_events_df)
+
+
+class ParallelDetectorRunner:
+    """
+    Run independent ML pattern detectors over a shared analysis frame.
+
+    Detector specs are (name, kwargs) pairs where name is a key of
+    DETECTOR_CLASSES and kwargs are the detector constructor arguments
+    (without aggregate_client).
+    """
+
+    def __init__(self, max_workers: int = 0, aggregate_client=None):
+        """
+        Initialize parallel detector runner.
+
+        Args:
+            max_workers: Process pool size (0 or 1 runs detectors sequentially)
+            aggregate_client: PatternAggregateClient for aggregate storage (optional)
+        """
+        self.max_workers = max_workers
+        self.aggregate_client = aggregate_client
+        self.timings: Dict[str, float] = {}
+
+    def run(
+        self,
+        frame: AnalysisFrame,
+        detector_specs: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, List[Dict]]:
+        """
+        Run detectors and store their aggregates.
+
+        Args:
+            frame: Prepared analysis frame (read-only for all detectors)
+            detector_specs: (name, constructor kwargs) per detector
+
+        Returns:
+            Patterns per detector name, in spec order
+        """
+        for name, _ in detector_specs:
+            if name not in DETECTOR_CLASSES:
+                raise ValueError(f"Unknown detector '{name}'. Expected one of {list(DETECTOR_CLASSES)}")
+
+        results: Optional[Dict[str, Tuple[List[Dict], float]]] = None
+        if self.max_workers > 1 and len(detector_specs) > 1:
+            try:
+                results = self._run_parallel(frame, detector_specs)
+            except Exception as e:
+                logger.warning(f"Parallel detector run failed, falling back to sequential: {e}")
+
+        if results is None:
+            results = self._run_sequential(frame, detector_specs)
+
+        patterns_by_detector: Dict[str, List[Dict]] = {}
+        for name, kwargs in detector_specs:
+            patterns, elapsed = results[name]
+            patterns_by_detector[name] = patterns
+            self.timings[name] = elapsed
+
+            if self.aggregate_client and patterns:
+                detector: MLPatternDetector = DETECTOR_CLASSES[name](
+                    **kwargs, aggregate_client=self.aggregate_client
+                )
+                detector.store_aggregates(patterns, frame.df)
+
+        return patterns_by_detector
+
+    def _run_sequential(
+        self,
+        frame: AnalysisFrame,
+        detector_specs: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, Tuple[List[Dict], float]]:
+        """Run detectors one after another in this process."""
+        results = {}
+        for name, kwargs in detector_specs:
+            try:
+                results[name] = _detect(name, kwargs, frame.df)
+            except Exception as e:
+                logger.error(f"Detector '{name}' failed: {e}", exc_info=True)
+                results[name] = ([], 0.0)
+        return results
+
+    def _run_parallel(
+        self,
+        frame: AnalysisFrame,
+        detector_specs: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, Tuple[List[Dict], float]]:
+        """Run detectors in a process pool sharing the frame via the initializer."""
+        workers = min(self.max_workers, len(detector_specs))
+        logger.info(f"Running {len(detector_specs)} detectors in {workers} worker processes")
+
+        results = {}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(frame.df,)
+        ) as pool:
+            futures = {
+                name: pool.submit(_run_in_worker, name, kwargs)
+                for name, kwargs in detector_specs
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.error(f"Detector '{name}' failed in worker: {e}")
+                    results[name] = ([], 0.0)
+        return results
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 
 from .ml_pattern_detector import MLPatternDetector
+from .analysis_frame import ensure_time_features
 
 logger = logging.getLogger(__name__)
 
@@ -121,20 +122,11 @@ class SeasonalDetector(MLPatternDetector):
         Returns:
             DataFrame with seasonal features
         """
-        df = events_df.copy()
+        df = events_df.copy(deep=False)
         
-        # Basic seasonal features
-        df['month'] = df['time'].dt.month
-        df['dayofyear'] = df['time'].dt.dayofyear
-        df['quarter'] = df['time'].dt.quarter
-        
-        # Season classification
-        df['season'] = df['month'].map({
-            12: 'winter', 1: 'winter', 2: 'winter',
-            3: 'spring', 4: 'spring', 5: 'spring',
-            6: 'summer', 7: 'summer', 8: 'summer',
-            9: 'fall', 10: 'fall', 11: 'fall'
-        })
+        # Basic seasonal features and season classification
+        # (reused when precomputed by the analysis frame)
+        ensure_time_features(df, 'month', 'dayofyear', 'quarter', 'season')
         
         # Daylight approximation
         df['daylight_hours'] = df['time'].dt.hour.map(self._calculate_daylight_hours)
@@ -5,6 +5,13 @@ Detects multi-step behavior patterns using ML clustering and pandas optimization
 Example: "Coffee maker → Kitchen light → Music" sequences.
 
 Story AI5.3: Converted to incremental processing with aggregate storage.
+
+Two engines are available:
+    - "python": original per-row windows (a masked DataFrame and iterrows per
+      event, duplicates from overlapping windows removed afterwards)
+    - "streaming": one pass over the time-sorted event arrays with a bounded
+      deque of open sequence starts; each start emits its sequence once and
+      sequences are counted as tuples of interned (entity, state) codes
 """
 
 import logging
@@ -12,12 +19,14 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict, Counter
+from collections import defaultdict, deque, Counter
 
 from .ml_pattern_detector import MLPatternDetector
 
 logger = logging.getLogger(__name__)
 
+ENGINES = ("python", "streaming")
+
 
 class SequenceDetector(MLPatternDetector):
     """
@@ -38,6 +47,7 @@ class SequenceDetector(MLPatternDetector):
         min_sequence_occurrences: int = 3,
         sequence_gap_seconds: int = 300,  # 5 minutes max gap between sequence steps
         aggregate_client=None,
+        engine: str = "python",
         **kwargs
     ):
         """
@@ -50,8 +60,12 @@ class SequenceDetector(MLPatternDetector):
             min_sequence_occurrences: Minimum occurrences for valid sequence
             sequence_gap_seconds: Maximum gap between sequence steps
             aggregate_client: PatternAggregateClient for storing daily aggregates (Story AI5.3)
+            engine: Sequence engine, "python" (default) or "streaming"
             **kwargs: Additional MLPatternDetector parameters
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown sequence engine '{engine}', expected one of {ENGINES}")
+        
         super().__init__(**kwargs)
         self.window_minutes = window_minutes
         self.min_sequence_length = min_sequence_length
@@ -59,8 +73,10 @@ class SequenceDetector(MLPatternDetector):
         self.min_sequence_occurrences = min_sequence_occurrences
         self.sequence_gap_seconds = sequence_gap_seconds
         self.aggregate_client = aggregate_client
+        self.engine = engine
         
-        logger.info(f"SequenceDetector initialized: window={window_minutes}min, min_length={min_sequence_length}")
+        logger.info(f"SequenceDetector initialized: window={window_minutes}min, min_length={min_sequence_length}, "
+                    f"engine={engine}")
     
     def detect_patterns(self, events_df: pd.DataFrame) -> List[Dict]:
         """
@@ -81,13 +97,19 @@ class SequenceDetector(MLPatternDetector):
         events_df = self._optimize_dataframe(events_df)
         
         # Filter for state changes (on/off transitions)
-        state_changes = self._filter_state_changes(events_df)
+        if self.engine == "streaming":
+            state_changes = self._filter_state_changes_vectorized(events_df)
+        else:
+            state_changes = self._filter_state_changes(events_df)
         if state_changes.empty:
             logger.info("No state changes found for sequence detection")
             return []
         
         # Detect sequences using rolling windows
-        sequences = self._detect_sequences(state_changes)
+        if self.engine == "streaming":
+            sequences = self._detect_sequences_streaming(state_changes)
+        else:
+            sequences = self._detect_sequences(state_changes)
         if not sequences:
             logger.info("No sequences detected")
             return []
@@ -200,6 +222,40 @@ class SequenceDetector(MLPatternDetector):
         else:
             return pd.DataFrame()
     
+    def _filter_state_changes_vectorized(self, events_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filter state changes with array operations instead of a per-entity loop.
+        
+        Keeps the same rows as _filter_state_changes: the first event of each
+        entity and every event whose state differs from that entity's previous event.
+        
+        Args:
+            events_df: Time-sorted events DataFrame
+            
+        Returns:
+            Time-sorted DataFrame with only state change events
+        """
+        if events_df.empty:
+            return pd.DataFrame()
+        
+        entity_codes = pd.factorize(events_df['entity_id'])[0]
+        state_codes = pd.factorize(events_df['state'])[0]
+        
+        # Stable sort keeps each entity's events in time order
+        order = np.argsort(entity_codes, kind='stable')
+        entities = entity_codes[order]
+        states = state_codes[order]
+        
+        changed = np.ones(len(order), dtype=bool)
+        # Missing states never compare equal (as with Series.ne)
+        changed[1:] = (entities[1:] != entities[:-1]) | (states[1:] != states[:-1]) | (states[1:] < 0)
+        
+        mask = np.empty(len(order), dtype=bool)
+        mask[order] = changed
+        mask &= entity_codes >= 0
+        
+        return events_df[mask].reset_index(drop=True)
+    
     def _detect_sequences(self, events_df: pd.DataFrame) -> List[Dict]:
         """
         Detect sequences using rolling window approach.
@@ -234,6 +290,101 @@ class SequenceDetector(MLPatternDetector):
         # Deduplicate and count occurrences
         return self._deduplicate_sequences(sequences)
     
+    def _detect_sequences_streaming(self, events_df: pd.DataFrame) -> List[Dict]:
+        """
+        Detect sequences in one pass over the time-sorted events.
+        
+        Every event starts one candidate sequence: it and the following events
+        while the gap between steps stays within sequence_gap_seconds, the step
+        lies within window_minutes of the start and max_sequence_length is not
+        reached. Open starts are kept in a deque (at most max_sequence_length
+        long); a start is emitted once its sequence can no longer grow. Only the
+        occurrence count and the first occurrence of each sequence are kept.
+        
+        Args:
+            events_df: State change events DataFrame
+            
+        Returns:
+            Sequences with at least min_sequence_occurrences occurrences
+            (unclustered, with 'occurrences' set)
+        """
+        start_time = datetime.utcnow()
+        
+        # Simultaneous events are ordered by entity so their sequences have one signature
+        events_sorted = events_df.sort_values(['time', 'entity_id'], kind='stable').reset_index(drop=True)
+        times = pd.DatetimeIndex(events_sorted['time']).as_unit('ns').asi8.tolist()
+        
+        # Intern (entity, state) pairs as small integer codes
+        entity_codes, entity_ids = pd.factorize(events_sorted['entity_id'])
+        state_codes, states = pd.factorize(events_sorted['state'])
+        pair_codes, pairs = pd.factorize(
+            entity_codes.astype(np.int64) * (len(states) + 1) + state_codes
+        )
+        tokens = pair_codes.tolist()
+        
+        window_ns = self.window_minutes * 60 * 1_000_000_000
+        gap_ns = self.sequence_gap_seconds * 1_000_000_000
+        min_length = self.min_sequence_length
+        max_length = self.max_sequence_length
+        
+        counts: Dict[Tuple[int, ...], int] = {}
+        first_occurrence: Dict[Tuple[int, ...], Tuple[int, int]] = {}
+        
+        def emit(first: int, end: int):
+            if end - first >= min_length:
+                key = tuple(tokens[first:end])
+                if key in counts:
+                    counts[key] += 1
+                else:
+                    counts[key] = 1
+                    first_occurrence[key] = (first, end)
+        
+        open_starts = deque()
+        for position, event_time in enumerate(times):
+            # A gap closes every open sequence
+            if open_starts and event_time - times[position - 1] > gap_ns:
+                while open_starts:
+                    emit(open_starts.popleft(), position)
+            
+            # Starts whose window or length limit excludes this event are complete
+            while open_starts and (
+                event_time - times[open_starts[0]] > window_ns
+                or position - open_starts[0] >= max_length
+            ):
+                emit(open_starts.popleft(), position)
+            
+            open_starts.append(position)
+        
+        while open_starts:
+            emit(open_starts.popleft(), len(times))
+        
+        has_area = 'area' in events_sorted.columns
+        sequences = []
+        for key, (first, end) in sorted(first_occurrence.items(), key=lambda item: item[1]):
+            occurrences = counts[key]
+            if occurrences < self.min_sequence_occurrences:
+                continue
+            
+            rows = events_sorted.iloc[first:end]
+            areas = rows['area'].tolist() if has_area else ['unknown'] * (end - first)
+            sequence_events = [
+                {'entity_id': entity_id, 'state': state, 'time': event_time, 'area': area}
+                for entity_id, state, event_time, area in zip(
+                    rows['entity_id'].tolist(), rows['state'].tolist(), rows['time'].tolist(), areas
+                )
+            ]
+            sequence = self._create_sequence_dict(sequence_events)
+            sequence['occurrences'] = occurrences
+            sequences.append(sequence)
+        
+        logger.info(
+            f"Streaming sequence engine: {len(times)} state changes, {len(pairs)} interned "
+            f"(entity, state) pairs, {len(counts)} distinct sequences, {len(sequences)} frequent "
+            f"in {(datetime.utcnow() - start_time).total_seconds():.2f}s"
+        )
+        
+        return sequences
+    
     def _extract_sequences_from_window(self, window_events: pd.DataFrame) -> List[Dict]:
         """
         Extract sequences from a time window.
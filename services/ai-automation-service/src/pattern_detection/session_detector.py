@@ -310,6 +310,12 @@ class SessionDetector(MLPatternDetector):
         """
         Identify user activity sessions.
         
+        A new session starts wherever the gap to the previous event exceeds
+        session_gap_minutes (diff > gap, cumulative sum as session ID). Session
+        bounds come from one groupby; only sessions lasting between
+        min_session_duration_minutes and max_session_duration_hours are
+        materialized.
+        
         Args:
             events_df: Events DataFrame
             
@@ -317,59 +323,51 @@ class SessionDetector(MLPatternDetector):
             List of session dictionaries
         """
         sessions = []
+        if events_df.empty:
+            return sessions
+        
         session_gap = pd.Timedelta(minutes=self.session_gap_minutes)
         
         # Sort events by time
-        events_sorted = events_df.sort_values('time').reset_index(drop=True)
+        events_sorted = events_df.sort_values('time', kind='stable').reset_index(drop=True)
         
-        current_session = []
-        session_start = None
+        session_ids = (events_sorted['time'].diff() > session_gap).cumsum().to_numpy()
+        bounds = events_sorted.groupby(session_ids, sort=False)['time'].agg(['first', 'last', 'size'])
         
-        for i, (_, event) in enumerate(events_sorted.iterrows()):
-            if session_start is None:
-                session_start = event['time']
-                current_session = [event]
-            else:
-                # Check if event is within session gap
-                time_since_last = event['time'] - events_sorted.iloc[i-1]['time']
-                
-                if time_since_last <= session_gap:
-                    current_session.append(event)
-                else:
-                    # End current session and start new one
-                    if current_session:
-                        session = self._create_session_dict(current_session, session_start)
-                        if self._is_valid_session(session):
-                            sessions.append(session)
-                    
-                    session_start = event['time']
-                    current_session = [event]
+        duration_minutes = (bounds['last'] - bounds['first']).dt.total_seconds() / 60
+        valid = (
+            (duration_minutes >= self.min_session_duration_minutes) &
+            (duration_minutes <= self.max_session_duration_hours * 60)
+        ).to_numpy()
+        
+        # Sessions are contiguous row ranges of the sorted frame
+        ends = np.cumsum(bounds['size'].to_numpy())
+        starts = ends - bounds['size'].to_numpy()
         
-        # Add final session
-        if current_session:
-            session = self._create_session_dict(current_session, session_start)
-            if self._is_valid_session(session):
-                sessions.append(session)
+        for start, end in zip(starts[valid], ends[valid]):
+            sessions.append(self._create_session_dict(events_sorted.iloc[start:end]))
         
         return sessions
     
-    def _create_session_dict(self, session_events: List[pd.Series], start_time: datetime) -> Dict:
+    def _create_session_dict(self, session_events: pd.DataFrame) -> Dict:
         """
         Create session dictionary from events.
         
         Args:
-            session_events: List of events in session
-            start_time: Session start time
+            session_events: Time-ordered events of the session
             
         Returns:
             Session dictionary
         """
-        end_time = session_events[-1]['time']
+        start_time = session_events['time'].iloc[0]
+        end_time = session_events['time'].iloc[-1]
         duration_minutes = (end_time - start_time).total_seconds() / 60
         
-        devices = list(set(event['entity_id'] for event in session_events))
-        rooms = list(set(event.get('area', 'unknown') for event in session_events))
-        states = [event['state'] for event in session_events]
+        devices = pd.unique(session_events['entity_id'].to_numpy()).tolist()
+        if 'area' in session_events.columns:
+            rooms = pd.unique(session_events['area'].to_numpy()).tolist()
+        else:
+            rooms = ['unknown']
         
         # Calculate activity intensity
         activity_intensity = len(session_events) / max(duration_minutes / 60, 0.1)  # Events per hour
@@ -378,7 +376,7 @@ class SessionDetector(MLPatternDetector):
         session_type = self._classify_session_type(start_time, duration_minutes, activity_intensity)
         
         # Calculate state distribution
-        state_distribution = dict(pd.Series(states).value_counts())
+        state_distribution = dict(pd.Series(session_events['state'].to_numpy()).value_counts())
         
         return {
             'events': session_events,
@@ -392,22 +390,6 @@ class SessionDetector(MLPatternDetector):
             'state_distribution': state_distribution
         }
     
-    def _is_valid_session(self, session: Dict) -> bool:
-        """
-        Check if session meets validity criteria.
-        
-        Args:
-            session: Session dictionary
-            
-        Returns:
-            True if session is valid
-        """
-        duration_minutes = session['duration_minutes']
-        return (
-            duration_minutes >= self.min_session_duration_minutes and
-            duration_minutes <= self.max_session_duration_hours * 60
-        )
-    
     def _classify_session_type(self, start_time: datetime, duration_minutes: float, activity_intensity: float) -> str:
         """
         Classify session type based on characteristics.
@@ -542,15 +524,13 @@ class SessionDetector(MLPatternDetector):
         if len(period_events) < 2:
             return 0.0
         
-        # Calculate time consistency
-        times = period_events['time'].dt.time
-        time_diffs = []
+        # Calculate time consistency (differences between consecutive times of day;
+        # datetime.time objects cannot be subtracted, so use seconds since midnight)
+        times = period_events['time']
+        seconds_of_day = (times.dt.hour * 3600 + times.dt.minute * 60 + times.dt.second).to_numpy(dtype=float)
+        time_diffs = np.diff(seconds_of_day)
         
-        for i in range(len(times) - 1):
-            diff = (times.iloc[i+1] - times.iloc[i]).total_seconds()
-            time_diffs.append(diff)
-        
-        if not time_diffs:
+        if len(time_diffs) == 0:
             return 0.0
         
         # Calculate coefficient of variation
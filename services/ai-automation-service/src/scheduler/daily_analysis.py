@@ -22,15 +22,9 @@ from ..clients.mqtt_client import MQTTNotificationClient
 from ..pattern_analyzer.time_of_day import TimeOfDayPatternDetector
 from ..pattern_analyzer.co_occurrence import CoOccurrencePatternDetector
 
-# New ML-enhanced pattern detectors
-from ..pattern_detection.sequence_detector import SequenceDetector
-from ..pattern_detection.contextual_detector import ContextualDetector
-from ..pattern_detection.room_based_detector import RoomBasedDetector
-from ..pattern_detection.session_detector import SessionDetector
-from ..pattern_detection.duration_detector import DurationDetector
-from ..pattern_detection.day_type_detector import DayTypeDetector
-from ..pattern_detection.seasonal_detector import SeasonalDetector
-from ..pattern_detection.anomaly_detector import AnomalyDetector
+# New ML-enhanced pattern detectors (shared analysis frame + parallel runner)
+from ..pattern_detection.analysis_frame import AnalysisFrame
+from ..pattern_detection.parallel_runner import ParallelDetectorRunner
 
 from ..llm.openai_client import OpenAIClient
 from ..database.crud import store_patterns, store_suggestion
@@ -194,10 +188,18 @@ class DailyAnalysisScheduler:
             )
             start_date = datetime.now(timezone.utc) - timedelta(days=30)
             
-            events_df = await data_client.fetch_events(
-                start_time=start_date,
-                limit=100000
-            )
+            if settings.columnar_event_fetch:
+                # Full 30-day history as typed columns, paged by time range
+                events_df = await data_client.fetch_events(
+                    start_time=start_date,
+                    limit=None,
+                    columnar=True
+                )
+            else:
+                events_df = await data_client.fetch_events(
+                    start_time=start_date,
+                    limit=100000
+                )
             
             if events_df.empty:
                 logger.warning("❌ No events available for analysis")
@@ -250,7 +252,8 @@ class DailyAnalysisScheduler:
                 window_minutes=5,
                 min_support=5,
                 min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.4: Pass aggregate client
+                aggregate_client=aggregate_client,  # Story AI5.4: Pass aggregate client
+                engine=settings.co_occurrence_engine
             )
             
             if len(events_df) > 50000:
@@ -262,111 +265,82 @@ class DailyAnalysisScheduler:
             logger.info(f"    ✅ Found {len(co_patterns)} co-occurrence patterns (daily aggregates stored)")
             
             # ML-Enhanced Pattern Detection (Story AI5.3: Incremental processing enabled)
-            logger.info("  → Running ML-enhanced pattern detectors (incremental)...")
-            
-            # Sequence patterns (Story AI5.3: Incremental processing enabled)
-            logger.info("    → Running sequence detector (incremental)...")
-            sequence_detector = SequenceDetector(
-                window_minutes=30,
-                min_sequence_length=2,
-                min_sequence_occurrences=3,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.4: Pass aggregate client
+            # Events are preprocessed once (sort, categorical codes, time features,
+            # per-entity index) and shared read-only by all ML detectors, which run
+            # in a process pool; aggregates are stored here after detection.
+            logger.info("  → Preparing shared analysis frame...")
+            analysis_frame = AnalysisFrame.from_events(events_df)
+            
+            detector_specs = [
+                # Sequence patterns (Story AI5.3: daily aggregates)
+                ('sequence', dict(
+                    window_minutes=30,
+                    min_sequence_length=2,
+                    min_sequence_occurrences=3,
+                    min_confidence=0.7,
+                    engine=settings.sequence_engine
+                )),
+                # Contextual patterns (Story AI5.8: monthly aggregates)
+                ('contextual', dict(
+                    weather_weight=0.3,
+                    presence_weight=0.4,
+                    time_weight=0.3,
+                    min_confidence=0.7
+                )),
+                # Room-based patterns (Story AI5.3: daily aggregates)
+                ('room_based', dict(
+                    min_room_occurrences=5,
+                    min_confidence=0.7
+                )),
+                # Session patterns (Story AI5.6: weekly aggregates)
+                ('session', dict(
+                    session_gap_minutes=60,
+                    min_session_occurrences=3,
+                    min_confidence=0.7
+                )),
+                # Duration patterns (Story AI5.3: daily aggregates)
+                ('duration', dict(
+                    min_duration_seconds=300,
+                    max_duration_hours=24,
+                    min_occurrences=3,
+                    min_confidence=0.7
+                )),
+                # Day-type patterns (Story AI5.6: weekly aggregates)
+                ('day_type', dict(
+                    min_day_type_occurrences=3,
+                    min_confidence=0.7
+                )),
+                # Seasonal patterns (Story AI5.8: monthly aggregates)
+                ('seasonal', dict(
+                    min_seasonal_occurrences=10,
+                    seasonal_window_days=30,
+                    weather_integration=True,
+                    min_confidence=0.7
+                )),
+                # Anomaly patterns (Story AI5.3: daily aggregates)
+                ('anomaly', dict(
+                    contamination=0.1,
+                    min_anomaly_occurrences=3,
+                    anomaly_window_hours=24,
+                    enable_timing_analysis=True,
+                    enable_behavioral_analysis=True,
+                    enable_device_analysis=True,
+                    min_confidence=0.7
+                )),
+            ]
+            
+            logger.info(f"  → Running {len(detector_specs)} ML-enhanced pattern detectors "
+                        f"(workers={settings.pattern_detection_workers})...")
+            detector_runner = ParallelDetectorRunner(
+                max_workers=settings.pattern_detection_workers,
+                aggregate_client=aggregate_client  # Story AI5.4: Aggregates stored in this process
             )
-            sequence_patterns = sequence_detector.detect_patterns(events_df)
-            all_patterns.extend(sequence_patterns)
-            logger.info(f"    ✅ Found {len(sequence_patterns)} sequence patterns (daily aggregates stored)")
-            
-            # Contextual patterns (Story AI5.8: Monthly aggregation enabled)
-            logger.info("    → Running contextual detector (monthly aggregates)...")
-            contextual_detector = ContextualDetector(
-                weather_weight=0.3,
-                presence_weight=0.4,
-                time_weight=0.3,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.8: Pass aggregate client for monthly aggregates
-            )
-            contextual_patterns = contextual_detector.detect_patterns(events_df)
-            all_patterns.extend(contextual_patterns)
-            logger.info(f"    ✅ Found {len(contextual_patterns)} contextual patterns (monthly aggregates stored)")
-            
-            # Room-based patterns (Story AI5.3: Incremental processing enabled)
-            logger.info("    → Running room-based detector (incremental)...")
-            room_detector = RoomBasedDetector(
-                min_room_activity_events=5,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.4: Pass aggregate client
-            )
-            room_patterns = room_detector.detect_patterns(events_df)
-            all_patterns.extend(room_patterns)
-            logger.info(f"    ✅ Found {len(room_patterns)} room-based patterns (daily aggregates stored)")
-            
-            # Session patterns (Story AI5.6: Weekly aggregation enabled)
-            logger.info("    → Running session detector (weekly aggregates)...")
-            session_detector = SessionDetector(
-                session_timeout_minutes=60,
-                min_session_events=3,
-                min_session_occurrences=3,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.6: Pass aggregate client for weekly aggregates
-            )
-            session_patterns = session_detector.detect_patterns(events_df)
-            all_patterns.extend(session_patterns)
-            logger.info(f"    ✅ Found {len(session_patterns)} session patterns (weekly aggregates stored)")
-            
-            # Duration patterns (Story AI5.3: Incremental processing enabled)
-            logger.info("    → Running duration detector (incremental)...")
-            duration_detector = DurationDetector(
-                min_duration_minutes=5,
-                max_duration_hours=24,
-                min_occurrences=3,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.4: Pass aggregate client
-            )
-            duration_patterns = duration_detector.detect_patterns(events_df)
-            all_patterns.extend(duration_patterns)
-            logger.info(f"    ✅ Found {len(duration_patterns)} duration patterns (daily aggregates stored)")
-            
-            # Day-type patterns (Story AI5.6: Weekly aggregation enabled)
-            logger.info("    → Running day-type detector (weekly aggregates)...")
-            day_type_detector = DayTypeDetector(
-                min_weekday_occurrences=5,
-                min_weekend_occurrences=3,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.6: Pass aggregate client for weekly aggregates
-            )
-            day_type_patterns = day_type_detector.detect_patterns(events_df)
-            all_patterns.extend(day_type_patterns)
-            logger.info(f"    ✅ Found {len(day_type_patterns)} day-type patterns (weekly aggregates stored)")
-            
-            # Seasonal patterns (Story AI5.8: Monthly aggregation enabled)
-            logger.info("    → Running seasonal detector (monthly aggregates)...")
-            seasonal_detector = SeasonalDetector(
-                min_seasonal_occurrences=10,
-                seasonal_window_days=30,
-                weather_integration=True,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.8: Pass aggregate client for monthly aggregates
-            )
-            seasonal_patterns = seasonal_detector.detect_patterns(events_df)
-            all_patterns.extend(seasonal_patterns)
-            logger.info(f"    ✅ Found {len(seasonal_patterns)} seasonal patterns (monthly aggregates stored)")
-            
-            # Anomaly patterns (Story AI5.3: Incremental processing enabled)
-            logger.info("    → Running anomaly detector (incremental)...")
-            anomaly_detector = AnomalyDetector(
-                contamination=0.1,
-                min_anomaly_occurrences=3,
-                anomaly_window_hours=24,
-                enable_timing_analysis=True,
-                enable_behavioral_analysis=True,
-                enable_device_analysis=True,
-                min_confidence=0.7,
-                aggregate_client=aggregate_client  # Story AI5.4: Pass aggregate client
-            )
-            anomaly_patterns = anomaly_detector.detect_patterns(events_df)
-            all_patterns.extend(anomaly_patterns)
-            logger.info(f"    ✅ Found {len(anomaly_patterns)} anomaly patterns (daily aggregates stored)")
+            ml_patterns = await asyncio.to_thread(detector_runner.run, analysis_frame, detector_specs)
+            
+            for name, patterns in ml_patterns.items():
+                all_patterns.extend(patterns)
+                logger.info(f"    ✅ Found {len(patterns)} {name} patterns "
+                            f"in {detector_runner.timings.get(name, 0.0):.2f}s")
             
             logger.info(f"✅ Total patterns detected: {len(all_patterns)}")
             logger.info(f"   📦 Aggregates stored: 6 Group A (daily), 2 Group B (weekly), 2 Group C (monthly)")
@@ -409,7 +383,8 @@ class DailyAnalysisScheduler:
                     ha_client=ha_client,  # Story AI4.3: Enable automation filtering!
                     influxdb_client=data_client.influxdb_client,  # Enable advanced scoring (Story AI3.2)
                     min_confidence=0.5,  # Lowered from 0.7 to be less restrictive
-                    same_area_required=False  # Relaxed requirement to find more opportunities
+                    same_area_required=False,  # Relaxed requirement to find more opportunities
+                    candidate_store_path=settings.synergy_candidate_store_path  # Incremental pair candidates
                 )
                 
                 logger.info("   → Calling detect_synergies() method...")
@@ -62,6 +62,8 @@ class EnsembleEntityValidator:
     5. Only approve entities with high consensus OR HA API confirmation
     """
     
+    MAX_CACHED_ENTITY_ID_EMBEDDINGS = 20000
+    
     def __init__(
         self,
         ha_client,
@@ -85,6 +87,7 @@ class EnsembleEntityValidator:
         self.sentence_model = sentence_transformer_model
         self.device_intel_client = device_intelligence_client
         self.min_consensus_threshold = min_consensus_threshold
+        self._entity_id_embeddings = None  # EmbeddingStore of entity ID embeddings
         
         # Method weights for consensus calculation
         self.method_weights = {
@@ -286,25 +289,19 @@ Respond with JSON:
             )
         
         try:
-            # Get embedding for the entity ID (use numpy arrays for compatibility)
-            entity_embedding = self.sentence_model.encode(entity_id)
+            # Embeddings of entity IDs are encoded once (batched) and reused across calls
+            store = self._get_entity_id_store()
+            available_ids = [a.get('entity_id', '') for a in available_entities if a.get('entity_id')]
+            missing = [eid for eid in dict.fromkeys(available_ids + [entity_id]) if eid not in store]
+            if missing:
+                store.add(missing, self.sentence_model.encode(missing))
             
-            # Find similar entities
+            # Find most similar entity (top-1 cosine search over the available IDs)
             best_match = None
             best_similarity = 0.0
-            
-            for available in available_entities:
-                available_id = available.get('entity_id', '')
-                if available_id:
-                    available_embedding = self.sentence_model.encode(available_id)
-                    # Use numpy cosine similarity
-                    import numpy as np
-                    similarity = float(np.dot(entity_embedding, available_embedding) / 
-                                     (np.linalg.norm(entity_embedding) * np.linalg.norm(available_embedding)))
-                    
-                    if similarity > best_similarity:
-                        best_similarity = similarity
-                        best_match = available_id
+            matches = store.top_k(store.get(entity_id), k=1, ids=available_ids)
+            if matches and matches[0][1] > 0.0:
+                best_match, best_similarity = matches[0]
             
             # High similarity (>0.8) suggests entity exists
             exists = best_match == entity_id and best_similarity > 0.8
@@ -330,6 +327,15 @@ Respond with JSON:
                 error=str(e)
             )
     
+    def _get_entity_id_store(self):
+        """Lazy create the store caching entity ID embeddings"""
+        from ..nlevel_synergy.embedding_store import EmbeddingStore
+        
+        if self._entity_id_embeddings is None or len(self._entity_id_embeddings) > self.MAX_CACHED_ENTITY_ID_EMBEDDINGS:
+            # Removed or renamed entities leave stale IDs behind; start over once the cache is large
+            self._entity_id_embeddings = EmbeddingStore()
+        return self._entity_id_embeddings
+    
     async def _validate_with_pattern(self, entity_id: str, query_context: str) -> EntityValidationResult:
         """Validate using pattern matching"""
         import re
@@ -0,0 +1,369 @@
+"""
+Entity Resolution Index for EntityValidator
+
+Prebuilt lookup structures over the entities fetched from data-api, so query
+terms are resolved without scanning every entity:
+
+- Hash map by entity_id
+- Inverted token index (entity_id words, friendly_name and area tokens)
+- Domain index
+- Character n-gram index for typo-tolerant candidate lookup
+- Batch fuzzy scoring with rapidfuzz.process.cdist
+
+Entities are indexed once and only re-indexed when their indexed fields
+change. Lookups are restricted to the entity list of the current request
+(a "view"), which may be any subset of the indexed entities.
+"""
+
+import logging
+import re
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+    logger.warning("rapidfuzz not available, fuzzy matching will be disabled")
+
+NGRAM_SIZE = 3
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def word_set(text: str) -> Set[str]:
+    """Words of a lowercased text as matched by \\w+ (underscores stay inside words)"""
+    return set(_WORD_RE.findall(text))
+
+
+def split_word_set(text: str) -> Set[str]:
+    """
+    Words of a lowercased text, additionally split on underscores and hyphens.
+
+    Keeps the unsplit words too, e.g. "living_room" -> {"living_room", "living", "room"}.
+    """
+    words = set()
+    for word in _WORD_RE.findall(text):
+        words.update(word.split('_'))
+        words.update(word.split('-'))
+    return words
+
+
+def ngrams(text: str, size: int = NGRAM_SIZE) -> Set[str]:
+    """Character n-grams of a text (short texts yield the text itself)"""
+    text = text.lower()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def fuzzy_scores(query: str, candidates: List[str]) -> List[float]:
+    """
+    Score one query against many candidates in a single rapidfuzz call.
+
+    Same scale and semantics as a token_sort_ratio per candidate (lowercased,
+    0.0-1.0); empty candidates score 0.0.
+
+    Args:
+        query: Query string
+        candidates: Candidate strings
+
+    Returns:
+        Scores in candidate order (all 0.0 if rapidfuzz is not installed)
+    """
+    if not candidates:
+        return []
+    if not RAPIDFUZZ_AVAILABLE:
+        return [0.0] * len(candidates)
+
+    lowered = [candidate.lower() if candidate else '' for candidate in candidates]
+    matrix = process.cdist([query.lower()], lowered, scorer=fuzz.token_sort_ratio, dtype=np.float64, workers=1)
+    return [float(score) / 100.0 if candidate else 0.0 for score, candidate in zip(matrix[0], lowered)]
+
+
+@dataclass
+class IndexedEntity:
+    """Precomputed matching data for one entity"""
+    entity: Dict[str, Any]
+    fingerprint: Tuple
+    domain: str
+    name: str                  # entity_id without domain, lowercased
+    name_words: Set[str]       # \w+ words of name
+    name_split_words: Set[str]  # name words split on underscores/hyphens
+    tokens: Set[str]           # inverted-index tokens (name, friendly_name, area)
+    grams: Set[str]            # n-grams of name
+
+
+class EntityResolutionIndex:
+    """
+    Incrementally maintained index over entity dicts from data-api.
+
+    Call view(entities) with the entity list of a request; the view only
+    returns entities of that list, in list order.
+    """
+
+    # Fields that feed the index: an entity is re-indexed when one changes
+    INDEXED_FIELDS = ('domain', 'friendly_name', 'area_id', 'device_area_id')
+    MAX_VIEWS = 8
+
+    def __init__(self):
+        self._entries: Dict[str, IndexedEntity] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        # Recent views by id() of their entity list (a request looks at a few lists, repeatedly)
+        self._views: Dict[int, 'EntityIndexView'] = {}
+        self._stats = {'indexed': 0, 'reindexed': 0, 'views': 0, 'view_reuses': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sync(self, entities: Iterable[Dict[str, Any]]) -> None:
+        """
+        Index new entities and re-index entities whose indexed fields changed.
+
+        Args:
+            entities: Entity dicts (must have 'entity_id')
+        """
+        seen = set()
+        for entity in entities:
+            entity_id = entity.get('entity_id')
+            if not entity_id or entity_id in seen:
+                # First occurrence wins (like a linear scan would)
+                continue
+            seen.add(entity_id)
+            fingerprint = tuple(entity.get(field) for field in self.INDEXED_FIELDS)
+            entry = self._entries.get(entity_id)
+            if entry is not None and entry.fingerprint == fingerprint:
+                # Unchanged: keep the latest dict so callers get current data
+                entry.entity = entity
+                continue
+            if entry is not None:
+                self._unindex(entity_id, entry)
+                self._stats['reindexed'] += 1
+            else:
+                self._stats['indexed'] += 1
+            self._index(entity_id, entity, fingerprint)
+
+    def remove(self, entity_ids: Iterable[str]) -> None:
+        """
+        Remove entities from the index.
+
+        Args:
+            entity_ids: Entity IDs to remove
+        """
+        for entity_id in entity_ids:
+            entry = self._entries.get(entity_id)
+            if entry is not None:
+                self._unindex(entity_id, entry)
+        self._views.clear()
+
+    def prune(self, entities: Iterable[Dict[str, Any]]) -> None:
+        """
+        Remove indexed entities that are missing from a complete entity list.
+
+        Args:
+            entities: All entities currently known to data-api
+        """
+        current = {entity.get('entity_id') for entity in entities}
+        stale = [entity_id for entity_id in self._entries if entity_id not in current]
+        if stale:
+            self.remove(stale)
+
+    def view(self, entities: List[Dict[str, Any]]) -> 'EntityIndexView':
+        """
+        Get a lookup view restricted to (and ordered like) an entity list.
+
+        The list is synced into the index first. Asking again for one of the
+        last MAX_VIEWS list objects (unchanged length) reuses its view.
+
+        Args:
+            entities: Entity list of the current request
+
+        Returns:
+            EntityIndexView over the list
+        """
+        view = self._views.get(id(entities))
+        if view is not None and view.source is entities and view.source_length == len(entities):
+            self._stats['view_reuses'] += 1
+            return view
+
+        self.sync(entities)
+        view = EntityIndexView(self, entities)
+        if len(self._views) >= self.MAX_VIEWS:
+            self._views.pop(next(iter(self._views)))
+        self._views[id(entities)] = view
+        self._stats['views'] += 1
+        return view
+
+    def entry(self, entity_id: str) -> Optional[IndexedEntity]:
+        """Get the indexed data for an entity ID"""
+        return self._entries.get(entity_id)
+
+    def get_index_statistics(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with entity/token/n-gram counts and (re)index counters
+        """
+        return {
+            'entities': len(self._entries),
+            'tokens': len(self._tokens),
+            'ngrams': len(self._grams),
+            **self._stats
+        }
+
+    def _index(self, entity_id: str, entity: Dict[str, Any], fingerprint: Tuple) -> None:
+        """Add an entity to all postings"""
+        domain, separator, name = entity_id.partition('.')
+        if not separator:
+            domain, name = '', entity_id
+        name = name.lower()
+
+        name_split_words = split_word_set(name)
+        tokens = set(name_split_words)
+        for field in ('friendly_name', 'area_id', 'device_area_id'):
+            value = entity.get(field)
+            if isinstance(value, str) and value:
+                tokens |= split_word_set(value.lower())
+
+        entry = IndexedEntity(
+            entity=entity,
+            fingerprint=fingerprint,
+            domain=domain,
+            name=name,
+            name_words=word_set(name),
+            name_split_words=name_split_words,
+            tokens=tokens,
+            grams=ngrams(name)
+        )
+        self._entries[entity_id] = entry
+        for token in entry.tokens:
+            self._tokens.setdefault(token, set()).add(entity_id)
+        for gram in entry.grams:
+            self._grams.setdefault(gram, set()).add(entity_id)
+
+    def _unindex(self, entity_id: str, entry: IndexedEntity) -> None:
+        """Remove an entity from all postings"""
+        for postings, keys in ((self._tokens, entry.tokens), (self._grams, entry.grams)):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(entity_id)
+                    if not ids:
+                        del postings[key]
+        del self._entries[entity_id]
+
+
+class EntityIndexView:
+    """Lookups over one entity list, backed by the shared EntityResolutionIndex"""
+
+    def __init__(self, index: EntityResolutionIndex, entities: List[Dict[str, Any]]):
+        self.index = index
+        self.source = entities
+        self.source_length = len(entities)
+        # entity_id -> position of its first occurrence in the list
+        self.positions: Dict[str, int] = {}
+        self.domain_counts: Dict[str, int] = {}
+        for position, entity in enumerate(entities):
+            entity_id = entity.get('entity_id')
+            if not entity_id or entity_id in self.positions:
+                continue
+            self.positions[entity_id] = position
+            domain = entity_id.split('.', 1)[0] if '.' in entity_id else None
+            if domain:
+                self.domain_counts[domain] = self.domain_counts.get(domain, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Get the list's entity with this entity ID (first occurrence)"""
+        position = self.positions.get(entity_id)
+        return self.source[position] if position is not None else None
+
+    def entry(self, entity_id: str) -> Optional[IndexedEntity]:
+        """Get the indexed data for an entity of this list"""
+        return self.index.entry(entity_id) if entity_id in self.positions else None
+
+    def _ordered(self, entity_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Entities of this list for entity IDs, in list order"""
+        positions = sorted(self.positions[entity_id] for entity_id in entity_ids if entity_id in self.positions)
+        return [self.source[position] for position in positions]
+
+    def with_any_token(self, tokens: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Entities sharing at least one token with the query tokens.
+
+        Args:
+            tokens: Lowercased query tokens
+
+        Returns:
+            Matching entities in list order
+        """
+        postings = self.index._tokens
+        entity_ids: Set[str] = set()
+        for token in tokens:
+            entity_ids |= postings.get(token, set())
+        return self._ordered(entity_ids)
+
+    def in_domain(self, domain: str) -> List[Dict[str, Any]]:
+        """Entities whose entity_id starts with '<domain>.', in list order"""
+        prefix = f"{domain}."
+        return [self.source[position] for entity_id, position in self.positions.items() if entity_id.startswith(prefix)]
+
+    def similar_names(
+        self,
+        name: str,
+        domain: Optional[str] = None,
+        min_shared_ngrams: int = 2,
+        min_score: float = 0.8,
+        limit: int = 5
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Typo-tolerant lookup: entities whose entity_id name is close to name.
+
+        Candidates share n-grams with the name and are scored in one batch.
+
+        Args:
+            name: Entity name without domain (e.g., 'office_lite')
+            domain: Optional domain the entity_id must have
+            min_shared_ngrams: Minimum shared n-grams for a candidate
+            min_score: Minimum fuzzy score (0.0-1.0)
+            limit: Maximum number of results
+
+        Returns:
+            (entity, score) tuples, best first
+        """
+        query_grams = ngrams(name)
+        if not query_grams:
+            return []
+
+        shared: Dict[str, int] = {}
+        postings = self.index._grams
+        for gram in query_grams:
+            for entity_id in postings.get(gram, ()):
+                shared[entity_id] = shared.get(entity_id, 0) + 1
+        threshold = min(min_shared_ngrams, len(query_grams))
+        candidates = [
+            self.index._entries[entity_id]
+            for entity_id, count in shared.items()
+            if count >= threshold and entity_id in self.positions
+            and (domain is None or self.index._entries[entity_id].domain == domain)
+        ]
+        if not candidates:
+            return []
+
+        scores = fuzzy_scores(name, [entry.name for entry in candidates])
+        matches = [
+            (self.positions[entry.entity['entity_id']], entry, score)
+            for entry, score in zip(candidates, scores)
+            if score >= min_score
+        ]
+        # Best score first, list order breaks ties
+        matches.sort(key=lambda match: (-match[2], match[0]))
+        return [(self.source[position], score) for position, _, score in matches[:limit]]
@@ -18,6 +18,11 @@ import re
 from dataclasses import dataclass
 import asyncio
 
+from .entity_resolution_index import EntityResolutionIndex, fuzzy_scores, word_set, split_word_set, RAPIDFUZZ_AVAILABLE
+
+if RAPIDFUZZ_AVAILABLE:
+    from rapidfuzz import fuzz
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -92,6 +97,8 @@ class EntityValidator:
     in the Home Assistant instance, preventing "Entity not found" errors.
     """
     
+    MAX_CACHED_CANDIDATE_EMBEDDINGS = 20000
+    
     def __init__(self, data_api_client=None, enable_full_chain: bool = True, db_session=None, ha_client=None):
         """
         Initialize EntityValidator.
@@ -114,6 +121,8 @@ class EntityValidator:
         self._device_metadata_cache = {}  # Cache device metadata by device_id
         self._alias_service = None  # Lazy-loaded alias service
         self._attribute_cache = {}  # Cache enriched entity attributes
+        self._resolution_index = EntityResolutionIndex()  # Token/n-gram index over fetched entities
+        self._candidate_embeddings = None  # EmbeddingStore of candidate string embeddings (full chain)
     
     def _get_alias_service(self):
         """Lazy-load alias service if db_session is available"""
@@ -206,6 +215,10 @@ class EntityValidator:
                     platform=integration  # Note: data API uses 'platform' for integration
                 )
                 logger.info(f"✅ Fetched {len(entities)} entities from data-api")
+                # Keep the resolution index in step: re-index changed entities, drop deleted ones
+                self._resolution_index.sync(entities)
+                if domain is None and area_id is None and integration is None:
+                    self._resolution_index.prune(entities)
                 if len(entities) > 0:
                     logger.info(f"First 3 entities: {[e.get('entity_id') for e in entities[:3]]}")
                 return entities
@@ -249,15 +262,15 @@ class EntityValidator:
     
     def _find_exact_match(self, entity_id: str, available_entities: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Find exact match for entity ID"""
-        for entity in available_entities:
-            if entity.get('entity_id') == entity_id:
-                return entity
-        return None
+        return self._resolution_index.view(available_entities).get(entity_id)
     
     def _find_alternatives(self, entity_id: str, available_entities: List[Dict[str, Any]]) -> List[str]:
         """
         Find alternative entity IDs based on similarity.
         
+        Word-overlap matches come first; remaining slots are filled with
+        typo-tolerant (n-gram + fuzzy) matches of the same domain.
+        
         Args:
             entity_id: Entity ID to find alternatives for
             available_entities: List of available entities
@@ -266,6 +279,7 @@ class EntityValidator:
             List of alternative entity IDs
         """
         alternatives = []
+        view = self._resolution_index.view(available_entities)
         
         # Extract domain and name parts
         if '.' in entity_id:
@@ -274,18 +288,13 @@ class EntityValidator:
             domain = 'unknown'
             name = entity_id
         
-        # Find entities with same domain
-        same_domain = [
-            entity for entity in available_entities
-            if entity.get('domain') == domain
-        ]
+        # Find entities with similar names (only entities sharing a word can qualify)
+        name_words = word_set(name.lower())
         
-        # Find entities with similar names
-        name_words = set(re.findall(r'\w+', name.lower()))
-        
-        for entity in same_domain:
-            entity_name = entity.get('entity_id', '').split('.', 1)[1] if '.' in entity.get('entity_id', '') else ''
-            entity_words = set(re.findall(r'\w+', entity_name.lower()))
+        for entity in view.with_any_token(name_words):
+            if entity.get('domain') != domain:
+                continue
+            entity_words = view.entry(entity['entity_id']).name_words if '.' in entity['entity_id'] else set()
             
             # Calculate similarity
             common_words = name_words.intersection(entity_words)
@@ -294,6 +303,12 @@ class EntityValidator:
                 if similarity > 0.3:  # 30% similarity threshold
                     alternatives.append(entity.get('entity_id'))
         
+        # Typos (e.g., "office_lite" for "office_light") share n-grams but no words
+        if len(alternatives) < 5:
+            for entity, _ in view.similar_names(name.lower(), domain=domain, limit=5):
+                if entity['entity_id'] not in alternatives and entity['entity_id'] != entity_id:
+                    alternatives.append(entity['entity_id'])
+        
         # Limit to top 5 alternatives
         return alternatives[:5]
     
@@ -686,14 +701,14 @@ class EntityValidator:
         sensor_type_words = query_words & sensor_types
         
         candidates = []
-        
-        for entity in available_entities:
-            entity_id = entity.get('entity_id', '')
-            if not entity_id.startswith('binary_sensor.'):
-                continue
-            
-            entity_name = entity_id.replace('binary_sensor.', '').lower()
-            entity_words = set(re.findall(r'\w+', entity_name))
+        view = self._resolution_index.view(available_entities)
+        
+        for entity in view.in_domain('binary_sensor'):
+            entity_id = entity['entity_id']
+            # Indexed name/words of the entity_id without 'binary_sensor.'
+            entry = view.entry(entity_id)
+            entity_name = entry.name
+            entity_words = entry.name_words
             
             # Calculate multiple similarity scores
             scores = []
@@ -770,14 +785,15 @@ class EntityValidator:
         Returns:
             Best matching entity or None
         """
-        query_words = set(re.findall(r'\w+', query_term.lower()))
+        query_words = word_set(query_term.lower())
         logger.debug(f"_find_best_match for '{query_term}' with {len(query_words)} words: {query_words}")
+        view = self._resolution_index.view(available_entities)
         
         # SPECIAL HANDLING: Try fuzzy matching for binary sensors first
         # Check if query mentions presence/motion/occupancy/door/window
         binary_sensor_keywords = {'presence', 'motion', 'occupancy', 'door', 'window', 'contact', 'sensor'}
         if any(keyword in query_term.lower() for keyword in binary_sensor_keywords):
-            binary_sensors = [e for e in available_entities if e.get('entity_id', '').startswith('binary_sensor.')]
+            binary_sensors = view.in_domain('binary_sensor')
             if binary_sensors:
                 fuzzy_match = self._find_binary_sensor_fuzzy(query_term, binary_sensors)
                 if fuzzy_match:
@@ -798,7 +814,7 @@ class EntityValidator:
                 if '.' in entity_id:
                     potential_domain = entity_id.split('.', 1)[0]
                     # Use domain if it appears multiple times (likely correct)
-                    if sum(1 for e in available_entities if e.get('entity_id', '').startswith(f"{potential_domain}.")) > 1:
+                    if view.domain_counts.get(potential_domain, 0) > 1:
                         domain = potential_domain
                         break
             
@@ -822,16 +838,12 @@ class EntityValidator:
         best_match = numbered_match
         best_score = 0.5 if numbered_match else 0  # Prioritize numbered matches
         
-        for entity in available_entities:
-            entity_id = entity.get('entity_id', '')
-            entity_name = entity_id.split('.', 1)[1] if '.' in entity_id else entity_id
+        # Only entities sharing a token with the query can score (inverted index lookup)
+        for entity in view.with_any_token(query_words):
+            entity_id = entity['entity_id']
             
-            # Split on underscores and hyphens to handle "living_room" -> ["living", "room"]
-            entity_words = set()
-            for word in re.findall(r'\w+', entity_name.lower()):
-                # Also split underscores and hyphens
-                entity_words.update(word.split('_'))
-                entity_words.update(word.split('-'))
+            # Words split on underscores and hyphens ("living_room" -> ["living", "room"])
+            entity_words = view.entry(entity_id).name_split_words
             
             # Calculate word overlap score
             common_words = query_words.intersection(entity_words)
@@ -1005,6 +1017,15 @@ class EntityValidator:
     # FULL MODEL CHAIN IMPLEMENTATION
     # ============================================================================
     
+    def _get_candidate_embedding_store(self):
+        """Lazy create the store caching candidate string embeddings"""
+        from ..nlevel_synergy.embedding_store import EmbeddingStore
+        
+        if self._candidate_embeddings is None or len(self._candidate_embeddings) > self.MAX_CACHED_CANDIDATE_EMBEDDINGS:
+            # Renamed entities leave stale strings behind; start over once the cache is large
+            self._candidate_embeddings = EmbeddingStore()
+        return self._candidate_embeddings
+    
     def _get_embedding_model(self):
         """Lazy load sentence-transformers embedding model"""
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
@@ -1179,19 +1200,16 @@ class EntityValidator:
         
         if embedding_model and candidate_strings:
             try:
-                # Generate embeddings
+                # Generate embeddings (candidate strings are encoded once and reused)
                 query_embedding = embedding_model.encode([query_term], convert_to_numpy=True)[0]
-                candidate_embeddings = embedding_model.encode(candidate_strings, convert_to_numpy=True)
+                candidate_store = self._get_candidate_embedding_store()
+                missing = [c for c in dict.fromkeys(candidate_strings) if c not in candidate_store]
+                if missing:
+                    candidate_store.add(missing, embedding_model.encode(missing, convert_to_numpy=True))
                 
-                # Calculate cosine similarity
-                import numpy as np
-                for i, candidate_embedding in enumerate(candidate_embeddings):
-                    # Cosine similarity
-                    dot_product = np.dot(query_embedding, candidate_embedding)
-                    norm_query = np.linalg.norm(query_embedding)
-                    norm_candidate = np.linalg.norm(candidate_embedding)
-                    similarity = dot_product / (norm_query * norm_candidate) if (norm_query * norm_candidate) > 0 else 0.0
-                    embedding_scores[i] = float(similarity)
+                # Cosine similarity against all candidates in one matrix product
+                similarities = candidate_store.similarity(query_embedding, ids=candidate_strings)[0]
+                embedding_scores = {i: float(similarity) for i, similarity in enumerate(similarities)}
                 
                 logger.debug(f"Computed embedding similarities: {list(embedding_scores.values())[:3]}")
             except Exception as e:
@@ -1211,6 +1229,16 @@ class EntityValidator:
         # Track location mismatches for summary logging
         location_mismatches = []
         
+        # Fuzzy scores against all names of all candidates in one batch (one row per name field)
+        name_fields = ('friendly_name', 'name_by_user', 'device_name')
+        fuzzy_names = []
+        for entity in enriched_entities:
+            entity_id = entity.get('entity_id', '')
+            fuzzy_names.extend(entity.get(field, '') for field in name_fields)
+            fuzzy_names.append(entity_id.split('.', 1)[1] if '.' in entity_id else entity_id)
+        batch_fuzzy = fuzzy_scores(query_term, fuzzy_names)
+        fields_per_entity = len(name_fields) + 1
+        
         for i, entity in enumerate(enriched_entities):
             score = 0.0
             score_details = {}
@@ -1261,20 +1289,12 @@ class EntityValidator:
             # Signal 2.5: Fuzzy string matching (for typos/abbreviations) - Weight: 15%
             # Only use if exact match failed (don't penalize exact matches)
             if not exact_match:
-                fuzzy_scores = []
-                # Check against all available names in priority order
-                if friendly_name:
-                    fuzzy_scores.append(self._fuzzy_match_score(query_term, friendly_name))
-                if name_by_user:
-                    fuzzy_scores.append(self._fuzzy_match_score(query_term, name_by_user))
-                if device_name:
-                    fuzzy_scores.append(self._fuzzy_match_score(query_term, device_name))
-                # Also check entity_id parts
-                if entity_name:
-                    fuzzy_scores.append(self._fuzzy_match_score(query_term, entity_name))
+                # Scores against friendly_name, name_by_user, device_name and entity_id parts
+                # (missing names score 0.0)
+                entity_fuzzy = batch_fuzzy[i * fields_per_entity:(i + 1) * fields_per_entity]
                 
-                if fuzzy_scores:
-                    max_fuzzy = max(fuzzy_scores)
+                if entity_fuzzy:
+                    max_fuzzy = max(entity_fuzzy)
                     # Only add fuzzy score if it's above threshold (e.g., >0.6 for meaningful match)
                     if max_fuzzy > 0.6:
                         score += max_fuzzy * 0.15
@@ -1511,18 +1531,12 @@ class EntityValidator:
         Returns:
             Similarity score between 0.0 (no match) and 1.0 (perfect match)
         """
-        if not candidate:
+        if not candidate or not RAPIDFUZZ_AVAILABLE:
             return 0.0
         
-        try:
-            from rapidfuzz import fuzz
-            # Use token_sort_ratio for order-independent matching
-            # This handles "living room light" vs "light living room"
-            score = fuzz.token_sort_ratio(query.lower(), candidate.lower()) / 100.0
-            return score
-        except ImportError:
-            logger.warning("rapidfuzz not available, fuzzy matching disabled")
-            return 0.0
+        # Use token_sort_ratio for order-independent matching
+        # This handles "living room light" vs "light living room"
+        return fuzz.token_sort_ratio(query.lower(), candidate.lower()) / 100.0
     
     def _is_group_entity(self, entity: Dict[str, Any]) -> bool:
         """
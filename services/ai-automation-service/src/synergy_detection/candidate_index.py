@@ -0,0 +1,324 @@
+"""
+Synergy Candidate Index
+
+Incrementally maintained set of compatible device pairs for synergy detection.
+
+Instead of enumerating every entity pair per area and filtering afterwards,
+entities are bucketed per area by the role they can play in a relationship
+(trigger for a relationship type, action for a domain). Only pairs from
+matching buckets are generated, and only for entities that were added or
+changed since the last run. The candidate set can be persisted to disk so
+the daily job starts from the previous run.
+
+Epic AI-3: Cross-Device Synergy & Contextual Opportunities
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (trigger_entity, action_entity, relationship_type)
+PairKey = Tuple[str, str, str]
+
+
+def entity_device_class(entity: Dict[str, Any]) -> Optional[str]:
+    """Device class used for relationship matching (falls back to original_device_class)"""
+    return entity.get('device_class', entity.get('original_device_class'))
+
+
+def build_compatibility_index(relationships: Dict[str, Dict]) -> Dict[Tuple[str, Optional[str]], List[str]]:
+    """
+    Index relationship types by trigger (domain, device_class).
+
+    Relationships without a trigger device class are keyed by (domain, None).
+
+    Args:
+        relationships: Relationship configs (e.g., COMPATIBLE_RELATIONSHIPS)
+
+    Returns:
+        Dict mapping (trigger_domain, trigger_device_class) to relationship types
+    """
+    index: Dict[Tuple[str, Optional[str]], List[str]] = {}
+    for rel_type, config in relationships.items():
+        key = (config['trigger_domain'], config.get('trigger_device_class'))
+        index.setdefault(key, []).append(rel_type)
+    return index
+
+
+class SynergyCandidateSet:
+    """
+    Compatible (trigger, action) pairs per area, updated incrementally.
+
+    Usage:
+        >>> candidates = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS, path="data/synergy_candidates.json")
+        >>> candidates.sync(entities)         # only new/changed/removed entities are processed
+        >>> pairs = candidates.compatible_pairs(entities)
+        >>> candidates.save()
+    """
+
+    VERSION = 1
+
+    def __init__(self, relationships: Dict[str, Dict], path: Optional[str] = None):
+        """
+        Initialize candidate set.
+
+        Args:
+            relationships: Relationship configs (e.g., COMPATIBLE_RELATIONSHIPS)
+            path: Optional JSON file to persist the candidate set
+        """
+        self.relationships = relationships
+        self.path = Path(path) if path else None
+        self._rel_order = {rel_type: i for i, rel_type in enumerate(relationships)}
+        self._trigger_index = build_compatibility_index(relationships)
+        self._action_index: Dict[str, List[str]] = {}
+        for rel_type, config in relationships.items():
+            self._action_index.setdefault(config['action_domain'], []).append(rel_type)
+
+        # entity_id -> (area, domain, device_class) as last indexed
+        self._entities: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        # area -> relationship type -> entity_ids able to trigger it
+        self._triggers: Dict[str, Dict[str, Set[str]]] = {}
+        # area -> relationship type -> entity_ids able to act for it
+        self._actions: Dict[str, Dict[str, Set[str]]] = {}
+        self._pairs: Dict[PairKey, str] = {}  # pair -> area
+        self._pairs_by_entity: Dict[str, Set[PairKey]] = {}
+        self._dirty = False
+        self._stats = {'added': 0, 'removed': 0, 'changed': 0, 'pairs_generated': 0, 'loaded': False}
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def sync(self, entities: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Update the candidate set to a complete entity list.
+
+        Args:
+            entities: All entities from data-api
+
+        Returns:
+            Dict with added/removed/changed entity counts for this sync
+        """
+        current: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        for entity in entities:
+            entity_id = entity.get('entity_id')
+            area = entity.get('area_id')
+            if not entity_id or not area or entity_id in current:
+                continue
+            current[entity_id] = (area, entity_id.split('.')[0], entity_device_class(entity))
+
+        removed = [entity_id for entity_id in self._entities if entity_id not in current]
+        changed = [entity_id for entity_id, key in current.items()
+                   if entity_id in self._entities and self._entities[entity_id] != key]
+        added = [entity_id for entity_id in current if entity_id not in self._entities]
+
+        for entity_id in removed + changed:
+            self._remove_entity(entity_id)
+        for entity_id in changed + added:
+            self._add_entity(entity_id, current[entity_id])
+
+        result = {'added': len(added), 'removed': len(removed), 'changed': len(changed)}
+        for name, count in result.items():
+            self._stats[name] += count
+        if any(result.values()):
+            self._dirty = True
+        return result
+
+    def _add_entity(self, entity_id: str, key: Tuple[str, str, Optional[str]], generate: bool = True):
+        """Index an entity and (optionally) generate its pairs against existing role buckets"""
+        area, domain, device_class = key
+        self._entities[entity_id] = key
+
+        trigger_rels = list(self._trigger_index.get((domain, device_class), []))
+        if device_class is not None:
+            trigger_rels += self._trigger_index.get((domain, None), [])
+        for rel_type in trigger_rels:
+            self._triggers.setdefault(area, {}).setdefault(rel_type, set()).add(entity_id)
+            if not generate:
+                continue
+            for action_id in self._actions.get(area, {}).get(rel_type, ()):
+                self._add_pair((entity_id, action_id, rel_type), area)
+
+        for rel_type in self._action_index.get(domain, []):
+            self._actions.setdefault(area, {}).setdefault(rel_type, set()).add(entity_id)
+            if not generate:
+                continue
+            for trigger_id in self._triggers.get(area, {}).get(rel_type, ()):
+                self._add_pair((trigger_id, entity_id, rel_type), area)
+
+    def _remove_entity(self, entity_id: str):
+        """Remove an entity and all its pairs"""
+        area, _, _ = self._entities.pop(entity_id)
+        for buckets in (self._triggers.get(area, {}), self._actions.get(area, {})):
+            for members in buckets.values():
+                members.discard(entity_id)
+        for pair in self._pairs_by_entity.pop(entity_id, set()):
+            self._pairs.pop(pair, None)
+            other = pair[1] if pair[0] == entity_id else pair[0]
+            other_pairs = self._pairs_by_entity.get(other)
+            if other_pairs is not None:
+                other_pairs.discard(pair)
+
+    def _add_pair(self, pair: PairKey, area: str):
+        """Record a compatible pair (an entity never pairs with itself)"""
+        trigger_id, action_id, _ = pair
+        if trigger_id == action_id or pair in self._pairs:
+            return
+        self._pairs[pair] = area
+        self._pairs_by_entity.setdefault(trigger_id, set()).add(pair)
+        self._pairs_by_entity.setdefault(action_id, set()).add(pair)
+        self._stats['pairs_generated'] += 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def compatible_pairs(self, entities: List[Dict[str, Any]]) -> List[Dict]:
+        """
+        Compatible pairs with relationship metadata for the current entities.
+
+        Pairs are ordered by area (first appearance), then by entity position
+        in the list, then by relationship order - the order a pairwise scan
+        over the list would produce.
+
+        Args:
+            entities: Entity list the set was synced with (names are read from it)
+
+        Returns:
+            List of compatible pair dicts (trigger/action entity and name, area,
+            relationship_type, relationship_config)
+        """
+        positions: Dict[str, int] = {}
+        area_order: Dict[str, int] = {}
+        for position, entity in enumerate(entities):
+            entity_id = entity.get('entity_id')
+            area = entity.get('area_id')
+            if entity_id and area and entity_id not in positions:
+                positions[entity_id] = position
+                area_order.setdefault(area, len(area_order))
+
+        def sort_key(item):
+            (trigger_id, action_id, rel_type), area = item
+            first, second = sorted((positions[trigger_id], positions[action_id]))
+            return area_order[area], first, second, self._rel_order[rel_type]
+
+        pairs = [item for item in self._pairs.items() if item[0][0] in positions and item[0][1] in positions]
+        pairs.sort(key=sort_key)
+
+        compatible = []
+        for (trigger_id, action_id, rel_type), area in pairs:
+            trigger_entity = entities[positions[trigger_id]]
+            action_entity = entities[positions[action_id]]
+            compatible.append({
+                'trigger_entity': trigger_id,
+                'trigger_name': trigger_entity.get('friendly_name', trigger_id),
+                'action_entity': action_id,
+                'action_name': action_entity.get('friendly_name', action_id),
+                'area': area,
+                'relationship_type': rel_type,
+                'relationship_config': self.relationships[rel_type]
+            })
+        return compatible
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get candidate set statistics.
+
+        Returns:
+            Dict with entity/pair counts and cumulative change counters
+        """
+        return {
+            'entities': len(self._entities),
+            'areas': len(set(area for area, _, _ in self._entities.values())),
+            'pairs': len(self._pairs),
+            **self._stats
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _signature(self) -> List:
+        """Relationship definitions the pairs depend on"""
+        return sorted(
+            [rel_type, config['trigger_domain'], config.get('trigger_device_class'), config['action_domain']]
+            for rel_type, config in self.relationships.items()
+        )
+
+    def load(self) -> bool:
+        """
+        Load a persisted candidate set.
+
+        Returns:
+            True if loaded (False if missing, unreadable or built for other relationships)
+        """
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get('version') != self.VERSION or data.get('relationships') != self._signature():
+                logger.info("Synergy candidate set outdated (relationships changed), rebuilding")
+                return False
+
+            entities = {entity_id: (area, domain, device_class)
+                        for entity_id, (area, domain, device_class) in data['entities'].items()}
+            pairs = [((trigger_id, action_id, rel_type), area)
+                     for trigger_id, action_id, rel_type, area in data['pairs']]
+        except Exception as e:
+            logger.warning(f"Failed to load synergy candidate set from {self.path}: {e}")
+            return False
+
+        # Role buckets are cheap to rebuild; stored pairs are restored as they were
+        self._entities.clear()
+        self._triggers.clear()
+        self._actions.clear()
+        self._pairs.clear()
+        self._pairs_by_entity.clear()
+        for entity_id, key in entities.items():
+            self._add_entity(entity_id, key, generate=False)
+        for pair, area in pairs:
+            if pair[0] in entities and pair[1] in entities:
+                self._pairs[pair] = area
+                self._pairs_by_entity.setdefault(pair[0], set()).add(pair)
+                self._pairs_by_entity.setdefault(pair[1], set()).add(pair)
+        self._stats['loaded'] = True
+        self._dirty = False
+        logger.info(f"Loaded synergy candidate set: {len(self._entities)} entities, {len(self._pairs)} pairs")
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Persist the candidate set if it changed since the last save/load.
+
+        Args:
+            force: Save even if nothing changed
+
+        Returns:
+            True if written
+        """
+        if not self.path or not (self._dirty or force):
+            return False
+        data = {
+            'version': self.VERSION,
+            'relationships': self._signature(),
+            'entities': {entity_id: list(key) for entity_id, key in self._entities.items()},
+            'pairs': [[trigger_id, action_id, rel_type, area]
+                      for (trigger_id, action_id, rel_type), area in self._pairs.items()]
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save synergy candidate set to {self.path}: {e}")
+            return False
+        self._dirty = False
+        return True
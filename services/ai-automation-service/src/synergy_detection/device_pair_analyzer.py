@@ -9,11 +9,79 @@ Story AI3.2: Same-Area Device Pair Detection
 """
 
 import logging
-from typing import List, Dict, Optional
+import time
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
+# Area traffic samples the first N entities of an area
+AREA_SAMPLE_SIZE = 10
+
+
+class UsageCountCache:
+    """
+    Event counts per entity for a query window, cached per time bucket.
+    
+    One module-level instance is shared by every DevicePairAnalyzer (and any
+    other phase calling get_usage_count_cache()), so synergy, pattern and
+    suggestion phases of one analysis run reuse the same bulk query result.
+    Entries expire when the time bucket rolls over.
+    """
+    
+    def __init__(self, bucket_seconds: int = 3600, max_entries: int = 16):
+        """
+        Initialize usage count cache.
+        
+        Args:
+            bucket_seconds: Width of a cache time bucket (counts over a 30-day
+                window barely change within it)
+            max_entries: Maximum (source, window) entries kept
+        """
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Dict[str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def _key(self, source: Tuple, days: int, now: Optional[float]) -> Tuple:
+        bucket = int((now if now is not None else time.time()) // self.bucket_seconds)
+        return (source, days, bucket)
+    
+    def get(self, source: Tuple, days: int, now: Optional[float] = None) -> Optional[Dict[str, int]]:
+        """Get counts for a source and window in the current time bucket"""
+        counts = self._entries.get(self._key(source, days, now))
+        if counts is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return counts
+    
+    def put(self, source: Tuple, days: int, counts: Dict[str, int], now: Optional[float] = None):
+        """Store counts for a source and window in the current time bucket"""
+        key = self._key(source, days, now)
+        # Drop entries of past buckets, then the oldest if still full
+        self._entries = {k: v for k, v in self._entries.items() if k[2] == key[2]}
+        while len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = counts
+    
+    def clear(self):
+        """Drop all cached counts"""
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_shared_usage_cache = UsageCountCache()
+
+
+def get_usage_count_cache() -> UsageCountCache:
+    """Get the process-wide usage count cache"""
+    return _shared_usage_cache
+
 
 class DevicePairAnalyzer:
     """
@@ -25,19 +93,119 @@ class DevicePairAnalyzer:
     Story AI3.2: Same-Area Device Pair Detection
     """
     
-    def __init__(self, influxdb_client):
+    def __init__(self, influxdb_client, usage_cache: Optional[UsageCountCache] = None):
         """
         Initialize device pair analyzer.
         
         Args:
             influxdb_client: InfluxDB client for usage queries
+            usage_cache: Cache for bulk usage counts (default: shared process-wide cache)
         """
         self.influxdb = influxdb_client
+        self.usage_cache = usage_cache or get_usage_count_cache()
         self._usage_cache = {}
         self._area_cache = {}
+        self._bulk_failed = set()  # Windows (days) whose bulk query failed - use per-entity queries
         
         logger.info("DevicePairAnalyzer initialized")
     
+    def _source_key(self) -> Tuple:
+        """Identify the InfluxDB source for the shared cache"""
+        return (
+            getattr(self.influxdb, 'url', None),
+            getattr(self.influxdb, 'org', None),
+            getattr(self.influxdb, 'bucket', None)
+        )
+    
+    async def get_usage_counts(self, days: int = 30) -> Optional[Dict[str, int]]:
+        """
+        Get event counts for all entities over the window in one grouped query.
+        
+        Results are kept in the shared time-bucketed cache, so ranking any
+        number of synergies (and later phases) costs a single query.
+        
+        Args:
+            days: Number of days to analyze (default: 30)
+        
+        Returns:
+            Dict mapping entity_id to event count (entities without events are
+            absent), or None if the bulk query failed
+        """
+        source = self._source_key()
+        counts = self.usage_cache.get(source, days)
+        if counts is not None:
+            return counts
+        if days in self._bulk_failed:
+            return None
+        
+        try:
+            # Count each field table first (its _value types differ: string
+            # state fields vs float duration), then sum the integer counts per
+            # entity - the same total as the per-entity query
+            query = f'''
+            from(bucket: "home_assistant_events")
+              |> range(start: -{days}d)
+              |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
+              |> count()
+              |> group(columns: ["entity_id"])
+              |> sum()
+            '''
+            
+            # InfluxDB query_api.query is synchronous
+            result = self.influxdb.query_api.query(query, org=self.influxdb.org)
+            
+            counts = {}
+            for table in result or []:
+                for record in table.records:
+                    entity_id = record.values.get('entity_id')
+                    if entity_id:
+                        counts[entity_id] = counts.get(entity_id, 0) + int(record.get_value() or 0)
+            
+            self.usage_cache.put(source, days, counts)
+            logger.info(f"Bulk usage counts: {len(counts)} entities over {days} days (1 query)")
+            return counts
+            
+        except Exception as e:
+            logger.warning(f"Bulk usage query failed, falling back to per-entity queries: {e}")
+            self._bulk_failed.add(days)
+            return None
+    
+    @staticmethod
+    def _frequency_score(event_count: float, days: int) -> Tuple[float, float]:
+        """Map an event count to (events_per_day, usage frequency score)"""
+        events_per_day = event_count / days
+        
+        if events_per_day >= 100:
+            frequency = 1.0
+        elif events_per_day >= 50:
+            frequency = 0.9
+        elif events_per_day >= 20:
+            frequency = 0.7
+        elif events_per_day >= 10:
+            frequency = 0.5
+        elif events_per_day >= 5:
+            frequency = 0.3
+        else:
+            frequency = 0.1
+        return events_per_day, frequency
+    
+    @staticmethod
+    def _traffic_score(total_events: float, days: int) -> Tuple[float, float]:
+        """Map an area event count to (events_per_day, traffic score)"""
+        events_per_day = total_events / days if days > 0 else 0
+        
+        if events_per_day >= 500:
+            traffic = 1.0  # Very high (bedroom, kitchen)
+        elif events_per_day >= 200:
+            traffic = 0.9  # High (living room, bathroom)
+        elif events_per_day >= 100:
+            traffic = 0.7  # Medium-high (office, hallway)
+        elif events_per_day >= 50:
+            traffic = 0.6  # Medium (guest room, garage)
+        else:
+            traffic = 0.5  # Low (storage, utility)
+        return events_per_day, traffic
+    
     async def get_device_usage_frequency(
         self,
         device_id: str,
@@ -62,40 +230,32 @@ class DevicePairAnalyzer:
             return self._usage_cache[cache_key]
         
         try:
-            # Query InfluxDB for event count
-            query = f'''
-            from(bucket: "home_assistant_events")
-              |> range(start: -{days}d)
-              |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
-              |> filter(fn: (r) => r["entity_id"] == "{device_id}")
-              |> count()
-            '''
-            
-            # InfluxDB query_api.query is synchronous
-            result = self.influxdb.query_api.query(query, org=self.influxdb.org)
-            
-            # Parse result to get event count
-            event_count = 0
-            if result and len(result) > 0:
-                for table in result:
-                    for record in table.records:
-                        event_count += record.get_value()
+            # Bulk counts (if loaded) cover every entity; no events means count 0
+            bulk_counts = self.usage_cache.get(self._source_key(), days)
+            if bulk_counts is not None:
+                event_count = bulk_counts.get(device_id, 0)
+            else:
+                # Query InfluxDB for event count
+                query = f'''
+                from(bucket: "home_assistant_events")
+                  |> range(start: -{days}d)
+                  |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
+                  |> filter(fn: (r) => r["entity_id"] == "{device_id}")
+                  |> count()
+                '''
+                
+                # InfluxDB query_api.query is synchronous
+                result = self.influxdb.query_api.query(query, org=self.influxdb.org)
+                
+                # Parse result to get event count
+                event_count = 0
+                if result and len(result) > 0:
+                    for table in result:
+                        for record in table.records:
+                            event_count += record.get_value()
             
             # Calculate frequency score
-            events_per_day = event_count / days
-            
-            if events_per_day >= 100:
-                frequency = 1.0
-            elif events_per_day >= 50:
-                frequency = 0.9
-            elif events_per_day >= 20:
-                frequency = 0.7
-            elif events_per_day >= 10:
-                frequency = 0.5
-            elif events_per_day >= 5:
-                frequency = 0.3
-            else:
-                frequency = 0.1
+            events_per_day, frequency = self._frequency_score(event_count, days)
             
             # Cache result
             self._usage_cache[cache_key] = frequency
@@ -144,41 +304,35 @@ class DevicePairAnalyzer:
             if not area_entities:
                 return 0.5  # Default low traffic
             
-            # Query total events for area (sample up to 10 entities to avoid expensive queries)
-            sample_entities = area_entities[:10]
-            entity_filter = ' or '.join([f'r["entity_id"] == "{e}"' for e in sample_entities])
-            
-            query = f'''
-            from(bucket: "home_assistant_events")
-              |> range(start: -{days}d)
-              |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
-              |> filter(fn: (r) => {entity_filter})
-              |> count()
-            '''
-            
-            # InfluxDB query_api.query is synchronous
-            result = self.influxdb.query_api.query(query, org=self.influxdb.org)
+            # Total events for area (sample up to 10 entities to avoid expensive queries)
+            sample_entities = area_entities[:AREA_SAMPLE_SIZE]
             
-            # Parse result
-            total_events = 0
-            if result and len(result) > 0:
-                for table in result:
-                    for record in table.records:
-                        total_events += record.get_value()
+            bulk_counts = self.usage_cache.get(self._source_key(), days)
+            if bulk_counts is not None:
+                total_events = sum(bulk_counts.get(e, 0) for e in sample_entities)
+            else:
+                entity_filter = ' or '.join([f'r["entity_id"] == "{e}"' for e in sample_entities])
+                
+                query = f'''
+                from(bucket: "home_assistant_events")
+                  |> range(start: -{days}d)
+                  |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
+                  |> filter(fn: (r) => {entity_filter})
+                  |> count()
+                '''
+                
+                # InfluxDB query_api.query is synchronous
+                result = self.influxdb.query_api.query(query, org=self.influxdb.org)
+                
+                # Parse result
+                total_events = 0
+                if result and len(result) > 0:
+                    for table in result:
+                        for record in table.records:
+                            total_events += record.get_value()
             
             # Calculate traffic score (events per day across all entities)
-            events_per_day = total_events / days if days > 0 else 0
-            
-            if events_per_day >= 500:
-                traffic = 1.0  # Very high (bedroom, kitchen)
-            elif events_per_day >= 200:
-                traffic = 0.9  # High (living room, bathroom)
-            elif events_per_day >= 100:
-                traffic = 0.7  # Medium-high (office, hallway)
-            elif events_per_day >= 50:
-                traffic = 0.6  # Medium (guest room, garage)
-            else:
-                traffic = 0.5  # Low (storage, utility)
+            events_per_day, traffic = self._traffic_score(total_events, days)
             
             # Cache result
             self._area_cache[cache_key] = traffic
@@ -258,5 +412,6 @@ class DevicePairAnalyzer:
         """Clear cached usage data."""
         self._usage_cache = {}
         self._area_cache = {}
+        self._bulk_failed = set()
         logger.debug("DevicePairAnalyzer cache cleared")
 
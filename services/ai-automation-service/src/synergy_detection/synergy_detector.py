@@ -13,6 +13,8 @@ from typing import List, Dict, Optional, Set
 from datetime import datetime, timezone
 import asyncio
 
+from .candidate_index import SynergyCandidateSet
+
 logger = logging.getLogger(__name__)
 
 
@@ -77,7 +79,8 @@ class DeviceSynergyDetector:
         ha_client=None,
         influxdb_client=None,
         min_confidence: float = 0.7,
-        same_area_required: bool = True
+        same_area_required: bool = True,
+        candidate_store_path: Optional[str] = None
     ):
         """
         Initialize synergy detector.
@@ -88,6 +91,8 @@ class DeviceSynergyDetector:
             influxdb_client: Optional InfluxDB client for usage statistics (Story AI3.2)
             min_confidence: Minimum confidence threshold (0.0-1.0)
             same_area_required: Whether devices must be in same area
+            candidate_store_path: Optional JSON file persisting the compatible pair
+                candidate set between runs (updated incrementally)
         """
         self.data_api = data_api_client
         self.ha_client = ha_client
@@ -100,6 +105,10 @@ class DeviceSynergyDetector:
         self._entity_cache = None
         self._automation_cache = None
         
+        # Compatible pairs, maintained incrementally as entities come and go
+        self._candidates = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS, path=candidate_store_path)
+        self._candidates_loaded = False
+        
         # Initialize advanced analyzer if InfluxDB available (Story AI3.2)
         self.pair_analyzer = None
         if influxdb_client:
@@ -136,31 +145,24 @@ class DeviceSynergyDetector:
             
             logger.info(f"📊 Loaded {len(devices)} devices, {len(entities)} entities")
             
-            # Step 2: Detect device pairs by area
-            logger.info("   → Step 2: Finding device pairs...")
-            device_pairs = self._find_device_pairs_by_area(devices, entities)
-            logger.info(f"🔍 Found {len(device_pairs)} potential device pairs")
-            if device_pairs:
-                logger.info(f"   → Sample pairs: {[(p.get('domain1', '?'), p.get('domain2', '?'), p.get('area', '?')) for p in device_pairs[:3]]}")
-            
-            # Step 3: Filter for compatible relationships
-            logger.info("   → Step 3: Filtering for compatible relationships...")
-            compatible_pairs = self._filter_compatible_pairs(device_pairs)
+            # Step 2: Update compatible pair candidates (only new/changed/removed entities)
+            logger.info("   → Step 2: Updating compatible pair candidates...")
+            compatible_pairs = self._find_compatible_pairs(entities)
             logger.info(f"✅ Found {len(compatible_pairs)} compatible pairs")
             if compatible_pairs:
                 logger.info(f"   → Sample compatible: {[p.get('relationship_type', '?') for p in compatible_pairs[:3]]}")
             
-            # Step 4: Check for existing automations
+            # Step 3: Check for existing automations
             synergies = await self._filter_existing_automations(compatible_pairs)
             logger.info(f"🆕 Found {len(synergies)} new synergy opportunities (no existing automation)")
             
-            # Step 5: Rank opportunities (with advanced scoring if available)
+            # Step 4: Rank opportunities (with advanced scoring if available)
             if self.pair_analyzer:
                 ranked_synergies = await self._rank_opportunities_advanced(synergies, entities)
             else:
                 ranked_synergies = self._rank_opportunities(synergies)
             
-            # Step 6: Filter by confidence threshold
+            # Step 5: Filter by confidence threshold
             final_synergies = [
                 s for s in ranked_synergies
                 if s['confidence'] >= self.min_confidence
@@ -213,110 +215,34 @@ class DeviceSynergyDetector:
             logger.error(f"Failed to fetch entities: {e}")
             return []
     
-    def _find_device_pairs_by_area(
-        self,
-        devices: List[Dict],
-        entities: List[Dict]
-    ) -> List[Dict]:
-        """
-        Find device pairs in the same area.
-        
-        Args:
-            devices: List of devices from data-api
-            entities: List of entities from data-api
-        
-        Returns:
-            List of potential device pairs
+    def _find_compatible_pairs(self, entities: List[Dict]) -> List[Dict]:
         """
-        # Group entities by area
-        entities_by_area = {}
-        for entity in entities:
-            area = entity.get('area_id')
-            if area:
-                if area not in entities_by_area:
-                    entities_by_area[area] = []
-                entities_by_area[area].append(entity)
-        
-        pairs = []
-        
-        # Find pairs within each area
-        for area, area_entities in entities_by_area.items():
-            for i, entity1 in enumerate(area_entities):
-                for entity2 in area_entities[i+1:]:
-                    # Don't pair entity with itself or same domain
-                    if entity1['entity_id'] == entity2['entity_id']:
-                        continue
-                    
-                    domain1 = entity1['entity_id'].split('.')[0]
-                    domain2 = entity2['entity_id'].split('.')[0]
-                    
-                    # Create potential pair
-                    pairs.append({
-                        'entity1': entity1,
-                        'entity2': entity2,
-                        'area': area,
-                        'domain1': domain1,
-                        'domain2': domain2
-                    })
+        Find compatible device pairs in the same area.
         
-        return pairs
-    
-    def _filter_compatible_pairs(self, pairs: List[Dict]) -> List[Dict]:
-        """
-        Filter device pairs for compatible relationships.
+        Uses the incrementally maintained candidate set: entities are indexed
+        by the relationship roles they can play, so only compatible pairs are
+        ever generated, and only for entities added or changed since the last
+        run (persisted across runs if a candidate_store_path was given).
         
         Args:
-            pairs: List of potential device pairs
+            entities: List of entities from data-api
         
         Returns:
             List of compatible pairs with relationship metadata
         """
-        compatible = []
+        if not self._candidates_loaded:
+            self._candidates.load()
+            self._candidates_loaded = True
         
-        for pair in pairs:
-            entity1 = pair['entity1']
-            entity2 = pair['entity2']
-            domain1 = pair['domain1']
-            domain2 = pair['domain2']
-            
-            # Check each relationship type
-            for rel_type, rel_config in COMPATIBLE_RELATIONSHIPS.items():
-                trigger_domain = rel_config['trigger_domain']
-                action_domain = rel_config['action_domain']
-                
-                # Check if pair matches this relationship (either direction)
-                match = None
-                if domain1 == trigger_domain and domain2 == action_domain:
-                    # Check device class if required
-                    if 'trigger_device_class' in rel_config:
-                        device_class1 = entity1.get('device_class', entity1.get('original_device_class'))
-                        if device_class1 == rel_config['trigger_device_class']:
-                            match = (entity1, entity2)
-                    else:
-                        match = (entity1, entity2)
-                
-                elif domain2 == trigger_domain and domain1 == action_domain:
-                    # Reverse direction
-                    if 'trigger_device_class' in rel_config:
-                        device_class2 = entity2.get('device_class', entity2.get('original_device_class'))
-                        if device_class2 == rel_config['trigger_device_class']:
-                            match = (entity2, entity1)
-                    else:
-                        match = (entity2, entity1)
-                
-                if match:
-                    trigger_entity, action_entity = match
-                    compatible.append({
-                        'trigger_entity': trigger_entity['entity_id'],
-                        'trigger_name': trigger_entity.get('friendly_name', trigger_entity['entity_id']),
-                        'action_entity': action_entity['entity_id'],
-                        'action_name': action_entity.get('friendly_name', action_entity['entity_id']),
-                        'area': pair['area'],
-                        'relationship_type': rel_type,
-                        'relationship_config': rel_config
-                    })
+        changes = self._candidates.sync(entities)
+        if any(changes.values()):
+            logger.info(
+                f"   → Candidate set updated: +{changes['added']} / -{changes['removed']} / "
+                f"~{changes['changed']} entities, {len(self._candidates)} pairs"
+            )
+            self._candidates.save()
         
-        return compatible
+        return self._candidates.compatible_pairs(entities)
     
     async def _filter_existing_automations(
         self,
@@ -473,6 +399,10 @@ class DeviceSynergyDetector:
         """
         logger.info("📊 Using advanced impact scoring with usage data...")
         
+        # One grouped query for all entities; per-synergy lookups then hit the cache
+        if synergies:
+            await self.pair_analyzer.get_usage_counts()
+        
         scored_synergies = []
         
         for synergy in synergies:
@@ -0,0 +1,138 @@
+"""
+Unit tests for the shared AnalysisFrame and ParallelDetectorRunner
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from src.pattern_detection.analysis_frame import AnalysisFrame, is_prepared
+from src.pattern_detection.parallel_runner import ParallelDetectorRunner
+from src.pattern_detection.sequence_detector import SequenceDetector
+from src.pattern_detection.day_type_detector import DayTypeDetector
+
+
+def create_events(days: int = 6) -> pd.DataFrame:
+    """
+    Helper to create unsorted raw events with an InfluxDB-style _time column.
+
+    Args:
+        days: Number of days of motion -> light sequences
+
+    Returns:
+        DataFrame with _time, entity_id, state columns (newest first)
+    """
+    base = datetime(2025, 1, 6, 7, 0, 0)
+    rows = []
+    for day in range(days):
+        t = base + timedelta(days=day)
+        rows.append({'_time': t, 'entity_id': 'binary_sensor.hall_motion', 'state': 'on'})
+        rows.append({'_time': t + timedelta(minutes=1), 'entity_id': 'light.hall', 'state': 'on'})
+        rows.append({'_time': t + timedelta(minutes=2), 'entity_id': 'binary_sensor.hall_motion', 'state': 'off'})
+        rows.append({'_time': t + timedelta(minutes=20), 'entity_id': 'light.hall', 'state': 'off'})
+    return pd.DataFrame(rows[::-1])
+
+
+class TestAnalysisFrame:
+    """Test shared analysis frame preprocessing"""
+
+    def test_prepares_sorted_typed_frame(self):
+        """Test time normalization, sort order, codes and time features"""
+        raw = create_events()
+        frame = AnalysisFrame.from_events(raw)
+        df = frame.df
+
+        assert is_prepared(df)
+        assert not is_prepared(raw)
+        assert 'time' not in raw.columns  # Raw frame untouched
+        assert df['time'].is_monotonic_increasing
+        assert df['entity_id'].dtype.name == 'category'
+        assert (df['entity_code'] == df['entity_id'].cat.codes).all()
+        assert df['hour'].iloc[0] == 7
+        assert df['dayofweek'].iloc[0] == 0
+        assert df['season'].iloc[0] == 'winter'
+
+    def test_entity_group_index(self):
+        """Test CSR entity index returns time-ordered rows per entity"""
+        frame = AnalysisFrame.from_events(create_events(days=3))
+
+        rows = frame.entity_rows('light.hall')
+        assert len(rows) == 6
+        assert (frame.df['entity_id'].iloc[rows] == 'light.hall').all()
+        assert np.all(np.diff(rows) > 0)
+        assert frame.entity_rows('light.unknown') is None
+
+        groups = dict(frame.groupby_entity())
+        assert set(groups) == {'binary_sensor.hall_motion', 'light.hall'}
+        assert len(groups['binary_sensor.hall_motion']) == 6
+
+        with pytest.raises(ValueError):
+            frame.entity_order[0] = 1
+
+    def test_detectors_do_not_mutate_shared_frame(self):
+        """Test detectors treat the prepared frame as read-only"""
+        frame = AnalysisFrame.from_events(create_events())
+        columns_before = list(frame.df.columns)
+        snapshot = frame.df.copy()
+
+        SequenceDetector(min_sequence_occurrences=3, min_confidence=0.1).detect_patterns(frame.df)
+        DayTypeDetector(min_confidence=0.1).detect_patterns(frame.df)
+
+        assert list(frame.df.columns) == columns_before
+        pd.testing.assert_frame_equal(frame.df, snapshot)
+
+    def test_same_patterns_as_raw_frame(self):
+        """Test a detector finds the same patterns on the prepared frame"""
+        raw = create_events().rename(columns={'_time': 'time'})
+        frame = AnalysisFrame.from_events(raw)
+
+        detector = SequenceDetector(min_sequence_occurrences=3, min_confidence=0.1)
+        from_raw = detector.detect_patterns(raw.copy())
+        from_frame = detector.detect_patterns(frame.df)
+
+        assert from_frame
+        assert [p['devices'] for p in from_raw] == [p['devices'] for p in from_frame]
+        assert [p['occurrences'] for p in from_raw] == [p['occurrences'] for p in from_frame]
+
+
+class TestParallelDetectorRunner:
+    """Test running detectors over the shared frame"""
+
+    def test_unknown_detector(self):
+        """Test unknown detector names are rejected"""
+        runner = ParallelDetectorRunner()
+        frame = AnalysisFrame.from_events(create_events())
+
+        with pytest.raises(ValueError):
+            runner.run(frame, [('unknown', {})])
+
+    def test_parallel_matches_sequential(self):
+        """Test process pool results match the sequential run"""
+        frame = AnalysisFrame.from_events(create_events())
+        specs = [
+            ('sequence', dict(min_sequence_occurrences=3, min_confidence=0.1)),
+            ('day_type', dict(min_confidence=0.1)),
+        ]
+
+        sequential = ParallelDetectorRunner(max_workers=0).run(frame, specs)
+        parallel_runner = ParallelDetectorRunner(max_workers=2)
+        parallel = parallel_runner.run(frame, specs)
+
+        assert list(parallel) == ['sequence', 'day_type']
+        assert parallel['sequence']
+        for name in parallel:
+            assert [p['devices'] for p in parallel[name]] == [p['devices'] for p in sequential[name]]
+        assert set(parallel_runner.timings) == {'sequence', 'day_type'}
+
+    def test_aggregates_stored_in_parent(self):
+        """Test aggregates are written by the parent with the shared frame"""
+        frame = AnalysisFrame.from_events(create_events())
+        aggregate_client = Mock()
+        runner = ParallelDetectorRunner(max_workers=0, aggregate_client=aggregate_client)
+
+        results = runner.run(frame, [('sequence', dict(min_sequence_occurrences=3, min_confidence=0.1))])
+
+        assert results['sequence']
+        assert aggregate_client.write_sequence_daily.called
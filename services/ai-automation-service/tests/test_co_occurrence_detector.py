@@ -4,6 +4,7 @@ Unit tests for Co-Occurrence Pattern Detector
 
 import pytest
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from src.pattern_analyzer.co_occurrence import CoOccurrencePatternDetector
 
@@ -363,6 +364,77 @@ class TestCoOccurrencePatternDetector:
         assert isinstance(patterns, list)
 
 
+class TestVectorizedCoOccurrenceEngine:
+    """Test the NumPy co-occurrence engine matches the Python engine"""
+    
+    def _random_events(self, n_events: int = 600, n_devices: int = 8, seed: int = 7) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        base = pd.Timestamp('2025-10-01 00:00:00')
+        # Second-level timestamps over two days so windows overlap and ties occur
+        offsets = rng.integers(0, 2 * 24 * 3600, size=n_events)
+        return pd.DataFrame({
+            'device_id': [f"light.device_{i}" for i in rng.integers(0, n_devices, size=n_events)],
+            'timestamp': base + pd.to_timedelta(offsets, unit='s'),
+            'state': ['on'] * n_events
+        })
+    
+    def test_rejects_unknown_engine(self):
+        """Test unknown engine names are rejected"""
+        with pytest.raises(ValueError):
+            CoOccurrencePatternDetector(engine='gpu')
+    
+    def test_matches_python_engine(self):
+        """Test both engines produce identical patterns"""
+        events = self._random_events()
+        
+        python_patterns = CoOccurrencePatternDetector(
+            window_minutes=30, min_support=2, min_confidence=0.1, engine='python'
+        ).detect_patterns(events)
+        vectorized_patterns = CoOccurrencePatternDetector(
+            window_minutes=30, min_support=2, min_confidence=0.1, engine='vectorized'
+        ).detect_patterns(events)
+        
+        assert len(python_patterns) > 0
+        by_pair = {p['device_id']: p for p in python_patterns}
+        assert set(by_pair) == {p['device_id'] for p in vectorized_patterns}
+        for pattern in vectorized_patterns:
+            expected = by_pair[pattern['device_id']]
+            assert pattern['occurrences'] == expected['occurrences']
+            assert pattern['confidence'] == pytest.approx(expected['confidence'])
+            assert pattern['metadata']['avg_time_delta_seconds'] == pytest.approx(
+                expected['metadata']['avg_time_delta_seconds']
+            )
+    
+    def test_chunked_pair_counting(self, monkeypatch):
+        """Test pair counts are unchanged when expansion is split into many chunks"""
+        from src.pattern_analyzer import co_occurrence
+        
+        events = self._random_events(n_events=300)
+        detector = CoOccurrencePatternDetector(window_minutes=60, min_support=1, min_confidence=0.0, engine='vectorized')
+        unchunked = {p['device_id']: p['occurrences'] for p in detector.detect_patterns(events)}
+        
+        monkeypatch.setattr(co_occurrence, 'MAX_PAIRS_PER_CHUNK', 50)
+        chunked = {p['device_id']: p['occurrences'] for p in detector.detect_patterns(events)}
+        
+        assert chunked == unchunked
+    
+    def test_optimized_skips_sampling(self):
+        """Test the optimized path runs the vectorized engine on the full dataset"""
+        dates = pd.date_range('2025-01-01', periods=30000, freq='10min')
+        events = pd.DataFrame({
+            'device_id': ['motion.hall'] * len(dates) + ['light.hall'] * len(dates),
+            'timestamp': list(dates) + list(dates + pd.Timedelta(seconds=20)),
+            'state': ['on'] * (len(dates) * 2)
+        })
+        
+        detector = CoOccurrencePatternDetector(window_minutes=5, min_support=5, min_confidence=0.5, engine='vectorized')
+        patterns = detector.detect_patterns_optimized(events)
+        
+        assert len(patterns) == 1
+        assert patterns[0]['occurrences'] == len(dates)
+        assert patterns[0]['total_events'] == len(events)
+
+
 @pytest.mark.asyncio
 async def test_co_occurrence_detector_integration():
     """
@@ -2,11 +2,12 @@
 Unit tests for Data API Client
 """
 
+import io
 import pytest
 import httpx
 import pandas as pd
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, patch, MagicMock
 from src.clients.data_api_client import DataAPIClient
 
@@ -285,6 +286,84 @@ class TestDataAPIClient:
         # Should not raise any errors
 
 
+class TestColumnarEventFetch:
+    """Test streaming columnar event fetch from InfluxDB"""
+    
+    PAGE_1 = (
+        ",result,table,_time,_value,attr_friendly_name,device_id,entity_id,event_type\r\n"
+        ",_result,0,2025-01-01T07:00:00Z,on,Hall Light,dev1,light.hall,state_changed\r\n"
+        ",_result,0,2025-01-01T07:00:02.5Z,off,,,binary_sensor.motion,state_changed\r\n"
+        ",_result,0,2025-01-01T07:10:00Z,off,Hall Light,dev1,light.hall,state_changed\r\n"
+    )
+    PAGE_2 = (
+        ",result,table,_time,_value,entity_id,event_type\r\n"
+        ",_result,0,2025-01-02T08:00:00Z,21.5,sensor.temp,state_changed\r\n"
+    )
+    
+    def _mock_pages(self, data_api_client, pages):
+        responses = [io.BytesIO(page.encode()) for page in pages]
+        query_raw = MagicMock(side_effect=lambda *args, **kwargs: responses.pop(0))
+        data_api_client.influxdb_client.query_api = MagicMock(query_raw=query_raw)
+        return query_raw
+    
+    @pytest.mark.asyncio
+    async def test_pages_and_types(self, data_api_client):
+        """Test time-range paging produces typed, time-ordered columns"""
+        query_raw = self._mock_pages(data_api_client, [self.PAGE_1, self.PAGE_2, "\r\n"])
+        
+        df = await data_api_client.fetch_events(
+            start_time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            end_time=datetime(2025, 1, 3, 12, tzinfo=timezone.utc),
+            limit=None,
+            columnar=True
+        )
+        
+        assert query_raw.call_count == 3
+        first_query = query_raw.call_args_list[0][0][0]
+        assert 'stop: 2025-01-02T00:00:00+00:00' in first_query
+        assert 'limit(' not in first_query
+        
+        assert list(df['entity_id']) == ['light.hall', 'binary_sensor.motion', 'light.hall', 'sensor.temp']
+        assert str(df['_time'].dtype) == 'datetime64[ns, UTC]'
+        for col in ['entity_id', 'state', 'domain', 'friendly_name', 'device_id', 'event_type']:
+            assert df[col].dtype.name == 'category'
+        assert df['_time'].is_monotonic_increasing
+        assert (df['timestamp'] == df['_time']).all()
+        
+        # Legacy defaults for missing tags
+        assert df['friendly_name'].iloc[1] == 'binary_sensor.motion'
+        assert df['device_id'].iloc[3] == ''
+        assert list(df['domain']) == ['light', 'binary_sensor', 'light', 'sensor']
+    
+    @pytest.mark.asyncio
+    async def test_limit_stops_paging(self, data_api_client):
+        """Test an explicit limit stops paging early and trims the result"""
+        query_raw = self._mock_pages(data_api_client, [self.PAGE_1, self.PAGE_2])
+        
+        df = await data_api_client.fetch_events(
+            start_time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            end_time=datetime(2025, 1, 3, tzinfo=timezone.utc),
+            limit=2,
+            columnar=True
+        )
+        
+        assert query_raw.call_count == 1
+        assert len(df) == 2
+    
+    @pytest.mark.asyncio
+    async def test_empty_range(self, data_api_client):
+        """Test an empty range returns an empty DataFrame"""
+        self._mock_pages(data_api_client, ["\r\n"])
+        
+        df = await data_api_client.fetch_events(
+            start_time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            end_time=datetime(2025, 1, 1, 12, tzinfo=timezone.utc),
+            columnar=True
+        )
+        
+        assert df.empty
+
+
 @pytest.mark.integration
 @pytest.mark.asyncio
 async def test_real_data_api_connection():
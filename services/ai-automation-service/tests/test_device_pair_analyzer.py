@@ -9,7 +9,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timezone
 
-from src.synergy_detection.device_pair_analyzer import DevicePairAnalyzer
+from src.synergy_detection.device_pair_analyzer import DevicePairAnalyzer, UsageCountCache
 
 
 # ============================================================================
@@ -315,6 +315,101 @@ async def test_cache_clear(mock_influxdb_client, sample_entities):
     assert len(analyzer._area_cache) == 0
 
 
+# ============================================================================
+# Bulk Usage Tests
+# ============================================================================
+
+def create_bulk_client(counts):
+    """Mock InfluxDB client answering grouped count queries with one record per entity"""
+    client = MagicMock()
+    client.url = "http://influxdb:8086"
+    client.org = "test-org"
+    client.bucket = "home_assistant_events"
+    
+    def mock_query(query_str, org=None):
+        tables = []
+        for entity_id, count in counts.items():
+            record = MagicMock()
+            record.values = {'entity_id': entity_id, '_value': count}
+            record.get_value = MagicMock(return_value=count)
+            table = MagicMock()
+            table.records = [record]
+            tables.append(table)
+        return tables
+    
+    client.query_api = MagicMock()
+    client.query_api.query = MagicMock(side_effect=mock_query)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_bulk_usage_counts_single_query(sample_entities):
+    """Test usage and area scores for many synergies come from one grouped query"""
+    client = create_bulk_client({
+        'light.bedroom_high_usage': 6000,
+        'binary_sensor.bedroom_motion': 450,
+        'light.kitchen': 90
+    })
+    analyzer = DevicePairAnalyzer(client, usage_cache=UsageCountCache())
+    
+    counts = await analyzer.get_usage_counts()
+    assert counts['light.bedroom_high_usage'] == 6000
+    
+    assert await analyzer.get_device_usage_frequency('light.bedroom_high_usage') == 1.0
+    assert await analyzer.get_device_usage_frequency('binary_sensor.bedroom_motion') == 0.5
+    assert await analyzer.get_device_usage_frequency('light.kitchen') == 0.1
+    assert await analyzer.get_device_usage_frequency('light.unused') == 0.1
+    assert await analyzer.get_area_traffic('bedroom', sample_entities) == 0.9
+    
+    assert client.query_api.query.call_count == 1
+    assert 'group(columns: ["entity_id"])' in client.query_api.query.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_usage_counts_shared_between_analyzers():
+    """Test a second analyzer in the same time bucket reuses the cached counts"""
+    client = create_bulk_client({'light.kitchen': 90})
+    cache = UsageCountCache()
+    
+    await DevicePairAnalyzer(client, usage_cache=cache).get_usage_counts()
+    await DevicePairAnalyzer(client, usage_cache=cache).get_usage_counts()
+    assert client.query_api.query.call_count == 1
+    
+    # Counts expire with the time bucket
+    assert cache.get(("http://influxdb:8086", "test-org", "home_assistant_events"), 30, now=0) is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_usage_query_counts_before_grouping():
+    """Test field tables are counted before regrouping (no mixed _value types in one table)"""
+    client = create_bulk_client({'light.kitchen': 90})
+    
+    await DevicePairAnalyzer(client, usage_cache=UsageCountCache()).get_usage_counts(days=7)
+    
+    query = client.query_api.query.call_args[0][0]
+    steps = [line.strip() for line in query.strip().splitlines()]
+    assert steps == [
+        'from(bucket: "home_assistant_events")',
+        '|> range(start: -7d)',
+        '|> filter(fn: (r) => r["_measurement"] == "home_assistant_events")',
+        '|> count()',
+        '|> group(columns: ["entity_id"])',
+        '|> sum()'
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_usage_failure_falls_back_to_per_entity(mock_influxdb_client):
+    """Test a failed bulk query falls back to per-entity queries"""
+    mock_influxdb_client.query_api.query.side_effect = [Exception("Query failed"), None]
+    analyzer = DevicePairAnalyzer(mock_influxdb_client, usage_cache=UsageCountCache())
+    
+    assert await analyzer.get_usage_counts() is None
+    assert await analyzer.get_usage_counts() is None  # not retried
+    assert await analyzer.get_device_usage_frequency('light.kitchen') == 0.1
+    assert mock_influxdb_client.query_api.query.call_count == 2
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
 
@@ -0,0 +1,114 @@
+"""
+Unit tests for DurationDetector on/off pairing
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.pattern_detection.duration_detector import DurationDetector
+
+
+def create_device_events(entity_id: str, cycles: list, start: datetime = datetime(2025, 1, 6, 18, 0, 0)) -> list:
+    """
+    Helper to create on/off cycles for one device.
+
+    Args:
+        entity_id: Device entity ID
+        cycles: List of (minutes after start, state) tuples
+        start: Base time
+
+    Returns:
+        List of event rows
+    """
+    return [
+        {'time': start + timedelta(minutes=minutes), 'entity_id': entity_id, 'state': state}
+        for minutes, state in cycles
+    ]
+
+
+class TestDurationPairing:
+    """Test searchsorted on/off pairing"""
+
+    @pytest.fixture
+    def detector(self):
+        return DurationDetector(min_confidence=0.0, enable_ml=False)
+
+    def test_pairs_each_on_with_next_later_off(self, detector):
+        """Test every on event is paired with the first later off event"""
+        events = pd.DataFrame(create_device_events('light.hall', [
+            (0, 'on'), (10, 'off'),
+            (20, 'on'), (25, 'on'), (40, 'off'),  # repeated on: both pair with the same off
+            (50, 'off'),                          # off without on
+            (60, 'unavailable'),
+            (70, 'on'),                           # on without later off
+        ]))
+
+        assert detector._calculate_usage_durations(events) == [600.0, 1200.0, 900.0]
+
+    def test_off_at_same_time_is_not_paired(self, detector):
+        """Test the off event must be strictly later than the on event"""
+        events = pd.DataFrame(create_device_events('light.hall', [(0, 'off'), (0, 'on'), (5, 'off')]))
+
+        assert detector._calculate_usage_durations(events) == [300.0]
+
+    def test_unsorted_input(self, detector):
+        """Test pairing does not depend on input order"""
+        events = pd.DataFrame(create_device_events('light.hall', [(0, 'on'), (10, 'off'), (20, 'on'), (35, 'off')]))
+
+        assert detector._calculate_usage_durations(events.iloc[::-1]) == [600.0, 900.0]
+
+    def test_auto_off_events_keep_on_times(self, detector):
+        """Test auto-off detection reports the on time of each 5-minute cycle"""
+        cycles = []
+        for cycle in range(4):
+            cycles += [(cycle * 60, 'on'), (cycle * 60 + 5, 'off')]
+        events = pd.DataFrame(create_device_events('light.stairs', cycles))
+
+        auto_off = detector._find_auto_off_events(events)
+
+        assert [event['time'] for event in auto_off] == [
+            pd.Timestamp(2025, 1, 6, 18, 0) + pd.Timedelta(hours=cycle) for cycle in range(4)
+        ]
+        assert all(event['duration_minutes'] == 5 for event in auto_off)
+
+
+class TestDurationDetection:
+    """Test detection over the shared per-entity groups"""
+
+    def test_usage_patterns_per_device(self):
+        """Test usage durations are detected per device and caches are released"""
+        rows = []
+        for day in range(5):
+            start = datetime(2025, 1, 6, 18, 0, 0) + timedelta(days=day)
+            rows += create_device_events('light.living_room', [(0, 'on'), (30, 'off')], start)
+            rows += create_device_events('switch.fan', [(0, 'on'), (90, 'off')], start)
+        detector = DurationDetector(min_confidence=0.0, enable_ml=False)
+
+        patterns = detector.detect_patterns(pd.DataFrame(rows))
+
+        usage = {p['devices'][0]: p for p in patterns if p['pattern_type'] == 'usage_duration'}
+        assert usage['light.living_room']['metadata']['avg_duration_seconds'] == 1800
+        assert usage['switch.fan']['metadata']['avg_duration_seconds'] == 5400
+        assert usage['light.living_room']['occurrences'] == 5
+        assert detector._groups_cache is None
+        assert detector._pairs_cache == {}
+
+    def test_device_groups_split_once(self):
+        """Test entity groups are time-ordered slices of the sorted frame"""
+        rng = np.random.default_rng(5)
+        events = pd.DataFrame({
+            'time': pd.Timestamp('2025-01-06') + pd.to_timedelta(np.sort(rng.integers(0, 86400, 200)), unit='s'),
+            'entity_id': rng.choice(['light.a', 'light.b', 'switch.c'], 200),
+            'state': rng.choice(['on', 'off'], 200)
+        })
+        detector = DurationDetector()
+
+        groups = detector._device_groups(events)
+
+        assert list(groups) == ['light.a', 'light.b', 'switch.c']
+        assert detector._device_groups(events) is groups
+        for entity_id, device_events in groups.items():
+            expected = events[events['entity_id'] == entity_id]
+            pd.testing.assert_frame_equal(device_events, expected)
@@ -0,0 +1,189 @@
+"""
+Unit tests for the EmbeddingStore and its users
+"""
+
+import sqlite3
+import numpy as np
+import pytest
+
+from src.nlevel_synergy.embedding_store import EmbeddingStore
+from src.nlevel_synergy.embedding_cache import EmbeddingCache
+from src.services.ensemble_entity_validator import EnsembleEntityValidator
+
+
+def random_embeddings(count: int, dim: int = 384, seed: int = 0) -> np.ndarray:
+    """Helper to create random float32 embeddings"""
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def brute_force_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> list:
+    """Reference top-k cosine search"""
+    normalized = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores, kind='stable')[:k])
+
+
+class TestEmbeddingStore:
+    """Test storage, search and persistence"""
+
+    def test_search_matches_brute_force(self):
+        """Test batched top-k search equals a per-vector cosine ranking"""
+        matrix = random_embeddings(500)
+        ids = [f"sensor.s{i}" for i in range(500)]
+        store = EmbeddingStore(dim=384, initial_capacity=8)
+        store.add(ids, matrix)
+
+        queries = random_embeddings(4, seed=1)
+        results = store.search(queries, k=10)
+
+        for query, result in zip(queries, results):
+            assert [entity_id for entity_id, _ in result] == [ids[i] for i in brute_force_top_k(matrix, query, 10)]
+            scores = [score for _, score in result]
+            assert scores == sorted(scores, reverse=True)
+
+    def test_restricted_search_and_ties(self):
+        """Test candidate restriction and candidate-order tie breaking"""
+        store = EmbeddingStore()
+        store.add(['light.a', 'light.b', 'light.c'], [[1, 0], [1, 0], [0, 1]])
+
+        assert store.top_k([1, 0], k=1) == [('light.a', pytest.approx(1.0))]
+        assert store.top_k([1, 0], k=1, ids=['light.b', 'light.a'])[0][0] == 'light.b'
+        assert [entity_id for entity_id, _ in store.top_k([1, 0], k=5, min_score=0.5)] == ['light.a', 'light.b']
+        assert store.top_k([1, 0], k=1, ids=['light.missing']) == []
+
+    def test_upsert_remove_and_get(self):
+        """Test replacing, removing and reading embeddings"""
+        store = EmbeddingStore(normalize=False)
+        store.add(['a', 'b', 'c'], [[2, 0], [0, 3], [1, 1]])
+        store.add(['b'], [[0, 5]])
+        assert store.remove(['a', 'missing']) == 1
+
+        assert len(store) == 2
+        assert 'a' not in store
+        assert store.get('b').tolist() == [0.0, 5.0]
+        assert store.get('c').tolist() == [1.0, 1.0]
+        found, matrix = store.get_many(['c', 'a', 'b'])
+        assert found == ['c', 'b']
+        assert matrix.shape == (2, 2)
+        # Unnormalized storage still scores cosine similarity
+        assert store.top_k([0, 1], k=1) == [('b', pytest.approx(1.0))]
+
+    @pytest.mark.parametrize("dtype", ['float16', 'int8'])
+    def test_compact_dtypes_stay_close(self, dtype):
+        """Test float16/int8 storage keeps similarities close to float32"""
+        matrix = random_embeddings(200)
+        ids = [f"e{i}" for i in range(200)]
+        exact = EmbeddingStore()
+        compact = EmbeddingStore(dtype=dtype)
+        exact.add(ids, matrix)
+        compact.add(ids, matrix)
+
+        query = random_embeddings(1, seed=2)
+        difference = np.abs(exact.similarity(query) - compact.similarity(query)).max()
+
+        assert difference < 0.02
+        assert compact.get_store_statistics()['size_mb'] < exact.get_store_statistics()['size_mb']
+
+    def test_save_and_mmap_load(self, tmp_path):
+        """Test saved stores load memory-mapped and copy on first write"""
+        matrix = random_embeddings(50)
+        ids = [f"e{i}" for i in range(50)]
+        store = EmbeddingStore(dtype='int8')
+        store.add(ids, matrix)
+        store.save(tmp_path / "embeddings")
+
+        loaded = EmbeddingStore.load(tmp_path / "embeddings")
+        assert loaded.get_store_statistics()['mmapped']
+        assert loaded.ids == ids
+        assert loaded.search(matrix[:3], k=5) == store.search(matrix[:3], k=5)
+
+        loaded.add(['new'], matrix[0])
+        assert not loaded.get_store_statistics()['mmapped']
+        assert len(loaded) == 51
+        assert len(EmbeddingStore.load(tmp_path / "embeddings")) == 50
+
+    def test_similar_pairs(self):
+        """Test pairwise similarity threshold search"""
+        store = EmbeddingStore()
+        store.add(['a', 'b', 'c'], [[1, 0], [0.9, 0.1], [0, 1]])
+
+        pairs = store.similar_pairs(0.9)
+
+        assert [(a, b) for a, b, _ in pairs] == [('a', 'b')]
+
+
+class TestEmbeddingCache:
+    """Test the store-backed embedding cache"""
+
+    @pytest.fixture
+    def db(self):
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE device_embeddings (entity_id TEXT PRIMARY KEY, embedding BLOB)")
+        for i, embedding in enumerate(random_embeddings(5)):
+            db.execute("INSERT INTO device_embeddings VALUES (?, ?)", (f"light.l{i}", embedding.tobytes()))
+        return db
+
+    def test_load_search_and_lru_eviction(self, db):
+        """Test embeddings round-trip, are searchable and evicted least recently used first"""
+        cache = EmbeddingCache(db, max_cache_mb=1)
+        cache.max_cache_entries = 3
+        expected = random_embeddings(5)
+
+        embeddings = cache.load_embeddings(["light.l0", "light.l1", "light.l2"])
+        assert np.allclose(embeddings["light.l1"].numpy(), expected[1])
+
+        cache.load_embeddings(["light.l0"])  # l1 is now least recently used
+        cache.load_embeddings(["light.l3"], convert_to_tensor=False)
+
+        assert cache.get_cache_stats()['cached_embeddings'] == 3
+        assert "light.l1" not in cache.store
+        assert cache.search(expected[3], k=1)[0][0] == "light.l3"
+
+
+class FakeSentenceModel:
+    """Deterministic encoder counting encoded strings"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.encoded += len(texts)
+        vectors = np.array([[text.count('kitchen'), text.count('office'), len(text) % 3 + 0.5] for text in texts],
+                           dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+class TestEnsembleEmbeddingValidation:
+    """Test embedding validation through the store"""
+
+    async def test_best_match_and_encoding_reuse(self):
+        """Test the best match equals the pairwise loop and embeddings are encoded once"""
+        model = FakeSentenceModel()
+        validator = EnsembleEntityValidator(ha_client=None, sentence_transformer_model=model)
+        available = [{'entity_id': 'light.office'}, {'entity_id': 'light.kitchen'}, {'entity_id': ''}]
+
+        first = await validator._validate_with_embeddings('light.kitchen', available)
+        encoded = model.encoded
+        second = await validator._validate_with_embeddings('light.kitchen', available)
+
+        assert first.details['best_match'] == 'light.kitchen'
+        assert first.exists
+        assert first.confidence == pytest.approx(1.0, abs=1e-6)
+        assert second.details == first.details
+        assert model.encoded == encoded == 2
+
+    def test_entity_id_store_is_capped(self):
+        """Test the entity ID store starts over once it exceeds the cap"""
+        validator = EnsembleEntityValidator(ha_client=None, sentence_transformer_model=FakeSentenceModel())
+        validator.MAX_CACHED_ENTITY_ID_EMBEDDINGS = 3
+
+        store = validator._get_entity_id_store()
+        store.add([f"light.l{i}" for i in range(3)], random_embeddings(3, dim=3))
+        assert validator._get_entity_id_store() is store
+
+        store.add(["light.l3"], random_embeddings(1, dim=3, seed=1))
+        fresh = validator._get_entity_id_store()
+        assert fresh is not store
+        assert len(fresh) == 0
@@ -0,0 +1,131 @@
+"""
+Unit tests for the EntityValidator resolution index
+"""
+
+import pytest
+from rapidfuzz import fuzz
+
+from src.services.entity_resolution_index import EntityResolutionIndex, fuzzy_scores
+from src.services.entity_validator import EntityValidator
+
+
+def create_entity(entity_id: str, area_id: str = None, friendly_name: str = None) -> dict:
+    """Helper to create a data-api entity dict"""
+    return {
+        'entity_id': entity_id,
+        'domain': entity_id.split('.', 1)[0],
+        'friendly_name': friendly_name or entity_id.split('.', 1)[1].replace('_', ' ').title(),
+        'area_id': area_id
+    }
+
+
+@pytest.fixture
+def entities():
+    return [
+        create_entity('light.office_light_1', 'office'),
+        create_entity('light.office_light_2', 'office'),
+        create_entity('light.living_room', 'living_room'),
+        create_entity('light.kitchen_ceiling', 'kitchen'),
+        create_entity('switch.office_fan', 'office'),
+        create_entity('binary_sensor.office_desk_presence', 'office'),
+        create_entity('binary_sensor.front_door', 'hall'),
+    ]
+
+
+class TestEntityResolutionIndex:
+    """Test index maintenance and lookups"""
+
+    def test_view_lookups_follow_list_order(self, entities):
+        """Test hash, token and domain lookups return entities of the list in list order"""
+        index = EntityResolutionIndex()
+        view = index.view(entities)
+
+        assert view.get('switch.office_fan') is entities[4]
+        assert view.get('light.garage') is None
+        assert [e['entity_id'] for e in view.with_any_token({'office'})] == [
+            'light.office_light_1', 'light.office_light_2', 'switch.office_fan', 'binary_sensor.office_desk_presence'
+        ]
+        # Underscore words are indexed whole and split
+        assert [e['entity_id'] for e in view.with_any_token({'room'})] == ['light.living_room']
+        assert [e['entity_id'] for e in view.with_any_token({'living_room'})] == ['light.living_room']
+        assert [e['entity_id'] for e in view.in_domain('binary_sensor')] == [
+            'binary_sensor.office_desk_presence', 'binary_sensor.front_door'
+        ]
+        assert view.domain_counts == {'light': 4, 'switch': 1, 'binary_sensor': 2}
+
+    def test_view_is_restricted_to_its_list(self, entities):
+        """Test a view of a subset never returns other indexed entities"""
+        index = EntityResolutionIndex()
+        index.view(entities)
+
+        lights = [e for e in entities if e['domain'] == 'light']
+        view = index.view(lights)
+
+        assert view.get('switch.office_fan') is None
+        assert [e['entity_id'] for e in view.with_any_token({'office'})] == ['light.office_light_1', 'light.office_light_2']
+        assert index.view(lights) is view
+
+    def test_incremental_reindex(self, entities):
+        """Test only new or changed entities are (re)indexed and removed ones are pruned"""
+        index = EntityResolutionIndex()
+        index.sync(entities)
+        assert index.get_index_statistics()['indexed'] == len(entities)
+
+        moved = [dict(e) for e in entities[:-1]]
+        moved[3]['area_id'] = 'office'  # kitchen ceiling light moved to the office
+        index.sync(moved)
+        index.prune(moved)
+
+        stats = index.get_index_statistics()
+        assert stats['indexed'] == len(entities)
+        assert stats['reindexed'] == 1
+        assert stats['entities'] == len(entities) - 1
+        view = index.view(moved)
+        assert 'light.kitchen_ceiling' in [e['entity_id'] for e in view.with_any_token({'office'})]
+        assert index.entry('binary_sensor.front_door') is None
+
+    def test_similar_names_tolerates_typos(self, entities):
+        """Test n-gram candidates are fuzzy scored and filtered by domain"""
+        view = EntityResolutionIndex().view(entities)
+
+        matches = view.similar_names('ofice_light_1', domain='light')
+
+        assert matches[0][0]['entity_id'] == 'light.office_light_1'
+        assert all(entity['domain'] == 'light' for entity, _ in matches)
+        assert view.similar_names('ofice_fan', domain='light') == []
+
+    def test_fuzzy_scores_match_token_sort_ratio(self):
+        """Test batch scores equal per-pair token_sort_ratio (lowercased, 0-1)"""
+        candidates = ['Office Light 1', 'light office', '', None, 'Kitchen']
+
+        scores = fuzzy_scores('office LIGHT', candidates)
+
+        expected = [fuzz.token_sort_ratio('office light', c.lower()) / 100.0 if c else 0.0 for c in candidates]
+        assert scores == expected
+
+
+class TestEntityValidatorIndexedMatching:
+    """Test EntityValidator matching through the index"""
+
+    @pytest.fixture
+    def validator(self):
+        return EntityValidator(enable_full_chain=False)
+
+    def test_exact_match_and_alternatives(self, validator, entities):
+        """Test exact lookups and word/typo based alternatives"""
+        assert validator._find_exact_match('light.living_room', entities) is entities[2]
+        assert validator._find_exact_match('light.garage', entities) is None
+
+        # Words with underscores only overlap as a whole, n-grams catch the rest
+        assert validator._find_alternatives('light.living_room_lamp', entities) == ['light.living_room']
+        assert validator._find_alternatives('light.ofice_light_2', entities)[0] == 'light.office_light_2'
+        assert validator._find_alternatives('switch.office_fan_2', entities) == ['switch.office_fan']
+        assert validator._find_alternatives('switch.garage_heater', entities) == []
+
+    def test_best_match_uses_token_candidates(self, validator, entities):
+        """Test best-match results for numbered, location and binary sensor queries"""
+        assert validator._find_best_match('office light 2', entities)['entity_id'] == 'light.office_light_2'
+        assert validator._find_best_match('living room light', entities)['entity_id'] == 'light.living_room'
+        assert validator._find_best_match('fan', entities, location_context='office')['entity_id'] == 'switch.office_fan'
+        assert validator._find_best_match('desk presence', entities)['entity_id'] == 'binary_sensor.office_desk_presence'
+        assert validator._find_best_match('garage heater', entities) is None
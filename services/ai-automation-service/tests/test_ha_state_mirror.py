@@ -0,0 +1,299 @@
+"""
+Tests for the Home Assistant State Mirror
+"""
+
+import asyncio
+import pytest
+from aiohttp import web, WSMsgType
+from aiohttp.test_utils import TestServer
+
+from src.clients.ha_client import HomeAssistantClient
+from src.clients.ha_state_mirror import HAStateMirror, get_state_mirror, close_state_mirrors
+
+
+def make_state(entity_id: str, state: str, last_updated: str = "2025-01-06T07:00:00.000000+00:00") -> dict:
+    """Helper to create an /api/states entry"""
+    return {
+        "entity_id": entity_id,
+        "state": state,
+        "attributes": {"friendly_name": entity_id.split('.', 1)[1].replace('_', ' ').title()},
+        "last_changed": last_updated,
+        "last_updated": last_updated
+    }
+
+
+class FakeHomeAssistant:
+    """Minimal HA REST + WebSocket API counting requests"""
+
+    def __init__(self):
+        self.states = [
+            make_state("light.office", "on"),
+            make_state("light.kitchen", "off"),
+            make_state("wled.office", "on"),
+            make_state("sensor.office_temperature", "21.5")
+        ]
+        self.requests = {"states": 0, "entity": 0}
+        self.states_status = 200
+        self.events = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/api/states', self.all_states)
+        app.router.add_get('/api/states/{entity_id}', self.entity_state)
+        app.router.add_get('/api/websocket', self.websocket)
+        return app
+
+    async def all_states(self, request):
+        self.requests["states"] += 1
+        if self.states_status != 200:
+            return web.json_response({"message": "error"}, status=self.states_status)
+        return web.json_response(self.states)
+
+    async def entity_state(self, request):
+        self.requests["entity"] += 1
+        for state in self.states:
+            if state["entity_id"] == request.match_info["entity_id"]:
+                return web.json_response(state)
+        return web.json_response({"message": "Entity not found."}, status=404)
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"type": "auth_required"})
+        auth = await ws.receive_json()
+        if auth.get("access_token") != "token":
+            await ws.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+            await ws.close()
+            return ws
+        await ws.send_json({"type": "auth_ok"})
+
+        registries = {
+            "config/entity_registry/list": [
+                {"entity_id": "light.office", "device_id": "dev1", "area_id": None},
+                {"entity_id": "wled.office", "device_id": None, "area_id": "office"},
+                {"entity_id": "light.kitchen", "device_id": "dev2", "area_id": "office"}
+            ],
+            "config/device_registry/list": [
+                {"id": "dev1", "area_id": "office"},
+                {"id": "dev2", "area_id": "kitchen"}
+            ],
+            "config/area_registry/list": [
+                {"area_id": "office", "name": "Home Office"},
+                {"area_id": "kitchen", "name": "Kitchen"}
+            ]
+        }
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            message = msg.json()
+            if message["type"] == "subscribe_events":
+                await ws.send_json({"id": message["id"], "type": "result", "success": True, "result": None})
+                for event in self.events:
+                    await ws.send_json({"id": message["id"], "type": "event", "event": event})
+            else:
+                await ws.send_json({"id": message["id"], "type": "result", "success": True,
+                                    "result": registries[message["type"]]})
+        return ws
+
+
+@pytest.fixture
+async def fake_ha():
+    """Run the fake HA on a local test server"""
+    ha = FakeHomeAssistant()
+    server = TestServer(ha.app())
+    await server.start_server()
+    ha.url = str(server.make_url('')).rstrip('/')
+    yield ha
+    await server.close()
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    """Poll until condition() is true"""
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+class TestHAStateMirror:
+    """Test the bulk-loaded, indexed state mirror"""
+
+    async def test_bulk_load_once_and_indexed_lookups(self, fake_ha):
+        """Test states are loaded once and served from the indexes"""
+        mirror = HAStateMirror(fake_ha.url, "token", use_websocket=False)
+        try:
+            for _ in range(3):
+                assert await mirror.ensure_loaded()
+
+            assert fake_ha.requests["states"] == 1
+            assert mirror.get_state("light.office")["state"] == "on"
+            assert mirror.get_state("light.missing") is None
+            assert mirror.get_entities_by_domain("light") == ["light.kitchen", "light.office"]
+            assert mirror.get_entities_by_domain("climate") == []
+        finally:
+            await mirror.close()
+
+    async def test_lookups_return_copies(self, fake_ha):
+        """Test callers cannot modify the mirrored states"""
+        mirror = HAStateMirror(fake_ha.url, "token", use_websocket=False)
+        try:
+            await mirror.ensure_loaded()
+            state = mirror.get_state("light.office")
+            state["state"] = "off"
+            state["attributes"]["brightness"] = 1
+
+            assert mirror.get_state("light.office")["state"] == "on"
+            assert "brightness" not in mirror.get_state("light.office")["attributes"]
+        finally:
+            await mirror.close()
+
+    async def test_ttl_expiry_reloads(self, fake_ha):
+        """Test the mirror re-loads /api/states once the TTL expired"""
+        mirror = HAStateMirror(fake_ha.url, "token", ttl_seconds=0.05, use_websocket=False)
+        try:
+            await mirror.ensure_loaded()
+            fake_ha.states.append(make_state("switch.fan", "off"))
+            await asyncio.sleep(0.06)
+
+            assert await mirror.ensure_loaded()
+            assert fake_ha.requests["states"] == 2
+            assert mirror.get_entities_by_domain("switch") == ["switch.fan"]
+        finally:
+            await mirror.close()
+
+    async def test_failed_load_is_not_retried_before_ttl(self, fake_ha):
+        """Test a failed load reports the mirror unavailable without hammering HA"""
+        fake_ha.states_status = 500
+        mirror = HAStateMirror(fake_ha.url, "token", ttl_seconds=60, use_websocket=False)
+        try:
+            assert not await mirror.ensure_loaded()
+            assert not await mirror.ensure_loaded()
+            assert fake_ha.requests["states"] == 1
+            assert mirror.get_mirror_statistics()["bulk_load_failures"] == 1
+        finally:
+            await mirror.close()
+
+    def test_apply_state_changed(self):
+        """Test state_changed events update, add and remove entities"""
+        mirror = HAStateMirror("http://ha:8123", "token", use_websocket=False)
+        mirror.apply_state_changed({"entity_id": "light.office", "new_state": make_state("light.office", "on")})
+        mirror.apply_state_changed({"entity_id": "light.office",
+                                    "new_state": make_state("light.office", "off", "2025-01-06T08:00:00.000000+00:00")})
+        # Older states (e.g. from a bulk load in flight) never overwrite newer ones
+        mirror.apply_state_changed({"entity_id": "light.office", "new_state": make_state("light.office", "on")})
+        mirror.apply_state_changed({"entity_id": "light.hall", "new_state": make_state("light.hall", "on")})
+        mirror.apply_state_changed({"entity_id": "light.hall", "new_state": None})
+
+        assert mirror.get_state("light.office")["state"] == "off"
+        assert mirror.get_state("light.hall") is None
+        assert mirror.get_entities_by_domain("light") == ["light.office"]
+
+    def test_registry_areas(self):
+        """Test entity areas override device areas and areas resolve by ID or name"""
+        mirror = HAStateMirror("http://ha:8123", "token", use_websocket=False)
+        for entity_id in ("light.office", "light.desk", "light.kitchen"):
+            mirror.apply_state_changed({"entity_id": entity_id, "new_state": make_state(entity_id, "on")})
+
+        mirror.apply_registries(
+            entities=[
+                {"entity_id": "light.office", "device_id": "dev1", "area_id": None},
+                {"entity_id": "light.desk", "device_id": "dev2", "area_id": "office"},
+                {"entity_id": "light.kitchen", "device_id": "dev2", "area_id": None}
+            ],
+            devices=[{"id": "dev1", "area_id": "office"}, {"id": "dev2", "area_id": "kitchen"}],
+            areas=[{"area_id": "office", "name": "Home Office"}, {"area_id": "kitchen", "name": "Kitchen"}]
+        )
+
+        assert mirror.get_entities_by_area("office") == ["light.desk", "light.office"]
+        assert mirror.get_entities_by_area("Home Office") == ["light.desk", "light.office"]
+        assert mirror.get_entities_by_area("kitchen") == ["light.kitchen"]
+        assert mirror.get_entities_by_area("garage") == []
+
+    async def test_websocket_keeps_mirror_current(self, fake_ha):
+        """Test the WebSocket subscription loads states, registries and applies events"""
+        fake_ha.events = [{
+            "event_type": "state_changed",
+            "data": {
+                "entity_id": "light.office",
+                "old_state": make_state("light.office", "on"),
+                "new_state": make_state("light.office", "off", "2025-01-06T09:00:00.000000+00:00")
+            }
+        }]
+        mirror = HAStateMirror(fake_ha.url, "token", ttl_seconds=0)
+        try:
+            await mirror.ensure_loaded()
+            await wait_for(lambda: mirror.get_mirror_statistics()["events_applied"] == 1)
+            await wait_for(lambda: mirror.get_entities_by_area("office") != [])
+
+            stats = mirror.get_mirror_statistics()
+            assert stats["websocket_live"]
+            assert stats["websocket_connects"] == 1
+            # Live mirrors never expire, even with a zero TTL
+            assert mirror.is_current()
+            assert await mirror.ensure_loaded()
+            assert mirror.get_state("light.office")["state"] == "off"
+            assert mirror.get_entities_by_area("Home Office") == ["light.kitchen", "light.office", "wled.office"]
+            assert fake_ha.requests["entity"] == 0
+        finally:
+            await mirror.close()
+        assert not mirror.get_mirror_statistics()["websocket_live"]
+
+
+class TestHomeAssistantClientMirror:
+    """Test HomeAssistantClient lookups backed by the state mirror"""
+
+    async def test_entity_lookups_use_mirror(self, fake_ha):
+        """Test entity and domain lookups need no per-entity REST calls"""
+        mirror = HAStateMirror(fake_ha.url, "token", use_websocket=False)
+        client = HomeAssistantClient(fake_ha.url, "token", state_mirror=mirror)
+        try:
+            states = await client.get_entity_states(["light.office", "light.missing"])
+            wled = await client.get_entities_by_domain("wled")
+            office = await client.get_entity_state("light.office")
+
+            assert states["light.office"]["state"] == "on"
+            assert states["light.missing"] is None
+            assert wled == ["wled.office"]
+            assert office["entity_id"] == "light.office"
+            assert fake_ha.requests == {"states": 1, "entity": 0}
+        finally:
+            await client.close()
+            await mirror.close()
+
+    async def test_max_age_falls_back_to_rest(self, fake_ha):
+        """Test lookups needing fresher states than a non-live mirror use REST"""
+        mirror = HAStateMirror(fake_ha.url, "token", use_websocket=False)
+        client = HomeAssistantClient(fake_ha.url, "token", state_mirror=mirror)
+        try:
+            await client.get_entity_state("light.office")
+            fake_ha.states[0] = make_state("light.office", "off", "2025-01-06T10:00:00.000000+00:00")
+
+            assert (await client.get_entity_state("light.office"))["state"] == "on"
+            assert (await client.get_entity_state("light.office", max_age=0))["state"] == "off"
+            assert fake_ha.requests["entity"] == 1
+        finally:
+            await client.close()
+            await mirror.close()
+
+    async def test_unavailable_mirror_falls_back_to_rest(self, fake_ha):
+        """Test lookups still work when the bulk load fails"""
+        fake_ha.states_status = 503
+        mirror = HAStateMirror(fake_ha.url, "token", use_websocket=False)
+        client = HomeAssistantClient(fake_ha.url, "token", state_mirror=mirror)
+        try:
+            assert (await client.get_entity_state("wled.office"))["state"] == "on"
+            assert await client.get_entity_state("light.missing") is None
+            assert fake_ha.requests["entity"] == 2
+        finally:
+            await client.close()
+            await mirror.close()
+
+    async def test_shared_mirror_per_instance(self):
+        """Test clients of the same HA instance share one mirror"""
+        try:
+            first = get_state_mirror("http://ha:8123/", "token", use_websocket=False)
+            assert get_state_mirror("http://ha:8123", "token") is first
+            assert get_state_mirror("http://other:8123", "token") is not first
+        finally:
+            await close_state_mirrors()
@@ -0,0 +1,146 @@
+"""
+Unit tests for the SequenceDetector engines
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.pattern_detection.sequence_detector import SequenceDetector
+from src.pattern_detection.analysis_frame import AnalysisFrame
+
+
+def create_routine_events(days: int = 5, noise_seed: int = None) -> pd.DataFrame:
+    """
+    Helper to create a daily coffee maker -> kitchen light -> music routine.
+
+    Args:
+        days: Number of days with the routine
+        noise_seed: Add random unrelated events with this seed (None = no noise)
+
+    Returns:
+        DataFrame with time, entity_id, state, area columns
+    """
+    base = datetime(2025, 1, 6, 7, 0, 0)
+    rows = []
+    for day in range(days):
+        t = base + timedelta(days=day)
+        rows.append({'time': t, 'entity_id': 'switch.coffee_maker', 'state': 'on', 'area': 'kitchen'})
+        rows.append({'time': t + timedelta(minutes=2), 'entity_id': 'light.kitchen', 'state': 'on', 'area': 'kitchen'})
+        rows.append({'time': t + timedelta(minutes=5), 'entity_id': 'media_player.kitchen', 'state': 'on', 'area': 'kitchen'})
+        # Everything off again in the evening (own sequence)
+        rows.append({'time': t + timedelta(hours=12), 'entity_id': 'switch.coffee_maker', 'state': 'off', 'area': 'kitchen'})
+        rows.append({'time': t + timedelta(hours=12, minutes=1), 'entity_id': 'light.kitchen', 'state': 'off', 'area': 'kitchen'})
+        rows.append({'time': t + timedelta(hours=12, minutes=2), 'entity_id': 'media_player.kitchen', 'state': 'off', 'area': 'kitchen'})
+
+    if noise_seed is not None:
+        rng = np.random.default_rng(noise_seed)
+        for offset in rng.integers(0, days * 24 * 3600, size=40):
+            rows.append({
+                'time': base + timedelta(seconds=int(offset)),
+                'entity_id': f"sensor.noise_{rng.integers(0, 4)}",
+                'state': str(rng.integers(0, 3)),
+                'area': 'hall'
+            })
+
+    return pd.DataFrame(rows)
+
+
+def detect(events: pd.DataFrame, engine: str, **kwargs) -> dict:
+    """Run a detector and index patterns by signature"""
+    params = dict(window_minutes=30, min_sequence_length=2, min_sequence_occurrences=3,
+                  min_confidence=0.0, enable_ml=False)
+    params.update(kwargs)
+    detector = SequenceDetector(engine=engine, **params)
+    return {p['sequence_signature']: p for p in detector.detect_patterns(events)}
+
+
+class TestStreamingSequenceEngine:
+    """Test the single-pass streaming sequence engine"""
+
+    def test_rejects_unknown_engine(self):
+        """Test unknown engine names are rejected"""
+        with pytest.raises(ValueError):
+            SequenceDetector(engine='gpu')
+
+    def test_detects_routine_once_per_occurrence(self):
+        """Test each daily routine is counted once per start event"""
+        patterns = detect(create_routine_events(days=5), 'streaming')
+
+        morning = (('switch.coffee_maker', 'on'), ('light.kitchen', 'on'), ('media_player.kitchen', 'on'))
+        assert morning in patterns
+        assert patterns[morning]['occurrences'] == 5
+        assert patterns[morning]['devices'] == ['switch.coffee_maker', 'light.kitchen', 'media_player.kitchen']
+        assert patterns[morning]['metadata']['duration_seconds'] == 300
+        assert patterns[morning]['metadata']['sequence_states'] == ['on', 'on', 'on']
+        assert patterns[morning]['metadata']['areas'] == ['kitchen']
+        assert patterns[morning]['metadata']['first_occurrence'] == '2025-01-06T07:00:00'
+
+        # The tail of the routine starts its own sequence
+        assert patterns[(('light.kitchen', 'on'), ('media_player.kitchen', 'on'))]['occurrences'] == 5
+
+    def test_matches_python_engine_sequences(self):
+        """Test the streaming engine finds the sequences of the Python engine"""
+        events = create_routine_events(days=6, noise_seed=3)
+
+        python_patterns = detect(events, 'python')
+        streaming_patterns = detect(events, 'streaming')
+
+        assert len(python_patterns) > 0
+        assert set(python_patterns) <= set(streaming_patterns)
+        for signature, pattern in python_patterns.items():
+            assert streaming_patterns[signature]['devices'] == pattern['devices']
+            # Overlapping windows only ever add duplicate counts in the Python engine
+            assert 3 <= streaming_patterns[signature]['occurrences'] <= pattern['occurrences']
+
+    def test_gap_breaks_sequence(self):
+        """Test steps further apart than sequence_gap_seconds are not joined"""
+        events = create_routine_events(days=4)
+
+        patterns = detect(events, 'streaming', sequence_gap_seconds=150)
+
+        assert (('switch.coffee_maker', 'on'), ('light.kitchen', 'on')) in patterns
+        assert not any(len(signature) == 3 and signature[0][1] == 'on' for signature in patterns)
+
+    def test_max_sequence_length(self):
+        """Test sequences are cut at max_sequence_length"""
+        patterns = detect(create_routine_events(days=4), 'streaming', max_sequence_length=2)
+
+        assert patterns
+        assert all(len(signature) == 2 for signature in patterns)
+
+    def test_repeated_states_are_not_state_changes(self):
+        """Test repeated reports of the same state do not start sequences"""
+        events = create_routine_events(days=4)
+        repeats = events[events['entity_id'] == 'switch.coffee_maker'].copy()
+        repeats['time'] = repeats['time'] + timedelta(seconds=30)
+        events = pd.concat([events, repeats], ignore_index=True)
+
+        patterns = detect(events, 'streaming')
+
+        assert (('switch.coffee_maker', 'on'), ('light.kitchen', 'on'), ('media_player.kitchen', 'on')) in patterns
+        assert not any(signature[0] == signature[1] for signature in patterns)
+
+    def test_simultaneous_events_have_one_signature(self):
+        """Test events with the same timestamp are ordered by entity ID"""
+        events = create_routine_events(days=4)
+        evening = events['state'] == 'off'
+        events.loc[evening, 'time'] = events.loc[evening, 'time'].dt.floor('h')
+        # Input order must not matter
+        events = events.iloc[::-1].reset_index(drop=True)
+
+        patterns = detect(events, 'streaming')
+
+        assert patterns[(
+            ('light.kitchen', 'off'), ('media_player.kitchen', 'off'), ('switch.coffee_maker', 'off')
+        )]['occurrences'] == 4
+
+    def test_prepared_analysis_frame(self):
+        """Test the engine gives the same result on a shared AnalysisFrame"""
+        events = create_routine_events(days=5, noise_seed=11)
+
+        raw = detect(events, 'streaming')
+        prepared = detect(AnalysisFrame.from_events(events).df, 'streaming')
+
+        assert {s: p['occurrences'] for s, p in raw.items()} == {s: p['occurrences'] for s, p in prepared.items()}
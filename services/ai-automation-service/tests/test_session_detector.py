@@ -0,0 +1,104 @@
+"""
+Unit tests for SessionDetector session segmentation
+"""
+
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src.pattern_detection.session_detector import SessionDetector
+
+
+def create_session_events(base: datetime, minutes: list, entity_id: str = 'light.kitchen',
+                          area: str = 'kitchen') -> list:
+    """
+    Helper to create events at the given minute offsets.
+
+    Args:
+        base: Base time
+        minutes: Minute offsets
+        entity_id: Entity ID
+        area: Area
+
+    Returns:
+        List of event rows
+    """
+    return [
+        {'time': base + timedelta(minutes=m), 'entity_id': entity_id,
+         'state': 'on' if i % 2 == 0 else 'off', 'area': area}
+        for i, m in enumerate(minutes)
+    ]
+
+
+class TestSessionSegmentation:
+    """Test gap-based session identification"""
+
+    @pytest.fixture
+    def detector(self):
+        return SessionDetector(
+            session_gap_minutes=30,
+            min_session_duration_minutes=5,
+            max_session_duration_hours=8,
+            min_confidence=0.0,
+            enable_ml=False
+        )
+
+    def test_sessions_split_on_gap(self, detector):
+        """Test a gap above session_gap_minutes starts a new session"""
+        base = datetime(2025, 1, 6, 7, 0, 0)
+        rows = create_session_events(base, [0, 10, 20])  # morning session (20 min)
+        rows += create_session_events(base, [60, 62], entity_id='light.hall', area='hall')  # too short
+        rows += create_session_events(base, [600, 630, 655], entity_id='media_player.tv', area='living_room')
+
+        sessions = detector._identify_sessions(pd.DataFrame(rows))
+
+        assert [len(s['events']) for s in sessions] == [3, 3]
+        assert [s['duration_minutes'] for s in sessions] == [20, 55]
+        assert sessions[0]['start_time'] == pd.Timestamp(base)
+        assert sessions[0]['session_type'] == 'morning'
+        assert sessions[1]['devices'] == ['media_player.tv']
+        assert sessions[1]['rooms'] == ['living_room']
+        assert sessions[1]['state_distribution'] == {'on': 2, 'off': 1}
+
+    def test_gap_equal_to_limit_continues_session(self, detector):
+        """Test events exactly session_gap_minutes apart stay in one session"""
+        rows = create_session_events(datetime(2025, 1, 6, 7, 0, 0), [0, 30, 60])
+
+        sessions = detector._identify_sessions(pd.DataFrame(rows))
+
+        assert len(sessions) == 1
+        assert sessions[0]['duration_minutes'] == 60
+
+    def test_overlong_sessions_are_dropped(self, detector):
+        """Test sessions longer than max_session_duration_hours are not returned"""
+        rows = create_session_events(datetime(2025, 1, 6, 0, 0, 0), list(range(0, 10 * 60, 20)))
+
+        assert detector._identify_sessions(pd.DataFrame(rows)) == []
+
+    def test_missing_area_reports_unknown_room(self, detector):
+        """Test sessions without an area column use the 'unknown' room"""
+        events = pd.DataFrame(create_session_events(datetime(2025, 1, 6, 19, 0, 0), [0, 15])).drop(columns=['area'])
+
+        sessions = detector._identify_sessions(events)
+
+        assert sessions[0]['rooms'] == ['unknown']
+        assert sessions[0]['session_type'] == 'evening'
+
+
+class TestSessionDetection:
+    """Test full session pattern detection"""
+
+    def test_detect_patterns_with_routines(self):
+        """Test detection (including routine consistency) runs on daily routines"""
+        rows = []
+        for day in range(5):
+            base = datetime(2025, 1, 6, 7, 0, 0) + timedelta(days=day)
+            rows += create_session_events(base, [0, 5, 10, 15])
+        detector = SessionDetector(min_confidence=0.0, enable_ml=False)
+
+        patterns = detector.detect_patterns(pd.DataFrame(rows))
+
+        routines = [p for p in patterns if p['pattern_type'] == 'routine']
+        assert len(routines) == 1
+        assert routines[0]['metadata']['routine_period'] == 'morning'
+        assert 0.0 <= routines[0]['metadata']['routine_consistency'] <= 1.0
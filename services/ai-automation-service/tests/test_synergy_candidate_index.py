@@ -0,0 +1,122 @@
+"""
+Unit tests for the incremental synergy candidate set
+
+Epic AI-3: Cross-Device Synergy & Contextual Opportunities
+"""
+
+import pytest
+
+from src.synergy_detection.candidate_index import SynergyCandidateSet, build_compatibility_index
+from src.synergy_detection.synergy_detector import DeviceSynergyDetector, COMPATIBLE_RELATIONSHIPS
+
+
+def create_entity(entity_id: str, area_id: str, device_class: str = None) -> dict:
+    """Helper to create a data-api entity dict"""
+    entity = {'entity_id': entity_id, 'area_id': area_id, 'friendly_name': entity_id.split('.')[1].title()}
+    if device_class:
+        entity['device_class'] = device_class
+    return entity
+
+
+@pytest.fixture
+def entities():
+    return [
+        create_entity('light.hall', 'hall'),
+        create_entity('binary_sensor.hall_motion', 'hall', 'motion'),
+        create_entity('binary_sensor.front_door', 'hall', 'door'),
+        create_entity('lock.front_door', 'hall'),
+        create_entity('switch.hall_fan', 'hall'),
+        create_entity('sensor.office_temperature', 'office', 'temperature'),
+        create_entity('climate.office', 'office'),
+        create_entity('light.garden', None)
+    ]
+
+
+def pair_keys(pairs):
+    return [(p['trigger_entity'], p['action_entity'], p['relationship_type']) for p in pairs]
+
+
+def test_compatibility_index():
+    """Test relationships are indexed by trigger domain and device class"""
+    index = build_compatibility_index(COMPATIBLE_RELATIONSHIPS)
+
+    assert index[('binary_sensor', 'door')] == ['door_to_light', 'door_to_lock']
+    assert index[('sensor', 'temperature')] == ['temp_to_climate']
+    assert ('switch', None) not in index
+
+
+def test_only_compatible_pairs_in_scan_order(entities):
+    """Test generated pairs and their order match a pairwise scan of the list"""
+    candidates = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS)
+    candidates.sync(entities)
+
+    assert pair_keys(candidates.compatible_pairs(entities)) == [
+        ('binary_sensor.hall_motion', 'light.hall', 'motion_to_light'),
+        ('binary_sensor.front_door', 'light.hall', 'door_to_light'),
+        ('binary_sensor.front_door', 'lock.front_door', 'door_to_lock'),
+        ('sensor.office_temperature', 'climate.office', 'temp_to_climate'),
+    ]
+
+
+def test_incremental_updates(entities):
+    """Test adding, moving and removing entities only touches their pairs"""
+    candidates = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS)
+    candidates.sync(entities)
+    generated = candidates.get_statistics()['pairs_generated']
+
+    updated = [e for e in entities if e['entity_id'] != 'lock.front_door']
+    updated.append(create_entity('light.office', 'office'))
+    updated[0] = create_entity('light.hall', 'office')  # moved
+    updated.append(create_entity('binary_sensor.office_occupancy', 'office', 'occupancy'))
+
+    changes = candidates.sync(updated)
+
+    assert changes == {'added': 2, 'removed': 1, 'changed': 1}
+    assert candidates.get_statistics()['pairs_generated'] == generated + 2
+    assert set(pair_keys(candidates.compatible_pairs(updated))) == {
+        ('sensor.office_temperature', 'climate.office', 'temp_to_climate'),
+        ('binary_sensor.office_occupancy', 'light.hall', 'occupancy_to_light'),
+        ('binary_sensor.office_occupancy', 'light.office', 'occupancy_to_light'),
+    }
+
+
+def test_persistence(entities, tmp_path):
+    """Test a saved candidate set is restored without regenerating pairs"""
+    path = tmp_path / "synergy_candidates.json"
+    candidates = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS, path=str(path))
+    candidates.sync(entities)
+    assert candidates.save()
+    assert not candidates.save()  # unchanged
+
+    restored = SynergyCandidateSet(COMPATIBLE_RELATIONSHIPS, path=str(path))
+    assert restored.load()
+    assert restored.sync(entities) == {'added': 0, 'removed': 0, 'changed': 0}
+    assert restored.get_statistics()['pairs_generated'] == 0
+    assert restored.compatible_pairs(entities) == candidates.compatible_pairs(entities)
+
+    # Changed relationship definitions invalidate the stored set
+    other = dict(COMPATIBLE_RELATIONSHIPS)
+    other.pop('door_to_lock')
+    assert not SynergyCandidateSet(other, path=str(path)).load()
+
+
+@pytest.mark.asyncio
+async def test_detector_reuses_persisted_candidates(entities, tmp_path):
+    """Test a new detector run starts from the persisted candidate set"""
+    class DataApi:
+        async def fetch_devices(self):
+            return [{'device_id': 'd1'}]
+
+        async def fetch_entities(self):
+            return entities
+
+    path = str(tmp_path / "synergy_candidates.json")
+    first = await DeviceSynergyDetector(DataApi(), candidate_store_path=path, min_confidence=0.0).detect_synergies()
+
+    detector = DeviceSynergyDetector(DataApi(), candidate_store_path=path, min_confidence=0.0)
+    second = await detector.detect_synergies()
+
+    assert detector._candidates.get_statistics()['loaded']
+    assert detector._candidates.get_statistics()['pairs_generated'] == 0
+    assert [s['relationship'] for s in second] == [s['relationship'] for s in first]
+    assert len(second) == 4
@@ -0,0 +1,69 @@
+"""Full-text index and device/integration junction tables
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-11-02 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create junction tables (primary keys are covering indexes for filters)
+    op.create_table(
+        'automation_devices',
+        sa.Column('device', sa.String(length=100), nullable=False),
+        sa.Column('automation_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['automation_id'], ['community_automations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('device', 'automation_id')
+    )
+    op.create_index('ix_automation_devices_automation_id', 'automation_devices', ['automation_id'])
+    
+    op.create_table(
+        'automation_integrations',
+        sa.Column('integration', sa.String(length=100), nullable=False),
+        sa.Column('automation_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['automation_id'], ['community_automations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('integration', 'automation_id')
+    )
+    op.create_index('ix_automation_integrations_automation_id', 'automation_integrations', ['automation_id'])
+    
+    # Create FTS5 index over title/description (rowid = community_automations.id)
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS community_automations_fts "
+        "USING fts5(title, description, tokenize='porter unicode61')"
+    )
+    
+    # Backfill from existing automations
+    op.execute(
+        "INSERT INTO community_automations_fts(rowid, title, description) "
+        "SELECT id, title, description FROM community_automations"
+    )
+    op.execute(
+        "INSERT OR IGNORE INTO automation_devices(device, automation_id) "
+        "SELECT DISTINCT value, community_automations.id "
+        "FROM community_automations, json_each(community_automations.devices)"
+    )
+    op.execute(
+        "INSERT OR IGNORE INTO automation_integrations(integration, automation_id) "
+        "SELECT DISTINCT value, community_automations.id "
+        "FROM community_automations, json_each(community_automations.integrations)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS community_automations_fts")
+    op.drop_index('ix_automation_integrations_automation_id', 'automation_integrations')
+    op.drop_table('automation_integrations')
+    op.drop_index('ix_automation_devices_automation_id', 'automation_devices')
+    op.drop_table('automation_devices')
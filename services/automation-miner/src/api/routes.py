@@ -25,6 +25,7 @@ router = APIRouter(tags=["corpus"])
 
 @router.get("/corpus/search", response_model=SearchResponse)
 async def search_corpus(
+    q: Optional[str] = Query(None, description="Full-text query over title and description (ranked by relevance and quality)"),
     device: Optional[str] = Query(None, description="Filter by device type (e.g., 'light', 'motion_sensor')"),
     integration: Optional[str] = Query(None, description="Filter by integration (e.g., 'mqtt', 'zigbee2mqtt')"),
     use_case: Optional[str] = Query(None, description="Filter by use case (energy/comfort/security/convenience)"),
@@ -35,19 +36,21 @@ async def search_corpus(
     """
     Search community automation corpus
     
-    Query automations by device type, integration, use case, and quality threshold.
+    Query automations by text, device type, integration, use case, and quality threshold.
     
     Example:
         GET /api/automation-miner/corpus/search?device=motion_sensor&use_case=security&min_quality=0.8
+        GET /api/automation-miner/corpus/search?q=night+light&min_quality=0.6
     """
     logger.info(
-        f"Search request: device={device}, integration={integration}, "
+        f"Search request: q={q}, device={device}, integration={integration}, "
         f"use_case={use_case}, min_quality={min_quality}, limit={limit}"
     )
     
     repo = CorpusRepository(db)
     
     filters = {
+        'query': q,
         'device': device,
         'integration': integration,
         'use_case': use_case,
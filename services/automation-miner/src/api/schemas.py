@@ -10,6 +10,7 @@ from pydantic import BaseModel, Field
 
 class SearchFilters(BaseModel):
     """Search filter parameters"""
+    query: Optional[str] = None
     device: Optional[str] = None
     integration: Optional[str] = None
     use_case: Optional[str] = None
@@ -121,14 +121,6 @@ async def run_initial_crawl(
                             metadata = parser.create_metadata(post_data, parsed)
                             stats['parsed'] += 1
                             
-                            # Check for duplicates
-                            if not dry_run:
-                                is_dup = await repo.is_duplicate(metadata)
-                                if is_dup:
-                                    logger.debug(f"Skipping duplicate: {metadata.title}")
-                                    stats['skipped'] += 1
-                                    continue
-                            
                             batch_to_add.append(metadata)
                         
                         except Exception as e:
@@ -136,6 +128,20 @@ async def run_initial_crawl(
                             stats['failed'] += 1
                             continue
                     
+                    # Skip already stored automations (one lookup per page)
+                    if batch_to_add and not dry_run:
+                        existing_ids = await repo.get_by_source_ids(
+                            'discourse', [metadata.source_id for metadata in batch_to_add]
+                        )
+                        new_batch = []
+                        for metadata in batch_to_add:
+                            if metadata.source_id in existing_ids:
+                                logger.debug(f"Skipping duplicate: {metadata.title}")
+                                stats['skipped'] += 1
+                            else:
+                                new_batch.append(metadata)
+                        batch_to_add = new_batch
+                    
                     # Save batch
                     if batch_to_add and not dry_run:
                         logger.info(f"[{correlation_id}] Saving batch of {len(batch_to_add)} automations...")
@@ -44,6 +44,7 @@ class Settings(BaseSettings):
     min_quality_score: float = 0.4
     target_avg_quality: float = 0.7
     dedup_similarity_threshold: float = 0.85
+    dedup_index_path: str = "data/automation_miner.lsh.json"  # MinHash/LSH blocking index
     
     # Logging
     log_level: str = "INFO"
@@ -8,12 +8,15 @@ Epic AI-4, Story AI4.4
 import logging
 from datetime import datetime, timedelta
 from uuid import uuid4
-from typing import Optional
+from typing import Optional, List
 
 from ..miner.discourse_client import DiscourseClient
 from ..miner.parser import AutomationParser
 from ..miner.repository import CorpusRepository
 from ..miner.database import get_database
+from ..miner.deduplicator import Deduplicator
+from ..miner.lsh_index import MinHashLSHIndex
+from ..miner.models import AutomationMetadata
 from ..config import settings
 
 logger = logging.getLogger(__name__)
@@ -71,6 +74,7 @@ class WeeklyRefreshJob:
                     added_count = 0
                     updated_count = 0
                     skipped_count = 0
+                    parsed_metadata = []
                     
                     for post in new_posts:
                         try:
@@ -89,33 +93,48 @@ class WeeklyRefreshJob:
                                 continue
                             
                             # Create metadata
-                            metadata = self.parser.create_metadata(details, parsed)
-                            
-                            # Check if exists
-                            existing = await repo.get_by_source_id(
-                                source='discourse',
-                                source_id=metadata.source_id
-                            )
-                            
-                            if existing:
-                                # Update if votes changed
-                                if existing.vote_count != metadata.vote_count:
-                                    await repo.save_automation(metadata)
-                                    updated_count += 1
-                                else:
-                                    skipped_count += 1
-                            else:
-                                # Add new
-                                if not await repo.is_duplicate(metadata):
-                                    await repo.save_automation(metadata)
-                                    added_count += 1
-                                else:
-                                    skipped_count += 1
+                            parsed_metadata.append(self.parser.create_metadata(details, parsed))
                         
                         except Exception as e:
                             logger.error(f"[{correlation_id}] Failed to process post {post['id']}: {e}")
                             continue
                     
+                    # Check which posts already exist with one batched lookup
+                    existing_by_id = await repo.get_by_source_ids(
+                        source='discourse',
+                        source_ids=[metadata.source_id for metadata in parsed_metadata]
+                    )
+                    
+                    to_save = []
+                    new_metadata = []
+                    for metadata in parsed_metadata:
+                        existing = existing_by_id.get(metadata.source_id)
+                        if existing:
+                            # Update if votes changed
+                            if existing.vote_count != metadata.vote_count:
+                                to_save.append(metadata)
+                                updated_count += 1
+                            else:
+                                skipped_count += 1
+                        else:
+                            new_metadata.append(metadata)
+                    
+                    if new_metadata or to_save:
+                        dedup = await self._load_deduplicator(repo, correlation_id)
+                        
+                        # Near-duplicate check against LSH candidates only
+                        if new_metadata:
+                            candidates = await self._fetch_candidates(repo, dedup, new_metadata)
+                            unique = dedup.deduplicate_batch(new_metadata, candidates)
+                            added_count = len(unique)
+                            skipped_count += len(new_metadata) - len(unique)
+                            to_save.extend(unique)
+                        
+                        if to_save:
+                            await repo.save_batch(to_save)
+                            dedup.add_to_index(to_save)
+                        dedup.index.save()
+                    
                     logger.info(f"[{correlation_id}]   Added: {added_count} new automations")
                     logger.info(f"[{correlation_id}]   Updated: {updated_count} vote counts")
                     logger.info(f"[{correlation_id}]   Skipped: {skipped_count} unchanged")
@@ -150,6 +169,63 @@ class WeeklyRefreshJob:
         
         finally:
             await db.close()
+    
+    async def _load_deduplicator(self, repo: CorpusRepository, correlation_id: str) -> Deduplicator:
+        """
+        Deduplicator backed by the persisted LSH index
+        
+        The index is rebuilt from the corpus when it is missing or its size
+        no longer matches the corpus.
+        
+        Args:
+            repo: Corpus repository
+            correlation_id: Correlation ID for logging
+        
+        Returns:
+            Deduplicator with an up-to-date index
+        """
+        index = MinHashLSHIndex(path=settings.dedup_index_path)
+        index.load()
+        dedup = Deduplicator(index=index)
+        
+        stats = await repo.get_stats()
+        if len(index) != stats['total']:
+            logger.info(
+                f"[{correlation_id}] Rebuilding dedup index "
+                f"({len(index)} indexed, {stats['total']} in corpus)"
+            )
+            index.clear()
+            dedup.add_to_index(await repo.get_all())
+        
+        return dedup
+    
+    async def _fetch_candidates(
+        self,
+        repo: CorpusRepository,
+        dedup: Deduplicator,
+        metadata_list: List[AutomationMetadata]
+    ) -> list:
+        """
+        Load the corpus rows sharing an LSH bucket with any new automation
+        
+        Args:
+            repo: Corpus repository
+            dedup: Deduplicator with a loaded index
+            metadata_list: New automations
+        
+        Returns:
+            Candidate CommunityAutomation rows
+        """
+        ids_by_source = {}
+        for metadata in metadata_list:
+            for key in dedup.find_candidates(metadata):
+                source, source_id = key.split(':', 1)
+                ids_by_source.setdefault(source, set()).add(source_id)
+        
+        candidates = []
+        for source, source_ids in ids_by_source.items():
+            candidates.extend((await repo.get_by_source_ids(source, source_ids)).values())
+        return candidates
 
 
 async def setup_weekly_refresh_job(scheduler):
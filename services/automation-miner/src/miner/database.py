@@ -4,15 +4,18 @@ Database Models and Session Management
 SQLAlchemy async models for automation corpus storage.
 """
 import json
+import logging
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Index, JSON, ForeignKey, text, table, column
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
 # Base class for all models
 Base = declarative_base()
 
@@ -70,6 +73,63 @@ Index('ix_quality_score', CommunityAutomation.quality_score)
 Index('ix_source', CommunityAutomation.source)
 
 
+class AutomationDevice(Base):
+    """
+    Automation <-> device junction (normalized copy of CommunityAutomation.devices)
+    
+    The primary key (device, automation_id) is a covering index for device filters.
+    """
+    __tablename__ = "automation_devices"
+    
+    device = Column(String(100), primary_key=True)
+    automation_id = Column(Integer, ForeignKey("community_automations.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (Index('ix_automation_devices_automation_id', 'automation_id'),)
+
+
+class AutomationIntegration(Base):
+    """
+    Automation <-> integration junction (normalized copy of CommunityAutomation.integrations)
+    
+    The primary key (integration, automation_id) is a covering index for integration filters.
+    """
+    __tablename__ = "automation_integrations"
+    
+    integration = Column(String(100), primary_key=True)
+    automation_id = Column(Integer, ForeignKey("community_automations.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (Index('ix_automation_integrations_automation_id', 'automation_id'),)
+
+
+# FTS5 index over title/description; rowid is CommunityAutomation.id
+# (SQLAlchemy has no model for virtual tables, so it is created with DDL)
+FTS_TABLE = "community_automations_fts"
+
+# Lightweight table construct for querying the FTS index from SQLAlchemy
+search_index = table(FTS_TABLE, column("rowid", Integer), column("title"), column("description"))
+
+CREATE_FTS_TABLE = text(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    f"USING fts5(title, description, tokenize='porter unicode61')"
+)
+
+# Rebuild the search index from community_automations (for databases created
+# before the index existed)
+REBUILD_SEARCH_INDEX = [
+    text(f"DELETE FROM {FTS_TABLE}"),
+    text(f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+         f"SELECT id, title, description FROM community_automations"),
+    text("DELETE FROM automation_devices"),
+    text("INSERT OR IGNORE INTO automation_devices(device, automation_id) "
+         "SELECT DISTINCT value, community_automations.id "
+         "FROM community_automations, json_each(community_automations.devices)"),
+    text("DELETE FROM automation_integrations"),
+    text("INSERT OR IGNORE INTO automation_integrations(integration, automation_id) "
+         "SELECT DISTINCT value, community_automations.id "
+         "FROM community_automations, json_each(community_automations.integrations)"),
+]
+
+
 class MinerState(Base):
     """
     Miner state tracking
@@ -114,13 +174,23 @@ class Database:
         )
     
     async def create_tables(self):
-        """Create all tables (for testing/initialization)"""
+        """Create all tables and the search index (for testing/initialization)"""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(CREATE_FTS_TABLE)
+            
+            # Backfill the search index if it is behind the corpus
+            indexed = (await conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}"))).scalar()
+            total = (await conn.execute(text("SELECT count(*) FROM community_automations"))).scalar()
+            if indexed != total:
+                logger.info(f"Rebuilding search index ({indexed} of {total} automations indexed)")
+                for statement in REBUILD_SEARCH_INDEX:
+                    await conn.execute(statement)
     
     async def drop_tables(self):
         """Drop all tables (for testing)"""
         async with self.engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
             await conn.run_sync(Base.metadata.drop_all)
     
     async def close(self):
@@ -2,13 +2,16 @@
 Deduplication Logic
 
 Uses rapidfuzz for fuzzy string matching to detect duplicate automations.
+A MinHash/LSH index narrows each lookup to candidate buckets so batches are
+not compared against the whole corpus.
 """
 import hashlib
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from rapidfuzz import fuzz
 
 from .models import AutomationMetadata
+from .lsh_index import MinHashLSHIndex
 from ..config import settings
 
 logger = logging.getLogger(__name__)
@@ -17,15 +20,67 @@ logger = logging.getLogger(__name__)
 class Deduplicator:
     """Detect and handle duplicate automations"""
     
-    def __init__(self, similarity_threshold: float = None):
+    def __init__(self, similarity_threshold: float = None, index: Optional[MinHashLSHIndex] = None):
         """
         Initialize deduplicator
         
         Args:
             similarity_threshold: Minimum similarity score (0.0-1.0) to consider duplicates
                                  Default from settings (0.85 = 85% similar)
+            index: Optional (persisted) LSH index over the existing corpus;
+                   a temporary one is built per batch if omitted
         """
         self.threshold = similarity_threshold or settings.dedup_similarity_threshold
+        self.index = index
+    
+    @staticmethod
+    def index_key(automation: Any) -> str:
+        """
+        LSH index key of an automation
+        
+        Args:
+            automation: AutomationMetadata or CommunityAutomation
+        
+        Returns:
+            'source:source_id'
+        """
+        return f"{automation.source}:{automation.source_id}"
+    
+    def add_to_index(self, automations: List[Any]):
+        """
+        Add automations to the LSH index (replacing previous entries)
+        
+        Args:
+            automations: AutomationMetadata or CommunityAutomation instances
+        """
+        if self.index is None:
+            self.index = MinHashLSHIndex()
+        self._add_to_index(self.index, automations)
+    
+    def _add_to_index(self, index: MinHashLSHIndex, automations: List[Any]):
+        for automation in automations:
+            index.add(self.index_key(automation), automation.title, automation.devices or [])
+    
+    def find_candidates(self, metadata: AutomationMetadata) -> set:
+        """
+        Index keys of possible near-duplicates (includes the same source_id)
+        
+        Args:
+            metadata: Automation to check
+        
+        Returns:
+            Set of index keys to compare exactly
+        """
+        if self.index is None:
+            return set()
+        return self._find_candidates(self.index, metadata)
+    
+    def _find_candidates(self, index: MinHashLSHIndex, metadata: AutomationMetadata) -> set:
+        key = self.index_key(metadata)
+        candidates = index.candidates(metadata.title, metadata.devices)
+        if key in index:
+            candidates.add(key)
+        return candidates
     
     def calculate_similarity_hash(self, metadata: AutomationMetadata) -> str:
         """
@@ -127,6 +182,9 @@ class Deduplicator:
         """
         Find all duplicates of an automation in existing corpus
         
+        Compares against every automation; use deduplicate_batch for many
+        automations.
+        
         Args:
             metadata: Automation to check
             existing_automations: List of existing automations
@@ -180,9 +238,13 @@ class Deduplicator:
         """
         Deduplicate a batch of new automations against existing corpus
         
+        Only automations sharing an LSH bucket with a new automation are
+        compared exactly. Existing automations missing from the index are
+        added to it first, so a persisted index only needs the candidate rows.
+        
         Args:
             new_automations: List of new automations to add
-            existing_automations: Existing corpus
+            existing_automations: Existing corpus (or at least the candidates)
         
         Returns:
             Deduplicated list of automations to add
@@ -190,9 +252,24 @@ class Deduplicator:
         to_add = []
         to_skip = []
         
+        existing_by_key = {self.index_key(existing): existing for existing in existing_automations}
+        index = self.index
+        if index is None:
+            index = MinHashLSHIndex()
+            self._add_to_index(index, existing_automations)
+        else:
+            self._add_to_index(index, [
+                existing for key, existing in existing_by_key.items() if key not in index
+            ])
+        
+        compared = 0
         for new_auto in new_automations:
-            # Find duplicates in existing corpus
-            duplicates = self.find_duplicates(new_auto, existing_automations)
+            # Find duplicates among the candidates only
+            candidates = [
+                existing_by_key[key] for key in self._find_candidates(index, new_auto) if key in existing_by_key
+            ]
+            compared += len(candidates)
+            duplicates = self.find_duplicates(new_auto, candidates)
             
             if duplicates:
                 # Compare quality scores
@@ -218,7 +295,8 @@ class Deduplicator:
                 to_add.append(new_auto)
         
         logger.info(
-            f"Deduplication complete: {len(to_add)} to add, {len(to_skip)} to skip"
+            f"Deduplication complete: {len(to_add)} to add, {len(to_skip)} to skip "
+            f"({compared} exact comparisons)"
         )
         
         return to_add
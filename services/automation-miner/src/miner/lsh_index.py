@@ -0,0 +1,281 @@
+"""
+MinHash/LSH Blocking Index
+
+Near-duplicate candidates for the deduplicator without comparing every pair.
+
+Each automation is reduced to a feature set (character shingles of its
+normalized title plus its device types), summarized with a MinHash
+signature and split into bands. Automations sharing any band bucket are
+candidates; only candidates are compared exactly with rapidfuzz.
+
+Hashes are stable across processes so the index can be persisted next to
+the corpus database and updated incrementally.
+"""
+import json
+import logging
+import os
+import random
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hash family (feature hashes are 32-bit)
+_PRIME = (1 << 61) - 1
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip punctuation and sort words (matches token_sort_ratio)"""
+    return ' '.join(sorted(_NON_ALNUM.sub(' ', title.lower()).split()))
+
+
+class MinHashLSHIndex:
+    """Banded MinHash index over title shingles and device sets"""
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        num_perm: int = 96,
+        bands: int = 32,
+        shingle_size: int = 3,
+        seed: int = 1,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize LSH index
+
+        Args:
+            num_perm: MinHash signature length
+            bands: Number of bands (num_perm must divide evenly); more bands
+                   find less similar pairs at the cost of more candidates
+            shingle_size: Character shingle length for titles
+            seed: Seed for the hash permutations (part of the persisted format)
+            path: Optional JSON file to persist the index
+
+        Raises:
+            ValueError: If num_perm is not a multiple of bands
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.path = Path(path) if path else None
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+
+        # band bucket key -> item keys, item key -> its bucket keys
+        self._buckets: Dict[int, Set[str]] = {}
+        self._items: Dict[str, List[int]] = {}
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Signatures
+    # ------------------------------------------------------------------
+
+    def features(self, title: str, devices: Iterable[str]) -> Set[int]:
+        """
+        Hashed feature set of an automation
+
+        Args:
+            title: Automation title
+            devices: Device types
+
+        Returns:
+            Set of 32-bit feature hashes
+        """
+        normalized = normalize_title(title or '')
+        size = self.shingle_size
+        if len(normalized) <= size:
+            shingles = {normalized} if normalized else set()
+        else:
+            shingles = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+        features = {zlib.crc32(shingle.encode()) for shingle in shingles}
+        features.update(zlib.crc32(f"\x00device:{device}".encode()) for device in devices or ())
+        return features
+
+    def signature(self, features: Set[int]) -> List[int]:
+        """MinHash signature of a feature set"""
+        if not features:
+            return [_PRIME] * self.num_perm
+        return [min((a * x + b) % _PRIME for x in features) for a, b in self._permutations]
+
+    def bucket_keys(self, title: str, devices: Iterable[str]) -> List[int]:
+        """
+        Band bucket keys of an automation
+
+        Args:
+            title: Automation title
+            devices: Device types
+
+        Returns:
+            One key per band
+        """
+        signature = self.signature(self.features(title, devices))
+        rows = self.rows
+        keys = []
+        for band in range(self.bands):
+            band_values = signature[band * rows:(band + 1) * rows]
+            digest = zlib.crc32(','.join(map(str, band_values)).encode())
+            keys.append((band << 32) | digest)
+        return keys
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def add(self, key: str, title: str, devices: Iterable[str]):
+        """
+        Add or replace an automation
+
+        Args:
+            key: Unique item key (source_id)
+            title: Automation title
+            devices: Device types
+        """
+        self._insert(key, self.bucket_keys(title, devices))
+
+    def _insert(self, key: str, bucket_keys: List[int]):
+        if key in self._items:
+            self.remove(key)
+        self._items[key] = bucket_keys
+        for bucket_key in bucket_keys:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                self._buckets[bucket_key] = {key}
+            else:
+                bucket.add(key)
+        self._dirty = True
+
+    def remove(self, key: str):
+        """Remove an automation (no-op if absent)"""
+        bucket_keys = self._items.pop(key, None)
+        if bucket_keys is None:
+            return
+        for bucket_key in bucket_keys:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+        self._dirty = True
+
+    def candidates(self, title: str, devices: Iterable[str], exclude: Optional[str] = None) -> Set[str]:
+        """
+        Keys of automations sharing at least one band bucket
+
+        Args:
+            title: Automation title
+            devices: Device types
+            exclude: Key to leave out (the automation itself)
+
+        Returns:
+            Candidate keys
+        """
+        found: Set[str] = set()
+        for bucket_key in self.bucket_keys(title, devices):
+            bucket = self._buckets.get(bucket_key)
+            if bucket:
+                found.update(bucket)
+        found.discard(exclude)
+        return found
+
+    def clear(self):
+        """Remove all items"""
+        self._buckets.clear()
+        self._items.clear()
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def keys(self) -> Set[str]:
+        """Keys of all indexed automations"""
+        return set(self._items)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _params(self) -> Dict[str, Any]:
+        return {
+            'version': self.VERSION,
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'shingle_size': self.shingle_size,
+            'seed': self.seed
+        }
+
+    def load(self) -> bool:
+        """
+        Load a persisted index (ignored if built with other parameters)
+
+        Returns:
+            True if loaded
+        """
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get('params') != self._params():
+                logger.info(f"LSH index at {self.path} was built with other parameters, ignoring it")
+                return False
+            items = data['items']
+        except Exception as e:
+            logger.warning(f"Failed to load LSH index from {self.path}: {e}")
+            return False
+
+        self._buckets.clear()
+        self._items.clear()
+        for key, bucket_keys in items.items():
+            self._insert(key, bucket_keys)
+        self._dirty = False
+        logger.info(f"Loaded LSH index with {len(self._items)} automations from {self.path}")
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Persist the index if it changed since the last save/load
+
+        Args:
+            force: Save even if nothing changed
+
+        Returns:
+            True if written
+        """
+        if not self.path or not (self._dirty or force):
+            return False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            tmp.write_text(json.dumps({'params': self._params(), 'items': self._items}))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save LSH index to {self.path}: {e}")
+            return False
+        self._dirty = False
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            'items': len(self._items),
+            'buckets': len(self._buckets),
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'persisted': self.path is not None
+        }
@@ -5,17 +5,50 @@ Handles all database operations for the automation corpus.
 Uses SQLAlchemy async session management (Context7 pattern).
 """
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, delete, insert, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .database import CommunityAutomation, MinerState
+from .database import (
+    CommunityAutomation, MinerState, AutomationDevice, AutomationIntegration, FTS_TABLE, search_index
+)
 from .models import AutomationMetadata
 
 logger = logging.getLogger(__name__)
 
+# BM25 column weights (title, description)
+BM25_WEIGHTS = (4.0, 1.0)
+
+# How strongly quality_score boosts text relevance in ranked search
+QUALITY_WEIGHT = 1.0
+
+# SQLite bound-parameter limit guard for IN (...) lookups
+LOOKUP_CHUNK_SIZE = 500
+
+_QUERY_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_fts_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression
+    
+    Each word is quoted (so FTS operators in user input are literal) and
+    matched as a prefix; all words must match.
+    
+    Args:
+        query: Free-text query
+    
+    Returns:
+        MATCH expression or None if the query has no words
+    """
+    tokens = _QUERY_TOKEN.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
 
 class CorpusRepository:
     """Repository for automation corpus database operations"""
@@ -43,15 +76,60 @@ class CorpusRepository:
             Saved CommunityAutomation instance
         """
         # Check if already exists (by source_id)
-        stmt = select(CommunityAutomation).where(
-            and_(
-                CommunityAutomation.source == metadata.source,
-                CommunityAutomation.source_id == metadata.source_id
-            )
-        )
-        result = await self.session.execute(stmt)
-        existing = result.scalar_one_or_none()
+        existing = await self.get_by_source_id(metadata.source, metadata.source_id)
+        automation = self._apply_metadata(metadata, existing)
         
+        await self.session.flush()
+        await self._sync_search_index([automation])
+        await self.session.commit()
+        await self.session.refresh(automation)
+        
+        return automation
+    
+    async def save_batch(
+        self,
+        metadata_list: List[AutomationMetadata]
+    ) -> int:
+        """
+        Save multiple automations in a batch (one transaction)
+        
+        Args:
+            metadata_list: List of AutomationMetadata
+        
+        Returns:
+            Number of automations saved
+        """
+        if not metadata_list:
+            return 0
+        
+        # Look up existing rows for the whole batch at once
+        existing_by_key = {}
+        source_ids = list({metadata.source_id for metadata in metadata_list})
+        for chunk in self._chunks(source_ids):
+            stmt = select(CommunityAutomation).where(CommunityAutomation.source_id.in_(chunk))
+            result = await self.session.execute(stmt)
+            for automation in result.scalars():
+                existing_by_key[(automation.source, automation.source_id)] = automation
+        
+        automations = {}
+        for metadata in metadata_list:
+            key = (metadata.source, metadata.source_id)
+            automations[key] = self._apply_metadata(metadata, existing_by_key.get(key) or automations.get(key))
+        
+        await self.session.flush()
+        await self._sync_search_index(automations.values())
+        await self.session.commit()
+        
+        count = len(metadata_list)
+        logger.info(f"Batch saved: {count} automations")
+        return count
+    
+    def _apply_metadata(
+        self,
+        metadata: AutomationMetadata,
+        existing: Optional[CommunityAutomation]
+    ) -> CommunityAutomation:
+        """Update an existing automation from metadata, or add a new one to the session"""
         if existing:
             # Update existing
             existing.title = metadata.title
@@ -70,56 +148,76 @@ class CorpusRepository:
             existing.extra_metadata = metadata.metadata
             
             logger.debug(f"Updated automation: {existing.id} - {metadata.title}")
-        else:
-            # Insert new
-            existing = CommunityAutomation(
-                source=metadata.source,
-                source_id=metadata.source_id,
-                title=metadata.title,
-                description=metadata.description,
-                devices=metadata.devices,
-                integrations=metadata.integrations,
-                triggers=metadata.triggers,
-                conditions=metadata.conditions,
-                actions=metadata.actions,
-                use_case=metadata.use_case,
-                complexity=metadata.complexity,
-                quality_score=metadata.quality_score,
-                vote_count=metadata.vote_count,
-                created_at=metadata.created_at,
-                updated_at=metadata.updated_at,
-                last_crawled=datetime.utcnow(),
-                extra_metadata=metadata.metadata
-            )
-            self.session.add(existing)
-            
-            logger.debug(f"Inserted new automation: {metadata.title}")
-        
-        await self.session.commit()
-        await self.session.refresh(existing)
+            return existing
+        
+        # Insert new
+        automation = CommunityAutomation(
+            source=metadata.source,
+            source_id=metadata.source_id,
+            title=metadata.title,
+            description=metadata.description,
+            devices=metadata.devices,
+            integrations=metadata.integrations,
+            triggers=metadata.triggers,
+            conditions=metadata.conditions,
+            actions=metadata.actions,
+            use_case=metadata.use_case,
+            complexity=metadata.complexity,
+            quality_score=metadata.quality_score,
+            vote_count=metadata.vote_count,
+            created_at=metadata.created_at,
+            updated_at=metadata.updated_at,
+            last_crawled=datetime.utcnow(),
+            extra_metadata=metadata.metadata
+        )
+        self.session.add(automation)
         
-        return existing
+        logger.debug(f"Inserted new automation: {metadata.title}")
+        return automation
     
-    async def save_batch(
-        self,
-        metadata_list: List[AutomationMetadata]
-    ) -> int:
+    async def _sync_search_index(self, automations: Iterable[CommunityAutomation]):
         """
-        Save multiple automations in a batch
+        Replace the FTS and junction rows of flushed automations
         
         Args:
-            metadata_list: List of AutomationMetadata
-        
-        Returns:
-            Number of automations saved
+            automations: Automations with assigned ids
         """
-        count = 0
-        for metadata in metadata_list:
-            await self.save_automation(metadata)
-            count += 1
+        automations = list(automations)
+        if not automations:
+            return
+        ids = [automation.id for automation in automations]
+        
+        for chunk in self._chunks(ids):
+            await self.session.execute(delete(search_index).where(search_index.c.rowid.in_(chunk)))
+            await self.session.execute(delete(AutomationDevice).where(AutomationDevice.automation_id.in_(chunk)))
+            await self.session.execute(
+                delete(AutomationIntegration).where(AutomationIntegration.automation_id.in_(chunk))
+            )
         
-        logger.info(f"Batch saved: {count} automations")
-        return count
+        await self.session.execute(
+            insert(search_index),
+            [{'rowid': a.id, 'title': a.title, 'description': a.description} for a in automations]
+        )
+        
+        device_rows = [
+            {'automation_id': a.id, 'device': device}
+            for a in automations for device in set(a.devices or [])
+        ]
+        if device_rows:
+            await self.session.execute(insert(AutomationDevice), device_rows)
+        
+        integration_rows = [
+            {'automation_id': a.id, 'integration': integration}
+            for a in automations for integration in set(a.integrations or [])
+        ]
+        if integration_rows:
+            await self.session.execute(insert(AutomationIntegration), integration_rows)
+    
+    @staticmethod
+    def _chunks(values: List[Any]):
+        """Split values for IN (...) lookups"""
+        for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            yield values[start:start + LOOKUP_CHUNK_SIZE]
     
     async def get_by_id(self, automation_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -164,6 +262,34 @@ class CorpusRepository:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
     
+    async def get_by_source_ids(
+        self,
+        source: str,
+        source_ids: Iterable[str]
+    ) -> Dict[str, CommunityAutomation]:
+        """
+        Get many automations by source_id with one query per chunk
+        
+        Args:
+            source: 'discourse' or 'github'
+            source_ids: Source identifiers to look up
+        
+        Returns:
+            Existing automations keyed by source_id (missing ids are absent)
+        """
+        found = {}
+        for chunk in self._chunks(list(set(source_ids))):
+            stmt = select(CommunityAutomation).where(
+                and_(
+                    CommunityAutomation.source == source,
+                    CommunityAutomation.source_id.in_(chunk)
+                )
+            )
+            result = await self.session.execute(stmt)
+            for automation in result.scalars():
+                found[automation.source_id] = automation
+        return found
+    
     async def search(
         self,
         filters: Dict[str, Any]
@@ -171,8 +297,12 @@ class CorpusRepository:
         """
         Search automations with filters
         
+        Device and integration filters use the junction tables; a text query
+        uses the FTS5 index, ranked by BM25 boosted by quality_score.
+        
         Args:
             filters: Dictionary with optional keys:
+                - query: Free-text query over title and description
                 - device: Filter by device type
                 - integration: Filter by integration
                 - use_case: Filter by use case
@@ -180,7 +310,7 @@ class CorpusRepository:
                 - limit: Maximum results
         
         Returns:
-            List of automation dictionaries
+            List of automation dictionaries (best match first)
         """
         # Build query
         stmt = select(CommunityAutomation)
@@ -188,20 +318,18 @@ class CorpusRepository:
         # Apply filters
         conditions = []
         
-        # Device filter (JSON contains check)
+        # Device filter (covering index on the junction table)
         if 'device' in filters and filters['device']:
-            device = filters['device']
-            # SQLite JSON support: json_each for array containment
-            conditions.append(
-                CommunityAutomation.devices.contains([device])
-            )
+            conditions.append(CommunityAutomation.id.in_(
+                select(AutomationDevice.automation_id).where(AutomationDevice.device == filters['device'])
+            ))
         
         # Integration filter
         if 'integration' in filters and filters['integration']:
-            integration = filters['integration']
-            conditions.append(
-                CommunityAutomation.integrations.contains([integration])
-            )
+            conditions.append(CommunityAutomation.id.in_(
+                select(AutomationIntegration.automation_id)
+                .where(AutomationIntegration.integration == filters['integration'])
+            ))
         
         # Use case filter
         if 'use_case' in filters and filters['use_case']:
@@ -212,12 +340,24 @@ class CorpusRepository:
         min_quality = filters.get('min_quality', 0.7)
         conditions.append(CommunityAutomation.quality_score >= min_quality)
         
+        # Full-text filter and ranking
+        match = build_fts_query(filters.get('query'))
+        if match:
+            fts = literal_column(FTS_TABLE)
+            # bm25() is negative (lower is better); scaling by quality keeps that order
+            rank = func.bm25(fts, *BM25_WEIGHTS) * (1.0 + QUALITY_WEIGHT * CommunityAutomation.quality_score)
+            stmt = stmt.join(search_index, search_index.c.rowid == CommunityAutomation.id)
+            conditions.append(fts.op('MATCH')(match))
+        
         # Apply all conditions
         if conditions:
             stmt = stmt.where(and_(*conditions))
         
-        # Order by quality descending
-        stmt = stmt.order_by(CommunityAutomation.quality_score.desc())
+        # Order by text relevance (if any), then quality descending
+        if match:
+            stmt = stmt.order_by(rank, CommunityAutomation.quality_score.desc())
+        else:
+            stmt = stmt.order_by(CommunityAutomation.quality_score.desc())
         
         # Limit
         limit = filters.get('limit', 50)
@@ -272,15 +412,14 @@ class CorpusRepository:
                 - by_complexity: Count by complexity
                 - last_crawl_time: Last crawl timestamp
         """
-        # Total count
-        total_stmt = select(func.count(CommunityAutomation.id))
-        total_result = await self.session.execute(total_stmt)
-        total = total_result.scalar()
-        
-        # Average quality
-        avg_stmt = select(func.avg(CommunityAutomation.quality_score))
-        avg_result = await self.session.execute(avg_stmt)
-        avg_quality = avg_result.scalar() or 0.0
+        # Totals in one pass
+        totals_stmt = select(
+            func.count(CommunityAutomation.id),
+            func.avg(CommunityAutomation.quality_score),
+            func.max(CommunityAutomation.last_crawled)
+        )
+        total, avg_quality, last_crawl_time = (await self.session.execute(totals_stmt)).one()
+        avg_quality = avg_quality or 0.0
         
         # Count by use case
         use_case_stmt = select(
@@ -298,30 +437,24 @@ class CorpusRepository:
         complexity_result = await self.session.execute(complexity_stmt)
         by_complexity = {row[0]: row[1] for row in complexity_result.all()}
         
-        # Last crawl time
-        last_crawl_stmt = select(func.max(CommunityAutomation.last_crawled))
-        last_crawl_result = await self.session.execute(last_crawl_stmt)
-        last_crawl_time = last_crawl_result.scalar()
-        
-        # Collect unique devices and integrations
-        all_stmt = select(CommunityAutomation.devices, CommunityAutomation.integrations)
-        all_result = await self.session.execute(all_stmt)
+        # Unique devices and integrations (read from the junction table indexes)
+        devices_result = await self.session.execute(
+            select(AutomationDevice.device).distinct().order_by(AutomationDevice.device)
+        )
+        unique_devices = list(devices_result.scalars().all())
         
-        unique_devices = set()
-        unique_integrations = set()
-        for devices, integrations in all_result.all():
-            if devices:
-                unique_devices.update(devices)
-            if integrations:
-                unique_integrations.update(integrations)
+        integrations_result = await self.session.execute(
+            select(AutomationIntegration.integration).distinct().order_by(AutomationIntegration.integration)
+        )
+        unique_integrations = list(integrations_result.scalars().all())
         
         return {
             'total': total,
             'avg_quality': round(avg_quality, 3),
             'device_count': len(unique_devices),
             'integration_count': len(unique_integrations),
-            'devices': sorted(list(unique_devices)),
-            'integrations': sorted(list(unique_integrations)),
+            'devices': unique_devices,
+            'integrations': unique_integrations,
             'by_use_case': by_use_case,
             'by_complexity': by_complexity,
             'last_crawl_time': last_crawl_time.isoformat() if last_crawl_time else None
@@ -7,6 +7,7 @@ import pytest
 from datetime import datetime
 
 from src.miner.deduplicator import Deduplicator
+from src.miner.lsh_index import MinHashLSHIndex
 from src.miner.models import AutomationMetadata
 
 
@@ -120,6 +121,68 @@ class TestDeduplicator:
         
         assert best.source_id == "2"
         assert best.quality_score == 0.9
+    
+    def test_deduplicate_batch_compares_candidates_only(self, dedup, sample_metadata):
+        """Test near-duplicates are found while unrelated automations are not compared"""
+        existing = [
+            sample_metadata.model_copy(update={"source_id": str(i), "title": f"Garage door opener {i}",
+                                               "devices": ["cover"]})
+            for i in range(50)
+        ]
+        existing.append(sample_metadata.model_copy(update={"title": "Motion activated lighting", "quality_score": 0.9}))
+        new = [
+            sample_metadata.model_copy(update={"source_id": "new-1", "title": "Motion activated lights"}),
+            sample_metadata.model_copy(update={"source_id": "new-2", "title": "Notify when washing machine is done",
+                                               "devices": ["sensor"]})
+        ]
+        
+        to_add = dedup.deduplicate_batch(new, existing)
+        
+        assert [a.source_id for a in to_add] == ["new-2"]
+        candidates = MinHashLSHIndex()
+        for auto in existing:
+            candidates.add(dedup.index_key(auto), auto.title, auto.devices)
+        assert "discourse:12345" in candidates.candidates(new[0].title, new[0].devices)
+        assert len(candidates.candidates(new[1].title, new[1].devices)) < 5
+
+
+class TestMinHashLSHIndex:
+    """Test MinHashLSHIndex blocking and persistence"""
+    
+    def test_signatures_are_stable(self):
+        """Test bucket keys do not depend on the process (needed for persistence)"""
+        index = MinHashLSHIndex()
+        keys = index.bucket_keys("Motion activated lighting", ["light"])
+        
+        assert keys == MinHashLSHIndex().bucket_keys("lighting: motion-activated", ["light"])
+        assert len(keys) == index.bands
+    
+    def test_add_remove(self):
+        """Test replaced and removed items leave no buckets behind"""
+        index = MinHashLSHIndex()
+        index.add("discourse:1", "Motion activated lighting", ["light"])
+        index.add("discourse:1", "Night time dimming", ["light"])
+        
+        assert index.candidates("Night time dimming", ["light"]) == {"discourse:1"}
+        assert index.candidates("Motion activated lighting", ["light"]) == set()
+        
+        index.remove("discourse:1")
+        assert len(index) == 0
+        assert index.get_statistics()["buckets"] == 0
+    
+    def test_save_and_load(self, tmp_path):
+        """Test the index round-trips and ignores files built with other parameters"""
+        path = tmp_path / "corpus.lsh.json"
+        index = MinHashLSHIndex(path=str(path))
+        index.add("discourse:1", "Motion activated lighting", ["light"])
+        assert index.save()
+        assert not index.save()  # unchanged since last save
+        
+        loaded = MinHashLSHIndex(path=str(path))
+        assert loaded.load()
+        assert loaded.candidates("Motion activated lights", ["light"]) == {"discourse:1"}
+        
+        assert not MinHashLSHIndex(num_perm=64, path=str(path)).load()
 
 
 if __name__ == '__main__':
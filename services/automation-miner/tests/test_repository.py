@@ -0,0 +1,111 @@
+"""
+Unit Tests for CorpusRepository
+
+Tests the full-text index and device/integration junction tables.
+"""
+import pytest
+import pytest_asyncio
+from datetime import datetime
+
+from src.miner.database import Database
+from src.miner.repository import CorpusRepository, build_fts_query
+from src.miner.models import AutomationMetadata
+
+
+def create_metadata(source_id: str, title: str, description: str, devices, integrations,
+                    quality_score: float = 0.8, use_case: str = "comfort") -> AutomationMetadata:
+    """Create automation metadata for tests"""
+    return AutomationMetadata(
+        title=title,
+        description=description,
+        devices=devices,
+        integrations=integrations,
+        triggers=[{"type": "state"}],
+        conditions=[],
+        actions=[{"service": "light.turn_on"}],
+        use_case=use_case,
+        complexity="low",
+        quality_score=quality_score,
+        vote_count=10,
+        source="discourse",
+        source_id=source_id,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    """Database in a temporary file"""
+    db = Database(str(tmp_path / "corpus.db"))
+    await db.create_tables()
+    yield db
+    await db.close()
+
+
+@pytest_asyncio.fixture
+async def repo(database):
+    """Repository seeded with a small corpus"""
+    async with database.get_session() as session:
+        repo = CorpusRepository(session)
+        await repo.save_batch([
+            create_metadata("1", "Motion activated hallway light", "Turn on lights when motion is detected",
+                            ["motion_sensor", "light"], ["zha"], 0.8),
+            create_metadata("2", "Night light dimming", "Dim the lights at night",
+                            ["light"], ["hue"], 0.95),
+            create_metadata("3", "Lock door when leaving", "Lock the front door when everyone leaves",
+                            ["lock", "person"], ["zwave"], 0.9, "security"),
+        ])
+        yield repo
+
+
+class TestCorpusRepository:
+    """Test CorpusRepository search index"""
+    
+    def test_build_fts_query(self):
+        """Test free text becomes quoted prefix terms"""
+        assert build_fts_query('night "light" OR') == '"night"* "light"* "OR"*'
+        assert build_fts_query('!!') is None
+    
+    @pytest.mark.asyncio
+    async def test_device_and_integration_filters(self, repo):
+        """Test filters use exact device/integration matches"""
+        results = await repo.search({'device': 'light', 'min_quality': 0.0})
+        assert [a['source_id'] for a in results] == ['2', '1']
+        
+        results = await repo.search({'device': 'light', 'integration': 'zha', 'min_quality': 0.0})
+        assert [a['source_id'] for a in results] == ['1']
+    
+    @pytest.mark.asyncio
+    async def test_text_search_ranked(self, repo):
+        """Test full-text search matches title/description and combines filters"""
+        results = await repo.search({'query': 'lights night', 'min_quality': 0.0})
+        assert [a['source_id'] for a in results] == ['2']
+        
+        results = await repo.search({'query': 'door', 'use_case': 'security', 'min_quality': 0.0})
+        assert [a['source_id'] for a in results] == ['3']
+    
+    @pytest.mark.asyncio
+    async def test_update_keeps_index_in_sync(self, repo):
+        """Test saving an existing automation replaces its index rows"""
+        await repo.save_automation(
+            create_metadata("1", "Motion activated garage light", "Garage lights on motion",
+                            ["motion_sensor", "light", "cover"], ["zha"], 0.8)
+        )
+        
+        assert [a['source_id'] for a in await repo.search({'query': 'garage', 'min_quality': 0.0})] == ['1']
+        assert await repo.search({'query': 'hallway', 'min_quality': 0.0}) == []
+        
+        stats = await repo.get_stats()
+        assert stats['total'] == 3
+        assert stats['devices'] == ['cover', 'light', 'lock', 'motion_sensor', 'person']
+        assert stats['integrations'] == ['hue', 'zha', 'zwave']
+    
+    @pytest.mark.asyncio
+    async def test_get_by_source_ids(self, repo):
+        """Test the batched existence check returns only stored ids of the source"""
+        found = await repo.get_by_source_ids('discourse', ['1', '3', '3', '99'])
+        
+        assert sorted(found) == ['1', '3']
+        assert found['3'].title == "Lock door when leaving"
+        assert await repo.get_by_source_ids('github', ['1']) == {}
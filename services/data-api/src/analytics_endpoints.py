@@ -5,6 +5,7 @@ Story 21.4: Analytics Tab with Real Data
 Provides aggregated analytics data from InfluxDB for dashboard visualization
 """
 
+import asyncio
 import logging
 import sys
 import os
@@ -16,7 +17,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../shared'))
 
 from fastapi import APIRouter, HTTPException, status, Query
 from pydantic import BaseModel
-from shared.influxdb_query_client import InfluxDBQueryClient
+from shared.influxdb_query_client import get_shared_query_client
+
+from .query_cache import get_query_cache, align_to_bucket
 
 logger = logging.getLogger(__name__)
 
@@ -85,7 +88,15 @@ class AnalyticsResponse(BaseModel):
 router = APIRouter(tags=["Analytics"])
 
 # InfluxDB client (shared instance)
-influxdb_client = InfluxDBQueryClient()
+influxdb_client = get_shared_query_client()
+
+# Result cache shared with the other dashboard endpoints
+query_cache = get_query_cache()
+
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '2h': 7200}
+
+# Closed windows are queried and cached in chunks of this many windows
+CLOSED_CHUNK_WINDOWS = 12
 
 
 def calculate_trend(data: List[float], window: int = 5) -> str:
@@ -134,6 +145,8 @@ def get_time_range_params(time_range: str) -> tuple:
     """
     now = datetime.utcnow()
     
+    # Align to the aggregation window so repeated polls produce the same
+    # closed windows (and cache keys) until the current window rolls over
     if time_range == '1h':
         start = now - timedelta(hours=1)
         interval = '1m'
@@ -156,6 +169,7 @@ def get_time_range_params(time_range: str) -> tuple:
         interval = '1m'
         num_points = 60
     
+    start = align_to_bucket(start, INTERVAL_SECONDS[interval])
     return (start.strftime('%Y-%m-%dT%H:%M:%SZ'), interval, num_points)
 
 
@@ -176,75 +190,17 @@ async def get_analytics(
     """
     try:
         # Ensure InfluxDB connection
-        if not influxdb_client.is_connected:
-            await influxdb_client.connect()
-        
-        # Get time range parameters
-        start_time, interval, num_points = get_time_range_params(range)
-        
-        # Query events count over time
-        events_data = await query_events_per_minute(start_time, interval, num_points)
+        await influxdb_client.ensure_connected()
         
-        # Query API response time (from InfluxDB query metrics if available)
-        api_response_data = await query_api_response_time(start_time, interval, num_points)
-        
-        # Query database latency
-        db_latency_data = await query_database_latency(start_time, interval, num_points)
-        
-        # Query error rate
-        error_rate_data = await query_error_rate(start_time, interval, num_points)
-        
-        # Calculate summary statistics
-        total_events = sum(point['value'] for point in events_data)
-        success_rate = 100.0 - (error_rate_data[-1]['value'] if error_rate_data else 0.0)
-        avg_latency = sum(point['value'] for point in db_latency_data) / len(db_latency_data) if db_latency_data else 0.0
-        
-        # Build response
-        response = AnalyticsResponse(
-            eventsPerMinute=MetricData(
-                current=events_data[-1]['value'] if events_data else 0.0,
-                peak=max((point['value'] for point in events_data), default=0.0),
-                average=sum(point['value'] for point in events_data) / len(events_data) if events_data else 0.0,
-                min=min((point['value'] for point in events_data), default=0.0),
-                trend=calculate_trend([point['value'] for point in events_data]),
-                data=[TimeSeriesPoint(**point) for point in events_data]
-            ),
-            apiResponseTime=MetricData(
-                current=api_response_data[-1]['value'] if api_response_data else 0.0,
-                peak=max((point['value'] for point in api_response_data), default=0.0),
-                average=sum(point['value'] for point in api_response_data) / len(api_response_data) if api_response_data else 0.0,
-                min=min((point['value'] for point in api_response_data), default=0.0),
-                trend=calculate_trend([point['value'] for point in api_response_data]),
-                data=[TimeSeriesPoint(**point) for point in api_response_data]
-            ),
-            databaseLatency=MetricData(
-                current=db_latency_data[-1]['value'] if db_latency_data else 0.0,
-                peak=max((point['value'] for point in db_latency_data), default=0.0),
-                average=avg_latency,
-                min=min((point['value'] for point in db_latency_data), default=0.0),
-                trend=calculate_trend([point['value'] for point in db_latency_data]),
-                data=[TimeSeriesPoint(**point) for point in db_latency_data]
-            ),
-            errorRate=MetricData(
-                current=error_rate_data[-1]['value'] if error_rate_data else 0.0,
-                peak=max((point['value'] for point in error_rate_data), default=0.0),
-                average=sum(point['value'] for point in error_rate_data) / len(error_rate_data) if error_rate_data else 0.0,
-                min=min((point['value'] for point in error_rate_data), default=0.0),
-                trend=calculate_trend([point['value'] for point in error_rate_data]),
-                data=[TimeSeriesPoint(**point) for point in error_rate_data]
-            ),
-            summary=AnalyticsSummary(
-                totalEvents=int(total_events),
-                successRate=round(success_rate, 2),
-                avgLatency=round(avg_latency, 2),
-                uptime=calculate_service_uptime() or 100.0  # Story 24.1: Real uptime calculation
-            ),
-            timeRange=range,
-            lastUpdate=datetime.utcnow().isoformat() + 'Z'
+        # Dashboard polls inside one aggregation window share the response
+        interval = get_time_range_params(range)[1]
+        return await query_cache.get_or_load(
+            "analytics",
+            {"range": range, "metrics": metrics},
+            lambda: build_analytics_response(range),
+            bucket_seconds=INTERVAL_SECONDS[interval]
         )
         
-        return response
-        
     except Exception as e:
         logger.error(f"Error getting analytics: {e}", exc_info=True)
         raise HTTPException(
@@ -253,39 +209,168 @@ async def get_analytics(
         )
 
 
+async def build_analytics_response(range: str) -> AnalyticsResponse:
+    """
+    Query and aggregate analytics data for a time range
+    
+    Args:
+        range: Time range ('1h', '6h', '24h', '7d')
+    
+    Returns:
+        Analytics response
+    """
+    # Get time range parameters
+    start_time, interval, num_points = get_time_range_params(range)
+    
+    # Query events count over time
+    events_data = await query_events_per_minute(start_time, interval, num_points)
+    
+    # Query API response time (from InfluxDB query metrics if available)
+    api_response_data = await query_api_response_time(start_time, interval, num_points)
+    
+    # Query database latency
+    db_latency_data = await query_database_latency(start_time, interval, num_points)
+    
+    # Query error rate
+    error_rate_data = await query_error_rate(start_time, interval, num_points)
+    
+    # Calculate summary statistics
+    total_events = sum(point['value'] for point in events_data)
+    success_rate = 100.0 - (error_rate_data[-1]['value'] if error_rate_data else 0.0)
+    avg_latency = sum(point['value'] for point in db_latency_data) / len(db_latency_data) if db_latency_data else 0.0
+    
+    # Build response
+    response = AnalyticsResponse(
+        eventsPerMinute=MetricData(
+            current=events_data[-1]['value'] if events_data else 0.0,
+            peak=max((point['value'] for point in events_data), default=0.0),
+            average=sum(point['value'] for point in events_data) / len(events_data) if events_data else 0.0,
+            min=min((point['value'] for point in events_data), default=0.0),
+            trend=calculate_trend([point['value'] for point in events_data]),
+            data=[TimeSeriesPoint(**point) for point in events_data]
+        ),
+        apiResponseTime=MetricData(
+            current=api_response_data[-1]['value'] if api_response_data else 0.0,
+            peak=max((point['value'] for point in api_response_data), default=0.0),
+            average=sum(point['value'] for point in api_response_data) / len(api_response_data) if api_response_data else 0.0,
+            min=min((point['value'] for point in api_response_data), default=0.0),
+            trend=calculate_trend([point['value'] for point in api_response_data]),
+            data=[TimeSeriesPoint(**point) for point in api_response_data]
+        ),
+        databaseLatency=MetricData(
+            current=db_latency_data[-1]['value'] if db_latency_data else 0.0,
+            peak=max((point['value'] for point in db_latency_data), default=0.0),
+            average=avg_latency,
+            min=min((point['value'] for point in db_latency_data), default=0.0),
+            trend=calculate_trend([point['value'] for point in db_latency_data]),
+            data=[TimeSeriesPoint(**point) for point in db_latency_data]
+        ),
+        errorRate=MetricData(
+            current=error_rate_data[-1]['value'] if error_rate_data else 0.0,
+            peak=max((point['value'] for point in error_rate_data), default=0.0),
+            average=sum(point['value'] for point in error_rate_data) / len(error_rate_data) if error_rate_data else 0.0,
+            min=min((point['value'] for point in error_rate_data), default=0.0),
+            trend=calculate_trend([point['value'] for point in error_rate_data]),
+            data=[TimeSeriesPoint(**point) for point in error_rate_data]
+        ),
+        summary=AnalyticsSummary(
+            totalEvents=int(total_events),
+            successRate=round(success_rate, 2),
+            avgLatency=round(avg_latency, 2),
+            uptime=calculate_service_uptime() or 100.0  # Story 24.1: Real uptime calculation
+        ),
+        timeRange=range,
+        lastUpdate=datetime.utcnow().isoformat() + 'Z'
+    )
+    
+    return response
+
+
 async def query_events_per_minute(start_time: str, interval: str, num_points: int) -> List[Dict[str, Any]]:
-    """Query events per minute from InfluxDB"""
+    """
+    Query events per minute from InfluxDB
+    
+    Windows that have already closed can no longer change. They are queried
+    in chunks of CLOSED_CHUNK_WINDOWS windows aligned to fixed boundaries, so
+    a chunk's query (and cache key) is identical on every poll until it ages
+    out of the range and it is cached with the long TTL. Only the tail since
+    the last chunk boundary, including the open window, is re-queried.
+    """
     try:
-        query = f'''
-        from(bucket: "home_assistant_events")
-          |> range(start: {start_time})
-          |> filter(fn: (r) => r._measurement == "home_assistant_events")
-          |> aggregateWindow(every: {interval}, fn: count)
-          |> keep(columns: ["_time", "_value"])
-        '''
+        chunk_seconds = INTERVAL_SECONDS.get(interval, 60) * CLOSED_CHUNK_WINDOWS
+        range_start = datetime.strptime(start_time, '%Y-%m-%dT%H:%M:%SZ')
+        chunk_start = align_to_bucket(range_start, chunk_seconds)
+        tail_start = align_to_bucket(datetime.utcnow(), chunk_seconds)
+        
+        loads = []
+        while chunk_start < tail_start:
+            chunk_stop = chunk_start + timedelta(seconds=chunk_seconds)
+            closed_query = _event_count_query(chunk_start, interval, chunk_stop)
+            loads.append(query_cache.get_or_load(
+                "analytics_events_closed",
+                closed_query,
+                lambda query=closed_query: _query_event_counts(query),
+                closed=True
+            ))
+            chunk_start = chunk_stop
         
-        result = await influxdb_client.query(query)
+        tail_query = _event_count_query(tail_start, interval)
+        loads.append(query_cache.get_or_load(
+            "analytics_events_open",
+            tail_query,
+            lambda: _query_event_counts(tail_query),
+            bucket_seconds=INTERVAL_SECONDS.get(interval, 60)
+        ))
         
-        # Convert result to list of dicts
-        data = []
-        for table in result:
-            for record in table.records:
-                data.append({
-                    'timestamp': record.get_time().isoformat() + 'Z',
-                    'value': float(record.get_value() or 0)
-                })
+        # Windows are labelled with their stop time; drop those before the range
+        data = [
+            point
+            for chunk in await asyncio.gather(*loads)
+            for point in chunk
+            if point['timestamp'][:19] > start_time[:19]
+        ]
         
         # Fill missing data points
         if len(data) < num_points:
             data = fill_missing_points(data, start_time, interval, num_points)
         
-        return data[:num_points]
+        # Keep the most recent points (the open window is the current value)
+        return data[-num_points:]
     except Exception as e:
         logger.error(f"Error querying events per minute: {e}")
         # Return empty data with proper structure
         return generate_empty_series(start_time, interval, num_points)
 
 
+def _event_count_query(start: datetime, interval: str, stop: Optional[datetime] = None) -> str:
+    """Flux query counting events per aggregation window from start (to stop)"""
+    time_range = f"start: {start.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+    if stop is not None:
+        time_range += f", stop: {stop.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+    return f'''
+        from(bucket: "home_assistant_events")
+          |> range({time_range})
+          |> filter(fn: (r) => r._measurement == "home_assistant_events")
+          |> aggregateWindow(every: {interval}, fn: count)
+          |> keep(columns: ["_time", "_value"])
+        '''
+
+
+async def _query_event_counts(query: str) -> List[Dict[str, Any]]:
+    """Run an aggregateWindow count query and convert it to series points"""
+    result = await influxdb_client.query(query, name="analytics_events_per_minute")
+    
+    # Convert result to list of dicts
+    data = []
+    for table in result:
+        for record in table.records:
+            data.append({
+                'timestamp': record.get_time().isoformat() + 'Z',
+                'value': float(record.get_value() or 0)
+            })
+    return data
+
+
 async def query_api_response_time(start_time: str, interval: str, num_points: int) -> List[Dict[str, Any]]:
     """Query API response time (mock data for now)"""
     # TODO: Implement once we have API response time metrics in InfluxDB
@@ -4,6 +4,7 @@ Migrated from admin-api as part of Epic 13 Story 13.2
 Story 22.2: Updated to use SQLite storage
 """
 
+import asyncio
 import logging
 import sys
 import os
@@ -17,11 +18,12 @@ from fastapi import APIRouter, HTTPException, status, Query, Depends
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from shared.influxdb_query_client import InfluxDBQueryClient
+from shared.influxdb_query_client import get_shared_query_client
 
 # Story 22.2: SQLite models and database
 from .database import get_db
 from .models import Device, Entity
+from .registry_upsert import bulk_upsert_device_rows, bulk_upsert_entity_rows
 
 logger = logging.getLogger(__name__)
 
@@ -86,7 +88,7 @@ router = APIRouter(tags=["Devices & Entities"])
 
 
 # InfluxDB client (initialized on first use to avoid circular imports)
-influxdb_client = InfluxDBQueryClient()
+influxdb_client = get_shared_query_client()
 
 
 @router.get("/api/devices", response_model=DevicesListResponse)
@@ -226,17 +228,10 @@ async def get_device_reliability(
     - Top manufacturers/models by event volume
     """
     try:
-        from influxdb_client import InfluxDBClient
-        
-        # Get InfluxDB configuration
-        influxdb_url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
-        influxdb_token = os.getenv("INFLUXDB_TOKEN")
-        influxdb_org = os.getenv("INFLUXDB_ORG", "homeassistant")
-        influxdb_bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        
-        # Create client
-        client = InfluxDBClient(url=influxdb_url, token=influxdb_token, org=influxdb_org)
-        query_api = client.query_api()
+        # Shared pooled client; queries run off the event loop
+        if not await influxdb_client.ensure_connected():
+            raise Exception("InfluxDB client not connected")
+        influxdb_bucket = influxdb_client.bucket
         
         # Build query based on group_by parameter
         field_name = "manufacturer" if group_by == "manufacturer" else "model"
@@ -251,7 +246,7 @@ async def get_device_reliability(
           |> sort(desc: true)
         '''
         
-        result = query_api.query(query)
+        result = await influxdb_client.query(query, name="device_reliability")
         
         # Parse results
         reliability_data = []
@@ -285,7 +280,7 @@ async def get_device_reliability(
           |> count()
         '''
         
-        total_result = query_api.query(total_query)
+        total_result = await influxdb_client.query(total_query, name="device_reliability_total")
         all_events_count = 0
         for table in total_result:
             for record in table.records:
@@ -294,8 +289,6 @@ async def get_device_reliability(
         # Calculate coverage
         coverage = round((total_events / all_events_count) * 100, 2) if all_events_count > 0 else 0
         
-        client.close()
-        
         return {
             "period": period,
             "group_by": group_by,
@@ -408,17 +401,10 @@ async def get_integration_performance(
     Returns event rate, error rate, response time, and discovery status
     """
     try:
-        from influxdb_client import InfluxDBClient
-        
-        # Get InfluxDB configuration
-        influxdb_url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
-        influxdb_token = os.getenv("INFLUXDB_TOKEN")
-        influxdb_org = os.getenv("INFLUXDB_ORG", "homeassistant")
-        influxdb_bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        
-        # Create client
-        client = InfluxDBClient(url=influxdb_url, token=influxdb_token, org=influxdb_org)
-        query_api = client.query_api()
+        # Shared pooled client; queries run off the event loop
+        if not await influxdb_client.ensure_connected():
+            raise Exception("InfluxDB client not connected")
+        influxdb_bucket = influxdb_client.bucket
         
         # Calculate events per minute
         # Event rate query - OPTIMIZED (Context7 KB Pattern)
@@ -432,22 +418,6 @@ async def get_integration_performance(
           |> count()
         '''
         
-        event_result = query_api.query(event_rate_query)
-        total_events = 0
-        for table in event_result:
-            for record in table.records:
-                total_events += record.get_value()
-        
-        # Calculate time period in minutes
-        period_minutes = {
-            "1h": 60,
-            "24h": 1440,
-            "7d": 10080
-        }.get(period, 60)
-        
-        events_per_minute = round(total_events / period_minutes, 2) if period_minutes > 0 else 0
-        
-        # Estimate error rate (events with error field)
         # Error count query - OPTIMIZED (Context7 KB Pattern)
         # FIX: Add _field filter to count unique events with errors
         error_query = f'''
@@ -460,15 +430,6 @@ async def get_integration_performance(
           |> count()
         '''
         
-        error_result = query_api.query(error_query)
-        total_errors = 0
-        for table in error_result:
-            for record in table.records:
-                total_errors += record.get_value()
-        
-        error_rate = round((total_errors / total_events) * 100, 2) if total_events > 0 else 0
-        
-        # Calculate average response time (if available)
         # Response time query - OPTIMIZED (Context7 KB Pattern)
         # FIX: Filter by response_time field specifically
         response_time_query = f'''
@@ -480,12 +441,6 @@ async def get_integration_performance(
           |> mean()
         '''
         
-        response_result = query_api.query(response_time_query)
-        avg_response_time = 0
-        for table in response_result:
-            for record in table.records:
-                avg_response_time = round(record.get_value(), 2)
-        
         # Device discovery status (simplified - check if we have recent device updates)
         discovery_query = f'''
         from(bucket: "{influxdb_bucket}")
@@ -495,7 +450,42 @@ async def get_integration_performance(
           |> count()
         '''
         
-        discovery_result = query_api.query(discovery_query)
+        # Independent queries run concurrently on the shared pool
+        event_result, error_result, response_result, discovery_result = await asyncio.gather(
+            influxdb_client.query(event_rate_query, name="integration_event_rate"),
+            influxdb_client.query(error_query, name="integration_errors"),
+            influxdb_client.query(response_time_query, name="integration_response_time"),
+            influxdb_client.query(discovery_query, name="integration_discovery")
+        )
+        
+        total_events = 0
+        for table in event_result:
+            for record in table.records:
+                total_events += record.get_value()
+        
+        # Calculate time period in minutes
+        period_minutes = {
+            "1h": 60,
+            "24h": 1440,
+            "7d": 10080
+        }.get(period, 60)
+        
+        events_per_minute = round(total_events / period_minutes, 2) if period_minutes > 0 else 0
+        
+        # Estimate error rate (events with error field)
+        total_errors = 0
+        for table in error_result:
+            for record in table.records:
+                total_errors += record.get_value()
+        
+        error_rate = round((total_errors / total_events) * 100, 2) if total_events > 0 else 0
+        
+        # Calculate average response time (if available)
+        avg_response_time = 0
+        for table in response_result:
+            for record in table.records:
+                avg_response_time = round(record.get_value(), 2)
+        
         recent_discoveries = 0
         for table in discovery_result:
             for record in table.records:
@@ -503,8 +493,6 @@ async def get_integration_performance(
         
         discovery_status = "active" if recent_discoveries > 0 else "paused"
         
-        client.close()
-        
         return {
             "platform": platform,
             "period": period,
@@ -604,8 +592,8 @@ async def list_integrations(
     try:
         # Query config entries from InfluxDB
         # Ensure client is connected
-        if not influxdb_client.is_connected:
-            await influxdb_client.connect()
+        if not await influxdb_client.ensure_connected():
+            raise Exception("InfluxDB client not connected")
         
         query = f'''
             from(bucket: "home_assistant_events")
@@ -615,7 +603,7 @@ async def list_integrations(
                 |> limit(n: {limit})
         '''
         
-        results = await influxdb_client._execute_query(query)
+        results = await influxdb_client._execute_query(query, name="list_integrations")
         
         # Convert results to response models
         integrations = []
@@ -700,60 +688,23 @@ async def bulk_upsert_devices(
     """
     Internal endpoint for websocket-ingestion to bulk upsert devices from HA discovery
     
-    Uses INSERT OR REPLACE for reliable upsert without SQLAlchemy metadata issues
+    Set-based: INSERT ... ON CONFLICT DO UPDATE in executemany chunks, only
+    rewriting devices whose metadata changed
     """
     try:
-        upserted_count = 0
-        
-        for device_data in devices:
-            # Extract device_id (HA uses 'id', we use 'device_id')
-            device_id = device_data.get('id') or device_data.get('device_id')
-            if not device_id:
-                logger.warning(f"Skipping device without ID: {device_data.get('name', 'unknown')}")
-                continue
-            
-            # Check if device exists first
-            result = await db.execute(
-                select(Device).where(Device.device_id == device_id)
-            )
-            existing_device = result.scalar_one_or_none()
-            
-            # Prepare device data
-            device_values = {
-                'device_id': device_id,
-                'name': device_data.get('name_by_user') or device_data.get('name', 'Unknown'),
-                'name_by_user': device_data.get('name_by_user'),
-                'manufacturer': device_data.get('manufacturer'),
-                'model': device_data.get('model'),
-                'sw_version': device_data.get('sw_version'),
-                'area_id': device_data.get('area_id'),
-                'integration': device_data.get('integration'),
-                'entry_type': device_data.get('entry_type'),
-                'configuration_url': device_data.get('configuration_url'),
-                'suggested_area': device_data.get('suggested_area'),
-                'last_seen': datetime.now()
-            }
-            
-            if existing_device:
-                # Update existing device
-                for key, value in device_values.items():
-                    if key != 'device_id':  # Don't update primary key
-                        setattr(existing_device, key, value)
-            else:
-                # Insert new device
-                device_values['created_at'] = datetime.now()
-                new_device = Device(**device_values)
-                db.add(new_device)
-            
-            upserted_count += 1
-        
+        result = await bulk_upsert_device_rows(db, devices)
         await db.commit()
         
-        logger.info(f"Bulk upserted {upserted_count} devices from HA discovery")
+        logger.info(
+            f"Bulk upserted devices from HA discovery: {result['inserted']} inserted, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged "
+            f"in {sum(result['chunk_timings_ms']):.1f}ms ({result['chunks']} chunks)"
+        )
         
         return {
             "success": True,
-            "upserted": upserted_count,
+            "upserted": result["inserted"] + result["updated"] + result["unchanged"],
+            **result,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -776,43 +727,23 @@ async def bulk_upsert_entities(
     """
     Internal endpoint for websocket-ingestion to bulk upsert entities from HA discovery
     
-    Simple approach: Loop and merge (SQLAlchemy handles upsert logic)
+    Set-based: INSERT ... ON CONFLICT DO UPDATE in executemany chunks, only
+    rewriting entities whose metadata changed
     """
     try:
-        upserted_count = 0
-        
-        for entity_data in entities:
-            entity_id = entity_data.get('entity_id')
-            if not entity_id:
-                logger.warning("Skipping entity without entity_id")
-                continue
-            
-            # Extract domain from entity_id (e.g., "light.kitchen" -> "light")
-            domain = entity_id.split('.')[0] if '.' in entity_id else 'unknown'
-            
-            # Create entity instance
-            entity = Entity(
-                entity_id=entity_id,
-                device_id=entity_data.get('device_id'),
-                domain=domain,
-                platform=entity_data.get('platform', 'unknown'),
-                unique_id=entity_data.get('unique_id'),
-                area_id=entity_data.get('area_id'),
-                disabled=entity_data.get('disabled_by') is not None,
-                created_at=datetime.now()
-            )
-            
-            # Merge (upsert)
-            await db.merge(entity)
-            upserted_count += 1
-        
+        result = await bulk_upsert_entity_rows(db, entities)
         await db.commit()
         
-        logger.info(f"Bulk upserted {upserted_count} entities from HA discovery")
+        logger.info(
+            f"Bulk upserted entities from HA discovery: {result['inserted']} inserted, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged "
+            f"in {sum(result['chunk_timings_ms']):.1f}ms ({result['chunks']} chunks)"
+        )
         
         return {
             "success": True,
-            "upserted": upserted_count,
+            "upserted": result["inserted"] + result["updated"] + result["unchanged"],
+            **result,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -3,13 +3,16 @@ Energy Correlation API Endpoints
 Provides access to energy-event correlation data and smart meter readings
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Query, HTTPException, status
 from pydantic import BaseModel
 
-from influxdb_client import InfluxDBClient
+from shared.influxdb_query_client import get_shared_query_client
+
+from .query_cache import get_query_cache, align_to_bucket
 
 import os
 
@@ -69,17 +72,31 @@ class EnergyStatistics(BaseModel):
 # Router
 router = APIRouter(prefix="/energy", tags=["energy"])
 
+# Dashboard polls inside one bucket share query results
+CACHE_BUCKET_SECONDS = 60
+query_cache = get_query_cache()
 
-def get_influxdb_client():
-    """Get InfluxDB client instance"""
-    influxdb_url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
-    influxdb_token = os.getenv("INFLUXDB_TOKEN", "homeiq-token")
-    influxdb_org = os.getenv("INFLUXDB_ORG", "homeiq")
-    
-    return InfluxDBClient(
-        url=influxdb_url,
-        token=influxdb_token,
-        org=influxdb_org
+
+async def get_influxdb_client():
+    """Get the shared pooled InfluxDB client (connected on first use)"""
+    client = get_shared_query_client()
+    if not await client.ensure_connected():
+        raise Exception("InfluxDB client not connected")
+    return client
+
+
+def aligned_now() -> datetime:
+    """Current time floored to the cache bucket so query text is stable within a bucket"""
+    return align_to_bucket(datetime.utcnow(), CACHE_BUCKET_SECONDS)
+
+
+async def cached_query(client, flux_query: str, name: str):
+    """Run a Flux query through the shared result cache"""
+    return await query_cache.get_or_load(
+        name,
+        flux_query,
+        lambda: client.query(flux_query, name=name),
+        bucket_seconds=CACHE_BUCKET_SECONDS
     )
 
 
@@ -98,11 +115,10 @@ async def get_energy_correlations(
     """
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         # Build Flux query
-        start_time = datetime.utcnow() - timedelta(hours=hours)
+        start_time = aligned_now() - timedelta(hours=hours)
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
         
         # Build filters
@@ -124,7 +140,7 @@ async def get_energy_correlations(
           |> limit(n: {limit})
         '''
         
-        tables = query_api.query(flux_query, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        tables = await cached_query(client, flux_query, name="energy_correlations")
         
         correlations = []
         for table in tables:
@@ -141,7 +157,6 @@ async def get_energy_correlations(
                     power_delta_pct=record.values.get("power_delta_pct", 0)
                 ))
         
-        client.close()
         return correlations
         
     except Exception as e:
@@ -157,8 +172,7 @@ async def get_current_power():
     """Get current power consumption from smart meter"""
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
         
@@ -170,7 +184,7 @@ async def get_current_power():
           |> last()
         '''
         
-        tables = query_api.query(flux_query, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        tables = await cached_query(client, flux_query, name="energy_current")
         
         power_w = 0.0
         daily_kwh = 0.0
@@ -187,7 +201,6 @@ async def get_current_power():
                 elif field == "daily_kwh":
                     daily_kwh = float(value)
         
-        client.close()
         
         return PowerReading(
             timestamp=timestamp,
@@ -210,11 +223,10 @@ async def get_circuit_power(
     """Get circuit-level power readings"""
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        start_time = datetime.utcnow() - timedelta(hours=hours)
+        start_time = aligned_now() - timedelta(hours=hours)
         
         flux_query = f'''
         from(bucket: "{bucket}")
@@ -225,7 +237,7 @@ async def get_circuit_power(
           |> last()
         '''
         
-        tables = query_api.query(flux_query, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        tables = await cached_query(client, flux_query, name="energy_circuits")
         
         circuits = []
         for table in tables:
@@ -237,7 +249,6 @@ async def get_circuit_power(
                     percentage=record.values.get("percentage", 0.0)
                 ))
         
-        client.close()
         return circuits
         
     except Exception as e:
@@ -263,11 +274,10 @@ async def get_device_energy_impact(
     """
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        start_time = datetime.utcnow() - timedelta(days=days)
+        start_time = aligned_now() - timedelta(days=days)
         
         # Query ON transitions
         flux_on = f'''
@@ -302,9 +312,11 @@ async def get_device_energy_impact(
         '''
         
         # Execute queries
-        on_tables = query_api.query(flux_on, org=os.getenv("INFLUXDB_ORG", "homeiq"))
-        off_tables = query_api.query(flux_off, org=os.getenv("INFLUXDB_ORG", "homeiq"))
-        count_tables = query_api.query(flux_count, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        on_tables, off_tables, count_tables = await asyncio.gather(
+            cached_query(client, flux_on, name="energy_impact_on"),
+            cached_query(client, flux_off, name="energy_impact_off"),
+            cached_query(client, flux_count, name="energy_impact_count")
+        )
         
         avg_power_on = 0.0
         avg_power_off = 0.0
@@ -337,7 +349,6 @@ async def get_device_energy_impact(
         # Estimate monthly cost (assuming $0.12/kWh)
         monthly_cost = daily_kwh * 30 * 0.12
         
-        client.close()
         
         return DeviceEnergyImpact(
             entity_id=entity_id,
@@ -364,11 +375,10 @@ async def get_energy_statistics(
     """Get overall energy statistics"""
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        start_time = datetime.utcnow() - timedelta(hours=hours)
+        start_time = aligned_now() - timedelta(hours=hours)
         
         # Current power
         flux_current = f'''
@@ -407,10 +417,12 @@ async def get_energy_statistics(
         '''
         
         # Execute queries
-        current_tables = query_api.query(flux_current, org=os.getenv("INFLUXDB_ORG", "homeiq"))
-        peak_tables = query_api.query(flux_peak, org=os.getenv("INFLUXDB_ORG", "homeiq"))
-        avg_tables = query_api.query(flux_avg, org=os.getenv("INFLUXDB_ORG", "homeiq"))
-        corr_tables = query_api.query(flux_correlations, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        current_tables, peak_tables, avg_tables, corr_tables = await asyncio.gather(
+            cached_query(client, flux_current, name="energy_stats_current"),
+            cached_query(client, flux_peak, name="energy_stats_peak"),
+            cached_query(client, flux_avg, name="energy_stats_avg"),
+            cached_query(client, flux_correlations, name="energy_stats_correlations")
+        )
         
         current_power = 0.0
         daily_kwh = 0.0
@@ -444,7 +456,6 @@ async def get_energy_statistics(
             for record in table.records:
                 total_correlations = int(record.get_value())
         
-        client.close()
         
         return EnergyStatistics(
             current_power_w=current_power,
@@ -475,11 +486,10 @@ async def get_top_energy_consumers(
     """
     
     try:
-        client = get_influxdb_client()
-        query_api = client.query_api()
+        client = await get_influxdb_client()
         
         bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-        start_time = datetime.utcnow() - timedelta(days=days)
+        start_time = aligned_now() - timedelta(days=days)
         
         # Get average power delta by entity (ON transitions only)
         flux_query = f'''
@@ -494,7 +504,7 @@ async def get_top_energy_consumers(
           |> limit(n: {limit})
         '''
         
-        tables = query_api.query(flux_query, org=os.getenv("INFLUXDB_ORG", "homeiq"))
+        tables = await cached_query(client, flux_query, name="energy_top_consumers")
         
         devices = []
         for table in tables:
@@ -517,7 +527,6 @@ async def get_top_energy_consumers(
                     estimated_monthly_cost=monthly_cost
                 ))
         
-        client.close()
         return devices
         
     except Exception as e:
@@ -3,6 +3,7 @@ Events Endpoints for Data API
 Migrated from admin-api as part of Epic 13 Story 13.2
 """
 
+import asyncio
 import json
 import logging
 from typing import Dict, Any, List, Optional
@@ -10,12 +11,16 @@ from datetime import datetime, timedelta
 import aiohttp
 import os
 import sys
+from functools import partial
 
 # Add shared directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../shared'))
 
 from fastapi import APIRouter, HTTPException, status, Query
 from pydantic import BaseModel
+from shared.influxdb_query_client import get_shared_query_client
+
+from .query_cache import get_query_cache
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +70,13 @@ class EventsEndpoints:
             "enrichment-pipeline": os.getenv("ENRICHMENT_PIPELINE_URL", "http://enrichment-pipeline:8002")
         }
         
+        # Shared pooled InfluxDB client (one connection pool for the process lifetime)
+        self.influxdb_client = get_shared_query_client()
+        
+        # Result cache for the polled statistics endpoint
+        self.query_cache = get_query_cache()
+        self.stats_cache_bucket_seconds = int(os.getenv("EVENTS_STATS_CACHE_BUCKET_SECONDS", "30"))
+        
         self._add_routes()
     
     def _add_routes(self):
@@ -81,11 +93,18 @@ class EventsEndpoints:
             """Get event statistics"""
             try:
                 if service and service in self.service_urls:
-                    stats = await self._get_service_events_stats(service, period)
+                    loader = partial(self._get_service_events_stats, service, period)
                 else:
-                    stats = await self._get_all_events_stats(period)
+                    service = None
+                    loader = partial(self._get_all_events_stats, period)
                 
-                return stats
+                # Concurrent dashboard polls share one round of upstream queries
+                return await self.query_cache.get_or_load(
+                    "events_stats",
+                    {"service": service, "period": period},
+                    loader,
+                    bucket_seconds=self.stats_cache_bucket_seconds
+                )
                 
             except Exception as e:
                 logger.error(f"Error getting events stats: {e}")
@@ -579,18 +598,10 @@ class EventsEndpoints:
             - Limit/offset support for large result sets
         """
         try:
-            # Import InfluxDB client
-            from influxdb_client import InfluxDBClient
-            
-            # Get InfluxDB configuration
-            influxdb_url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
-            influxdb_token = os.getenv("INFLUXDB_TOKEN", "homeiq-token")
-            influxdb_org = os.getenv("INFLUXDB_ORG", "homeiq")
-            influxdb_bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-            
-            # Create InfluxDB client
-            client = InfluxDBClient(url=influxdb_url, token=influxdb_token, org=influxdb_org)
-            query_api = client.query_api()
+            # Shared pooled client; queries run off the event loop
+            if not await self.influxdb_client.ensure_connected():
+                raise Exception("InfluxDB client not connected")
+            influxdb_bucket = self.influxdb_client.bucket
             
             # Build Flux query - SIMPLIFIED APPROACH (Context7 KB Pattern)
             # Context7 KB: /websites/influxdata-influxdb-v2
@@ -637,7 +648,7 @@ class EventsEndpoints:
             logger.debug(f"Executing Flux query:\n{query}")
             
             # Execute query
-            result = query_api.query(query)
+            result = await self.influxdb_client.query(query, name="events")
             
             events = []
             seen_event_ids = set()  # Deduplication safety check
@@ -687,7 +698,6 @@ class EventsEndpoints:
                     )
                     events.append(event)
             
-            client.close()
             logger.info(f"InfluxDB Query Stats: {table_count} tables, {record_count} records, {len(events)} unique events (before final dedup)")
             
             # PRAGMATIC FIX: Python-level deduplication as final safety net
@@ -724,16 +734,10 @@ class EventsEndpoints:
             List of events in the automation chain
         """
         try:
-            from influxdb_client import InfluxDBClient
-            
-            # Initialize InfluxDB client
-            influxdb_url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
-            influxdb_token = os.getenv("INFLUXDB_TOKEN")
-            influxdb_org = os.getenv("INFLUXDB_ORG", "homeassistant")
-            influxdb_bucket = os.getenv("INFLUXDB_BUCKET", "home_assistant_events")
-            
-            client = InfluxDBClient(url=influxdb_url, token=influxdb_token, org=influxdb_org)
-            query_api = client.query_api()
+            # Shared pooled client; queries run off the event loop
+            if not await self.influxdb_client.ensure_connected():
+                raise Exception("InfluxDB client not connected")
+            influxdb_bucket = self.influxdb_client.bucket
             
             chain = []
             visited_contexts = set()
@@ -758,54 +762,60 @@ class EventsEndpoints:
                     |> limit(n: 100)
                 '''
                 
-                result = query_api.query(query)
+                result = await self.influxdb_client.query(query, name="automation_chain")
                 
                 found_events = []
                 next_context = None
                 
-                for table in result:
-                    for record in table.records:
-                        # Get the event context_id for next iteration
-                        event_context_id = record.values.get("context_id")
-                        
-                        if include_details:
-                            # Query full event details
-                            event_detail_query = f'''
+                records = [record for table in result for record in table.records]
+                
+                if include_details:
+                    # Query full event details for all children concurrently
+                    detail_results = await asyncio.gather(*[
+                        self.influxdb_client.query(f'''
                             from(bucket: "{influxdb_bucket}")
                                 |> range(start: -30d)
                                 |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
-                                |> filter(fn: (r) => r["context_id"] == "{event_context_id}")
+                                |> filter(fn: (r) => r["context_id"] == "{record.values.get("context_id")}")
                                 |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
                                 |> limit(n: 1)
-                            '''
-                            detail_result = query_api.query(event_detail_query)
-                            
-                            for detail_table in detail_result:
-                                for detail_record in detail_table.records:
-                                    event_info = {
-                                        "depth": depth,
-                                        "context_id": event_context_id,
-                                        "context_parent_id": current_context,
-                                        "timestamp": detail_record.get_time().isoformat(),
-                                        "entity_id": detail_record.values.get("entity_id", "unknown"),
-                                        "event_type": detail_record.values.get("event_type", "unknown"),
-                                        "state": detail_record.values.get("state"),
-                                        "old_state": detail_record.values.get("old_state")
-                                    }
-                                    found_events.append(event_info)
-                        else:
-                            # Minimal info
-                            event_info = {
-                                "depth": depth,
-                                "context_id": event_context_id,
-                                "context_parent_id": current_context,
-                                "timestamp": record.get_time().isoformat()
-                            }
-                            found_events.append(event_info)
-                        
-                        # Use first event's context_id for next iteration
-                        if not next_context:
-                            next_context = event_context_id
+                            ''', name="automation_chain_detail")
+                        for record in records
+                    ])
+                else:
+                    detail_results = [None] * len(records)
+                
+                for record, detail_result in zip(records, detail_results):
+                    # Get the event context_id for next iteration
+                    event_context_id = record.values.get("context_id")
+                    
+                    if include_details:
+                        for detail_table in detail_result:
+                            for detail_record in detail_table.records:
+                                event_info = {
+                                    "depth": depth,
+                                    "context_id": event_context_id,
+                                    "context_parent_id": current_context,
+                                    "timestamp": detail_record.get_time().isoformat(),
+                                    "entity_id": detail_record.values.get("entity_id", "unknown"),
+                                    "event_type": detail_record.values.get("event_type", "unknown"),
+                                    "state": detail_record.values.get("state"),
+                                    "old_state": detail_record.values.get("old_state")
+                                }
+                                found_events.append(event_info)
+                    else:
+                        # Minimal info
+                        event_info = {
+                            "depth": depth,
+                            "context_id": event_context_id,
+                            "context_parent_id": current_context,
+                            "timestamp": record.get_time().isoformat()
+                        }
+                        found_events.append(event_info)
+                    
+                    # Use first event's context_id for next iteration
+                    if not next_context:
+                        next_context = event_context_id
                 
                 chain.extend(found_events)
                 
@@ -813,8 +823,6 @@ class EventsEndpoints:
                 current_context = next_context
                 depth += 1
             
-            client.close()
-            
             logger.info(f"Traced automation chain for {context_id}: {len(chain)} events, {depth} levels deep")
             return chain
             
@@ -19,7 +19,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../shared'))
 
 from fastapi import APIRouter, HTTPException, status, Query, BackgroundTasks
 from pydantic import BaseModel, HttpUrl
-from shared.influxdb_query_client import InfluxDBQueryClient
+from shared.influxdb_query_client import get_shared_query_client
 import aiohttp
 
 logger = logging.getLogger(__name__)
@@ -77,7 +77,7 @@ class WebhookResponse(BaseModel):
 router = APIRouter(tags=["Home Assistant Automation"])
 
 # InfluxDB client
-influxdb_client = InfluxDBQueryClient()
+influxdb_client = get_shared_query_client()
 
 # Webhook storage (in-memory for now, will be persistent in Phase 2)
 webhooks: Dict[str, WebhookRegistration] = {}
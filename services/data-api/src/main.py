@@ -33,7 +33,7 @@ from shared.logging_config import (
 )
 from shared.correlation_middleware import FastAPICorrelationMiddleware
 from shared.auth import AuthManager
-from shared.influxdb_query_client import InfluxDBQueryClient
+from shared.influxdb_query_client import get_shared_query_client
 
 # Story 22.1: SQLite database
 from .database import init_db, check_db_health
@@ -59,6 +59,9 @@ from .analytics_endpoints import router as analytics_router
 # Energy Correlation Endpoints (Phase 4)
 from .energy_endpoints import router as energy_router
 
+# Result cache shared by the statistics/analytics/energy endpoints
+from .query_cache import get_query_cache
+
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
@@ -107,7 +110,7 @@ class DataAPIService:
         
         # Initialize components
         self.auth_manager = AuthManager(api_key=self.api_key, enable_auth=self.enable_auth)
-        self.influxdb_client = InfluxDBQueryClient()
+        self.influxdb_client = get_shared_query_client()  # Pooled client shared by all endpoints
         
         # Service state
         self.start_time = datetime.now()
@@ -322,6 +325,7 @@ async def health_check():
             },
             "sqlite": sqlite_status
         },
+        "query_cache": get_query_cache().get_cache_statistics(),
         "authentication": {
             "enabled": data_api_service.enable_auth
         }
@@ -0,0 +1,291 @@
+"""
+Query Result Cache for Data API
+
+Caches results of the statistics/analytics/energy endpoints that the health
+dashboard polls every few seconds. Entries are keyed on the normalized query
+(Flux text or request parameters) plus the aligned time bucket, so all polls
+inside one bucket share a single InfluxDB query.
+
+- Open buckets (still receiving data) expire at the end of the bucket and
+  never later than the open TTL
+- Closed historical buckets can no longer change and use the longer
+  historical TTL
+- Concurrent identical requests are coalesced onto one in-flight load
+- Size-bounded LRU eviction and hit/miss/coalesced metrics
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: Union[str, Dict[str, Any]]) -> str:
+    """
+    Normalize a query so equivalent requests map to the same key
+    
+    Args:
+        query: Flux query text (whitespace collapsed) or request parameters
+            (sorted, None values dropped, strings lower-cased)
+    
+    Returns:
+        Normalized query string
+    """
+    if isinstance(query, str):
+        return _WHITESPACE.sub(' ', query).strip()
+    
+    params = {
+        key: value.lower() if isinstance(value, str) else value
+        for key, value in query.items()
+        if value is not None
+    }
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def align_to_bucket(moment: datetime, bucket_seconds: int) -> datetime:
+    """
+    Floor a timestamp to the start of its time bucket
+    
+    Args:
+        moment: Timestamp (naive timestamps are treated as UTC)
+        bucket_seconds: Bucket size in seconds
+    
+    Returns:
+        Bucket start with the same tzinfo as moment
+    """
+    epoch = moment.replace(tzinfo=timezone.utc).timestamp() if moment.tzinfo is None else moment.timestamp()
+    aligned = datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc)
+    return aligned if moment.tzinfo is not None else aligned.replace(tzinfo=None)
+
+
+class QueryResultCache:
+    """In-memory TTL + LRU cache with request coalescing for query results"""
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        open_ttl_seconds: Optional[float] = None,
+        historical_ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize query result cache
+        
+        Args:
+            max_entries: Maximum cached results (default: QUERY_CACHE_MAX_ENTRIES or 512)
+            open_ttl_seconds: TTL for results of the current, open bucket
+                (default: QUERY_CACHE_OPEN_TTL_SECONDS or 10)
+            historical_ttl_seconds: TTL for results of closed buckets
+                (default: QUERY_CACHE_HISTORICAL_TTL_SECONDS or 3600)
+        """
+        self.max_entries = max_entries or int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512"))
+        self.open_ttl_seconds = open_ttl_seconds if open_ttl_seconds is not None else float(
+            os.getenv("QUERY_CACHE_OPEN_TTL_SECONDS", "10")
+        )
+        self.historical_ttl_seconds = historical_ttl_seconds if historical_ttl_seconds is not None else float(
+            os.getenv("QUERY_CACHE_HISTORICAL_TTL_SECONDS", "3600")
+        )
+        self.enabled = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+        
+        self._entries: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.load_errors = 0
+        self.namespace_stats: Dict[str, Dict[str, int]] = {}
+    
+    def make_key(
+        self,
+        namespace: str,
+        query: Union[str, Dict[str, Any]],
+        bucket_seconds: Optional[int] = None,
+        now: Optional[float] = None
+    ) -> Tuple[str, Optional[float]]:
+        """
+        Build the cache key for a query
+        
+        Args:
+            namespace: Endpoint/query name (used for metrics and invalidation)
+            query: Flux query text or request parameters
+            bucket_seconds: Align the key to buckets of this size (None = no bucket)
+            now: Current epoch seconds (for testing)
+        
+        Returns:
+            (cache key, epoch seconds at which the current bucket closes or None)
+        """
+        digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+        if not bucket_seconds:
+            return f"{namespace}:{digest}", None
+        
+        now = time.time() if now is None else now
+        bucket = int(now // bucket_seconds)
+        return f"{namespace}:{digest}:{bucket}", (bucket + 1) * bucket_seconds
+    
+    async def get_or_load(
+        self,
+        namespace: str,
+        query: Union[str, Dict[str, Any]],
+        loader: Callable[[], Awaitable[Any]],
+        bucket_seconds: Optional[int] = None,
+        closed: bool = False
+    ) -> Any:
+        """
+        Return the cached result for a query or load it once
+        
+        Args:
+            namespace: Endpoint/query name
+            query: Flux query text or request parameters
+            loader: Coroutine function producing the result on a miss
+            bucket_seconds: Time bucket size the result is valid for
+            closed: True if the queried range lies entirely in the past
+                (cached with the historical TTL)
+        
+        Returns:
+            Query result (shared between callers; treat as read-only)
+        """
+        if not self.enabled:
+            return await loader()
+        
+        now = time.time()
+        key, bucket_end = self.make_key(namespace, query, bucket_seconds, now)
+        stats = self.namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0})
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        
+        # Coalesce onto an identical load that is already running
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+        
+        self.misses += 1
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.load_errors += 1
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody waited for is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        future.set_result(value)
+        self._store(key, value, self._ttl(now, bucket_end, closed))
+        return value
+    
+    def _ttl(self, now: float, bucket_end: Optional[float], closed: bool) -> float:
+        """TTL for a freshly loaded result"""
+        if closed:
+            return self.historical_ttl_seconds
+        if bucket_end is None:
+            return self.open_ttl_seconds
+        # An open bucket's result is never reused after the bucket closes
+        return min(self.open_ttl_seconds, max(bucket_end - now, 0.0))
+    
+    def _store(self, key: str, value: Any, ttl: float):
+        """Store a result and evict least recently used entries"""
+        if ttl <= 0:
+            return
+        
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """
+        Drop cached results
+        
+        Args:
+            namespace: Only drop results of this namespace (None = all)
+        
+        Returns:
+            Number of entries removed
+        """
+        if namespace is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            prefix = f"{namespace}:"
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            removed = len(keys)
+        
+        if removed:
+            logger.debug(f"Invalidated {removed} cached query results ({namespace or 'all'})")
+        return removed
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache hit/miss statistics
+        
+        Returns:
+            Dictionary with cache metrics
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups * 100, 2) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "load_errors": self.load_errors,
+            "open_ttl_seconds": self.open_ttl_seconds,
+            "historical_ttl_seconds": self.historical_ttl_seconds,
+            "namespaces": {name: dict(stats) for name, stats in self.namespace_stats.items()}
+        }
+
+
+_query_cache: Optional[QueryResultCache] = None
+
+
+def get_query_cache() -> QueryResultCache:
+    """
+    Get the process-wide query result cache
+    
+    Returns:
+        Shared QueryResultCache instance
+    """
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = QueryResultCache()
+    return _query_cache
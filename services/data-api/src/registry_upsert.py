@@ -0,0 +1,242 @@
+"""
+Set-based bulk upsert for the device/entity registry
+
+Used by the /internal/devices|entities/bulk_upsert endpoints that
+websocket-ingestion calls after every HA discovery (including repeated
+discoveries during reconnect storms). Rows are written with SQLite
+INSERT ... ON CONFLICT DO UPDATE in executemany chunks instead of one
+SELECT + ORM update per row, and the DO UPDATE only fires for rows whose
+content actually changed, so unchanged rows are never rewritten.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Device, Entity
+
+logger = logging.getLogger(__name__)
+
+BULK_UPSERT_CHUNK_SIZE = int(os.getenv("BULK_UPSERT_CHUNK_SIZE", "500"))
+
+# Refresh last_seen of unchanged devices at most this often
+DEVICE_LAST_SEEN_REFRESH = timedelta(
+    seconds=int(os.getenv("DEVICE_LAST_SEEN_REFRESH_SECONDS", "3600"))
+)
+
+DEVICE_COLUMNS = (
+    'name', 'name_by_user', 'manufacturer', 'model', 'sw_version', 'area_id',
+    'integration', 'entry_type', 'configuration_url', 'suggested_area'
+)
+
+ENTITY_COLUMNS = ('device_id', 'domain', 'platform', 'unique_id', 'area_id', 'disabled')
+
+
+def device_row(device_data: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Map an HA device registry entry to a devices row
+
+    Args:
+        device_data: HA device (HA uses 'id', we use 'device_id')
+        now: Timestamp for last_seen/created_at
+
+    Returns:
+        Row values, or None if the device has no ID
+    """
+    device_id = device_data.get('id') or device_data.get('device_id')
+    if not device_id:
+        logger.warning(f"Skipping device without ID: {device_data.get('name', 'unknown')}")
+        return None
+
+    return {
+        'device_id': device_id,
+        'name': device_data.get('name_by_user') or device_data.get('name', 'Unknown'),
+        'name_by_user': device_data.get('name_by_user'),
+        'manufacturer': device_data.get('manufacturer'),
+        'model': device_data.get('model'),
+        'sw_version': device_data.get('sw_version'),
+        'area_id': device_data.get('area_id'),
+        'integration': device_data.get('integration'),
+        'entry_type': device_data.get('entry_type'),
+        'configuration_url': device_data.get('configuration_url'),
+        'suggested_area': device_data.get('suggested_area'),
+        'last_seen': now,
+        'created_at': now
+    }
+
+
+def entity_row(entity_data: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Map an HA entity registry entry to an entities row
+
+    Args:
+        entity_data: HA entity
+        now: Timestamp for created_at
+
+    Returns:
+        Row values, or None if the entity has no entity_id
+    """
+    entity_id = entity_data.get('entity_id')
+    if not entity_id:
+        logger.warning("Skipping entity without entity_id")
+        return None
+
+    return {
+        'entity_id': entity_id,
+        'device_id': entity_data.get('device_id'),
+        # Extract domain from entity_id (e.g., "light.kitchen" -> "light")
+        'domain': entity_id.split('.')[0] if '.' in entity_id else 'unknown',
+        'platform': entity_data.get('platform', 'unknown'),
+        'unique_id': entity_data.get('unique_id'),
+        'area_id': entity_data.get('area_id'),
+        'disabled': entity_data.get('disabled_by') is not None,
+        'created_at': now
+    }
+
+
+def _dedupe(rows: Iterable[Optional[Dict[str, Any]]], key: str) -> List[Dict[str, Any]]:
+    """Drop invalid rows and keep the last occurrence of each key"""
+    unique = {}
+    for row in rows:
+        if row is not None:
+            unique[row[key]] = row
+    return list(unique.values())
+
+
+async def _upsert_rows(
+    db: AsyncSession,
+    model,
+    key: str,
+    rows: List[Dict[str, Any]],
+    compare_columns: tuple,
+    touch_column: Optional[str] = None,
+    touch_before: Optional[datetime] = None,
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Upsert rows in executemany chunks, rewriting only changed rows
+
+    Args:
+        db: Database session (caller commits)
+        model: ORM model of the target table
+        key: Primary key column name
+        rows: Deduplicated row values
+        compare_columns: Columns that define "changed"
+        touch_column: Timestamp column refreshed on update (e.g. last_seen)
+        touch_before: Also update unchanged rows whose touch_column is older
+        chunk_size: Rows per executemany chunk
+
+    Returns:
+        Dictionary with inserted/updated/unchanged counts and chunk timings
+    """
+    table = model.__table__
+    key_column = table.c[key]
+
+    stmt = sqlite_insert(table)
+    set_columns = list(compare_columns) + ([touch_column] if touch_column else [])
+    changed = [table.c[col].is_distinct_from(stmt.excluded[col]) for col in compare_columns]
+    if touch_column and touch_before is not None:
+        changed.append(table.c[touch_column] < touch_before)
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key_column],
+        set_={col: stmt.excluded[col] for col in set_columns},
+        where=or_(*changed)
+    )
+
+    inserted = updated = unchanged = 0
+    chunk_timings_ms = []
+
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        start = time.perf_counter()
+
+        # One existence lookup per chunk to split inserts from updates
+        result = await db.execute(
+            select(key_column).where(key_column.in_([row[key] for row in chunk]))
+        )
+        existing = len(result.scalars().all())
+
+        result = await db.execute(stmt, chunk)
+        written = max(result.rowcount, 0)
+
+        chunk_inserted = len(chunk) - existing
+        chunk_updated = max(written - chunk_inserted, 0)
+        inserted += chunk_inserted
+        updated += chunk_updated
+        unchanged += existing - chunk_updated
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        chunk_timings_ms.append(round(elapsed_ms, 2))
+        logger.debug(
+            f"Upserted {table.name} chunk {offset // chunk_size + 1}: {len(chunk)} rows "
+            f"({chunk_inserted} inserted, {chunk_updated} updated) in {elapsed_ms:.1f}ms"
+        )
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged,
+        "chunks": len(chunk_timings_ms),
+        "chunk_timings_ms": chunk_timings_ms
+    }
+
+
+async def bulk_upsert_device_rows(
+    db: AsyncSession,
+    devices: List[Dict[str, Any]],
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Bulk upsert HA devices
+
+    Unchanged devices are not rewritten; their last_seen is refreshed at most
+    once per DEVICE_LAST_SEEN_REFRESH (those rows count as updated).
+
+    Args:
+        db: Database session (caller commits)
+        devices: HA device registry entries
+        chunk_size: Rows per executemany chunk
+
+    Returns:
+        Dictionary with inserted/updated/unchanged/skipped counts and chunk timings
+    """
+    now = datetime.now()
+    rows = _dedupe((device_row(device, now) for device in devices), 'device_id')
+    stats = await _upsert_rows(
+        db, Device, 'device_id', rows, DEVICE_COLUMNS,
+        touch_column='last_seen',
+        touch_before=now - DEVICE_LAST_SEEN_REFRESH,
+        chunk_size=chunk_size
+    )
+    stats["skipped"] = len(devices) - len(rows)
+    return stats
+
+
+async def bulk_upsert_entity_rows(
+    db: AsyncSession,
+    entities: List[Dict[str, Any]],
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Bulk upsert HA entities (created_at is only set on insert)
+
+    Args:
+        db: Database session (caller commits)
+        entities: HA entity registry entries
+        chunk_size: Rows per executemany chunk
+
+    Returns:
+        Dictionary with inserted/updated/unchanged/skipped counts and chunk timings
+    """
+    now = datetime.now()
+    rows = _dedupe((entity_row(entity, now) for entity in entities), 'entity_id')
+    stats = await _upsert_rows(db, Entity, 'entity_id', rows, ENTITY_COLUMNS, chunk_size=chunk_size)
+    stats["skipped"] = len(entities) - len(rows)
+    return stats
@@ -15,7 +15,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../shared'))
 
 from fastapi import APIRouter, HTTPException, status, Query
 from pydantic import BaseModel
-from shared.influxdb_query_client import InfluxDBQueryClient
+from shared.influxdb_query_client import get_shared_query_client
 
 logger = logging.getLogger(__name__)
 
@@ -79,7 +79,7 @@ class ScoreTimelineResponse(BaseModel):
 router = APIRouter(tags=["Sports Data"])
 
 # InfluxDB client (shared instance)
-influxdb_client = InfluxDBQueryClient()
+influxdb_client = get_shared_query_client()
 
 
 @router.get("/sports/games/live")
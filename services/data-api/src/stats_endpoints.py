@@ -12,7 +12,9 @@ import os
 from fastapi import APIRouter, HTTPException, status, Query
 from pydantic import BaseModel
 
-from shared.influxdb_query_client import InfluxDBQueryClient as AdminAPIInfluxDBClient
+from shared.influxdb_query_client import get_shared_query_client
+
+from .query_cache import get_query_cache
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +45,14 @@ class StatsEndpoints:
         """Initialize stats endpoints"""
         self.router = APIRouter()
         
-        # InfluxDB client for querying metrics
-        self.influxdb_client = AdminAPIInfluxDBClient()
+        # Shared pooled InfluxDB client (one connection pool for the process lifetime)
+        self.influxdb_client = get_shared_query_client()
         self.use_influxdb = os.getenv("USE_INFLUXDB_STATS", "true").lower() == "true"
         
+        # Result cache for the polled statistics queries
+        self.query_cache = get_query_cache()
+        self.stats_cache_bucket_seconds = int(os.getenv("STATS_CACHE_BUCKET_SECONDS", "30"))
+        
         # Keep service URLs for fallback
         self.service_urls = {
             "websocket-ingestion": os.getenv("WEBSOCKET_INGESTION_URL", "http://localhost:8001"),
@@ -56,9 +62,9 @@ class StatsEndpoints:
         self._add_routes()
     
     async def initialize(self):
-        """Initialize InfluxDB connection"""
+        """Initialize InfluxDB connection (if the shared client is not connected yet)"""
         try:
-            if self.use_influxdb:
+            if self.use_influxdb and not self.influxdb_client.is_connected:
                 success = await self.influxdb_client.connect()
                 if not success:
                     logger.warning("InfluxDB connection failed, will use fallback")
@@ -70,11 +76,8 @@ class StatsEndpoints:
             self.use_influxdb = False
     
     async def close(self):
-        """Close InfluxDB connection"""
-        try:
-            await self.influxdb_client.close()
-        except Exception as e:
-            logger.error(f"Error closing InfluxDB client: {e}")
+        """Release InfluxDB resources (the shared client is closed by the service on shutdown)"""
+        logger.debug("Stats endpoints closed; shared InfluxDB client left open")
     
     def _add_routes(self):
         """Add statistics routes"""
@@ -89,7 +92,12 @@ class StatsEndpoints:
                 # Try InfluxDB first
                 if self.use_influxdb and self.influxdb_client.is_connected:
                     try:
-                        stats = await self._get_stats_from_influxdb(period, service)
+                        stats = await self.query_cache.get_or_load(
+                            "stats",
+                            {"period": period, "service": service},
+                            lambda: self._get_stats_from_influxdb(period, service),
+                            bucket_seconds=self.stats_cache_bucket_seconds
+                        )
                         return StatisticsResponse(
                             timestamp=datetime.now(),
                             period=period,
@@ -65,3 +65,64 @@ def test_calculate_service_uptime_not_hardcoded():
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
+
+
+class FixedDateTime(datetime):
+    """datetime whose utcnow() is set by the test"""
+    
+    now_value = datetime(2025, 1, 1, 12, 30, 20)
+    
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+
+def make_count_table(times):
+    """Query result table with one count record per window stop time"""
+    from datetime import timezone
+    records = []
+    for time in times:
+        record = MagicMock()
+        record.get_time.return_value = time.replace(tzinfo=timezone.utc)
+        record.get_value.return_value = 1
+        records.append(record)
+    table = MagicMock()
+    table.records = records
+    return [table]
+
+
+@pytest.mark.asyncio
+async def test_events_per_minute_reuses_closed_chunks():
+    """Test closed chunks keep their cache key across polls in later windows"""
+    from unittest.mock import AsyncMock
+    from src import analytics_endpoints
+    from src.query_cache import QueryResultCache
+    
+    queries = []
+    
+    async def fake_query(query, name=None):
+        queries.append(query)
+        start = query.split("start: ")[1][:20]
+        first = datetime.strptime(start, '%Y-%m-%dT%H:%M:%SZ')
+        return make_count_table([first + timedelta(minutes=i + 1) for i in range(12)])
+    
+    client = MagicMock()
+    client.query = AsyncMock(side_effect=fake_query)
+    cache = QueryResultCache(open_ttl_seconds=10)
+    
+    with patch.object(analytics_endpoints, 'datetime', FixedDateTime), \
+            patch.object(analytics_endpoints, 'influxdb_client', client), \
+            patch.object(analytics_endpoints, 'query_cache', cache):
+        FixedDateTime.now_value = datetime(2025, 1, 1, 12, 30, 20)
+        data = await analytics_endpoints.query_events_per_minute('2025-01-01T11:30:00Z', '1m', 60)
+        first_poll = len(queries)
+        
+        FixedDateTime.now_value = datetime(2025, 1, 1, 12, 31, 20)
+        await analytics_endpoints.query_events_per_minute('2025-01-01T11:31:00Z', '1m', 60)
+    
+    # 11:24-12:24 in five 12-minute chunks plus the tail from 12:24
+    assert first_poll == 6
+    assert all(point['timestamp'][:19] > '2025-01-01T11:30:00' for point in data)
+    # The next minute reuses every closed chunk
+    assert cache.namespace_stats["analytics_events_closed"] == {"hits": 5, "misses": 5, "coalesced": 0}
+    assert len(queries) <= first_poll + 1
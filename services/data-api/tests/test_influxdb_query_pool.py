@@ -0,0 +1,144 @@
+"""
+Unit tests for the pooled, non-blocking shared InfluxDB query client
+"""
+
+import asyncio
+import threading
+import time
+import sys
+import os
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# Add repository root to path for the shared package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+from shared import influxdb_query_client
+from shared.influxdb_query_client import InfluxDBQueryClient, get_shared_query_client
+
+
+def make_client(max_concurrent_queries=2, delay=0.05):
+    """Build a connected client whose query_api sleeps and tracks concurrency"""
+    client = InfluxDBQueryClient(max_concurrent_queries=max_concurrent_queries)
+    state = {'running': 0, 'peak': 0, 'threads': set()}
+    lock = threading.Lock()
+    
+    def slow_query(query, org):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            state['threads'].add(threading.current_thread().name)
+        time.sleep(delay)
+        with lock:
+            state['running'] -= 1
+        record = MagicMock()
+        record.values = {'_value': 1}
+        table = MagicMock()
+        table.records = [record]
+        return [table]
+    
+    client.query_api = MagicMock()
+    client.query_api.query.side_effect = slow_query
+    client._executor = influxdb_query_client.ThreadPoolExecutor(
+        max_workers=client.max_concurrent_queries, thread_name_prefix="influxdb-query"
+    )
+    client.is_connected = True
+    return client, state
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited():
+    """Test no more than max_concurrent_queries run at once"""
+    client, state = make_client(max_concurrent_queries=2)
+    
+    results = await asyncio.gather(*[client._execute_query("q", name="test") for _ in range(6)])
+    
+    assert all(r == [{'_value': 1}] for r in results)
+    assert state['peak'] == 2
+    assert all(name.startswith("influxdb-query") for name in state['threads'])
+    assert client.in_flight_queries == 0
+    assert client.waiting_queries == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_queries_do_not_block_event_loop():
+    """Test the event loop keeps running while queries execute"""
+    client, _ = make_client(max_concurrent_queries=1, delay=0.2)
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.02)
+            ticks += 1
+    
+    await asyncio.gather(client.query("q"), ticker())
+    
+    assert ticks == 5
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_per_query_metrics():
+    """Test timing is recorded per named query"""
+    client, _ = make_client(delay=0.01)
+    
+    await client.query("q", name="events")
+    await client.query("q", name="events")
+    await client.query("q", name="reliability")
+    
+    metrics = client.get_query_metrics()
+    assert metrics['queries']['events']['count'] == 2
+    assert metrics['queries']['reliability']['count'] == 1
+    assert metrics['p50_ms'] > 0
+    assert metrics['p95_ms'] >= metrics['p50_ms']
+    assert client.query_count == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_query_is_counted():
+    """Test failures release the slot and are recorded"""
+    client, _ = make_client()
+    client.query_api.query.side_effect = RuntimeError("boom")
+    
+    with pytest.raises(RuntimeError):
+        await client.query("q", name="broken")
+    
+    assert client.error_count == 1
+    assert client.in_flight_queries == 0
+    assert client.get_query_metrics()['queries']['broken']['errors'] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_ensure_connected_connects_once():
+    """Test concurrent callers share one connection attempt"""
+    client = InfluxDBQueryClient()
+    
+    async def fake_connect():
+        await asyncio.sleep(0.01)
+        client.is_connected = True
+        return True
+    
+    client.connect = AsyncMock(side_effect=fake_connect)
+    
+    results = await asyncio.gather(*[client.ensure_connected() for _ in range(5)])
+    
+    assert all(results)
+    assert client.connect.await_count == 1
+
+
+def test_shared_client_is_singleton():
+    """Test all endpoints get the same client instance"""
+    assert get_shared_query_client() is get_shared_query_client()
+
+
+def test_stats_endpoints_use_shared_client():
+    """Test the stats endpoints query through the shared pooled client"""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from src.stats_endpoints import StatsEndpoints
+    
+    assert StatsEndpoints().influxdb_client is get_shared_query_client()
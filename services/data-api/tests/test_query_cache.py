@@ -0,0 +1,144 @@
+"""
+Unit tests for the data-api query result cache
+"""
+
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.query_cache import QueryResultCache, normalize_query, align_to_bucket
+
+
+class CountingLoader:
+    """Loader that counts calls and optionally waits before returning"""
+    
+    def __init__(self, value="result", delay=0.0, error=None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def test_normalize_query():
+    """Test equivalent queries normalize to the same text"""
+    assert normalize_query("from(bucket: \"x\")\n   |> range(start: -1h)") == \
+        normalize_query("from(bucket: \"x\") |> range(start: -1h)")
+    assert normalize_query({"period": "1H", "service": None}) == normalize_query({"period": "1h"})
+
+
+def test_align_to_bucket():
+    """Test timestamps are floored to the bucket start"""
+    assert align_to_bucket(datetime(2025, 1, 6, 7, 14, 59), 300) == datetime(2025, 1, 6, 7, 10)
+    assert align_to_bucket(datetime(2025, 1, 6, 7, 59, 0), 7200) == datetime(2025, 1, 6, 6, 0)
+
+
+def test_keys_aligned_to_bucket():
+    """Test keys change only when the time bucket rolls over"""
+    cache = QueryResultCache()
+    
+    key_a, end_a = cache.make_key("stats", {"period": "1h"}, bucket_seconds=60, now=120.0)
+    key_b, _ = cache.make_key("stats", {"period": "1h"}, bucket_seconds=60, now=179.9)
+    key_c, _ = cache.make_key("stats", {"period": "1h"}, bucket_seconds=60, now=180.0)
+    
+    assert key_a == key_b
+    assert key_a != key_c
+    assert end_a == 180
+
+
+@pytest.mark.asyncio
+async def test_hit_and_miss():
+    """Test repeated queries are served from cache"""
+    cache = QueryResultCache(open_ttl_seconds=60)
+    loader = CountingLoader()
+    
+    assert await cache.get_or_load("stats", {"period": "1h"}, loader) == "result"
+    assert await cache.get_or_load("stats", {"period": "1h"}, loader) == "result"
+    await cache.get_or_load("stats", {"period": "24h"}, loader)
+    
+    stats = cache.get_cache_statistics()
+    assert loader.calls == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["namespaces"]["stats"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced():
+    """Test concurrent identical requests share one load"""
+    cache = QueryResultCache()
+    loader = CountingLoader(delay=0.05)
+    
+    results = await asyncio.gather(*[cache.get_or_load("energy", "q", loader) for _ in range(5)])
+    
+    assert results == ["result"] * 5
+    assert loader.calls == 1
+    assert cache.get_cache_statistics()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    """Test a failed load propagates to waiters and is retried next time"""
+    cache = QueryResultCache()
+    loader = CountingLoader(delay=0.02, error=RuntimeError("influx down"))
+    
+    results = await asyncio.gather(
+        *[cache.get_or_load("energy", "q", loader) for _ in range(3)],
+        return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert loader.calls == 1
+    
+    loader.error = None
+    assert await cache.get_or_load("energy", "q", loader) == "result"
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """Test the least recently used entry is evicted first"""
+    cache = QueryResultCache(max_entries=2, open_ttl_seconds=60)
+    
+    await cache.get_or_load("q", "a", CountingLoader("a"))
+    await cache.get_or_load("q", "b", CountingLoader("b"))
+    await cache.get_or_load("q", "a", CountingLoader("a"))  # a is now most recent
+    await cache.get_or_load("q", "c", CountingLoader("c"))
+    
+    loader = CountingLoader("b")
+    await cache.get_or_load("q", "b", loader)
+    assert loader.calls == 1
+    assert cache.get_cache_statistics()["evictions"] >= 1
+
+
+def test_historical_ttl_longer_than_open():
+    """Test closed buckets outlive the open bucket"""
+    cache = QueryResultCache(open_ttl_seconds=10, historical_ttl_seconds=3600)
+    
+    assert cache._ttl(now=100.0, bucket_end=104.0, closed=False) == 4.0
+    assert cache._ttl(now=100.0, bucket_end=200.0, closed=False) == 10
+    assert cache._ttl(now=100.0, bucket_end=104.0, closed=True) == 3600
+
+
+@pytest.mark.asyncio
+async def test_invalidate_namespace():
+    """Test invalidation drops only the requested namespace"""
+    cache = QueryResultCache(open_ttl_seconds=60)
+    await cache.get_or_load("energy", "a", CountingLoader())
+    await cache.get_or_load("stats", "a", CountingLoader())
+    
+    assert cache.invalidate("energy") == 1
+    assert cache.get_cache_statistics()["entries"] == 1
+    assert cache.invalidate() == 1
@@ -0,0 +1,114 @@
+"""
+Tests for the set-based device/entity bulk upsert
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.database import Base
+from src.models import Device, Entity
+from src.registry_upsert import bulk_upsert_device_rows, bulk_upsert_entity_rows
+
+
+@pytest_asyncio.fixture
+async def session():
+    """In-memory SQLite session with the registry tables"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        yield db
+    
+    await engine.dispose()
+
+
+def make_devices(count, model="v1"):
+    """HA discovery device payloads"""
+    return [
+        {'id': f"dev_{i}", 'name': f"Device {i}", 'manufacturer': "Acme", 'model': model}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_insert_then_unchanged(session):
+    """Test repeated discovery does not rewrite unchanged devices"""
+    first = await bulk_upsert_device_rows(session, make_devices(25), chunk_size=10)
+    await session.commit()
+    
+    assert first["inserted"] == 25
+    assert first["updated"] == 0
+    assert first["chunks"] == 3
+    assert len(first["chunk_timings_ms"]) == 3
+    
+    second = await bulk_upsert_device_rows(session, make_devices(25), chunk_size=10)
+    await session.commit()
+    
+    assert second["inserted"] == 0
+    assert second["updated"] == 0
+    assert second["unchanged"] == 25
+
+
+@pytest.mark.asyncio
+async def test_changed_rows_updated(session):
+    """Test only changed devices are updated and new ones inserted"""
+    await bulk_upsert_device_rows(session, make_devices(5))
+    await session.commit()
+    
+    devices = make_devices(6)
+    devices[0]['model'] = "v2"
+    devices[1]['name_by_user'] = "Kitchen Lamp"
+    result = await bulk_upsert_device_rows(session, devices)
+    await session.commit()
+    
+    assert (result["inserted"], result["updated"], result["unchanged"]) == (1, 2, 3)
+    
+    device = (await session.execute(select(Device).where(Device.device_id == "dev_1"))).scalar_one()
+    assert device.name == "Kitchen Lamp"
+
+
+@pytest.mark.asyncio
+async def test_stale_last_seen_refreshed(session):
+    """Test unchanged devices still get last_seen refreshed once it is stale"""
+    await bulk_upsert_device_rows(session, make_devices(2))
+    stale = datetime.now() - timedelta(days=2)
+    await session.execute(update(Device).where(Device.device_id == "dev_0").values(last_seen=stale))
+    await session.commit()
+    
+    result = await bulk_upsert_device_rows(session, make_devices(2))
+    await session.commit()
+    
+    assert result["updated"] == 1
+    device = (await session.execute(select(Device).where(Device.device_id == "dev_0"))).scalar_one()
+    assert device.last_seen > stale
+
+
+@pytest.mark.asyncio
+async def test_entities_upsert_keeps_created_at(session):
+    """Test entity upsert skips invalid rows and keeps created_at on update"""
+    await bulk_upsert_device_rows(session, make_devices(1))
+    entities = [
+        {'entity_id': "light.kitchen", 'device_id': "dev_0", 'platform': "hue"},
+        {'entity_id': "sensor.temp", 'platform': "zha"},
+        {'platform': "broken"},
+    ]
+    first = await bulk_upsert_entity_rows(session, entities)
+    await session.commit()
+    created = (await session.execute(
+        select(Entity.created_at).where(Entity.entity_id == "light.kitchen")
+    )).scalar_one()
+    
+    entities[0]['disabled_by'] = "user"
+    second = await bulk_upsert_entity_rows(session, entities)
+    await session.commit()
+    
+    assert (first["inserted"], first["skipped"]) == (2, 1)
+    assert (second["updated"], second["unchanged"]) == (1, 1)
+    entity = (await session.execute(select(Entity).where(Entity.entity_id == "light.kitchen"))).scalar_one()
+    assert entity.disabled is True
+    assert entity.domain == "light"
+    assert entity.created_at == created
@@ -0,0 +1,201 @@
+"""
+Bulk InfluxDB writer for downsampling and materialized views.
+
+Converts aggregate DataFrames to line protocol with vectorized pandas
+string operations (no per-row Point objects) and writes them in sized
+chunks on a worker thread so the scheduler's event loop is never blocked.
+Also tracks per-measurement watermarks for incremental refreshes.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('RETENTION_WRITE_CHUNK_SIZE', '5000'))
+
+
+def _escape_tag(values: pd.Series) -> pd.Series:
+    """Escape tag keys/values for line protocol."""
+    return (values.astype(str)
+            .str.replace('\\', '\\\\', regex=False)
+            .str.replace(',', '\\,', regex=False)
+            .str.replace('=', '\\=', regex=False)
+            .str.replace(' ', '\\ ', regex=False))
+
+
+def _to_nanoseconds(values: Union[pd.Series, datetime], index: pd.Index) -> pd.Series:
+    """Convert timestamps (naive = UTC) to epoch nanoseconds."""
+    if isinstance(values, datetime):
+        if values.tzinfo is None:
+            values = values.replace(tzinfo=timezone.utc)
+        return pd.Series(int(values.timestamp() * 1_000_000_000), index=index)
+    return pd.to_datetime(values, utc=True).astype('int64')
+
+
+def to_line_protocol(
+    df: pd.DataFrame,
+    measurement: str,
+    time_column: Optional[str] = None,
+    tag_columns: Sequence[str] = (),
+    float_fields: Sequence[str] = (),
+    int_fields: Sequence[str] = (),
+    timestamp: Optional[datetime] = None
+) -> List[str]:
+    """
+    Convert a DataFrame to InfluxDB line protocol (nanosecond precision).
+    
+    Missing tag values and NaN fields are omitted per row; rows without any
+    field are dropped.
+    
+    Args:
+        df: Aggregate rows
+        measurement: Target measurement
+        time_column: Column holding the point time
+        tag_columns: Columns written as tags
+        float_fields: Columns written as float fields
+        int_fields: Columns written as integer fields
+        timestamp: Fixed time for all points (used when time_column is None)
+    
+    Returns:
+        Line protocol strings, one per point
+    """
+    if df.empty:
+        return []
+    
+    lines = pd.Series(_escape_tag(pd.Series([measurement])).iloc[0], index=df.index)
+    
+    for column in tag_columns:
+        values = df[column]
+        present = values.notna() & (values.astype(str) != '')
+        escaped = ',' + _escape_tag(pd.Series([column])).iloc[0] + '=' + _escape_tag(values)
+        lines = lines + escaped.where(present, '')
+    
+    field_parts = []
+    for column in float_fields:
+        values = pd.to_numeric(df[column], errors='coerce').astype(float)
+        present = np.isfinite(values)
+        field_parts.append((column + '=' + values.astype(str)).where(present, ''))
+    for column in int_fields:
+        values = pd.to_numeric(df[column], errors='coerce')
+        present = values.notna()
+        formatted = values.fillna(0).astype('int64').astype(str) + 'i'
+        field_parts.append((column + '=' + formatted).where(present, ''))
+    
+    if not field_parts:
+        raise ValueError("At least one field column is required")
+    
+    fields = field_parts[0]
+    for part in field_parts[1:]:
+        fields = fields + ',' + part
+    # Collapse separators left by omitted fields
+    fields = fields.str.replace(r',{2,}', ',', regex=True).str.strip(',')
+    has_fields = fields != ''
+    
+    times = _to_nanoseconds(df[time_column] if time_column else (timestamp or datetime.now(timezone.utc)), df.index)
+    lines = lines + ' ' + fields + ' ' + times.astype(str)
+    
+    return lines[has_fields].tolist()
+
+
+class BulkWriter:
+    """Chunked, non-blocking line protocol writer for an InfluxDB 3 client."""
+    
+    def __init__(self, client, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize bulk writer.
+        
+        Args:
+            client: InfluxDBClient3 (or any client with write(record=...))
+            chunk_size: Points per write request
+        """
+        self.client = client
+        self.chunk_size = chunk_size
+    
+    async def write_frame(self, df: pd.DataFrame, measurement: str, **line_protocol_args) -> Dict[str, Any]:
+        """
+        Write a DataFrame as one measurement in chunks.
+        
+        Args:
+            df: Aggregate rows
+            measurement: Target measurement
+            **line_protocol_args: Column mapping passed to to_line_protocol
+        
+        Returns:
+            Dictionary with points, chunks and conversion/write timings
+        """
+        start = time.perf_counter()
+        lines = await asyncio.to_thread(to_line_protocol, df, measurement, **line_protocol_args)
+        convert_ms = (time.perf_counter() - start) * 1000
+        
+        chunk_timings_ms = []
+        for offset in range(0, len(lines), self.chunk_size):
+            chunk_start = time.perf_counter()
+            await asyncio.to_thread(self.client.write, record=lines[offset:offset + self.chunk_size])
+            chunk_timings_ms.append(round((time.perf_counter() - chunk_start) * 1000, 2))
+        
+        logger.info(f"Wrote {len(lines)} points to {measurement} in {len(chunk_timings_ms)} chunks "
+                    f"(convert {convert_ms:.1f}ms, write {sum(chunk_timings_ms):.1f}ms)")
+        
+        return {
+            'points': len(lines),
+            'chunks': len(chunk_timings_ms),
+            'convert_ms': round(convert_ms, 2),
+            'chunk_timings_ms': chunk_timings_ms
+        }
+
+
+class WatermarkTracker:
+    """
+    Track the newest bucket already materialized per measurement.
+    
+    The watermark is read once from InfluxDB (MAX(time) of the target
+    measurement), so it survives restarts without extra state, and is then
+    kept in memory after every successful run.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+        self.watermarks: Dict[str, Optional[datetime]] = {}
+    
+    async def get(self, measurement: str) -> Optional[datetime]:
+        """
+        Get the newest materialized bucket of a measurement.
+        
+        Args:
+            measurement: Target measurement
+        
+        Returns:
+            Bucket time (naive UTC) or None if nothing has been written yet
+        """
+        if measurement not in self.watermarks:
+            try:
+                result = await asyncio.to_thread(
+                    self.client.query,
+                    f"SELECT MAX(time) AS watermark FROM {measurement}",
+                    language='sql',
+                    mode='pandas'
+                )
+                self.set(measurement, result['watermark'].iloc[0] if not result.empty else None)
+            except Exception as e:
+                # Measurement does not exist yet (or query failed): full refresh
+                logger.debug(f"No watermark for {measurement}: {e}")
+                return None
+        return self.watermarks[measurement]
+    
+    def set(self, measurement: str, watermark) -> None:
+        """Record the newest materialized bucket of a measurement (stored as naive UTC)."""
+        if watermark is None or pd.isna(watermark):
+            self.watermarks[measurement] = None
+            return
+        watermark = pd.Timestamp(watermark)
+        if watermark.tzinfo is not None:
+            watermark = watermark.tz_convert('UTC').tz_localize(None)
+        self.watermarks[measurement] = watermark.to_pydatetime()
@@ -3,12 +3,15 @@ Materialized Views Manager
 Creates and manages pre-computed aggregates for fast queries
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from influxdb_client_3 import InfluxDBClient3
 
+from .bulk_writer import BulkWriter, WatermarkTracker
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +25,8 @@ class MaterializedViewManager:
         self.influxdb_bucket = os.getenv('INFLUXDB_BUCKET', 'events')
         
         self.client: InfluxDBClient3 = None
+        self.writer: BulkWriter = None
+        self.watermarks: WatermarkTracker = None
     
     def initialize(self):
         """Initialize InfluxDB client"""
@@ -31,6 +36,27 @@ class MaterializedViewManager:
             database=self.influxdb_bucket,
             org=self.influxdb_org
         )
+        self.writer = BulkWriter(self.client)
+        self.watermarks = WatermarkTracker(self.client)
+    
+    async def _daily_refresh_start(self, view: str, window_days: int) -> datetime:
+        """
+        First day to recompute for an incrementally refreshed daily view
+        
+        The newest materialized day may have been written while still open,
+        so it is recomputed; older days are final and skipped.
+        """
+        window_start = (datetime.utcnow() - timedelta(days=window_days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        watermark = await self.watermarks.get(view)
+        if watermark is None:
+            return window_start
+        return max(window_start, watermark.replace(hour=0, minute=0, second=0, microsecond=0))
+    
+    async def _query(self, query: str):
+        """Run a SQL query off the event loop"""
+        return await asyncio.to_thread(self.client.query, query, language='sql', mode='pandas')
     
     async def create_daily_energy_view(self):
         """Create materialized view for daily energy by device"""
@@ -40,7 +66,9 @@ class MaterializedViewManager:
         # In InfluxDB 3.0, we use continuous aggregates via tasks
         # This creates a new measurement with pre-computed data
         
-        query = '''
+        refresh_start = await self._daily_refresh_start("mv_daily_energy_by_device", 30)
+        
+        query = f'''
         SELECT
             entity_id,
             DATE_TRUNC('day', time) as day,
@@ -49,30 +77,26 @@ class MaterializedViewManager:
             MAX(normalized_value) as peak_power,
             SUM(energy_consumption * 0.12) as cost_usd
         FROM home_assistant_events
-        WHERE time >= NOW() - INTERVAL '30 days'
+        WHERE time >= TIMESTAMP '{refresh_start.isoformat()}'
         AND energy_consumption > 0
         GROUP BY entity_id, DATE_TRUNC('day', time)
         '''
         
         # Execute and store in new measurement
-        result = self.client.query(query, language='sql', mode='pandas')
+        result = await self._query(query)
         
         if not result.empty:
             # Write to materialized view measurement
-            for _, row in result.iterrows():
-                from influxdb_client_3 import Point
-                
-                point = Point("mv_daily_energy_by_device") \
-                    .tag("entity_id", row['entity_id']) \
-                    .field("total_kwh", float(row['total_kwh'])) \
-                    .field("avg_power", float(row['avg_power'])) \
-                    .field("peak_power", float(row['peak_power'])) \
-                    .field("cost_usd", float(row['cost_usd'])) \
-                    .time(row['day'])
-                
-                self.client.write(point)
+            await self.writer.write_frame(
+                result, "mv_daily_energy_by_device",
+                time_column='day',
+                tag_columns=('entity_id',),
+                float_fields=('total_kwh', 'avg_power', 'peak_power', 'cost_usd')
+            )
+            self.watermarks.set("mv_daily_energy_by_device", result['day'].max())
             
-            logger.info(f"Created/updated daily energy view with {len(result)} records")
+            logger.info(f"Created/updated daily energy view with {len(result)} records "
+                        f"(since {refresh_start.date()})")
     
     async def create_hourly_room_activity_view(self):
         """Create materialized view for hourly room activity"""
@@ -93,21 +117,18 @@ class MaterializedViewManager:
         GROUP BY area, EXTRACT(HOUR FROM time), EXTRACT(DOW FROM time)
         '''
         
-        result = self.client.query(query, language='sql', mode='pandas')
+        result = await self._query(query)
         
         if not result.empty:
-            from influxdb_client_3 import Point
-            
-            for _, row in result.iterrows():
-                point = Point("mv_hourly_room_activity") \
-                    .tag("area", row['area']) \
-                    .field("hour", int(row['hour'])) \
-                    .field("day_of_week", int(row['day_of_week'])) \
-                    .field("motion_count", int(row['motion_count'])) \
-                    .field("occupancy_rate", float(row['occupancy_rate'])) \
-                    .time(datetime.now())
-                
-                self.client.write(point)
+            # Rolling 90-day profile (not time-bucketed), so it is fully
+            # recomputed but written as one batch
+            await self.writer.write_frame(
+                result, "mv_hourly_room_activity",
+                timestamp=datetime.utcnow(),
+                tag_columns=('area',),
+                float_fields=('occupancy_rate',),
+                int_fields=('hour', 'day_of_week', 'motion_count')
+            )
             
             logger.info(f"Created/updated hourly room activity view with {len(result)} records")
     
@@ -116,7 +137,9 @@ class MaterializedViewManager:
         
         logger.info("Creating daily carbon summary view...")
         
-        query = '''
+        refresh_start = await self._daily_refresh_start("mv_daily_carbon_summary", 90)
+        
+        query = f'''
         SELECT
             DATE_TRUNC('day', time) as day,
             AVG(carbon_intensity_gco2_kwh) as avg_carbon,
@@ -124,26 +147,22 @@ class MaterializedViewManager:
             MAX(carbon_intensity_gco2_kwh) as max_carbon,
             AVG(renewable_percentage) as avg_renewable
         FROM carbon_intensity
-        WHERE time >= NOW() - INTERVAL '90 days'
+        WHERE time >= TIMESTAMP '{refresh_start.isoformat()}'
         GROUP BY DATE_TRUNC('day', time)
         '''
         
-        result = self.client.query(query, language='sql', mode='pandas')
+        result = await self._query(query)
         
         if not result.empty:
-            from influxdb_client_3 import Point
-            
-            for _, row in result.iterrows():
-                point = Point("mv_daily_carbon_summary") \
-                    .field("avg_carbon", float(row['avg_carbon'])) \
-                    .field("min_carbon", float(row['min_carbon'])) \
-                    .field("max_carbon", float(row['max_carbon'])) \
-                    .field("avg_renewable", float(row['avg_renewable'])) \
-                    .time(row['day'])
-                
-                self.client.write(point)
+            await self.writer.write_frame(
+                result, "mv_daily_carbon_summary",
+                time_column='day',
+                float_fields=('avg_carbon', 'min_carbon', 'max_carbon', 'avg_renewable')
+            )
+            self.watermarks.set("mv_daily_carbon_summary", result['day'].max())
             
-            logger.info(f"Created/updated daily carbon summary view with {len(result)} records")
+            logger.info(f"Created/updated daily carbon summary view with {len(result)} records "
+                        f"(since {refresh_start.date()})")
     
     async def refresh_all_views(self):
         """Refresh all materialized views"""
@@ -193,7 +212,7 @@ class MaterializedViewManager:
         
         query += " ORDER BY time DESC LIMIT 1000"
         
-        result = self.client.query(query, language='sql', mode='pandas')
+        result = await self._query(query)
         
         return result.to_dict('records') if not result.empty else []
     
@@ -3,13 +3,16 @@ Tiered Data Retention Manager
 Implements hot/warm/cold/archive storage tiers
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta
 from typing import Dict, Any
-from influxdb_client_3 import InfluxDBClient3, Point
+from influxdb_client_3 import InfluxDBClient3
 import pandas as pd
 
+from .bulk_writer import BulkWriter, WatermarkTracker
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +26,8 @@ class TieredRetentionManager:
         self.influxdb_bucket = os.getenv('INFLUXDB_BUCKET', 'events')
         
         self.client: InfluxDBClient3 = None
+        self.writer: BulkWriter = None
+        self.watermarks: WatermarkTracker = None
         
         # Storage tiers configuration
         self.tiers = {
@@ -40,15 +45,30 @@ class TieredRetentionManager:
             database=self.influxdb_bucket,
             org=self.influxdb_org
         )
+        self.writer = BulkWriter(self.client)
+        self.watermarks = WatermarkTracker(self.client)
+    
+    async def _incremental_lower_bound(self, measurement: str, bucket: timedelta):
+        """Start of the first bucket not yet downsampled into measurement (None = all)"""
+        watermark = await self.watermarks.get(measurement)
+        return watermark + bucket if watermark else None
     
     async def downsample_hot_to_warm(self) -> Dict[str, Any]:
         """Downsample raw data (7+ days old) to hourly aggregates"""
         
         logger.info("Starting hot to warm downsampling (raw → hourly)...")
         
-        cutoff_date = datetime.now() - timedelta(days=7)
+        # Only complete hours are downsampled; buckets already written
+        # (up to the hourly_aggregates watermark) are not recomputed
+        cutoff_date = (datetime.utcnow() - timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
         
         try:
+            lower_bound = await self._incremental_lower_bound("hourly_aggregates", timedelta(hours=1))
+            if lower_bound and lower_bound >= cutoff_date:
+                logger.info("No new hours to downsample")
+                return {'status': 'no_data'}
+            lower_clause = f"AND time >= TIMESTAMP '{lower_bound.isoformat()}'" if lower_bound else ""
+            
             # Create hourly aggregates
             query = f'''
             SELECT
@@ -62,25 +82,22 @@ class TieredRetentionManager:
                 SUM(energy_consumption) as total_energy
             FROM home_assistant_events
             WHERE time < TIMESTAMP '{cutoff_date.isoformat()}'
+            {lower_clause}
             GROUP BY DATE_TRUNC('hour', time), entity_id, domain
             '''
             
-            result = self.client.query(query, language='sql', mode='pandas')
+            result = await asyncio.to_thread(self.client.query, query, language='sql', mode='pandas')
             
             if not result.empty:
                 # Write hourly aggregates
-                for _, row in result.iterrows():
-                    point = Point("hourly_aggregates") \
-                        .tag("entity_id", row['entity_id']) \
-                        .tag("domain", row['domain']) \
-                        .field("avg_value", float(row['avg_value'])) \
-                        .field("min_value", float(row['min_value'])) \
-                        .field("max_value", float(row['max_value'])) \
-                        .field("sample_count", int(row['sample_count'])) \
-                        .field("total_energy", float(row.get('total_energy', 0))) \
-                        .time(row['hour'])
-                    
-                    self.client.write(point)
+                write_stats = await self.writer.write_frame(
+                    result, "hourly_aggregates",
+                    time_column='hour',
+                    tag_columns=('entity_id', 'domain'),
+                    float_fields=('avg_value', 'min_value', 'max_value', 'total_energy'),
+                    int_fields=('sample_count',)
+                )
+                self.watermarks.set("hourly_aggregates", cutoff_date - timedelta(hours=1))
                 
                 records_downsampled = len(result)
                 
@@ -93,9 +110,12 @@ class TieredRetentionManager:
                     'status': 'success',
                     'records_downsampled': records_downsampled,
                     'cutoff_date': cutoff_date.isoformat(),
+                    'from_date': lower_bound.isoformat() if lower_bound else None,
+                    'write': write_stats,
                     'timestamp': datetime.now()
                 }
             else:
+                self.watermarks.set("hourly_aggregates", cutoff_date - timedelta(hours=1))
                 logger.info("No data to downsample")
                 return {'status': 'no_data'}
                 
@@ -108,12 +128,21 @@ class TieredRetentionManager:
         
         logger.info("Starting warm to cold downsampling (hourly → daily)...")
         
-        cutoff_date = datetime.now() - timedelta(days=90)
+        # Only complete days are downsampled, starting after the
+        # daily_aggregates watermark
+        cutoff_date = (datetime.utcnow() - timedelta(days=90)).replace(hour=0, minute=0, second=0, microsecond=0)
         
         try:
+            lower_bound = await self._incremental_lower_bound("daily_aggregates", timedelta(days=1))
+            if lower_bound and lower_bound >= cutoff_date:
+                logger.info("No new days to downsample")
+                return {'status': 'no_data'}
+            lower_clause = f"AND time >= TIMESTAMP '{lower_bound.isoformat()}'" if lower_bound else ""
+            
+            # hourly_aggregates points are stored at the hour bucket time
             query = f'''
             SELECT
-                DATE_TRUNC('day', hour) as day,
+                DATE_TRUNC('day', time) as day,
                 entity_id,
                 domain,
                 AVG(avg_value) as avg_value,
@@ -122,26 +151,23 @@ class TieredRetentionManager:
                 SUM(sample_count) as total_samples,
                 SUM(total_energy) as daily_energy
             FROM hourly_aggregates
-            WHERE hour < TIMESTAMP '{cutoff_date.isoformat()}'
-            GROUP BY DATE_TRUNC('day', hour), entity_id, domain
+            WHERE time < TIMESTAMP '{cutoff_date.isoformat()}'
+            {lower_clause}
+            GROUP BY DATE_TRUNC('day', time), entity_id, domain
             '''
             
-            result = self.client.query(query, language='sql', mode='pandas')
+            result = await asyncio.to_thread(self.client.query, query, language='sql', mode='pandas')
             
             if not result.empty:
                 # Write daily aggregates
-                for _, row in result.iterrows():
-                    point = Point("daily_aggregates") \
-                        .tag("entity_id", row['entity_id']) \
-                        .tag("domain", row['domain']) \
-                        .field("avg_value", float(row['avg_value'])) \
-                        .field("min_value", float(row['min_value'])) \
-                        .field("max_value", float(row['max_value'])) \
-                        .field("total_samples", int(row['total_samples'])) \
-                        .field("daily_energy", float(row.get('daily_energy', 0))) \
-                        .time(row['day'])
-                    
-                    self.client.write(point)
+                write_stats = await self.writer.write_frame(
+                    result, "daily_aggregates",
+                    time_column='day',
+                    tag_columns=('entity_id', 'domain'),
+                    float_fields=('avg_value', 'min_value', 'max_value', 'daily_energy'),
+                    int_fields=('total_samples',)
+                )
+                self.watermarks.set("daily_aggregates", cutoff_date - timedelta(days=1))
                 
                 records_downsampled = len(result)
                 
@@ -151,9 +177,12 @@ class TieredRetentionManager:
                     'status': 'success',
                     'records_downsampled': records_downsampled,
                     'cutoff_date': cutoff_date.isoformat(),
+                    'from_date': lower_bound.isoformat() if lower_bound else None,
+                    'write': write_stats,
                     'timestamp': datetime.now()
                 }
             else:
+                self.watermarks.set("daily_aggregates", cutoff_date - timedelta(days=1))
                 logger.info("No data to downsample")
                 return {'status': 'no_data'}
                 
@@ -0,0 +1,113 @@
+"""Tests for bulk line protocol writer."""
+
+import pytest
+import pandas as pd
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from src.bulk_writer import BulkWriter, WatermarkTracker, to_line_protocol
+
+
+def make_hourly_frame():
+    """Hourly aggregate rows as returned by the downsampling query."""
+    return pd.DataFrame({
+        'hour': [datetime(2025, 1, 1, 0), datetime(2025, 1, 1, 1), datetime(2025, 1, 1, 2)],
+        'entity_id': ['sensor.power meter', 'light.kitchen', None],
+        'domain': ['sensor', 'light', 'light'],
+        'avg_value': [1.5, 2.0, float('nan')],
+        'sample_count': [10, 20, 30],
+        'total_energy': [float('nan'), float('nan'), float('nan')],
+    })
+
+
+class TestLineProtocol:
+    """Test vectorized line protocol conversion."""
+    
+    def test_converts_rows(self):
+        """Test tags, fields and nanosecond timestamps."""
+        lines = to_line_protocol(
+            make_hourly_frame(), "hourly_aggregates",
+            time_column='hour',
+            tag_columns=('entity_id', 'domain'),
+            float_fields=('avg_value', 'total_energy'),
+            int_fields=('sample_count',)
+        )
+        
+        assert lines[0] == ("hourly_aggregates,entity_id=sensor.power\\ meter,domain=sensor "
+                            "avg_value=1.5,sample_count=10i 1735689600000000000")
+        assert lines[1].startswith("hourly_aggregates,entity_id=light.kitchen,domain=light avg_value=2.0,")
+        # Missing tag and NaN fields are omitted
+        assert lines[2] == "hourly_aggregates,domain=light sample_count=30i 1735696800000000000"
+    
+    def test_drops_rows_without_fields(self):
+        """Test rows with only NaN fields are skipped."""
+        df = make_hourly_frame()
+        lines = to_line_protocol(df, "m", time_column='hour', float_fields=('total_energy',))
+        
+        assert lines == []
+    
+    def test_fixed_timestamp(self):
+        """Test a fixed timestamp for all points."""
+        df = pd.DataFrame({'area': ['kitchen', 'hall'], 'motion_count': [3, 4]})
+        lines = to_line_protocol(
+            df, "mv_hourly_room_activity",
+            timestamp=datetime(2025, 1, 1),
+            tag_columns=('area',),
+            int_fields=('motion_count',)
+        )
+        
+        assert all(line.endswith(" 1735689600000000000") for line in lines)
+    
+    def test_requires_fields(self):
+        """Test at least one field is required."""
+        with pytest.raises(ValueError):
+            to_line_protocol(make_hourly_frame(), "m", time_column='hour', tag_columns=('domain',))
+
+
+class TestBulkWriter:
+    """Test chunked writes."""
+    
+    @pytest.mark.asyncio
+    async def test_writes_in_chunks(self):
+        """Test points are written in sized chunks."""
+        client = MagicMock()
+        writer = BulkWriter(client, chunk_size=2)
+        
+        stats = await writer.write_frame(
+            make_hourly_frame(), "hourly_aggregates",
+            time_column='hour',
+            int_fields=('sample_count',)
+        )
+        
+        assert stats['points'] == 3
+        assert stats['chunks'] == 2
+        assert [len(call.kwargs['record']) for call in client.write.call_args_list] == [2, 1]
+
+
+class TestWatermarkTracker:
+    """Test incremental refresh watermarks."""
+    
+    @pytest.mark.asyncio
+    async def test_reads_watermark_once(self):
+        """Test watermark is read from InfluxDB once and cached."""
+        client = MagicMock()
+        client.query.return_value = pd.DataFrame({
+            'watermark': [pd.Timestamp('2025-01-05T00:00:00Z')]
+        })
+        tracker = WatermarkTracker(client)
+        
+        assert await tracker.get("mv_daily_energy_by_device") == datetime(2025, 1, 5)
+        await tracker.get("mv_daily_energy_by_device")
+        assert client.query.call_count == 1
+        
+        tracker.set("mv_daily_energy_by_device", pd.Timestamp('2025-01-06T00:00:00Z'))
+        assert await tracker.get("mv_daily_energy_by_device") == datetime(2025, 1, 6)
+    
+    @pytest.mark.asyncio
+    async def test_missing_measurement(self):
+        """Test a missing measurement means full refresh."""
+        client = MagicMock()
+        client.query.side_effect = Exception("table not found")
+        tracker = WatermarkTracker(client)
+        
+        assert await tracker.get("hourly_aggregates") is None
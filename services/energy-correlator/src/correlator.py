@@ -7,6 +7,8 @@ import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 from influxdb_client import Point
 
 from .influxdb_wrapper import InfluxDBWrapper
@@ -25,7 +27,8 @@ class EnergyEventCorrelator:
         influxdb_url: str,
         influxdb_token: str,
         influxdb_org: str,
-        influxdb_bucket: str
+        influxdb_bucket: str,
+        batch_mode: bool = True
     ):
         self.influxdb_url = influxdb_url
         self.influxdb_token = influxdb_token
@@ -36,6 +39,15 @@ class EnergyEventCorrelator:
         # Configuration
         self.correlation_window_seconds = 10  # Look +/- 10 seconds
         self.min_power_delta = 10.0  # Minimum 10W change to correlate
+        self.power_offset_seconds = 5  # Power sampled 5s before/after the event
+        self.power_search_seconds = 30  # First reading within ±30s of the sample time
+        
+        # Batch mode: one power query per window, vectorized alignment, one write
+        self.batch_mode = batch_mode
+        # Events are only processed once their "after" power window is complete
+        self.settle_seconds = self.power_offset_seconds + self.power_search_seconds
+        # End of the last processed window (events before it are never reprocessed)
+        self.last_processed_time: Optional[datetime] = None
         
         # Statistics
         self.total_events_processed = 0
@@ -75,6 +87,10 @@ class EnergyEventCorrelator:
         Args:
             lookback_minutes: How far back to process events (default: 5 minutes)
         """
+        if self.batch_mode:
+            await self.process_events_batch(lookback_minutes)
+            return
+        
         logger.info(f"Processing events from last {lookback_minutes} minutes")
         
         try:
@@ -101,25 +117,214 @@ class EnergyEventCorrelator:
             logger.error(f"Error processing events: {e}")
             self.errors += 1
     
+    async def process_events_batch(self, lookback_minutes: int = 5) -> bool:
+        """
+        Correlate all events of the lookback window at once
+        
+        Pulls the power series for the whole window with one query, aligns
+        every event to it with a vectorized as-of lookup and writes all
+        correlations in one batch. A cursor (last_processed_time) keeps
+        overlapping windows from processing the same events twice; it only
+        moves once a window is written, so a failed window (e.g. InfluxDB
+        down) is retried and a backlog is caught up one window per run.
+        
+        Args:
+            lookback_minutes: Maximum window to process (default: 5 minutes)
+            
+        Returns:
+            True if the window was processed (or there was nothing to do),
+            False if it failed and will be retried
+        """
+        # Leave the newest events for the next run until their "after"
+        # power readings have arrived
+        latest_end = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        window = timedelta(minutes=lookback_minutes)
+        if self.last_processed_time:
+            start_time = self.last_processed_time
+            end_time = min(latest_end, start_time + window)
+        else:
+            end_time = latest_end
+            start_time = end_time - window
+        
+        if start_time >= end_time:
+            return True
+        
+        logger.info(f"Batch processing events from {start_time.isoformat()}Z to {end_time.isoformat()}Z")
+        
+        try:
+            events = await asyncio.to_thread(self._query_events_between, start_time, end_time)
+            
+            if events:
+                margin = timedelta(seconds=self.settle_seconds)
+                power = await asyncio.to_thread(
+                    self._query_power_series, start_time - margin, end_time + margin
+                )
+                correlations = self._correlate_events_batch(events, power)
+                
+                if correlations:
+                    await asyncio.to_thread(self._write_correlations, correlations)
+                
+                self.total_events_processed += len(events)
+                self.correlations_found += len(correlations)
+            
+        except Exception as e:
+            logger.error(f"Error batch processing events, window will be retried: {e}")
+            self.errors += 1
+            return False
+        
+        # Only advance the cursor once the window is fully written
+        self.last_processed_time = end_time
+        
+        logger.info(
+            f"Processed {self.total_events_processed} events, "
+            f"found {self.correlations_found} correlations, "
+            f"wrote {self.correlations_written} to InfluxDB"
+        )
+        return True
+    
+    def _correlate_events_batch(self, events: List[Dict], power: pd.DataFrame) -> List[Dict]:
+        """
+        Compute power deltas for all events at once
+        
+        As-of alignment: power_before is the last reading at or before
+        t - 5s, power_after the first reading at or after t + 5s, each
+        within 30s of its sample time.
+        
+        Args:
+            events: Events with time, entity_id, domain, state, previous_state
+            power: Power series with 'time' (UTC) and 'power' columns
+            
+        Returns:
+            Correlations with event fields plus power_before/after/delta
+        """
+        if not events or power.empty:
+            return []
+        
+        power = power.dropna(subset=['power']).sort_values('time')
+        power_times = pd.to_datetime(power['time'], utc=True).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        power_values = power['power'].to_numpy(dtype=float)
+        if len(power_times) == 0:
+            return []
+        
+        event_times = pd.to_datetime([event['time'] for event in events], utc=True) \
+            .to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        offset_ns = self.power_offset_seconds * 1_000_000_000
+        search_ns = self.power_search_seconds * 1_000_000_000
+        last_index = len(power_times) - 1
+        
+        # Backward as-of lookup for the reading before the event
+        targets = event_times - offset_ns
+        idx = np.searchsorted(power_times, targets, side='right') - 1
+        idx_clipped = np.clip(idx, 0, last_index)
+        found = (idx >= 0) & (power_times[idx_clipped] >= targets - search_ns)
+        power_before = np.where(found, power_values[idx_clipped], np.nan)
+        
+        # Forward as-of lookup for the reading after the event
+        targets = event_times + offset_ns
+        idx = np.searchsorted(power_times, targets, side='left')
+        idx_clipped = np.clip(idx, 0, last_index)
+        found = (idx <= last_index) & (power_times[idx_clipped] <= targets + search_ns)
+        power_after = np.where(found, power_values[idx_clipped], np.nan)
+        
+        power_delta = power_after - power_before
+        
+        significant = np.isfinite(power_delta) & (np.abs(power_delta) >= self.min_power_delta)
+        
+        correlations = []
+        for i in np.flatnonzero(significant):
+            correlations.append({
+                **events[i],
+                'power_before': float(power_before[i]),
+                'power_after': float(power_after[i]),
+                'power_delta': float(power_delta[i])
+            })
+        return correlations
+    
+    def _query_power_series(self, start_time: datetime, end_time: datetime) -> pd.DataFrame:
+        """
+        Query the smart meter power series for a time range
+        
+        Args:
+            start_time: Range start (UTC)
+            end_time: Range end (UTC, exclusive)
+            
+        Returns:
+            DataFrame with 'time' and 'power' columns sorted by time
+        """
+        flux_query = f'''
+        from(bucket: "{self.influxdb_bucket}")
+          |> range(start: {start_time.isoformat()}Z, stop: {end_time.isoformat()}Z)
+          |> filter(fn: (r) => r["_measurement"] == "smart_meter")
+          |> filter(fn: (r) => r["_field"] == "total_power_w")
+          |> keep(columns: ["_time", "_value"])
+          |> sort(columns: ["_time"])
+        '''
+        
+        results = self.client.query(flux_query)
+        return pd.DataFrame(
+            {
+                'time': [record['time'] for record in results],
+                'power': pd.to_numeric([record.get('_value') for record in results], errors='coerce')
+            },
+            columns=['time', 'power']
+        )
+    
+    def _write_correlations(self, correlations: List[Dict]):
+        """Write correlations to InfluxDB in one batch (raises on failure)"""
+        points = []
+        for correlation in correlations:
+            power_before = correlation['power_before']
+            power_delta = correlation['power_delta']
+            power_delta_pct = (power_delta / power_before * 100) if power_before > 0 else 0
+            
+            points.append(
+                Point("event_energy_correlation")
+                .tag("entity_id", correlation['entity_id'])
+                .tag("domain", correlation['domain'])
+                .tag("state", correlation['state'])
+                .tag("previous_state", correlation['previous_state'])
+                .field("power_before_w", power_before)
+                .field("power_after_w", correlation['power_after'])
+                .field("power_delta_w", power_delta)
+                .field("power_delta_pct", float(power_delta_pct))
+                .time(correlation['time'])
+            )
+            
+            logger.debug(
+                f"Correlation: {correlation['entity_id']} "
+                f"[{correlation['previous_state']}→{correlation['state']}] "
+                f"caused {power_delta:+.0f}W change ({power_delta_pct:+.1f}%)"
+            )
+        
+        self.client.write_points(points)
+        self.correlations_written += len(points)
+        logger.info(f"Wrote {len(points)} correlations in one batch")
+    
     async def _query_recent_events(self, minutes: int) -> List[Dict]:
         """
         Query recent HA events that could affect power consumption
+        """
+        now = datetime.utcnow()
+        return self._query_events_between(now - timedelta(minutes=minutes), now)
+    
+    def _query_events_between(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+        """
+        Query HA events that could affect power consumption
         
         Focuses on:
         - Switches (lights, plugs)
         - Climate devices (HVAC, thermostats)
         - Fans
         - Covers (blinds - affect heating/cooling)
-        """
         
-        # Calculate time range
-        now = datetime.utcnow()
-        start_time = now - timedelta(minutes=minutes)
+        Raises:
+            Exception: If the query fails
+        """
         
         # Flux query for InfluxDB 2.x
         flux_query = f'''
         from(bucket: "{self.influxdb_bucket}")
-          |> range(start: {start_time.isoformat()}Z, stop: {now.isoformat()}Z)
+          |> range(start: {start_time.isoformat()}Z, stop: {end_time.isoformat()}Z)
           |> filter(fn: (r) => r["_measurement"] == "home_assistant_events")
           |> filter(fn: (r) => 
               r["domain"] == "switch" or 
@@ -132,26 +337,21 @@ class EnergyEventCorrelator:
           |> sort(columns: ["_time"])
         '''
         
-        try:
-            logger.debug(f"Querying events since {start_time.isoformat()}")
-            results = self.client.query(flux_query)
-            
-            # Convert to event format
-            events = []
-            for record in results:
-                events.append({
-                    'time': record['time'],
-                    'entity_id': record.get('entity_id', ''),
-                    'domain': record.get('domain', ''),
-                    'state': record.get('_value', ''),
-                    'previous_state': record.get('previous_state', '')
-                })
-            
-            return events
-            
-        except Exception as e:
-            logger.error(f"Error querying events: {e}")
-            return []
+        logger.debug(f"Querying events since {start_time.isoformat()}")
+        results = self.client.query(flux_query)
+        
+        # Convert to event format
+        events = []
+        for record in results:
+            events.append({
+                'time': record['time'],
+                'entity_id': record.get('entity_id', ''),
+                'domain': record.get('domain', ''),
+                'state': record.get('_value', ''),
+                'previous_state': record.get('previous_state', '')
+            })
+        
+        return events
     
     async def _correlate_event_with_power(self, event: Dict):
         """
@@ -311,9 +511,11 @@ class EnergyEventCorrelator:
             "correlation_rate_pct": round(correlation_rate, 2),
             "write_success_rate_pct": round(write_success_rate, 2),
             "errors": self.errors,
+            "last_processed_time": self.last_processed_time.isoformat() if self.last_processed_time else None,
             "config": {
                 "correlation_window_seconds": self.correlation_window_seconds,
-                "min_power_delta_w": self.min_power_delta
+                "min_power_delta_w": self.min_power_delta,
+                "batch_mode": self.batch_mode
             }
         }
     
@@ -68,6 +68,9 @@ class InfluxDBWrapper:
             
         Returns:
             List of records as dictionaries
+            
+        Raises:
+            Exception: If the query fails (an outage must not look like an empty result)
         """
         try:
             tables = self.query_api.query(flux_query, org=self.influxdb_org)
@@ -91,7 +94,7 @@ class InfluxDBWrapper:
             
         except Exception as e:
             logger.error(f"Error executing query: {e}")
-            return []
+            raise
     
     def write_point(self, point: Point):
         """
@@ -109,4 +112,20 @@ class InfluxDBWrapper:
         except Exception as e:
             logger.error(f"Error writing point: {e}")
             raise
-
+    
+    def write_points(self, points: List[Point]):
+        """
+        Write multiple points to InfluxDB in one request
+        
+        Args:
+            points: InfluxDB Point objects
+        """
+        try:
+            self.write_api.write(
+                bucket=self.influxdb_bucket,
+                org=self.influxdb_org,
+                record=points
+            )
+        except Exception as e:
+            logger.error(f"Error writing {len(points)} points: {e}")
+            raise
@@ -43,7 +43,8 @@ class EnergyCorrelatorService:
             self.influxdb_url,
             self.influxdb_token,
             self.influxdb_org,
-            self.influxdb_bucket
+            self.influxdb_bucket,
+            batch_mode=os.getenv('BATCH_CORRELATION', 'true').lower() == 'true'
         )
         
         self.health_handler = HealthCheckHandler()
@@ -0,0 +1,128 @@
+"""
+Tests for batch energy-event correlation
+"""
+
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+from src.correlator import EnergyEventCorrelator
+
+
+def create_correlator(client) -> EnergyEventCorrelator:
+    """Correlator wired to a mock InfluxDB wrapper"""
+    correlator = EnergyEventCorrelator("http://influxdb:8086", "token", "org", "bucket")
+    correlator.client = client
+    return correlator
+
+
+def create_event(time: datetime, entity_id: str = "switch.heater", state: str = "on") -> dict:
+    """Event as returned by _query_events_between"""
+    return {
+        'time': time,
+        'entity_id': entity_id,
+        'domain': entity_id.split('.')[0],
+        'state': state,
+        'previous_state': 'off'
+    }
+
+
+class TestBatchCorrelation:
+    """Test cases for the vectorized as-of alignment"""
+
+    def test_correlate_events_batch(self):
+        """Test power before/after come from readings 5s before/after each event"""
+        correlator = create_correlator(Mock())
+        base = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        power = pd.DataFrame({
+            'time': [base + timedelta(seconds=s) for s in (0, 10, 20, 30, 40)],
+            'power': [100.0, 100.0, 1600.0, 1600.0, 1605.0]
+        })
+        events = [
+            create_event(base + timedelta(seconds=15)),
+            create_event(base + timedelta(seconds=35), "light.lamp")
+        ]
+
+        correlations = correlator._correlate_events_batch(events, power)
+
+        assert len(correlations) == 1
+        assert correlations[0]['entity_id'] == "switch.heater"
+        assert correlations[0]['power_before'] == 100.0
+        assert correlations[0]['power_after'] == 1600.0
+        assert correlations[0]['power_delta'] == 1500.0
+
+    def test_no_power_readings(self):
+        """Test events without nearby power readings are not correlated"""
+        correlator = create_correlator(Mock())
+        events = [create_event(datetime(2025, 1, 1, tzinfo=timezone.utc))]
+
+        assert correlator._correlate_events_batch(events, pd.DataFrame(columns=['time', 'power'])) == []
+
+
+class TestBatchCursor:
+    """Test cases for the processed-window cursor"""
+
+    @pytest.mark.asyncio
+    async def test_window_written_and_cursor_advanced(self):
+        """Test a successful window is written in one batch and moves the cursor"""
+        now = datetime.utcnow()
+        event_time = (now - timedelta(minutes=2)).replace(tzinfo=timezone.utc)
+        client = Mock()
+        client.query.side_effect = [
+            [{'time': event_time, 'entity_id': 'switch.heater', 'domain': 'switch',
+              '_value': 'on', 'previous_state': 'off'}],
+            [{'time': event_time - timedelta(seconds=10), '_value': 100.0},
+             {'time': event_time + timedelta(seconds=10), '_value': 1600.0}]
+        ]
+        correlator = create_correlator(client)
+
+        assert await correlator.process_events_batch(lookback_minutes=5)
+
+        client.write_points.assert_called_once()
+        assert len(client.write_points.call_args[0][0]) == 1
+        assert correlator.correlations_written == 1
+        assert correlator.last_processed_time is not None
+
+    @pytest.mark.asyncio
+    async def test_cursor_stays_on_query_failure(self):
+        """Test an InfluxDB outage does not skip the window"""
+        client = Mock()
+        client.query.side_effect = ConnectionError("influxdb unavailable")
+        correlator = create_correlator(client)
+        cursor = datetime.utcnow() - timedelta(minutes=30)
+        correlator.last_processed_time = cursor
+
+        assert not await correlator.process_events_batch(lookback_minutes=5)
+
+        assert correlator.last_processed_time == cursor
+        assert correlator.errors == 1
+
+        # Once InfluxDB is back the same window is processed, one window per run
+        client.query.side_effect = None
+        client.query.return_value = []
+        assert await correlator.process_events_batch(lookback_minutes=5)
+        assert correlator.last_processed_time == cursor + timedelta(minutes=5)
+        start = client.query.call_args[0][0].split("range(start: ")[1].split("Z")[0]
+        assert start == cursor.isoformat()
+
+    @pytest.mark.asyncio
+    async def test_cursor_stays_on_write_failure(self):
+        """Test a failed correlation write leaves the window for the next run"""
+        now = datetime.utcnow()
+        event_time = (now - timedelta(minutes=2)).replace(tzinfo=timezone.utc)
+        client = Mock()
+        client.query.side_effect = lambda query: (
+            [{'time': event_time - timedelta(seconds=10), '_value': 100.0},
+             {'time': event_time + timedelta(seconds=10), '_value': 1600.0}]
+            if 'smart_meter' in query else
+            [{'time': event_time, 'entity_id': 'switch.heater', 'domain': 'switch',
+              '_value': 'on', 'previous_state': 'off'}]
+        )
+        client.write_points.side_effect = ConnectionError("write failed")
+        correlator = create_correlator(client)
+
+        assert not await correlator.process_events_batch(lookback_minutes=5)
+
+        assert correlator.last_processed_time is None
+        assert correlator.total_events_processed == 0
@@ -4,12 +4,13 @@ Epic 18.1: Integrated with Data Validation Engine
 """
 
 import logging
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timezone
 import re
 import json
 
 from data_validator import get_validator, ValidationResult
+from schema_registry import SchemaRegistry
 # TEMPORARILY DISABLED: from quality_metrics import get_quality_metrics_collector
 
 logger = logging.getLogger(__name__)
@@ -18,11 +19,12 @@ logger = logging.getLogger(__name__)
 class DataNormalizer:
     """Normalizes Home Assistant event data to standardized formats"""
     
-    def __init__(self):
+    def __init__(self, schema_registry: Optional[SchemaRegistry] = None):
         self.normalized_events = 0
         self.normalization_errors = 0
         self.last_normalized_time: Optional[datetime] = None
         self.validator = get_validator()  # Epic 18.1: Data validation engine
+        self.schema_registry = schema_registry or SchemaRegistry()  # Compiled attribute field types
         # TEMPORARILY DISABLED: self.quality_metrics = get_quality_metrics_collector()  # Epic 18.2: Quality metrics
         
         # State value mappings
@@ -68,6 +70,25 @@ class DataNormalizer:
         Returns:
             Normalized event data or None if normalization fails or validation fails
         """
+        normalized, _ = self.normalize_and_validate(event_data)
+        return normalized
+    
+    def normalize_and_validate(self, event_data: Dict[str, Any],
+                               normalized_at: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], ValidationResult]:
+        """
+        Validate and normalize a Home Assistant event in one call
+        
+        Callers that need the validation result use this instead of running
+        the validator a second time.
+        
+        Args:
+            event_data: The raw event data
+            normalized_at: ISO timestamp for the normalization metadata (defaults to now)
+            
+        Returns:
+            Tuple of (normalized event data or None, validation result)
+        """
+        validation_result = ValidationResult(is_valid=False)
         try:
             # TEMPORARILY DISABLED: Epic 18.1: Validate event data FIRST
             # TODO: Re-enable validation after fixing validation issues
@@ -99,7 +120,7 @@ class DataNormalizer:
             
             # Add normalization metadata
             normalized["_normalized"] = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": normalized_at or datetime.now(timezone.utc).isoformat(),
                 "version": "1.0.0",
                 "source": "enrichment-pipeline"
             }
@@ -120,20 +141,42 @@ class DataNormalizer:
             if not self._validate_normalized_data(normalized):
                 self.normalization_errors += 1
                 logger.warning(f"Normalized data validation failed for event: {event_data.get('event_type', 'unknown')}")
-                return None
+                return None, validation_result
             
             # Update statistics
             self.normalized_events += 1
             self.last_normalized_time = datetime.now(timezone.utc)
             
             logger.debug(f"Successfully normalized {event_data.get('event_type', 'unknown')} event")
-            return normalized
+            return normalized, validation_result
             
         except Exception as e:
             self.normalization_errors += 1
             logger.error(f"Error normalizing event: {e}")
             logger.debug(f"Event data: {event_data}")
-            return None
+            return None, validation_result
+    
+    def normalize_batch(self, events: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], ValidationResult]]:
+        """
+        Validate and normalize a list of events in one call
+        
+        Args:
+            events: The raw events
+            
+        Returns:
+            Per-event (normalized event data or None, validation result), in input order
+        """
+        normalized_at = datetime.now(timezone.utc).isoformat()
+        results = []
+        for event_data in events:
+            if not isinstance(event_data, dict):
+                validation_result = ValidationResult(is_valid=False)
+                validation_result.add_error("Event must be an object")
+                self.normalization_errors += 1
+                results.append((None, validation_result))
+                continue
+            results.append(self.normalize_and_validate(event_data, normalized_at))
+        return results
     
     def _normalize_timestamps(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -309,17 +352,14 @@ class DataNormalizer:
         """
         try:
             if event_data.get("event_type") == "state_changed":
-                # Normalize units in new_state attributes
-                if "new_state" in event_data and event_data["new_state"]:
-                    new_state = event_data["new_state"]
-                    if "attributes" in new_state:
-                        new_state["attributes"] = self._normalize_attribute_units(new_state["attributes"])
+                entity_id = event_data.get("entity_id") or (event_data.get("new_state") or {}).get("entity_id") or ""
+                domain = entity_id.split(".")[0] if "." in entity_id else ""
                 
-                # Normalize units in old_state attributes
-                if "old_state" in event_data and event_data["old_state"]:
-                    old_state = event_data["old_state"]
-                    if "attributes" in old_state:
-                        old_state["attributes"] = self._normalize_attribute_units(old_state["attributes"])
+                # Normalize units in new_state and old_state attributes
+                for state_key in ("new_state", "old_state"):
+                    state = event_data.get(state_key)
+                    if state and "attributes" in state:
+                        state["attributes"] = self._normalize_attribute_units(state["attributes"], domain)
             
             return event_data
             
@@ -327,181 +367,58 @@ class DataNormalizer:
             logger.error(f"Error normalizing units: {e}")
             return event_data
     
-    def _normalize_attribute_units(self, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    def _normalize_attribute_units(self, attributes: Dict[str, Any], domain: str = "") -> Dict[str, Any]:
         """
-        Normalize units in entity attributes
+        Normalize units and field types in entity attributes
         
         Args:
             attributes: The attributes dictionary
+            domain: Entity domain (selects the compiled attribute schema)
             
         Returns:
             Attributes with normalized units
         """
         try:
-            normalized_attrs = attributes.copy()
+            # Normalize field types to prevent InfluxDB type conflicts (returns a new dict)
+            normalized_attrs = self._normalize_numeric_attributes(attributes, domain)
             
             # Normalize temperature units
-            if "unit_of_measurement" in normalized_attrs:
-                unit = normalized_attrs["unit_of_measurement"]
+            unit = normalized_attrs.get("unit_of_measurement")
+            if unit is not None:
                 if unit in self.temperature_units:
                     normalized_attrs["unit_of_measurement"] = self.temperature_units[unit]
                 elif unit in self.pressure_units:
                     normalized_attrs["unit_of_measurement"] = self.pressure_units[unit]
             
-            # Normalize numeric attribute fields to prevent InfluxDB type conflicts
-            normalized_attrs = self._normalize_numeric_attributes(normalized_attrs)
-            
             return normalized_attrs
             
         except Exception as e:
             logger.error(f"Error normalizing attribute units: {e}")
             return attributes
     
-    def _normalize_numeric_attributes(self, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    def _normalize_numeric_attributes(self, attributes: Dict[str, Any], domain: str = "") -> Dict[str, Any]:
         """
         Normalize ALL attribute field types to prevent InfluxDB type conflicts.
         
         InfluxDB enforces strict field typing - once a field is defined with a type,
-        it cannot accept different types. This method ensures consistent typing for:
+        it cannot accept different types. Field types come from the schema
+        registry (learned types, then the static boolean/numeric rules):
         - Boolean fields (true/false strings → boolean)
         - Numeric fields (string numbers → float)
-        - String fields (keep as strings)
-        - Null/empty values (remove)
+        - String fields (primitives → strings)
+        - Null values and values incompatible with the field type (remove)
         
         Args:
             attributes: The attributes dictionary
+            domain: Entity domain (selects the compiled attribute schema)
             
         Returns:
             Attributes with normalized field types
         """
         try:
-            # Known boolean attribute fields that may arrive as strings from Home Assistant
-            boolean_fields = [
-                'dynamic_eq', 'aux_heat', 'away_mode', 'is_volume_muted', 
-                'shuffle', 'repeat', 'is_locked', 'motion_detected', 
-                'tamper_detected', 'battery_low', 'door_open', 'window_open',
-                'occupancy', 'presence', 'charging', 'auto', 'eco_mode'
-            ]
-            
-            # Known numeric attribute fields that may arrive as strings from Home Assistant
-            numeric_fields = [
-                'azimuth', 'elevation', 'brightness', 'temperature', 'humidity',
-                'pressure', 'battery', 'battery_level', 'power', 'energy', 
-                'voltage', 'current', 'frequency', 'speed', 'distance',
-                'wind_speed', 'wind_bearing', 'visibility', 'precipitation',
-                'uv_index', 'pm25', 'pm10', 'co2', 'voc', 'latitude', 'longitude',
-                'volume_level', 'media_position', 'media_duration', 'supported_features',
-                'hvac_modes', 'swing_modes', 'fan_modes', 'preset_modes', 'options',
-                'min_temp', 'max_temp', 'min_humidity', 'max_humidity', 'step'
-            ]
-            
-            normalized_attrs = attributes.copy()
-            type_conversions = {'boolean': 0, 'numeric': 0, 'removed': 0}
-            
-            for key, value in list(normalized_attrs.items()):
-                # Skip None values
-                if value is None:
-                    del normalized_attrs[key]
-                    type_conversions['removed'] += 1
-                    continue
-                
-                # Remove attr_ prefix for matching
-                attr_name = key.replace('attr_', '')
-                
-                # Handle Boolean Fields
-                if attr_name in boolean_fields:
-                    try:
-                        if isinstance(value, bool):
-                            # Already boolean, keep as-is
-                            pass
-                        elif isinstance(value, str):
-                            # Convert string to boolean
-                            value_lower = value.lower().strip()
-                            if value_lower in ('true', '1', 'on', 'yes', 'enabled'):
-                                normalized_attrs[key] = True
-                                type_conversions['boolean'] += 1
-                            elif value_lower in ('false', '0', 'off', 'no', 'disabled'):
-                                normalized_attrs[key] = False
-                                type_conversions['boolean'] += 1
-                            elif value_lower == '':
-                                # Empty string - remove field
-                                del normalized_attrs[key]
-                                type_conversions['removed'] += 1
-                            else:
-                                # Invalid boolean value - remove to prevent conflict
-                                logger.warning(f"Invalid boolean value for {key}: '{value}' - removing field")
-                                del normalized_attrs[key]
-                                type_conversions['removed'] += 1
-                        elif isinstance(value, (int, float)):
-                            # Convert 0/1 to boolean
-                            normalized_attrs[key] = bool(value)
-                            type_conversions['boolean'] += 1
-                        else:
-                            # Unknown type - remove
-                            logger.warning(f"Removing boolean field {key} with invalid type {type(value)}: {value}")
-                            del normalized_attrs[key]
-                            type_conversions['removed'] += 1
-                    except Exception as e:
-                        logger.warning(f"Failed to convert {key} to boolean: {value} ({e}) - removing field")
-                        del normalized_attrs[key]
-                        type_conversions['removed'] += 1
-                
-                # Handle Numeric Fields
-                elif attr_name in numeric_fields:
-                    try:
-                        if isinstance(value, str):
-                            # Handle empty strings
-                            if value.strip() == '':
-                                del normalized_attrs[key]
-                                type_conversions['removed'] += 1
-                                continue
-                            
-                            # Attempt float conversion
-                            normalized_attrs[key] = float(value)
-                            type_conversions['numeric'] += 1
-                        
-                        elif isinstance(value, (int, float)):
-                            # Already numeric, ensure it's float for consistency
-                            normalized_attrs[key] = float(value)
-                        
-                        elif isinstance(value, bool):
-                            # Boolean shouldn't be in numeric field - convert to 0/1
-                            normalized_attrs[key] = float(1 if value else 0)
-                            type_conversions['numeric'] += 1
-                        
-                        else:
-                            # Non-numeric value - remove to prevent conflict
-                            logger.warning(f"Removing numeric field {key} with non-numeric type {type(value)}: {value}")
-                            del normalized_attrs[key]
-                            type_conversions['removed'] += 1
-                    
-                    except (ValueError, TypeError) as e:
-                        # Conversion failed - remove field rather than cause InfluxDB conflict
-                        logger.warning(f"Failed to convert {key} to float: {value} ({e}) - removing field")
-                        del normalized_attrs[key]
-                        type_conversions['removed'] += 1
-                
-                # Handle String Fields (keep as-is, just ensure they're strings)
-                else:
-                    if isinstance(value, str):
-                        # Already string, keep as-is
-                        pass
-                    elif isinstance(value, (int, float, bool)):
-                        # Convert primitives to strings to maintain consistency
-                        normalized_attrs[key] = str(value)
-                    elif value == '':
-                        # Empty string - remove
-                        del normalized_attrs[key]
-                        type_conversions['removed'] += 1
-                    # Lists, dicts, etc. keep as-is (InfluxDB will handle as JSON)
-            
-            # Log type conversions summary if any occurred
-            if sum(type_conversions.values()) > 0:
-                logger.info(f"Type normalization applied: {type_conversions['boolean']} boolean, "
-                           f"{type_conversions['numeric']} numeric, "
-                           f"{type_conversions['removed']} removed fields")
-            
-            return normalized_attrs
+            if not isinstance(attributes, dict):
+                return attributes
+            return self.schema_registry.normalize_attributes(attributes, domain, attributes.get("device_class"))
             
         except Exception as e:
             logger.error(f"Error normalizing attribute types: {e}")
@@ -607,7 +524,8 @@ class DataNormalizer:
             "normalization_errors": self.normalization_errors,
             "success_rate": (self.normalized_events / (self.normalized_events + self.normalization_errors) * 100) 
                            if (self.normalized_events + self.normalization_errors) > 0 else 0,
-            "last_normalized_time": self.last_normalized_time.isoformat() if self.last_normalized_time else None
+            "last_normalized_time": self.last_normalized_time.isoformat() if self.last_normalized_time else None,
+            "schema_registry": self.schema_registry.get_statistics()
         }
     
     def reset_statistics(self):
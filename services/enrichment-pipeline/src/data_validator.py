@@ -53,21 +53,25 @@ class DataValidationEngine:
     ENTITY_ID_PATTERN = re.compile(r'^[a-z_]+\.[a-z0-9_]+$')
     
     # Known Home Assistant domains
-    KNOWN_DOMAINS = {
+    KNOWN_DOMAINS = frozenset({
         'sensor', 'binary_sensor', 'light', 'switch', 'climate', 'cover',
         'fan', 'lock', 'media_player', 'camera', 'alarm_control_panel',
         'vacuum', 'water_heater', 'weather', 'device_tracker', 'person',
         'zone', 'automation', 'script', 'scene', 'input_boolean',
         'input_number', 'input_select', 'input_text', 'input_datetime',
         'timer', 'counter', 'sun', 'moon', 'calendar'
-    }
+    })
     
     # Numeric sensor device classes (expect numeric state)
-    NUMERIC_SENSOR_CLASSES = {
+    NUMERIC_SENSOR_CLASSES = frozenset({
         'temperature', 'humidity', 'pressure', 'battery', 'power',
         'energy', 'voltage', 'current', 'frequency', 'illuminance',
         'signal_strength', 'pm25', 'pm10', 'co2', 'aqi'
-    }
+    })
+    
+    KNOWN_EVENT_TYPES = frozenset({'state_changed', 'call_service', 'automation_triggered'})
+    ON_OFF_STATES = frozenset({'on', 'off', 'unavailable', 'unknown'})
+    CLIMATE_STATES = frozenset({'off', 'heat', 'cool', 'heat_cool', 'auto', 'dry', 'fan_only', 'unavailable', 'unknown'})
     
     def __init__(self):
         """Initialize validation engine"""
@@ -86,33 +90,20 @@ class DataValidationEngine:
         Returns:
             ValidationResult with validation status and details
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = ValidationResult(is_valid=True)
         
         try:
-            # DEBUG: Log event structure
-            logger.warning(f"[VALIDATOR] validate_event called")
-            logger.warning(f"[VALIDATOR] Event keys: {list(event.keys())}")
-            logger.warning(f"[VALIDATOR] Event type: {event.get('event_type')}")
-            logger.warning(f"[VALIDATOR] Has entity_id: {'entity_id' in event}")
-            logger.warning(f"[VALIDATOR] Has data: {'data' in event}")
-            
             # Extract entity_id and state data from the event
             # The WebSocket service already extracts and flattens the structure,
             # so entity_id is at the top level, not in event['data']['entity_id']
             entity_id = event.get('entity_id', '')
             new_state = event.get('new_state', {})
-            old_state = event.get('old_state', {})
-            
-            logger.warning(f"[VALIDATOR] Extracted entity_id: '{entity_id}' (type: {type(entity_id)})")
-            logger.warning(f"[VALIDATOR] Has new_state: {new_state is not None}, Has old_state: {old_state is not None}")
             
             # Validate entity_id
-            logger.warning(f"[VALIDATOR] Calling _validate_entity_id")
             if not self._validate_entity_id(entity_id, result):
-                logger.warning(f"[VALIDATOR] _validate_entity_id FAILED - Errors: {result.errors}")
+                logger.debug(f"[VALIDATOR] Invalid entity_id {entity_id!r}: {result.errors}")
                 return result
-            logger.warning(f"[VALIDATOR] _validate_entity_id PASSED")
             
             # Extract domain from entity_id
             domain = entity_id.split('.')[0] if '.' in entity_id else ''
@@ -136,7 +127,7 @@ class DataValidationEngine:
         
         finally:
             # Record validation metrics
-            validation_time_ms = (time.time() - start_time) * 1000
+            validation_time_ms = (time.perf_counter() - start_time) * 1000
             result.validation_time_ms = validation_time_ms
             
             self.validation_count += 1
@@ -180,7 +171,7 @@ class DataValidationEngine:
         
         # Validate event_type if present
         event_type = event.get('event_type')
-        if event_type and event_type not in ['state_changed', 'call_service', 'automation_triggered']:
+        if event_type and event_type not in self.KNOWN_EVENT_TYPES:
             result.add_warning(f"Unusual event_type: {event_type}")
     
     def _validate_state_data(self, state: Dict[str, Any], domain: str, result: ValidationResult):
@@ -277,16 +268,12 @@ class DataValidationEngine:
     
     def _validate_binary_sensor(self, state: Any, result: ValidationResult):
         """Validate binary sensor state"""
-        valid_states = ['on', 'off', 'unavailable', 'unknown']
-        
-        if state not in valid_states:
+        if state not in self.ON_OFF_STATES:
             result.add_error(f"Binary sensor has invalid state: {state}")
     
     def _validate_light(self, state: Any, attributes: Dict[str, Any], result: ValidationResult):
         """Validate light state"""
-        valid_states = ['on', 'off', 'unavailable', 'unknown']
-        
-        if state not in valid_states:
+        if state not in self.ON_OFF_STATES:
             result.add_error(f"Light has invalid state: {state}")
         
         # If on, check for brightness
@@ -301,16 +288,12 @@ class DataValidationEngine:
     
     def _validate_switch(self, state: Any, result: ValidationResult):
         """Validate switch state"""
-        valid_states = ['on', 'off', 'unavailable', 'unknown']
-        
-        if state not in valid_states:
+        if state not in self.ON_OFF_STATES:
             result.add_error(f"Switch has invalid state: {state}")
     
     def _validate_climate(self, state: Any, attributes: Dict[str, Any], result: ValidationResult):
         """Validate climate/thermostat state"""
-        valid_states = ['off', 'heat', 'cool', 'heat_cool', 'auto', 'dry', 'fan_only', 'unavailable', 'unknown']
-        
-        if state not in valid_states:
+        if state not in self.CLIMATE_STATES:
             result.add_warning(f"Unusual climate state: {state}")
         
         # Validate temperature settings
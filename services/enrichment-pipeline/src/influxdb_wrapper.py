@@ -3,23 +3,108 @@ InfluxDB Client for storing normalized Home Assistant events
 """
 
 import logging
+import math
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 from influxdb_client import InfluxDBClient, Point
+from influxdb_client.client.util.date_utils import get_date_helper
 from influxdb_client.client.write_api import SYNCHRONOUS
 
 logger = logging.getLogger(__name__)
 
+MEASUREMENT = "home_assistant_events"
+
+# Line protocol escaping (same rules as influxdb_client Point)
+_ESCAPE_KEY = str.maketrans({
+    ',': r'\,',
+    '=': r'\=',
+    ' ': r'\ ',
+    '\n': r'\n',
+    '\t': r'\t',
+    '\r': r'\r',
+})
+
+_ESCAPE_STRING = str.maketrans({
+    '"': r'\"',
+    '\\': r'\\',
+})
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _escape_tag_value(value: Any) -> str:
+    """Escape a tag value (a trailing backslash would escape the separator)"""
+    escaped = str(value).translate(_ESCAPE_KEY)
+    if escaped.endswith('\\'):
+        escaped += ' '
+    return escaped
+
+
+def _format_field(key: str, value: Any) -> Optional[str]:
+    """Format one field as key=value, or None if the value cannot be written"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        formatted = 'true' if value else 'false'
+    elif isinstance(value, int):
+        formatted = f"{value}i"
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        formatted = str(value)
+        if formatted.endswith('.0'):
+            formatted = formatted[:-2]
+    elif isinstance(value, str):
+        formatted = '"' + value.translate(_ESCAPE_STRING) + '"'
+    else:
+        return None
+    return f"{key.translate(_ESCAPE_KEY)}={formatted}"
+
+
+def _parse_timestamp(timestamp: Any) -> Optional[datetime]:
+    """Parse an event timestamp (ISO string or datetime)"""
+    if isinstance(timestamp, datetime):
+        return timestamp
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        # e.g. nanosecond precision, which fromisoformat does not accept
+        return get_date_helper().parse_date(timestamp)
+
+
+def _to_nanoseconds(ts: datetime) -> int:
+    """Nanoseconds since the epoch (naive datetimes are UTC)"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    delta = ts - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+def _time_of_day(hour: int) -> str:
+    """Time of day bucket for an hour"""
+    if 5 <= hour < 12:
+        return "morning"
+    if 12 <= hour < 17:
+        return "afternoon"
+    if 17 <= hour < 21:
+        return "evening"
+    return "night"
+
 
 class InfluxDBClientWrapper:
     """Wrapper for InfluxDB operations"""
     
-    def __init__(self, url: str, token: str, org: str, bucket: str):
+    def __init__(self, url: str, token: str, org: str, bucket: str, schema_registry=None,
+                 enable_gzip: bool = True):
         self.url = url
         self.token = token
         self.org = org
         self.bucket = bucket
+        # Compress write bodies (line protocol shrinks ~10x, which matters for batches)
+        self.enable_gzip = enable_gzip
+        # Learns field types from type conflict errors so later events are coerced before the write
+        self.schema_registry = schema_registry
         self.client: Optional[InfluxDBClient] = None
         self.write_api = None
         self.query_api = None
@@ -27,6 +112,7 @@ class InfluxDBClientWrapper:
         # Statistics
         self.points_written = 0
         self.write_errors = 0
+        self.batches_written = 0
         self.last_write_time: Optional[datetime] = None
     
     async def connect(self) -> bool:
@@ -40,7 +126,8 @@ class InfluxDBClientWrapper:
             self.client = InfluxDBClient(
                 url=self.url,
                 token=self.token,
-                org=self.org
+                org=self.org,
+                enable_gzip=self.enable_gzip
             )
             
             # Test connection
@@ -112,6 +199,8 @@ class InfluxDBClientWrapper:
             # Handle field type conflicts specifically
             if "field type conflict" in error_msg:
                 logger.warning(f"InfluxDB field type conflict (dropping event): {error_msg}")
+                if self.schema_registry is not None:
+                    self.schema_registry.record_write_error(error_msg)
                 # For field type conflicts, we'll drop the event to prevent data corruption
                 # This is a temporary solution until we can clean up the existing data
                 return False
@@ -205,6 +294,131 @@ class InfluxDBClientWrapper:
             logger.error(f"Error creating InfluxDB point: {e}")
             return None
     
+    def _create_line_from_event(self, event_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the line protocol for an event directly (no Point object)
+        
+        Produces the same line as _create_point_from_event(...).to_line_protocol()
+        for the batch write path, where building and serializing a Point per
+        event dominated the cost.
+        
+        Args:
+            event_data: The normalized event data
+            
+        Returns:
+            Line protocol string or None if the event has nothing to write
+        """
+        try:
+            event_type = event_data.get("event_type")
+            if not event_type:
+                return None
+            
+            tags = {"event_type": event_type}
+            
+            entity_metadata = event_data.get("entity_metadata", {})
+            if entity_metadata:
+                for key in ("domain", "device_class", "entity_category"):
+                    if entity_metadata.get(key):
+                        tags[key] = entity_metadata[key]
+            
+            device_id = event_data.get("device_id")
+            if device_id:
+                tags["device_id"] = device_id
+            area_id = event_data.get("area_id")
+            if area_id:
+                tags["area_id"] = area_id
+            
+            integration = entity_metadata.get("platform") or entity_metadata.get("integration")
+            if integration:
+                tags["integration"] = integration
+            
+            timestamp = event_data.get("timestamp")
+            ts = None
+            if timestamp:
+                try:
+                    ts = _parse_timestamp(timestamp)
+                    tags["time_of_day"] = _time_of_day(ts.hour)
+                except Exception as e:
+                    logger.debug(f"Could not determine time_of_day: {e}")
+            
+            fields: Dict[str, Any] = {}
+            if event_type == "state_changed":
+                self._collect_state_changed_values(event_data, tags, fields)
+            else:
+                fields["raw_data"] = str(event_data)
+            
+            formatted_fields = []
+            for key, value in sorted(fields.items()):
+                field = _format_field(key, value)
+                if field is not None:
+                    formatted_fields.append(field)
+            if not formatted_fields:
+                return None
+            
+            formatted_tags = []
+            for key, value in sorted(tags.items()):
+                tag_value = _escape_tag_value(value)
+                if tag_value:
+                    formatted_tags.append(f"{key.translate(_ESCAPE_KEY)}={tag_value}")
+            
+            line = MEASUREMENT
+            if formatted_tags:
+                line += "," + ",".join(formatted_tags)
+            line += " " + ",".join(formatted_fields)
+            if ts is not None:
+                line += f" {_to_nanoseconds(ts)}"
+            return line
+            
+        except Exception as e:
+            logger.error(f"Error creating line protocol: {e}")
+            return None
+    
+    def _collect_state_changed_values(self, event_data: Dict[str, Any], tags: Dict[str, Any],
+                                      fields: Dict[str, Any]):
+        """
+        Collect state_changed tags and fields (mirrors _add_state_changed_fields)
+        
+        Args:
+            event_data: The event data
+            tags: Tag dict to add to
+            fields: Field dict to add to
+        """
+        new_state = event_data.get("new_state", {})
+        entity_id = new_state.get("entity_id") or event_data.get("entity_id")
+        if entity_id:
+            tags["entity_id"] = entity_id
+        
+        if "state" in new_state:
+            fields["state"] = str(new_state["state"])
+        
+        old_state = event_data.get("old_state", {})
+        if old_state and "state" in old_state:
+            fields["old_state"] = str(old_state["state"])
+        
+        # Normalized types pass through; dicts/lists are not written
+        for key, value in new_state.get("attributes", {}).items():
+            if not isinstance(value, (dict, list)):
+                fields[f"attr_{key}"] = value
+        
+        entity_metadata = event_data.get("entity_metadata", {})
+        for key in ("friendly_name", "unit_of_measurement", "icon"):
+            if entity_metadata.get(key):
+                fields[key] = entity_metadata[key]
+        
+        for key in ("context_id", "context_parent_id", "context_user_id"):
+            if event_data.get(key):
+                fields[key] = event_data[key]
+        
+        duration_in_state = event_data.get("duration_in_state")
+        if duration_in_state is not None:
+            fields["duration_in_state_seconds"] = float(duration_in_state)
+        
+        device_metadata = event_data.get("device_metadata")
+        if device_metadata:
+            for key in ("manufacturer", "model", "sw_version"):
+                if device_metadata.get(key):
+                    fields[key] = str(device_metadata[key])
+    
     def _add_state_changed_fields(self, point: Point, event_data: Dict[str, Any]) -> Point:
         """
         Add state_changed specific fields to InfluxDB point
@@ -363,37 +577,57 @@ class InfluxDBClientWrapper:
         Returns:
             Number of events successfully written
         """
-        try:
-            if not self.client or not self.write_api:
-                logger.error("InfluxDB client not connected")
-                return 0
-            
-            # Create points
-            points = []
-            for event_data in events:
-                point = self._create_point_from_event(event_data)
-                if point:
-                    points.append(point)
-            
-            if not points:
-                logger.warning("No valid points to write")
-                return 0
-            
-            # Write batch
-            self.write_api.write(bucket=self.bucket, record=points)
-            
-            # Update statistics
-            written_count = len(points)
-            self.points_written += written_count
-            self.last_write_time = datetime.now()
-            
-            logger.info(f"Successfully wrote {written_count} events to InfluxDB")
-            return written_count
+        return sum(await self.write_batch(events))
+    
+    async def write_batch(self, events: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Write events as one line protocol request from a worker thread
+        
+        The body is gzip-compressed when enable_gzip is set. InfluxDB writes
+        are idempotent (same series and timestamp overwrite), so a failed
+        batch can be resent as a whole.
+        
+        Args:
+            events: List of normalized event data
             
+        Returns:
+            Per-event flags, True where the event was written
+        """
+        results = [False] * len(events)
+        if not self.client or not self.write_api:
+            logger.error("InfluxDB client not connected")
+            return results
+        
+        lines = []
+        indexes = []
+        for index, event_data in enumerate(events):
+            line = self._create_line_from_event(event_data)
+            if line:
+                lines.append(line)
+                indexes.append(index)
+        
+        if not lines:
+            logger.warning("No valid points to write")
+            return results
+        
+        try:
+            # The synchronous client blocks on HTTP; keep it off the event loop
+            await asyncio.to_thread(self.write_api.write, bucket=self.bucket, record="\n".join(lines))
         except Exception as e:
             self.write_errors += 1
-            logger.error(f"Error writing batch to InfluxDB: {e}")
-            return 0
+            logger.error(f"Error writing batch of {len(lines)} events to InfluxDB: {e}")
+            if self.schema_registry is not None and "field type conflict" in str(e):
+                self.schema_registry.record_write_error(str(e))
+            return results
+        
+        for index in indexes:
+            results[index] = True
+        self.points_written += len(lines)
+        self.batches_written += 1
+        self.last_write_time = datetime.now()
+        
+        logger.debug(f"Successfully wrote {len(lines)} events to InfluxDB")
+        return results
     
     async def query_events(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -449,6 +683,8 @@ class InfluxDBClientWrapper:
         return {
             "points_written": self.points_written,
             "write_errors": self.write_errors,
+            "batches_written": self.batches_written,
+            "gzip": self.enable_gzip,
             "success_rate": (self.points_written / (self.points_written + self.write_errors) * 100) 
                            if (self.points_written + self.write_errors) > 0 else 0,
             "last_write_time": self.last_write_time.isoformat() if self.last_write_time else None,
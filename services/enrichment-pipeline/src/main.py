@@ -24,7 +24,8 @@ from influxdb_wrapper import InfluxDBClientWrapper
 from health_check import health_check_handler
 from historical_event_counter import HistoricalEventCounter
 from data_validator import DataValidationEngine
-# TEMPORARILY DISABLED: from quality_metrics import QualityMetricsCollector
+from schema_registry import SchemaRegistry
+from quality_metrics import QualityMetricsCollector
 from quality_alerts import QualityAlertManager, alert_manager
 from quality_dashboard import QualityDashboardAPI
 from quality_reporting import QualityReportingSystem
@@ -49,18 +50,29 @@ class EnrichmentPipelineService:
         # Historical event counter for persistent totals
         self.historical_counter = None
         
+        # Attribute field types, persisted so learned types survive restarts
+        self.schema_registry = SchemaRegistry(os.getenv("SCHEMA_REGISTRY_PATH", "/app/data/schema_registry.json"))
+        self.schema_registry.load()
+        
         # Core Components
-        self.data_normalizer = DataNormalizer()
+        self.data_normalizer = DataNormalizer(schema_registry=self.schema_registry)
         self.influxdb_client = InfluxDBClientWrapper(
             self.influxdb_url,
             self.influxdb_token,
             self.influxdb_org,
-            self.influxdb_bucket
+            self.influxdb_bucket,
+            schema_registry=self.schema_registry,
+            enable_gzip=os.getenv("INFLUXDB_ENABLE_GZIP", "true").lower() == "true"
         )
         
         # Quality Monitoring Components
-        self.data_validator = DataValidationEngine()
-        # TEMPORARILY DISABLED: self.quality_metrics = QualityMetricsCollector()
+        # The normalizer validates every event; share its engine so statistics cover all events
+        self.data_validator = self.data_normalizer.validator
+        # Fixed-cost counters and sketches; aggregates are flushed to InfluxDB periodically
+        self.quality_metrics = QualityMetricsCollector(
+            bucket=self.influxdb_bucket,
+            flush_interval=float(os.getenv("QUALITY_METRICS_FLUSH_INTERVAL", "60"))
+        )
         self.alert_manager = alert_manager
         # TEMPORARILY DISABLED: Quality dashboard and reporting
         # self.quality_dashboard = QualityDashboardAPI(
@@ -122,6 +134,9 @@ class EnrichmentPipelineService:
                 total_events=historical_totals.get('total_events_processed', 0)
             )
             
+            # Start periodic quality metrics flush
+            await self.quality_metrics.start(self.influxdb_client.client)
+            
             # TEMPORARILY DISABLED: Start quality reporting system
             # TODO: Re-enable after fixing quality metrics
             # await self.quality_reporting.start()
@@ -162,9 +177,15 @@ class EnrichmentPipelineService:
             # TODO: Re-enable after fixing quality metrics
             # await self.quality_reporting.stop()
             
+            # Write the final quality metrics before the connection closes
+            await self.quality_metrics.stop()
+            
             # Close InfluxDB connection
             await self.influxdb_client.close()
             
+            # Keep field types recorded this session
+            self.schema_registry.save()
+            
             # Mark service as stopped
             self.is_running = False
             
@@ -204,30 +225,7 @@ class EnrichmentPipelineService:
             logger.debug(f"[PROCESS_EVENT] Starting - Type: {event_type}, Entity: {entity_id}")
             logger.debug(f"[PROCESS_EVENT] Event keys: {list(event_data.keys())}")
             
-            # Validate event data
-            logger.debug(f"[PROCESS_EVENT] Calling validator.validate_event")
-            validation_results = self.data_validator.validate_event(event_data)
-            logger.debug(f"[PROCESS_EVENT] Validation result - Valid: {validation_results.is_valid}, "
-                          f"Errors: {validation_results.errors}, Warnings: {validation_results.warnings}")
-            
-            # Check if event is valid and log detailed validation results
-            if not validation_results.is_valid:
-                log_with_context(
-                    logger, "WARNING", f"[PROCESS_EVENT] Event validation failed - Errors: {', '.join(validation_results.errors)}",
-                    operation="event_validation",
-                    correlation_id=corr_id,
-                    event_type=event_type,
-                    entity_id=entity_id,
-                    validation_errors=validation_results.errors,
-                    validation_warnings=validation_results.warnings
-                )
-                #  Continue processing despite validation errors (for now)
-                # TODO: Re-enable strict validation after confirming all events are properly structured
-            else:
-                logger.debug(f"[PROCESS_EVENT] Validation passed!")
-            
-            # Normalize event data
-            logger.debug(f"[PROCESS_EVENT] Calling normalizer.normalize_event")
+            # Validate and normalize event data in one call
             log_with_context(
                 logger, "DEBUG", "Starting event normalization",
                 operation="event_normalization_start",
@@ -235,8 +233,12 @@ class EnrichmentPipelineService:
                 event_type=event_type,
                 entity_id=entity_id
             )
-            normalized_event = self.data_normalizer.normalize_event(event_data)
-            logger.debug(f"[PROCESS_EVENT] Normalization result: {type(normalized_event)}, Is None: {normalized_event is None}")
+            normalized_event, validation_results = self.data_normalizer.normalize_and_validate(event_data)
+            logger.debug(f"[PROCESS_EVENT] Validation result - Valid: {validation_results.is_valid}, "
+                          f"Errors: {validation_results.errors}, Warnings: {validation_results.warnings}")
+            
+            # Validation failures are logged by the normalizer; processing continues despite them (for now)
+            # TODO: Re-enable strict validation after confirming all events are properly structured
             
             if not normalized_event:
                 logger.debug(f"[PROCESS_EVENT] Normalization returned None/False - FAILING")
@@ -249,7 +251,7 @@ class EnrichmentPipelineService:
                 )
                 # Record normalization failure in metrics
                 processing_time_ms = (time.time() - start_time) * 1000
-                # TEMPORARILY DISABLED: self.quality_metrics.record_validation_result(validation_results, event_data)
+                self.quality_metrics.record_validation_result(validation_results, event_data)
                 return False
             
             log_with_context(
@@ -278,9 +280,9 @@ class EnrichmentPipelineService:
                 success=success
             )
             
-            # TEMPORARILY DISABLED: Record processing result in quality metrics
+            # Record processing result in quality metrics
             processing_time_ms = (time.time() - start_time) * 1000
-            # self.quality_metrics.record_validation_result(validation_results, event_data)
+            self.quality_metrics.record_validation_result(validation_results, event_data)
             
             if success:
                 log_with_context(
@@ -318,19 +320,22 @@ class EnrichmentPipelineService:
             from data_validator import ValidationResult
             error_result = ValidationResult(is_valid=False)
             error_result.add_error("Processing exception occurred")
-            # TEMPORARILY DISABLED: self.quality_metrics.record_validation_result(error_result, event_data)
+            self.quality_metrics.record_validation_result(error_result, event_data)
             return False
     
     @performance_monitor("batch_processing")
-    async def process_events_batch(self, events: list) -> int:
+    async def process_events_batch(self, events: list) -> list:
         """
         Process multiple events through the enrichment pipeline
         
+        Events are validated and normalized in one call and written to
+        InfluxDB as a single request, instead of one write per event.
+        
         Args:
             events: List of raw event data
             
         Returns:
-            Number of events successfully processed
+            Per-event results in input order (index, status and reason/errors on failure)
         """
         import time
         start_time = time.time()
@@ -344,27 +349,31 @@ class EnrichmentPipelineService:
             batch_size=batch_size
         )
         
+        results = [
+            {"index": index, "event_id": event_data.get("id") if isinstance(event_data, dict) else None}
+            for index, event_data in enumerate(events)
+        ]
+        
         try:
-            # Process events individually to track quality metrics
-            processed_count = 0
-            for event_data in events:
-                success = await self.process_event(event_data)
-                if success:
-                    processed_count += 1
-            
-            processing_time_ms = (time.time() - start_time) * 1000
-            
-            log_with_context(
-                logger, "INFO", "Batch processing completed",
-                operation="batch_processing_complete",
-                correlation_id=corr_id,
-                batch_size=batch_size,
-                processed_count=processed_count,
-                success_rate=(processed_count / batch_size * 100) if batch_size > 0 else 0,
-                processing_time_ms=processing_time_ms
-            )
+            normalized_events = []
+            normalized_indexes = []
+            for index, (normalized_event, validation_results) in enumerate(
+                    self.data_normalizer.normalize_batch(events)):
+                self.quality_metrics.record_validation_result(
+                    validation_results, events[index] if isinstance(events[index], dict) else None)
+                if normalized_event:
+                    normalized_events.append(normalized_event)
+                    normalized_indexes.append(index)
+                else:
+                    results[index].update(status="failed", reason="normalization_failed",
+                                          errors=validation_results.errors)
             
-            return processed_count
+            written = await self.influxdb_client.write_batch(normalized_events) if normalized_events else []
+            for index, success in zip(normalized_indexes, written):
+                if success:
+                    results[index]["status"] = "success"
+                else:
+                    results[index].update(status="failed", reason="write_failed")
             
         except Exception as e:
             log_error_with_context(
@@ -373,7 +382,25 @@ class EnrichmentPipelineService:
                 correlation_id=corr_id,
                 batch_size=batch_size
             )
-            return 0
+            for result in results:
+                if result.get("status") != "failed":
+                    result.update(status="failed", reason="processing_failed")
+            return results
+        
+        processed_count = sum(1 for result in results if result["status"] == "success")
+        processing_time_ms = (time.time() - start_time) * 1000
+        
+        log_with_context(
+            logger, "INFO", "Batch processing completed",
+            operation="batch_processing_complete",
+            correlation_id=corr_id,
+            batch_size=batch_size,
+            processed_count=processed_count,
+            success_rate=(processed_count / batch_size * 100) if batch_size > 0 else 0,
+            processing_time_ms=processing_time_ms
+        )
+        
+        return results
     
     def get_service_status(self) -> dict:
         """
@@ -405,8 +432,8 @@ class EnrichmentPipelineService:
                 "historical_events_processed": historical_total,  # Historical only
             },
             "influxdb": self.influxdb_client.get_statistics(),
-            # TEMPORARILY DISABLED: "quality_metrics": self.quality_metrics.get_metrics(),
-            # TEMPORARILY DISABLED: "quality_health": self.quality_metrics.get_health_status(),
+            "quality_metrics": self.quality_metrics.get_metrics(),
+            "quality_health": self.quality_metrics.get_health_status(),
             "validation_stats": self.data_validator.get_statistics(),
             "alert_stats": self.alert_manager.get_alert_statistics(),
             "timestamp": asyncio.get_event_loop().time()
@@ -427,7 +454,11 @@ async def main():
         
         # Create web application with proper middleware factory
         correlation_middleware = create_correlation_middleware()
-        app = web.Application(middlewares=[correlation_middleware])
+        # Batches are larger than aiohttp's 1 MB default body limit (gzip bodies are decompressed by aiohttp)
+        app = web.Application(
+            middlewares=[correlation_middleware],
+            client_max_size=int(os.getenv("MAX_REQUEST_SIZE_MB", "32")) * 1024 * 1024
+        )
         
         # Set service instance for health checks
         from health_check import health_handler
@@ -439,6 +470,7 @@ async def main():
         app.router.add_get('/api/v1/health', health_check_handler)
         app.router.add_get('/api/v1/event-rate', health_handler.get_event_rate)
         app.router.add_post('/events', events_handler)  # New endpoint for WebSocket service
+        app.router.add_post('/events/batch', events_batch_handler)
         app.router.add_post('/process-event', process_event_handler)
         app.router.add_post('/process-events', process_events_handler)
         app.router.add_get('/status', status_handler)
@@ -534,6 +566,50 @@ async def events_handler(request):
         }, status=500)
 
 
+async def events_batch_handler(request):
+    """Handle a batch of events from WebSocket service (JSON list or {"events": [...]})"""
+    try:
+        if not service.is_running:
+            logger.error("Service is not running, rejecting batch")
+            return web.json_response({
+                "status": "error",
+                "reason": "service_not_running"
+            }, status=503)
+        
+        data = await request.json()
+        events = data.get("events") if isinstance(data, dict) else data
+        
+        if not isinstance(events, list):
+            return web.json_response({
+                "status": "error",
+                "reason": "invalid_event_data"
+            }, status=400)
+        
+        results = await service.process_events_batch(events)
+        processed_count = sum(1 for result in results if result["status"] == "success")
+        
+        if processed_count == len(events):
+            status = "success"
+        elif processed_count:
+            status = "partial"
+        else:
+            status = "failed"
+        
+        return web.json_response({
+            "status": status,
+            "processed_count": processed_count,
+            "total_count": len(events),
+            "results": results
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in events_batch_handler: {e}")
+        return web.json_response({
+            "status": "error",
+            "error": str(e)
+        }, status=500)
+
+
 async def process_event_handler(request):
     """Handle single event processing request"""
     try:
@@ -565,12 +641,13 @@ async def process_events_handler(request):
                 "error": "No events provided"
             }, status=400)
         
-        processed_count = await service.process_events_batch(events)
+        results = await service.process_events_batch(events)
         
         return web.json_response({
             "success": True,
-            "processed_count": processed_count,
-            "total_count": len(events)
+            "processed_count": sum(1 for result in results if result["status"] == "success"),
+            "total_count": len(events),
+            "results": results
         })
         
     except Exception as e:
@@ -3,54 +3,207 @@ Data Quality Metrics Collector
 Epic 18.2: Collect Comprehensive Data Quality Metrics
 
 Collects and tracks data quality metrics from the validation engine.
+
+Recording runs on the event hot path, so it only does fixed-cost work:
+- Error/warning messages are classified once per message template and
+  interned to small integer codes; counters are fixed-size lists
+- Domains are interned to list slots (bounded, overflow goes to "other")
+- Per-entity counts live in a count-min sketch (bounded memory, estimates
+  never undercount) with a top-k of the entities failing most often
+Aggregates are flushed to InfluxDB periodically instead of per event.
 """
 
+import asyncio
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Interned error/warning codes (index into the counter lists)
+ERROR_CODES = (
+    'missing_field', 'invalid_format', 'invalid_type', 'out_of_range',
+    'timestamp_error', 'invalid_state', 'other_error'
+)
+WARNING_CODES = (
+    'missing_optional_field', 'unknown_domain', 'unusual_value',
+    'out_of_typical_range', 'other_warning'
+)
+
+# Upper bound on interned message templates and domains
+MAX_INTERNED_MESSAGES = 1024
+MAX_DOMAINS = 128
+OTHER_DOMAIN = 'other'
+
+_MASK64 = (1 << 64) - 1
+
+
+def classify_error(error: str) -> int:
+    """Classify an error message into an index of ERROR_CODES"""
+    error_lower = error.lower()
+    
+    if 'missing' in error_lower:
+        code = 'missing_field'
+    elif 'invalid' in error_lower and 'format' in error_lower:
+        code = 'invalid_format'
+    elif 'invalid' in error_lower and 'type' in error_lower:
+        code = 'invalid_type'
+    elif 'range' in error_lower or 'out of' in error_lower:
+        code = 'out_of_range'
+    elif 'timestamp' in error_lower:
+        code = 'timestamp_error'
+    elif 'state' in error_lower:
+        code = 'invalid_state'
+    else:
+        code = 'other_error'
+    return ERROR_CODES.index(code)
+
+
+def classify_warning(warning: str) -> int:
+    """Classify a warning message into an index of WARNING_CODES"""
+    warning_lower = warning.lower()
+    
+    if 'missing' in warning_lower:
+        code = 'missing_optional_field'
+    elif 'unknown' in warning_lower and 'domain' in warning_lower:
+        code = 'unknown_domain'
+    elif 'unusual' in warning_lower or 'unexpected' in warning_lower:
+        code = 'unusual_value'
+    elif 'range' in warning_lower:
+        code = 'out_of_typical_range'
+    else:
+        code = 'other_warning'
+    return WARNING_CODES.index(code)
+
+
+def _message_template(message: str) -> str:
+    """Fixed part of a validator message (variable values follow the first ':')"""
+    return message.split(':', 1)[0]
+
+
+class CountMinSketch:
+    """Count-min sketch over string keys (estimates are upper bounds)"""
+    
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialize sketch
+        
+        Args:
+            width: Counters per row (rounded up to a power of two)
+            depth: Number of rows (independent hashes)
+        """
+        self.bits = max(1, (width - 1).bit_length())
+        self.width = 1 << self.bits
+        self.depth = depth
+        # Rows are stored back to back in one flat list
+        self._counters = [0] * (self.width * depth)
+        # Odd multipliers for multiply-shift hashing of the key's hash, with each row's offset
+        self._rows = [(((2 * row + 1) * 0x9E3779B97F4A7C15) & _MASK64 | 1, row * self.width)
+                      for row in range(depth)]
+        self._shift = 64 - self.bits
+    
+    def indexes(self, key: str) -> List[int]:
+        """Counter index of a key in every row (shareable between sketches of the same shape)"""
+        h = hash(key) & _MASK64
+        shift = self._shift
+        return [(((h * multiplier) & _MASK64) >> shift) + offset for multiplier, offset in self._rows]
+    
+    def add(self, indexes: List[int], count: int = 1):
+        """
+        Add to a key's counters
+        
+        Args:
+            indexes: Result of indexes(key)
+            count: Amount to add
+        """
+        counters = self._counters
+        for index in indexes:
+            counters[index] += count
+    
+    def estimate(self, indexes: List[int]) -> int:
+        """Estimated count of a key"""
+        counters = self._counters
+        return min([counters[index] for index in indexes])
+    
+    def clear(self):
+        """Reset all counters"""
+        self._counters = [0] * (self.width * self.depth)
+    
+    @property
+    def memory_counters(self) -> int:
+        """Number of counters held"""
+        return len(self._counters)
+
+
+class TopK:
+    """Keys with the highest estimated counts (bounded to k entries)"""
+    
+    def __init__(self, k: int = 20):
+        self.k = k
+        self._counts: Dict[str, int] = {}
+        # Smallest entry, found lazily (None = needs a rescan)
+        self._min_count: Optional[int] = None
+    
+    def offer(self, key: str, estimate: int):
+        """Record a key's latest estimate; replaces the smallest entry when full"""
+        counts = self._counts
+        if key in counts or len(counts) < self.k:
+            counts[key] = estimate
+            self._min_count = None
+            return
+        min_count = self._min_count
+        if min_count is None:
+            min_count = self._min_count = min(counts.values())
+        if estimate > min_count:
+            min_key = min(counts, key=counts.get)
+            del counts[min_key]
+            counts[key] = estimate
+            self._min_count = None
+    
+    def items(self) -> List[Tuple[str, int]]:
+        """Entries sorted by count, highest first"""
+        return sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+    
+    def clear(self):
+        """Drop all entries"""
+        self._counts.clear()
+        self._min_count = None
+
 
 class QualityMetricsCollector:
     """Collects data quality metrics from validation results"""
     
-    def __init__(self, influxdb_client=None):
+    def __init__(self, influxdb_client=None, bucket: str = "home_assistant_events",
+                 flush_interval: float = 60.0, sketch_width: int = 2048, sketch_depth: int = 4,
+                 top_k: int = 20):
         """
         Initialize quality metrics collector
         
         Args:
             influxdb_client: Optional InfluxDB client for storing metrics
+            bucket: Bucket the aggregated metrics are written to
+            flush_interval: Seconds between periodic flushes (0 disables the flush task)
+            sketch_width: Counters per row of the per-entity sketches
+            sketch_depth: Rows of the per-entity sketches
+            top_k: Number of most-failing entities tracked by name
         """
         self.influxdb_client = influxdb_client
+        self.bucket = bucket
+        self.flush_interval = flush_interval
         self.start_time = time.time()
         
-        # Quality metrics counters
-        self.total_events = 0
-        self.valid_events = 0
-        self.invalid_events = 0
-        
-        # Error type counters
-        self.error_types = defaultdict(int)
-        
-        # Warning type counters
-        self.warning_types = defaultdict(int)
+        # Interning tables (message template / domain -> code)
+        self._error_codes: Dict[str, int] = {}
+        self._warning_codes: Dict[str, int] = {}
+        self._domain_codes: Dict[str, int] = {}
+        self._domains: List[str] = []
         
-        # Domain-specific counters
-        self.events_by_domain = defaultdict(int)
-        self.invalid_by_domain = defaultdict(int)
-        
-        # Timing metrics
-        self.total_validation_time_ms = 0.0
-        self.min_validation_time_ms = float('inf')
-        self.max_validation_time_ms = 0.0
-        
-        # Entity-specific metrics
-        self.entity_metrics = defaultdict(lambda: {
-            'total': 0, 'valid': 0, 'invalid': 0, 'warnings': 0
-        })
+        # Per-entity sketches
+        self._entity_total = CountMinSketch(sketch_width, sketch_depth)
+        self._entity_invalid = CountMinSketch(sketch_width, sketch_depth)
+        self._entity_warnings = CountMinSketch(sketch_width, sketch_depth)
+        self._top_invalid = TopK(top_k)
         
         # Quality thresholds
         self._quality_thresholds = {
@@ -58,6 +211,17 @@ class QualityMetricsCollector:
             'max_invalid_rate': 5.0,
             'max_warning_rate': 10.0
         }
+        
+        # Periodic flush
+        self._write_api = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._is_running = False
+        self.flushes = 0
+        self.flush_errors = 0
+        self._last_flush_events = 0
+        self._last_flush_time = time.monotonic()
+        
+        self.reset_metrics()
     
     def record_validation_result(self, validation_result, event_data: Optional[Dict[str, Any]] = None):
         """
@@ -65,71 +229,87 @@ class QualityMetricsCollector:
         
         Args:
             validation_result: ValidationResult from data validator
-            event_data: Original event data (optional, for additional context)
+            event_data: Original event data (optional, for per-entity statistics)
         """
         self.total_events += 1
+        is_valid = validation_result.is_valid
         
         # Track valid/invalid
-        if validation_result.is_valid:
+        if is_valid:
             self.valid_events += 1
         else:
             self.invalid_events += 1
             
             # Count error types
             for error in validation_result.errors:
-                error_type = self._classify_error(error)
-                self.error_types[error_type] += 1
+                template = _message_template(error)
+                code = self._error_codes.get(template)
+                if code is None:
+                    code = classify_error(error)
+                    if len(self._error_codes) < MAX_INTERNED_MESSAGES:
+                        self._error_codes[template] = code
+                self._error_counts[code] += 1
         
         # Track warnings
-        for warning in validation_result.warnings:
-            warning_type = self._classify_warning(warning)
-            self.warning_types[warning_type] += 1
+        warnings = validation_result.warnings
+        if warnings:
+            self.events_with_warnings += 1
+            for warning in warnings:
+                template = _message_template(warning)
+                code = self._warning_codes.get(template)
+                if code is None:
+                    code = classify_warning(warning)
+                    if len(self._warning_codes) < MAX_INTERNED_MESSAGES:
+                        self._warning_codes[template] = code
+                self._warning_counts[code] += 1
         
         # Track by domain
-        if validation_result.domain:
-            self.events_by_domain[validation_result.domain] += 1
-            if not validation_result.is_valid:
-                self.invalid_by_domain[validation_result.domain] += 1
+        domain = validation_result.domain
+        if domain:
+            slot = self._domain_codes.get(domain)
+            if slot is None:
+                slot = self._intern_domain(domain)
+            self._domain_total[slot] += 1
+            if not is_valid:
+                self._domain_invalid[slot] += 1
         
         # Track validation timing
-        if validation_result.validation_time_ms:
-            self.total_validation_time_ms += validation_result.validation_time_ms
-            self.min_validation_time_ms = min(self.min_validation_time_ms, validation_result.validation_time_ms)
-            self.max_validation_time_ms = max(self.max_validation_time_ms, validation_result.validation_time_ms)
-    
-    def _classify_error(self, error: str) -> str:
-        """Classify error type from error message"""
-        error_lower = error.lower()
-        
-        if 'missing' in error_lower:
-            return 'missing_field'
-        elif 'invalid' in error_lower and 'format' in error_lower:
-            return 'invalid_format'
-        elif 'invalid' in error_lower and 'type' in error_lower:
-            return 'invalid_type'
-        elif 'range' in error_lower or 'out of' in error_lower:
-            return 'out_of_range'
-        elif 'timestamp' in error_lower:
-            return 'timestamp_error'
-        elif 'state' in error_lower:
-            return 'invalid_state'
-        else:
-            return 'other_error'
+        validation_time_ms = validation_result.validation_time_ms
+        if validation_time_ms:
+            self.total_validation_time_ms += validation_time_ms
+            if validation_time_ms < self.min_validation_time_ms:
+                self.min_validation_time_ms = validation_time_ms
+            if validation_time_ms > self.max_validation_time_ms:
+                self.max_validation_time_ms = validation_time_ms
+        
+        # Track by entity (sketched)
+        if event_data:
+            entity_id = event_data.get('entity_id')
+            if not entity_id:
+                new_state = event_data.get('new_state')
+                entity_id = new_state.get('entity_id') if isinstance(new_state, dict) else None
+            if entity_id and isinstance(entity_id, str):
+                indexes = self._entity_total.indexes(entity_id)
+                self._entity_total.add(indexes)
+                if not is_valid:
+                    self._entity_invalid.add(indexes)
+                    self._top_invalid.offer(entity_id, self._entity_invalid.estimate(indexes))
+                if warnings:
+                    self._entity_warnings.add(indexes)
     
-    def _classify_warning(self, warning: str) -> str:
-        """Classify warning type from warning message"""
-        warning_lower = warning.lower()
-        
-        if 'missing' in warning_lower:
-            return 'missing_optional_field'
-        elif 'unknown' in warning_lower and 'domain' in warning_lower:
-            return 'unknown_domain'
-        elif 'unusual' in warning_lower or 'unexpected' in warning_lower:
-            return 'unusual_value'
-        elif 'range' in warning_lower:
-            return 'out_of_typical_range'
-        else:
-            return 'other_warning'
+    def _intern_domain(self, domain: str) -> int:
+        """Assign a counter slot to a domain (overflow shares the 'other' slot)"""
+        if len(self._domains) >= MAX_DOMAINS:
+            slot = self._domain_codes.get(OTHER_DOMAIN)
+            if slot is not None:
+                return slot
+            domain = OTHER_DOMAIN
+        slot = len(self._domains)
+        self._domains.append(domain)
+        self._domain_codes[domain] = slot
+        self._domain_total.append(0)
+        self._domain_invalid.append(0)
+        return slot
     
     def get_metrics(self) -> Dict[str, Any]:
         """
@@ -146,7 +326,7 @@ class QualityMetricsCollector:
         
         # Calculate average validation time
         avg_validation_time = (
-            self.total_validation_time_ms / self.total_events 
+            self.total_validation_time_ms / self.total_events
             if self.total_events > 0 else 0.0
         )
         
@@ -157,29 +337,97 @@ class QualityMetricsCollector:
                 'total_events': self.total_events,
                 'valid_events': self.valid_events,
                 'invalid_events': self.invalid_events,
-                'events_with_warnings': sum(self.warning_types.values())
+                'events_with_warnings': self.events_with_warnings
             },
             'rates': {
                 'valid_rate_percent': round(valid_rate, 2),
                 'invalid_rate_percent': round(invalid_rate, 2),
                 'events_per_second': round(self.total_events / uptime, 2) if uptime > 0 else 0.0
             },
-            'error_types': dict(self.error_types),
-            'warning_types': dict(self.warning_types),
+            'error_types': {code: count for code, count in zip(ERROR_CODES, self._error_counts) if count},
+            'warning_types': {code: count for code, count in zip(WARNING_CODES, self._warning_counts) if count},
             'by_domain': {
-                'total': dict(self.events_by_domain),
-                'invalid': dict(self.invalid_by_domain)
+                'total': {domain: count for domain, count in zip(self._domains, self._domain_total) if count},
+                'invalid': {domain: count for domain, count in zip(self._domains, self._domain_invalid) if count}
             },
+            'top_invalid_entities': [
+                {'entity_id': entity_id, 'invalid_events': count}
+                for entity_id, count in self._top_invalid.items()
+            ],
             'performance': {
                 'avg_validation_time_ms': round(avg_validation_time, 3),
                 'min_validation_time_ms': round(self.min_validation_time_ms, 3) if self.min_validation_time_ms != float('inf') else 0.0,
                 'max_validation_time_ms': round(self.max_validation_time_ms, 3)
+            },
+            'collector': {
+                'interned_messages': len(self._error_codes) + len(self._warning_codes),
+                'domains': len(self._domains),
+                'sketch_counters': self._entity_total.memory_counters * 3,
+                'flushes': self.flushes,
+                'flush_errors': self.flush_errors
             }
         }
     
+    def _build_points(self, measurement: str) -> list:
+        """Aggregated points for one flush"""
+        from influxdb_client import Point
+        
+        metrics = self.get_metrics()
+        now = time.monotonic()
+        elapsed = now - self._last_flush_time
+        interval_events = self.total_events - self._last_flush_events
+        
+        points = [
+            Point(measurement)
+            .tag("service", "enrichment-pipeline")
+            .field("total_events", self.total_events)
+            .field("valid_events", self.valid_events)
+            .field("invalid_events", self.invalid_events)
+            .field("events_with_warnings", self.events_with_warnings),
+            Point(measurement)
+            .tag("service", "enrichment-pipeline")
+            .tag("metric_type", "rates")
+            .field("valid_rate_percent", metrics['rates']['valid_rate_percent'])
+            .field("invalid_rate_percent", metrics['rates']['invalid_rate_percent'])
+            .field("events_per_second", metrics['rates']['events_per_second'])
+            .field("interval_events_per_second", round(interval_events / elapsed, 2) if elapsed > 0 else 0.0)
+            .field("avg_validation_time_ms", metrics['performance']['avg_validation_time_ms'])
+        ]
+        
+        for metric_type, counts in (("error_types", metrics['error_types']),
+                                    ("warning_types", metrics['warning_types'])):
+            if counts:
+                point = Point(measurement).tag("service", "enrichment-pipeline").tag("metric_type", metric_type)
+                for code, count in counts.items():
+                    point.field(code, count)
+                points.append(point)
+        
+        for domain, total in metrics['by_domain']['total'].items():
+            points.append(
+                Point(measurement)
+                .tag("service", "enrichment-pipeline")
+                .tag("metric_type", "domain")
+                .tag("domain", domain)
+                .field("total_events", total)
+                .field("invalid_events", metrics['by_domain']['invalid'].get(domain, 0))
+            )
+        
+        for entry in metrics['top_invalid_entities']:
+            points.append(
+                Point(measurement)
+                .tag("service", "enrichment-pipeline")
+                .tag("metric_type", "top_invalid_entity")
+                .tag("entity_id", entry['entity_id'])
+                .field("invalid_events", entry['invalid_events'])
+            )
+        
+        self._last_flush_time = now
+        self._last_flush_events = self.total_events
+        return points
+    
     async def write_to_influxdb(self, measurement: str = "data_quality_metrics"):
         """
-        Write quality metrics to InfluxDB
+        Write aggregated quality metrics to InfluxDB in one request
         
         Args:
             measurement: InfluxDB measurement name
@@ -189,37 +437,60 @@ class QualityMetricsCollector:
             return
         
         try:
-            from influxdb_client import Point
             from influxdb_client.client.write_api import SYNCHRONOUS
             
-            write_api = self.influxdb_client.write_api(write_options=SYNCHRONOUS)
-            
-            # Write totals
-            point = Point(measurement) \
-                .tag("service", "enrichment-pipeline") \
-                .field("total_events", self.total_events) \
-                .field("valid_events", self.valid_events) \
-                .field("invalid_events", self.invalid_events) \
-                .field("events_with_warnings", sum(self.warning_types.values()))
+            if self._write_api is None:
+                self._write_api = self.influxdb_client.write_api(write_options=SYNCHRONOUS)
             
-            write_api.write(bucket="home_assistant_events", record=point)
-            
-            # Write rates
-            metrics = self.get_metrics()
-            point = Point(measurement) \
-                .tag("service", "enrichment-pipeline") \
-                .tag("metric_type", "rates") \
-                .field("valid_rate_percent", metrics['rates']['valid_rate_percent']) \
-                .field("invalid_rate_percent", metrics['rates']['invalid_rate_percent']) \
-                .field("events_per_second", metrics['rates']['events_per_second'])
-            
-            write_api.write(bucket="home_assistant_events", record=point)
-            
-            logger.debug("Wrote quality metrics to InfluxDB")
+            points = self._build_points(measurement)
+            await asyncio.to_thread(self._write_api.write, bucket=self.bucket, record=points)
+            self.flushes += 1
             
+            logger.debug(f"Wrote {len(points)} quality metric points to InfluxDB")
+        
         except Exception as e:
+            self.flush_errors += 1
             logger.error(f"Error writing quality metrics to InfluxDB: {e}")
     
+    async def start(self, influxdb_client=None):
+        """
+        Start the periodic flush to InfluxDB
+        
+        Args:
+            influxdb_client: InfluxDB client to write to (replaces the configured one)
+        """
+        if influxdb_client is not None:
+            self.influxdb_client = influxdb_client
+            self._write_api = None
+        if self._is_running or self.flush_interval <= 0:
+            return
+        
+        self._is_running = True
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"Quality metrics flush started (every {self.flush_interval}s)")
+    
+    async def stop(self):
+        """Stop the periodic flush and write the final aggregates"""
+        if not self._is_running:
+            return
+        
+        self._is_running = False
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        
+        await self.write_to_influxdb()
+        logger.info("Quality metrics flush stopped")
+    
+    async def _flush_loop(self):
+        """Flush aggregates every flush_interval seconds"""
+        while self._is_running:
+            await asyncio.sleep(self.flush_interval)
+            await self.write_to_influxdb()
+    
     def get_health_status(self) -> Dict[str, Any]:
         """
         Get health status based on current metrics
@@ -273,26 +544,29 @@ class QualityMetricsCollector:
         """
         Get quality metrics for a specific entity
         
+        Counts are count-min estimates: they can exceed, but never undercount,
+        the true values.
+        
         Args:
             entity_id: Entity ID to get metrics for
-            
+        
         Returns:
             Dictionary with entity-specific quality metrics
         """
-        entity_data = self.entity_metrics.get(entity_id, {
-            'total': 0, 'valid': 0, 'invalid': 0, 'warnings': 0
-        })
-        
-        total = entity_data['total']
-        valid_rate = (entity_data['valid'] / total * 100) if total > 0 else 0.0
+        indexes = self._entity_total.indexes(entity_id)
+        total = self._entity_total.estimate(indexes)
+        invalid = min(self._entity_invalid.estimate(indexes), total)
+        valid = total - invalid
+        valid_rate = (valid / total * 100) if total > 0 else 0.0
         
         return {
             'entity_id': entity_id,
             'total_events': total,
-            'valid_events': entity_data['valid'],
-            'invalid_events': entity_data['invalid'],
-            'warnings': entity_data['warnings'],
-            'valid_rate': round(valid_rate, 2)
+            'valid_events': valid,
+            'invalid_events': invalid,
+            'warnings': self._entity_warnings.estimate(indexes),
+            'valid_rate': round(valid_rate, 2),
+            'estimated': True
         }
     
     @property
@@ -315,13 +589,19 @@ class QualityMetricsCollector:
         self.total_events = 0
         self.valid_events = 0
         self.invalid_events = 0
-        self.error_types.clear()
-        self.warning_types.clear()
-        self.events_by_domain.clear()
-        self.invalid_by_domain.clear()
+        self.events_with_warnings = 0
+        self._error_counts = [0] * len(ERROR_CODES)
+        self._warning_counts = [0] * len(WARNING_CODES)
+        self._domain_total = [0] * len(self._domains)
+        self._domain_invalid = [0] * len(self._domains)
         self.total_validation_time_ms = 0.0
         self.min_validation_time_ms = float('inf')
         self.max_validation_time_ms = 0.0
+        self._entity_total.clear()
+        self._entity_invalid.clear()
+        self._entity_warnings.clear()
+        self._top_invalid.clear()
+        self._last_flush_events = 0
 
 
 # Global quality metrics collector
@@ -0,0 +1,322 @@
+"""
+Attribute Schema Registry for InfluxDB Field Types
+
+InfluxDB fixes the type of a field the first time it is written; any later
+write with another type fails the whole point. The registry records the type
+of every attribute field once and compiles, per (domain, device_class), a
+lookup table from attribute key to converter, so normalizing an attribute
+dict is a single pass of dict lookups.
+
+Field types come from (in order of precedence):
+- Types learned from InfluxDB "field type conflict" errors (the type the
+  database already holds)
+- Types recorded when a field was first written
+- Static rules for attributes Home Assistant sends as strings (booleans and
+  numbers); everything else is written as a string
+
+Learned types are persisted so a restart keeps them.
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# InfluxDB field types
+BOOLEAN = "boolean"
+FLOAT = "float"
+INTEGER = "integer"
+STRING = "string"
+
+# Known boolean attribute fields that may arrive as strings from Home Assistant
+BOOLEAN_ATTRIBUTES = frozenset({
+    'dynamic_eq', 'aux_heat', 'away_mode', 'is_volume_muted',
+    'shuffle', 'repeat', 'is_locked', 'motion_detected',
+    'tamper_detected', 'battery_low', 'door_open', 'window_open',
+    'occupancy', 'presence', 'charging', 'auto', 'eco_mode'
+})
+
+# Known numeric attribute fields that may arrive as strings from Home Assistant
+NUMERIC_ATTRIBUTES = frozenset({
+    'azimuth', 'elevation', 'brightness', 'temperature', 'humidity',
+    'pressure', 'battery', 'battery_level', 'power', 'energy',
+    'voltage', 'current', 'frequency', 'speed', 'distance',
+    'wind_speed', 'wind_bearing', 'visibility', 'precipitation',
+    'uv_index', 'pm25', 'pm10', 'co2', 'voc', 'latitude', 'longitude',
+    'volume_level', 'media_position', 'media_duration', 'supported_features',
+    'hvac_modes', 'swing_modes', 'fan_modes', 'preset_modes', 'options',
+    'min_temp', 'max_temp', 'min_humidity', 'max_humidity', 'step'
+})
+
+TRUE_STRINGS = frozenset({'true', '1', 'on', 'yes', 'enabled'})
+FALSE_STRINGS = frozenset({'false', '0', 'off', 'no', 'disabled'})
+
+# Prefix the InfluxDB writer puts in front of attribute keys
+FIELD_PREFIX = "attr_"
+
+_CONFLICT_PATTERN = re.compile(
+    r'input field \\?"(?P<field>[^"\\]+)\\?" on measurement \\?"(?P<measurement>[^"\\]+)\\?" '
+    r'is type (?P<input>\w+), already exists as type (?P<existing>\w+)'
+)
+
+# Returned by a converter when the value cannot be written with the field's type
+REJECT = object()
+
+
+def _to_boolean(value: Any) -> Any:
+    """Convert a value for a boolean field"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        value_lower = value.lower().strip()
+        if value_lower in TRUE_STRINGS:
+            return True
+        if value_lower in FALSE_STRINGS:
+            return False
+        return REJECT
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return REJECT
+
+
+def _to_float(value: Any) -> Any:
+    """Convert a value for a float field"""
+    if isinstance(value, bool):
+        return float(1 if value else 0)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        if value.strip() == '':
+            return REJECT
+        try:
+            return float(value)
+        except ValueError:
+            return REJECT
+    return REJECT
+
+
+def _to_integer(value: Any) -> Any:
+    """Convert a value for an integer field (only whole numbers)"""
+    converted = _to_float(value)
+    if converted is REJECT or not converted.is_integer():
+        return REJECT
+    return int(converted)
+
+
+def _to_string(value: Any) -> Any:
+    """Convert a value for a string field (lists and dicts are kept as-is)"""
+    if isinstance(value, (bool, int, float)):
+        return str(value)
+    return value
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    BOOLEAN: _to_boolean,
+    FLOAT: _to_float,
+    INTEGER: _to_integer,
+    STRING: _to_string,
+}
+
+
+def static_field_type(key: str) -> str:
+    """Field type from the static attribute rules"""
+    attr_name = key.replace(FIELD_PREFIX, '')
+    if attr_name in BOOLEAN_ATTRIBUTES:
+        return BOOLEAN
+    if attr_name in NUMERIC_ATTRIBUTES:
+        return FLOAT
+    return STRING
+
+
+class SchemaRegistry:
+    """Learned InfluxDB field types and compiled per-(domain, device_class) attribute schemas"""
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize schema registry
+
+        Args:
+            path: Optional JSON file to persist learned field types
+        """
+        self.path = Path(path) if path else None
+
+        # InfluxDB field name -> type, as recorded or learned from the database
+        self._field_types: Dict[str, str] = {}
+        # (domain, device_class) -> attribute key -> (field type, converter)
+        self._schemas: Dict[Tuple[str, Optional[str]], Dict[str, Tuple[str, Callable]]] = {}
+        self._dirty = False
+
+        self.conflicts_learned = 0
+        self.rejected_fields = 0
+        self.converted_fields = 0
+        self.removed_fields = 0
+
+    # ------------------------------------------------------------------
+    # Normalization
+    # ------------------------------------------------------------------
+
+    def normalize_attributes(self, attributes: Dict[str, Any], domain: str = '',
+                             device_class: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Coerce attribute values to their field types in one pass
+
+        None values are removed, and so are values that cannot be written with
+        the field's type (instead of failing the InfluxDB write).
+
+        Args:
+            attributes: Entity attributes
+            domain: Entity domain
+            device_class: Entity device class
+
+        Returns:
+            New attributes dict with normalized values
+        """
+        schema = self._schemas.get((domain, device_class))
+        if schema is None:
+            schema = self._schemas[(domain, device_class)] = {}
+
+        normalized = {}
+        for key, value in attributes.items():
+            if value is None:
+                self.removed_fields += 1
+                continue
+
+            compiled = schema.get(key)
+            if compiled is None:
+                compiled = schema[key] = self._compile_field(key, value)
+            field_type, converter = compiled
+
+            converted = converter(value)
+            if converted is REJECT:
+                if not (isinstance(value, str) and value.strip() == ''):
+                    logger.warning(f"Removing {field_type} field {key} with incompatible value: {value!r}")
+                self.rejected_fields += 1
+                continue
+            if converted is not value and type(converted) is not type(value):
+                self.converted_fields += 1
+            normalized[key] = converted
+
+        return normalized
+
+    def _compile_field(self, key: str, value: Any) -> Tuple[str, Callable]:
+        """Resolve (and record on first sight) the field type of an attribute key"""
+        field_name = FIELD_PREFIX + key
+        field_type = self._field_types.get(field_name)
+        if field_type is None:
+            field_type = static_field_type(key)
+            # Only primitives are written as fields
+            if field_type != STRING or isinstance(value, (str, bool, int, float)):
+                self._field_types[field_name] = field_type
+                self._dirty = True
+        return field_type, CONVERTERS.get(field_type, _to_string)
+
+    def field_type(self, key: str) -> str:
+        """Field type an attribute key is written with"""
+        return self._field_types.get(FIELD_PREFIX + key) or static_field_type(key)
+
+    # ------------------------------------------------------------------
+    # Learning from InfluxDB
+    # ------------------------------------------------------------------
+
+    def record_write_error(self, error_message: str) -> bool:
+        """
+        Learn field types from an InfluxDB field type conflict error
+
+        Args:
+            error_message: Error text from a failed write
+
+        Returns:
+            True if a new field type was learned
+        """
+        learned = False
+        for match in _CONFLICT_PATTERN.finditer(error_message):
+            field_name = match.group('field')
+            existing = match.group('existing')
+            if existing not in CONVERTERS or self._field_types.get(field_name) == existing:
+                continue
+            logger.warning(f"Learned InfluxDB field type {field_name}={existing} from write conflict")
+            self._field_types[field_name] = existing
+            self.conflicts_learned += 1
+            self._dirty = True
+            learned = True
+
+        if learned:
+            # Recompile schemas with the learned types and keep them across restarts
+            self._schemas.clear()
+            self.save()
+        return learned
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Load persisted field types
+
+        Returns:
+            True if loaded
+        """
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get('version') != self.VERSION:
+                return False
+            field_types = {name: field_type for name, field_type in data['field_types'].items()
+                           if field_type in CONVERTERS}
+        except Exception as e:
+            logger.warning(f"Failed to load schema registry from {self.path}: {e}")
+            return False
+
+        self._field_types.update(field_types)
+        self._schemas.clear()
+        self._dirty = False
+        logger.info(f"Loaded {len(field_types)} field types from {self.path}")
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Persist field types if any were recorded since the last save/load
+
+        Args:
+            force: Save even if nothing changed
+
+        Returns:
+            True if written
+        """
+        if not self.path or not (self._dirty or force):
+            return False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            tmp.write_text(json.dumps({'version': self.VERSION, 'field_types': self._field_types}, sort_keys=True))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save schema registry to {self.path}: {e}")
+            return False
+        self._dirty = False
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get registry statistics
+
+        Returns:
+            Dictionary with field/schema counts and conversion counters
+        """
+        return {
+            'field_types': len(self._field_types),
+            'compiled_schemas': len(self._schemas),
+            'conflicts_learned': self.conflicts_learned,
+            'converted_fields': self.converted_fields,
+            'rejected_fields': self.rejected_fields,
+            'removed_fields': self.removed_fields,
+            'persisted': self.path is not None
+        }
@@ -0,0 +1,129 @@
+"""
+Tests for batch normalization and line protocol batch writes
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from influxdb_wrapper import InfluxDBClientWrapper
+from data_normalizer import DataNormalizer
+from schema_registry import SchemaRegistry
+
+
+def create_event(entity_id: str, state: str = 'on', **attributes) -> dict:
+    """Helper to create a normalized state_changed event"""
+    return {
+        'event_type': 'state_changed',
+        'timestamp': '2025-01-01T18:30:00.123456+00:00',
+        'entity_metadata': {'domain': entity_id.split('.')[0], 'friendly_name': 'Living Room, Lamp'},
+        'area_id': 'living room',
+        'context_id': 'ctx-1',
+        'new_state': {'entity_id': entity_id, 'state': state, 'attributes': attributes},
+        'old_state': {'state': 'off'}
+    }
+
+
+class TestLineProtocol:
+    """Test cases for direct line protocol building"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.client = InfluxDBClientWrapper(
+            url="http://test-influxdb:8086",
+            token="test-token",
+            org="test-org",
+            bucket="test-bucket"
+        )
+
+    def test_line_matches_point(self):
+        """Test the line equals the serialized Point for the same event"""
+        event = create_event(
+            'light.living_room', brightness=128.0, supported_features=44, is_on=True,
+            effect='say "hi"\\now', effect_list=['rainbow'], icon=None
+        )
+        event['duration_in_state'] = 12
+        event['device_metadata'] = {'manufacturer': 'Acme', 'model': 'L 1'}
+
+        line = self.client._create_line_from_event(event)
+
+        assert line == self.client._create_point_from_event(event).to_line_protocol()
+        assert line.startswith(
+            'home_assistant_events,area_id=living\\ room,domain=light,entity_id=light.living_room,'
+            'event_type=state_changed,time_of_day=evening '
+        )
+        assert line.endswith(' 1735756200123456000')
+
+    def test_event_without_type_is_skipped(self):
+        """Test events without event_type produce no line"""
+        assert self.client._create_line_from_event({'new_state': {'state': 'on'}}) is None
+
+    @pytest.mark.asyncio
+    async def test_write_batch_single_request(self):
+        """Test a batch is sent as one write with per-event results"""
+        self.client.client = Mock()
+        self.client.write_api = Mock()
+        events = [create_event('light.a'), {'new_state': {}}, create_event('light.b', 'off')]
+
+        results = await self.client.write_batch(events)
+
+        assert results == [True, False, True]
+        self.client.write_api.write.assert_called_once()
+        record = self.client.write_api.write.call_args.kwargs['record']
+        assert len(record.split('\n')) == 2
+        assert self.client.points_written == 2
+        assert self.client.get_statistics()['batches_written'] == 1
+
+    @pytest.mark.asyncio
+    async def test_write_batch_failure(self):
+        """Test a failed write marks every event failed and learns field type conflicts"""
+        registry = SchemaRegistry()
+        self.client.schema_registry = registry
+        self.client.client = Mock()
+        self.client.write_api = Mock()
+        self.client.write_api.write.side_effect = Exception(
+            'partial write: field type conflict: input field "attr_brightness" on measurement '
+            '"home_assistant_events" is type float, already exists as type string dropped=1'
+        )
+
+        results = await self.client.write_batch([create_event('light.a', brightness=1.0)])
+
+        assert results == [False]
+        assert self.client.write_errors == 1
+        assert registry.field_type('brightness') == 'string'
+        assert await self.client.write_events_batch([create_event('light.a')]) == 0
+
+
+class TestNormalizeBatch:
+    """Test cases for DataNormalizer.normalize_batch"""
+
+    def test_results_in_input_order(self):
+        """Test each event gets its own result, including invalid entries"""
+        normalizer = DataNormalizer()
+        events = [
+            {
+                'event_type': 'state_changed',
+                'entity_id': 'light.kitchen',
+                'new_state': {
+                    'entity_id': 'light.kitchen',
+                    'state': 'on',
+                    'last_changed': '2025-01-01T00:00:00+00:00',
+                    'last_updated': '2025-01-01T00:00:00+00:00',
+                    'attributes': {'brightness': '255'}
+                }
+            },
+            'not-an-event'
+        ]
+
+        results = normalizer.normalize_batch(events)
+
+        assert len(results) == 2
+        normalized, validation = results[0]
+        assert validation.is_valid
+        assert normalized['new_state']['attributes'] == {'brightness': 255.0}
+        assert results[1][0] is None
+        assert not results[1][1].is_valid
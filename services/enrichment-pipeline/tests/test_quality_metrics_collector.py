@@ -0,0 +1,133 @@
+"""
+Tests for the hot-path quality metrics collector
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from quality_metrics import QualityMetricsCollector, CountMinSketch, TopK, MAX_DOMAINS
+from data_validator import ValidationResult
+
+
+def create_result(is_valid: bool = True, errors=(), warnings=(), domain: str = 'sensor') -> ValidationResult:
+    """Helper to create a validation result"""
+    result = ValidationResult(is_valid=True, domain=domain, validation_time_ms=0.5)
+    for error in errors:
+        result.add_error(error)
+    for warning in warnings:
+        result.add_warning(warning)
+    if not is_valid and not errors:
+        result.is_valid = False
+    return result
+
+
+class TestSketches:
+    """Test cases for CountMinSketch and TopK"""
+
+    def test_count_min_never_undercounts(self):
+        """Test estimates are at least the true counts in a small sketch"""
+        sketch = CountMinSketch(width=64, depth=4)
+        counts = {f'sensor.s{i}': i % 7 + 1 for i in range(500)}
+        for key, count in counts.items():
+            sketch.add(sketch.indexes(key), count)
+
+        assert sketch.memory_counters == 256
+        assert all(sketch.estimate(sketch.indexes(key)) >= count for key, count in counts.items())
+
+    def test_top_k_keeps_heaviest(self):
+        """Test the top-k keeps the keys with the largest counts"""
+        top = TopK(k=2)
+        for key, count in [('a', 1), ('b', 5), ('c', 3), ('a', 2), ('d', 4)]:
+            top.offer(key, count)
+
+        assert top.items() == [('b', 5), ('d', 4)]
+
+
+class TestQualityMetricsCollector:
+    """Test cases for QualityMetricsCollector"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.collector = QualityMetricsCollector(flush_interval=0)
+
+    def test_counters_by_interned_code(self):
+        """Test errors and warnings are counted by classified type"""
+        self.collector.record_validation_result(create_result())
+        self.collector.record_validation_result(
+            create_result(errors=['Invalid entity_id format: Bad-ID', 'Missing entity_id'],
+                          warnings=['Unknown domain: foo'], domain='foo'))
+        self.collector.record_validation_result(
+            create_result(errors=['Invalid entity_id format: other'], domain='foo'))
+
+        metrics = self.collector.get_metrics()
+
+        assert metrics['totals'] == {
+            'total_events': 3, 'valid_events': 1, 'invalid_events': 2, 'events_with_warnings': 1
+        }
+        assert metrics['error_types'] == {'invalid_format': 2, 'missing_field': 1}
+        assert metrics['warning_types'] == {'unknown_domain': 1}
+        assert metrics['by_domain'] == {'total': {'sensor': 1, 'foo': 2}, 'invalid': {'foo': 2}}
+        # Messages differing only in their value share one interned template
+        assert metrics['collector']['interned_messages'] == 3
+
+    def test_entity_quality_and_top_invalid(self):
+        """Test per-entity statistics come from the sketch and top-k"""
+        for i in range(10):
+            event = {'entity_id': 'sensor.flaky'}
+            self.collector.record_validation_result(create_result(is_valid=i % 2 == 0), event)
+        self.collector.record_validation_result(
+            create_result(is_valid=False), {'new_state': {'entity_id': 'sensor.broken'}})
+
+        quality = self.collector.get_entity_quality('sensor.flaky')
+
+        assert quality['total_events'] == 10
+        assert quality['invalid_events'] == 5
+        assert quality['valid_rate'] == 50.0
+        assert self.collector.get_metrics()['top_invalid_entities'] == [
+            {'entity_id': 'sensor.flaky', 'invalid_events': 5},
+            {'entity_id': 'sensor.broken', 'invalid_events': 1}
+        ]
+
+    def test_domains_are_bounded(self):
+        """Test domains beyond MAX_DOMAINS share one 'other' slot"""
+        for i in range(MAX_DOMAINS + 10):
+            self.collector.record_validation_result(create_result(domain=f'domain_{i}'))
+
+        by_domain = self.collector.get_metrics()['by_domain']['total']
+
+        assert len(by_domain) == MAX_DOMAINS + 1
+        assert by_domain['other'] == 10
+
+    def test_reset_metrics(self):
+        """Test reset clears counters and sketches"""
+        self.collector.record_validation_result(create_result(is_valid=False), {'entity_id': 'sensor.a'})
+        self.collector.reset_metrics()
+
+        assert self.collector.get_metrics()['totals']['total_events'] == 0
+        assert self.collector.get_entity_quality('sensor.a')['total_events'] == 0
+        assert self.collector.get_metrics()['top_invalid_entities'] == []
+
+    @pytest.mark.asyncio
+    async def test_write_to_influxdb_single_request(self):
+        """Test a flush writes all aggregates in one request"""
+        influxdb_client = Mock()
+        write_api = influxdb_client.write_api.return_value
+        collector = QualityMetricsCollector(influxdb_client, bucket='test-bucket', flush_interval=0)
+        collector.record_validation_result(
+            create_result(errors=['Missing entity_id'], warnings=['Unknown domain: foo']), {'entity_id': 'sensor.a'})
+
+        await collector.write_to_influxdb()
+        await collector.write_to_influxdb()
+
+        assert write_api.write.call_count == 2
+        influxdb_client.write_api.assert_called_once()
+        kwargs = write_api.write.call_args.kwargs
+        assert kwargs['bucket'] == 'test-bucket'
+        metric_types = {point._tags.get('metric_type') for point in kwargs['record']}
+        assert metric_types == {None, 'rates', 'error_types', 'warning_types', 'domain', 'top_invalid_entity'}
+        assert collector.get_metrics()['collector']['flushes'] == 2
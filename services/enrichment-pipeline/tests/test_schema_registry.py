@@ -0,0 +1,112 @@
+"""
+Tests for the attribute schema registry
+"""
+
+import pytest
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from schema_registry import SchemaRegistry, BOOLEAN, FLOAT, STRING
+from data_normalizer import DataNormalizer
+
+
+CONFLICT_ERROR = (
+    '(422) Reason: Unprocessable Entity HTTP response body: {"code":"unprocessable entity",'
+    '"message":"failure writing points to database: partial write: field type conflict: '
+    'input field \\"attr_brightness\\" on measurement \\"home_assistant_events\\" is type float, '
+    'already exists as type string dropped=1"}'
+)
+
+
+class TestSchemaRegistry:
+    """Test cases for SchemaRegistry"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.registry = SchemaRegistry()
+
+    def test_normalize_attributes_by_field_type(self):
+        """Test boolean, numeric and string fields are coerced in one pass"""
+        attributes = {
+            'brightness': '128',
+            'is_volume_muted': 'off',
+            'friendly_name': 'Kitchen',
+            'supported_features': 44,
+            'effect_list': ['rainbow'],
+            'node_id': 7,
+            'icon': None
+        }
+
+        normalized = self.registry.normalize_attributes(attributes, 'light')
+
+        assert normalized == {
+            'brightness': 128.0,
+            'is_volume_muted': False,
+            'friendly_name': 'Kitchen',
+            'supported_features': 44.0,
+            'effect_list': ['rainbow'],
+            'node_id': '7'
+        }
+        assert attributes['brightness'] == '128'  # input is not modified
+        assert self.registry.field_type('brightness') == FLOAT
+        assert self.registry.field_type('is_volume_muted') == BOOLEAN
+        assert self.registry.field_type('node_id') == STRING
+
+    def test_incompatible_values_rejected(self):
+        """Test values that cannot take the field type are dropped before the write"""
+        normalized = self.registry.normalize_attributes({'brightness': 'max', 'battery_low': 'maybe', 'occupancy': ''})
+
+        assert normalized == {}
+        assert self.registry.get_statistics()['rejected_fields'] == 3
+
+    def test_learns_type_from_write_conflict(self):
+        """Test a field type conflict error overrides the static rule"""
+        assert self.registry.normalize_attributes({'brightness': 200}, 'light') == {'brightness': 200.0}
+
+        assert self.registry.record_write_error(CONFLICT_ERROR)
+        assert not self.registry.record_write_error(CONFLICT_ERROR)  # already known
+
+        assert self.registry.normalize_attributes({'brightness': 200}, 'light') == {'brightness': '200'}
+        assert self.registry.get_statistics()['conflicts_learned'] == 1
+
+    def test_learned_types_persist(self, tmp_path):
+        """Test learned field types survive a restart"""
+        path = str(tmp_path / 'schema_registry.json')
+        registry = SchemaRegistry(path)
+        registry.normalize_attributes({'temperature': '21.5'}, 'climate')
+        registry.record_write_error(CONFLICT_ERROR)
+        assert not registry.save()  # saved when the conflict was learned
+
+        restored = SchemaRegistry(path)
+        assert restored.load()
+        assert restored.field_type('brightness') == STRING
+        assert restored.field_type('temperature') == FLOAT
+
+
+class TestNormalizerSchema:
+    """Test DataNormalizer integration"""
+
+    def test_normalize_and_validate(self):
+        """Test one call returns the normalized event and its validation result"""
+        registry = SchemaRegistry()
+        normalizer = DataNormalizer(schema_registry=registry)
+        event = {
+            'event_type': 'state_changed',
+            'entity_id': 'light.kitchen',
+            'new_state': {
+                'entity_id': 'light.kitchen',
+                'state': 'on',
+                'last_changed': '2025-01-01T00:00:00+00:00',
+                'last_updated': '2025-01-01T00:00:00+00:00',
+                'attributes': {'brightness': '255', 'unit_of_measurement': '°C', 'icon': None}
+            }
+        }
+
+        normalized, validation = normalizer.normalize_and_validate(event)
+
+        assert validation.is_valid
+        assert normalized['new_state']['attributes'] == {'brightness': 255.0, 'unit_of_measurement': 'celsius'}
+        assert normalizer.get_normalization_statistics()['schema_registry']['compiled_schemas'] == 1
@@ -3,54 +3,80 @@ Anomaly Detection Manager
 Provides Isolation Forest for anomaly detection
 """
 
+import asyncio
 import logging
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+from .execution_engine import ExecutionEngine, fingerprint
+
 logger = logging.getLogger(__name__)
 
+
+def fit_isolation_forest(X: np.ndarray, contamination: float) -> Tuple[StandardScaler, IsolationForest]:
+    """Fit scaler and Isolation Forest on a baseline (runs in a worker)"""
+    scaler = StandardScaler().fit(X)
+    isolation_forest = IsolationForest(
+        contamination=contamination,
+        random_state=42,
+        n_estimators=100
+    )
+    isolation_forest.fit(scaler.transform(X))
+    return scaler, isolation_forest
+
+
+def score_isolation_forest(X: np.ndarray, model: Tuple[StandardScaler, IsolationForest]) -> Tuple[List[int], List[float]]:
+    """Label and score data points with a fitted model"""
+    scaler, isolation_forest = model
+    X_scaled = scaler.transform(X)
+    return isolation_forest.predict(X_scaled).tolist(), isolation_forest.decision_function(X_scaled).tolist()
+
+
 class AnomalyDetectionManager:
     """
     Manages anomaly detection algorithms for pattern detection
     """
     
-    def __init__(self):
-        self.scaler = StandardScaler()
+    def __init__(self, engine: Optional[ExecutionEngine] = None):
+        self.engine = engine or ExecutionEngine()
         logger.info("AnomalyDetectionManager initialized")
     
-    async def detect_anomalies(self, data: List[List[float]], contamination: float = 0.1) -> Tuple[List[int], List[float]]:
+    async def detect_anomalies(
+        self,
+        data,
+        contamination: float = 0.1,
+        baseline=None
+    ) -> Tuple[List[int], List[float]]:
         """
         Detect anomalies using Isolation Forest
         
+        The model is fitted on the baseline (default: the data itself) and
+        cached by baseline fingerprint, so repeated scoring against the same
+        baseline skips refitting.
+        
         Args:
-            data: List of data points to analyze
+            data: Data points to analyze (list of lists or 2D array)
             contamination: Expected proportion of outliers (0.0 to 0.5)
+            baseline: Optional reference data to fit the model on
         
         Returns:
             Tuple of (labels, scores) where labels: 1=normal, -1=anomaly
         """
-        if not data:
+        if data is None or len(data) == 0:
             return [], []
         
         # Convert to numpy array
-        X = np.array(data)
+        X = np.asarray(data, dtype=np.float64)
+        X_fit = X if baseline is None or len(baseline) == 0 else np.asarray(baseline, dtype=np.float64)
         
-        # Standardize features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Perform anomaly detection
-        isolation_forest = IsolationForest(
-            contamination=contamination,
-            random_state=42,
-            n_estimators=100
+        model = await self.engine.cached(
+            fingerprint(X_fit, 'isolation_forest', contamination), fit_isolation_forest, X_fit, contamination
         )
-        
-        labels = isolation_forest.fit_predict(X_scaled)
-        scores = isolation_forest.decision_function(X_scaled)
+        labels, scores = await asyncio.to_thread(score_isolation_forest, X, model)
         
         n_anomalies = sum(1 for label in labels if label == -1)
-        logger.info(f"Anomaly detection completed: {n_anomalies} anomalies found in {len(data)} points")
+        logger.info(f"Anomaly detection completed: {n_anomalies} anomalies found in {len(X)} points")
         
-        return labels.tolist(), scores.tolist()
+        return labels, scores
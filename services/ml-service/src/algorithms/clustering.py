@@ -9,84 +9,97 @@ from typing import List, Tuple, Optional
 from sklearn.cluster import KMeans, DBSCAN
 from sklearn.preprocessing import StandardScaler
 
+from .execution_engine import ExecutionEngine, fingerprint
+
 logger = logging.getLogger(__name__)
 
+
+def fit_kmeans(X: np.ndarray, n_clusters: int) -> List[int]:
+    """Standardize and cluster with KMeans (runs in a worker)"""
+    X_scaled = StandardScaler().fit_transform(X)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+    return kmeans.fit_predict(X_scaled).tolist()
+
+
+def fit_dbscan(X: np.ndarray, eps: Optional[float]) -> Tuple[List[int], float]:
+    """Standardize and cluster with DBSCAN (runs in a worker); returns labels and eps used"""
+    X_scaled = StandardScaler().fit_transform(X)
+    
+    # Auto-detect epsilon if not specified
+    if eps is None:
+        # Use a simple heuristic: 0.5 * mean distance to nearest neighbor
+        from sklearn.neighbors import NearestNeighbors
+        nbrs = NearestNeighbors(n_neighbors=2).fit(X_scaled)
+        distances, _ = nbrs.kneighbors(X_scaled)
+        eps = 0.5 * np.mean(distances[:, 1])
+    
+    dbscan = DBSCAN(eps=eps, min_samples=2)
+    return dbscan.fit_predict(X_scaled).tolist(), float(eps)
+
+
 class ClusteringManager:
     """
     Manages clustering algorithms for pattern detection
     """
     
-    def __init__(self):
-        self.scaler = StandardScaler()
+    def __init__(self, engine: Optional[ExecutionEngine] = None):
+        self.engine = engine or ExecutionEngine()
         logger.info("ClusteringManager initialized")
     
-    async def kmeans_cluster(self, data: List[List[float]], n_clusters: Optional[int] = None) -> Tuple[List[int], int]:
+    async def kmeans_cluster(self, data, n_clusters: Optional[int] = None) -> Tuple[List[int], int]:
         """
         Perform KMeans clustering
         
         Args:
-            data: List of data points to cluster
+            data: Data points to cluster (list of lists or 2D array)
             n_clusters: Number of clusters (auto-detect if None)
         
         Returns:
             Tuple of (labels, n_clusters_found)
         """
-        if not data:
+        if data is None or len(data) == 0:
             return [], 0
         
         # Convert to numpy array
-        X = np.array(data)
-        
-        # Standardize features
-        X_scaled = self.scaler.fit_transform(X)
+        X = np.asarray(data, dtype=np.float64)
         
         # Auto-detect number of clusters if not specified
         if n_clusters is None:
-            n_clusters = min(8, max(2, len(data) // 10))
+            n_clusters = min(8, max(2, len(X) // 10))
         
-        # Perform KMeans clustering
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X_scaled)
+        # Same data and parameters: reuse the previous result
+        labels = await self.engine.cached(
+            fingerprint(X, 'kmeans', n_clusters), fit_kmeans, X, n_clusters
+        )
         
-        logger.info(f"KMeans clustering completed: {n_clusters} clusters, {len(data)} points")
+        logger.info(f"KMeans clustering completed: {n_clusters} clusters, {len(X)} points")
         
-        return labels.tolist(), n_clusters
+        return list(labels), n_clusters
     
-    async def dbscan_cluster(self, data: List[List[float]], eps: Optional[float] = None) -> Tuple[List[int], int]:
+    async def dbscan_cluster(self, data, eps: Optional[float] = None) -> Tuple[List[int], int]:
         """
         Perform DBSCAN clustering
         
         Args:
-            data: List of data points to cluster
+            data: Data points to cluster (list of lists or 2D array)
             eps: Epsilon parameter (auto-detect if None)
         
         Returns:
             Tuple of (labels, n_clusters_found)
         """
-        if not data:
+        if data is None or len(data) == 0:
             return [], 0
         
         # Convert to numpy array
-        X = np.array(data)
-        
-        # Standardize features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Auto-detect epsilon if not specified
-        if eps is None:
-            # Use a simple heuristic: 0.5 * mean distance to nearest neighbor
-            from sklearn.neighbors import NearestNeighbors
-            nbrs = NearestNeighbors(n_neighbors=2).fit(X_scaled)
-            distances, _ = nbrs.kneighbors(X_scaled)
-            eps = 0.5 * np.mean(distances[:, 1])
+        X = np.asarray(data, dtype=np.float64)
         
-        # Perform DBSCAN clustering
-        dbscan = DBSCAN(eps=eps, min_samples=2)
-        labels = dbscan.fit_predict(X_scaled)
+        labels, eps = await self.engine.cached(
+            fingerprint(X, 'dbscan', eps), fit_dbscan, X, eps
+        )
         
         # Count clusters (excluding noise points labeled as -1)
         n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
         
-        logger.info(f"DBSCAN clustering completed: {n_clusters} clusters, {len(data)} points, eps={eps:.3f}")
+        logger.info(f"DBSCAN clustering completed: {n_clusters} clusters, {len(X)} points, eps={eps:.3f}")
         
-        return labels.tolist(), n_clusters
+        return list(labels), n_clusters
@@ -0,0 +1,203 @@
+"""
+Execution Engine
+Runs scikit-learn fits off the event loop and caches fitted models
+
+- Large fits run in a process pool, small ones in a thread (no pickling cost)
+- Fitted models/results are cached by data fingerprint (LRU)
+- Identical fits requested concurrently run once
+- Compact payloads: base64-encoded little-endian float32 matrices
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def decode_matrix(
+    data: Optional[Sequence[Sequence[float]]] = None,
+    data_b64: Optional[str] = None,
+    shape: Optional[Sequence[int]] = None
+) -> np.ndarray:
+    """
+    Build the input matrix from a JSON list or a base64 float32 payload
+
+    Args:
+        data: Nested list of data points
+        data_b64: Base64 of a little-endian float32 buffer (row-major)
+        shape: [rows, columns] of the base64 buffer
+
+    Returns:
+        (rows, columns) float64 array
+    """
+    if data_b64 is not None:
+        raw = np.frombuffer(base64.b64decode(data_b64), dtype='<f4')
+        if shape is None or len(shape) != 2:
+            raise ValueError("shape [rows, columns] is required with data_b64")
+        rows, columns = int(shape[0]), int(shape[1])
+        if raw.size != rows * columns:
+            raise ValueError(f"data_b64 holds {raw.size} values, shape {rows}x{columns} needs {rows * columns}")
+        return raw.reshape(rows, columns).astype(np.float64)
+
+    X = np.array(data if data is not None else [], dtype=np.float64)
+    if X.size == 0:
+        return np.empty((0, 0), dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(len(X), 1)
+    return X
+
+
+def encode_matrix(X: np.ndarray) -> Tuple[str, List[int]]:
+    """Encode a matrix as (base64 float32, shape) - the inverse of decode_matrix"""
+    X = np.ascontiguousarray(X, dtype='<f4')
+    return base64.b64encode(X.tobytes()).decode('ascii'), list(X.shape)
+
+
+def fingerprint(X: np.ndarray, *params: Hashable) -> str:
+    """Content hash of a matrix plus the fit parameters"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((X.shape, X.dtype.str, params)).encode())
+    digest.update(np.ascontiguousarray(X).tobytes())
+    return digest.hexdigest()
+
+
+class ExecutionEngine:
+    """
+    Shared executor and fitted-model cache for the ML managers
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        inline_max_values: int = 20000,
+        model_cache_size: int = 32,
+        use_processes: bool = True
+    ):
+        """
+        Args:
+            max_workers: Process pool size (default: CPU count, at most 4)
+            inline_max_values: Inputs up to this many values run in a thread instead of a process
+            model_cache_size: Fitted models/results kept (LRU)
+            use_processes: Use a process pool for large fits
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.inline_max_values = inline_max_values
+        self.model_cache_size = model_cache_size
+        self.use_processes = use_processes
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            'process_runs': 0,
+            'thread_runs': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'shared_fits': 0,
+            'fit_seconds': 0.0
+        }
+        logger.info(f"ExecutionEngine initialized: {self.max_workers} workers, cache {model_cache_size} models")
+
+    async def run(self, fn: Callable, X: np.ndarray, *args) -> Any:
+        """
+        Run fn(X, *args) off the event loop
+
+        fn must be a module-level function (picklable) for the process pool.
+        """
+        started = time.perf_counter()
+        try:
+            if self.use_processes and X.size > self.inline_max_values:
+                self._stats['process_runs'] += 1
+                loop = asyncio.get_running_loop()
+                try:
+                    return await loop.run_in_executor(self._get_pool(), partial(fn, X, *args))
+                except BrokenProcessPool:
+                    # A worker died (e.g. out of memory): start a fresh pool next time
+                    logger.error("Process pool broken, restarting on next run")
+                    self._pool = None
+                    raise
+            self._stats['thread_runs'] += 1
+            return await asyncio.to_thread(fn, X, *args)
+        finally:
+            self._stats['fit_seconds'] += time.perf_counter() - started
+
+    async def cached(self, key: str, fn: Callable, X: np.ndarray, *args) -> Any:
+        """
+        Return the cached result for key, or run fn(X, *args) once and cache it
+
+        Concurrent calls with the same key share one run.
+        """
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._stats['cache_hits'] += 1
+            return self._cache[key]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats['shared_fits'] += 1
+            return await asyncio.shield(inflight)
+
+        self._stats['cache_misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self.run(fn, X, *args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so failures nobody else waited for do not log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(result)
+        self._cache[key] = result
+        while len(self._cache) > self.model_cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Execution and cache statistics"""
+        return {
+            **self._stats,
+            'max_workers': self.max_workers,
+            'pool_started': self._pool is not None,
+            'cached_models': len(self._cache),
+            'model_cache_size': self.model_cache_size
+        }
+
+    def clear_cache(self):
+        """Drop all cached models"""
+        self._cache.clear()
+
+    def shutdown(self):
+        """Stop the process pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        logger.info("ExecutionEngine shut down")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the process pool on first use"""
+        if self._pool is None:
+            # spawn: workers never inherit the server's threads or sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
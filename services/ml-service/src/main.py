@@ -9,7 +9,9 @@ Provides classical ML algorithms for:
 - Batch processing capabilities
 """
 
+import asyncio
 import logging
+import os
 import time
 from typing import List, Dict, Any, Optional
 
@@ -19,12 +21,14 @@ from pydantic import BaseModel, Field
 
 from .algorithms.clustering import ClusteringManager
 from .algorithms.anomaly_detection import AnomalyDetectionManager
+from .algorithms.execution_engine import ExecutionEngine, decode_matrix
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global managers
+execution_engine: ExecutionEngine = None
 clustering_manager: ClusteringManager = None
 anomaly_manager: AnomalyDetectionManager = None
 
@@ -46,7 +50,9 @@ app.add_middleware(
 
 # Pydantic models
 class ClusteringRequest(BaseModel):
-    data: List[List[float]] = Field(..., description="Data points to cluster")
+    data: Optional[List[List[float]]] = Field(None, description="Data points to cluster")
+    data_b64: Optional[str] = Field(None, description="Data points as base64 little-endian float32 (instead of data)")
+    shape: Optional[List[int]] = Field(None, description="[rows, columns] of data_b64")
     algorithm: str = Field("kmeans", description="Clustering algorithm (kmeans, dbscan)")
     n_clusters: Optional[int] = Field(None, description="Number of clusters (for KMeans)")
     eps: Optional[float] = Field(None, description="Epsilon parameter (for DBSCAN)")
@@ -58,8 +64,13 @@ class ClusteringResponse(BaseModel):
     processing_time: float = Field(..., description="Processing time in seconds")
 
 class AnomalyRequest(BaseModel):
-    data: List[List[float]] = Field(..., description="Data points to analyze")
+    data: Optional[List[List[float]]] = Field(None, description="Data points to analyze")
+    data_b64: Optional[str] = Field(None, description="Data points as base64 little-endian float32 (instead of data)")
+    shape: Optional[List[int]] = Field(None, description="[rows, columns] of data_b64")
     contamination: float = Field(0.1, description="Expected proportion of outliers")
+    baseline: Optional[List[List[float]]] = Field(None, description="Reference data to fit on (default: data)")
+    baseline_b64: Optional[str] = Field(None, description="Reference data as base64 little-endian float32")
+    baseline_shape: Optional[List[int]] = Field(None, description="[rows, columns] of baseline_b64")
 
 class AnomalyResponse(BaseModel):
     labels: List[int] = Field(..., description="Anomaly labels (1=normal, -1=anomaly)")
@@ -78,17 +89,28 @@ class BatchProcessResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize ML managers on startup"""
-    global clustering_manager, anomaly_manager
+    global execution_engine, clustering_manager, anomaly_manager
     
     logger.info("🚀 Starting ML Service...")
     try:
-        clustering_manager = ClusteringManager()
-        anomaly_manager = AnomalyDetectionManager()
+        # One engine: shared process pool and fitted-model cache
+        execution_engine = ExecutionEngine(
+            max_workers=int(os.getenv("ML_MAX_WORKERS", "0")) or None,
+            model_cache_size=int(os.getenv("ML_MODEL_CACHE_SIZE", "32"))
+        )
+        clustering_manager = ClusteringManager(engine=execution_engine)
+        anomaly_manager = AnomalyDetectionManager(engine=execution_engine)
         logger.info("✅ ML Service started successfully")
     except Exception as e:
         logger.error(f"❌ Failed to start ML Service: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker processes"""
+    if execution_engine:
+        execution_engine.shutdown()
+
 # API Endpoints
 @app.get("/health")
 async def health_check():
@@ -112,9 +134,18 @@ async def get_algorithm_status():
         },
         "anomaly_detection": {
             "isolation_forest": "available"
-        }
+        },
+        "execution": execution_engine.get_stats() if execution_engine else None
     }
 
+def _decode_request_matrix(data, data_b64, shape, field: str = "data"):
+    """Decode a request matrix; malformed payloads are rejected with 400"""
+    try:
+        return decode_matrix(data, data_b64, shape)
+    except ValueError as e:
+        # Also covers binascii.Error from malformed base64
+        raise HTTPException(status_code=400, detail=f"Invalid {field}: {e}")
+
 @app.post("/cluster", response_model=ClusteringResponse)
 async def cluster_data(request: ClusteringRequest):
     """Cluster data using specified algorithm"""
@@ -124,14 +155,15 @@ async def cluster_data(request: ClusteringRequest):
     try:
         start_time = time.time()
         
+        data = _decode_request_matrix(request.data, request.data_b64, request.shape)
         if request.algorithm == "kmeans":
             labels, n_clusters = await clustering_manager.kmeans_cluster(
-                data=request.data,
+                data=data,
                 n_clusters=request.n_clusters
             )
         elif request.algorithm == "dbscan":
             labels, n_clusters = await clustering_manager.dbscan_cluster(
-                data=request.data,
+                data=data,
                 eps=request.eps
             )
         else:
@@ -146,6 +178,8 @@ async def cluster_data(request: ClusteringRequest):
             processing_time=processing_time
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error clustering data: {e}")
         raise HTTPException(status_code=500, detail=f"Clustering failed: {e}")
@@ -159,9 +193,14 @@ async def detect_anomalies(request: AnomalyRequest):
     try:
         start_time = time.time()
         
+        baseline = None
+        if request.baseline is not None or request.baseline_b64 is not None:
+            baseline = _decode_request_matrix(request.baseline, request.baseline_b64, request.baseline_shape, "baseline")
+        
         labels, scores = await anomaly_manager.detect_anomalies(
-            data=request.data,
-            contamination=request.contamination
+            data=_decode_request_matrix(request.data, request.data_b64, request.shape),
+            contamination=request.contamination,
+            baseline=baseline
         )
         
         n_anomalies = sum(1 for label in labels if label == -1)
@@ -174,69 +213,80 @@ async def detect_anomalies(request: AnomalyRequest):
             processing_time=processing_time
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error detecting anomalies: {e}")
         raise HTTPException(status_code=500, detail=f"Anomaly detection failed: {e}")
 
+async def _process_operation(operation: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one batch operation"""
+    op_type = operation.get("type")
+    op_data = operation.get("data", {})
+    
+    if op_type == "cluster":
+        if not clustering_manager:
+            raise HTTPException(status_code=503, detail="Clustering service not ready")
+        
+        algorithm = op_data.get("algorithm", "kmeans")
+        data = _decode_request_matrix(op_data.get("data", []), op_data.get("data_b64"), op_data.get("shape"))
+        
+        if algorithm == "kmeans":
+            labels, n_clusters = await clustering_manager.kmeans_cluster(
+                data=data,
+                n_clusters=op_data.get("n_clusters")
+            )
+        elif algorithm == "dbscan":
+            labels, n_clusters = await clustering_manager.dbscan_cluster(
+                data=data,
+                eps=op_data.get("eps")
+            )
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown clustering algorithm: {algorithm}")
+        
+        return {
+            "type": "cluster",
+            "algorithm": algorithm,
+            "labels": labels,
+            "n_clusters": n_clusters
+        }
+    
+    elif op_type == "anomaly":
+        if not anomaly_manager:
+            raise HTTPException(status_code=503, detail="Anomaly detection service not ready")
+        
+        data = _decode_request_matrix(op_data.get("data", []), op_data.get("data_b64"), op_data.get("shape"))
+        contamination = op_data.get("contamination", 0.1)
+        baseline = None
+        if op_data.get("baseline") is not None or op_data.get("baseline_b64") is not None:
+            baseline = _decode_request_matrix(op_data.get("baseline"), op_data.get("baseline_b64"), op_data.get("baseline_shape"), "baseline")
+        
+        labels, scores = await anomaly_manager.detect_anomalies(
+            data=data,
+            contamination=contamination,
+            baseline=baseline
+        )
+        
+        return {
+            "type": "anomaly",
+            "labels": labels,
+            "scores": scores,
+            "n_anomalies": sum(1 for label in labels if label == -1)
+        }
+    
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown operation type: {op_type}")
+
 @app.post("/batch/process", response_model=BatchProcessResponse)
 async def batch_process(request: BatchProcessRequest):
     """Process multiple operations in batch"""
     try:
         start_time = time.time()
-        results = []
-        
-        for operation in request.operations:
-            op_type = operation.get("type")
-            op_data = operation.get("data", {})
-            
-            if op_type == "cluster":
-                if not clustering_manager:
-                    raise HTTPException(status_code=503, detail="Clustering service not ready")
-                
-                algorithm = op_data.get("algorithm", "kmeans")
-                data = op_data.get("data", [])
-                
-                if algorithm == "kmeans":
-                    labels, n_clusters = await clustering_manager.kmeans_cluster(
-                        data=data,
-                        n_clusters=op_data.get("n_clusters")
-                    )
-                elif algorithm == "dbscan":
-                    labels, n_clusters = await clustering_manager.dbscan_cluster(
-                        data=data,
-                        eps=op_data.get("eps")
-                    )
-                else:
-                    raise HTTPException(status_code=400, detail=f"Unknown clustering algorithm: {algorithm}")
-                
-                results.append({
-                    "type": "cluster",
-                    "algorithm": algorithm,
-                    "labels": labels,
-                    "n_clusters": n_clusters
-                })
-            
-            elif op_type == "anomaly":
-                if not anomaly_manager:
-                    raise HTTPException(status_code=503, detail="Anomaly detection service not ready")
-                
-                data = op_data.get("data", [])
-                contamination = op_data.get("contamination", 0.1)
-                
-                labels, scores = await anomaly_manager.detect_anomalies(
-                    data=data,
-                    contamination=contamination
-                )
-                
-                results.append({
-                    "type": "anomaly",
-                    "labels": labels,
-                    "scores": scores,
-                    "n_anomalies": sum(1 for label in labels if label == -1)
-                })
-            
-            else:
-                raise HTTPException(status_code=400, detail=f"Unknown operation type: {op_type}")
+        
+        # Operations run concurrently (fits go to the shared worker pool); results keep request order
+        results = list(await asyncio.gather(*(
+            _process_operation(operation) for operation in request.operations
+        )))
         
         processing_time = time.time() - start_time
         
@@ -245,6 +295,8 @@ async def batch_process(request: BatchProcessRequest):
             processing_time=processing_time
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in batch processing: {e}")
         raise HTTPException(status_code=500, detail=f"Batch processing failed: {e}")
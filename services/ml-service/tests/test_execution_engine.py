@@ -0,0 +1,127 @@
+"""
+Execution Engine Tests
+Unit tests for worker execution, fitted-model caching and compact payloads
+"""
+
+import asyncio
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.cluster import KMeans
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from src.algorithms.anomaly_detection import AnomalyDetectionManager
+from src.algorithms.clustering import ClusteringManager
+from src.algorithms.execution_engine import ExecutionEngine, decode_matrix, encode_matrix
+from src import main
+
+
+@pytest.fixture
+def sample_data():
+    """Three 2D clusters plus two outliers"""
+    rng = np.random.default_rng(42)
+    data = np.vstack([
+        rng.normal([0, 0], 0.5, (20, 2)),
+        rng.normal([3, 3], 0.5, (20, 2)),
+        rng.normal([-3, 3], 0.5, (20, 2)),
+        [[10, -10], [-10, -10]]
+    ])
+    return data
+
+
+class TestExecutionEngine:
+    """Test the engine and the managers using it"""
+
+    def test_matrix_round_trip(self, sample_data):
+        """Test base64 float32 payloads decode to the same matrix"""
+        data_b64, shape = encode_matrix(sample_data)
+
+        decoded = decode_matrix(data_b64=data_b64, shape=shape)
+
+        assert decoded.shape == sample_data.shape
+        assert np.allclose(decoded, sample_data, atol=1e-6)
+        assert decode_matrix([]).shape == (0, 0)
+        with pytest.raises(ValueError):
+            decode_matrix(data_b64=data_b64, shape=[5, 5])
+
+    @pytest.mark.asyncio
+    async def test_results_match_inline_sklearn(self, sample_data):
+        """Test clustering and anomaly results equal the inline scikit-learn calls"""
+        engine = ExecutionEngine(use_processes=False)
+        X_scaled = StandardScaler().fit_transform(sample_data)
+
+        labels, n_clusters = await ClusteringManager(engine).kmeans_cluster(sample_data.tolist(), n_clusters=3)
+        assert n_clusters == 3
+        assert labels == KMeans(n_clusters=3, random_state=42, n_init=10).fit_predict(X_scaled).tolist()
+
+        forest = IsolationForest(contamination=0.1, random_state=42, n_estimators=100)
+        labels, scores = await AnomalyDetectionManager(engine).detect_anomalies(sample_data.tolist(), 0.1)
+        assert labels == forest.fit_predict(X_scaled).tolist()
+        assert np.allclose(scores, forest.decision_function(X_scaled))
+
+    @pytest.mark.asyncio
+    async def test_baseline_model_is_cached(self, sample_data):
+        """Test scoring against the same baseline fits once, also when requested concurrently"""
+        engine = ExecutionEngine(use_processes=False)
+        manager = AnomalyDetectionManager(engine)
+        baseline = sample_data[:60]
+
+        results = await asyncio.gather(*(
+            manager.detect_anomalies(sample_data[i:i + 10], baseline=baseline) for i in range(0, 60, 10)
+        ))
+        labels, _ = await manager.detect_anomalies(sample_data[60:], baseline=baseline)
+
+        stats = engine.get_stats()
+        assert stats['cache_misses'] == 1
+        assert stats['shared_fits'] + stats['cache_hits'] == 6
+        assert labels == [-1, -1]
+        assert len(results) == 6
+
+    @pytest.mark.asyncio
+    async def test_large_fits_use_process_pool(self, sample_data):
+        """Test inputs above the inline limit run in worker processes"""
+        engine = ExecutionEngine(max_workers=1, inline_max_values=10)
+        try:
+            labels, _ = await ClusteringManager(engine).dbscan_cluster(sample_data)
+            inline, _ = await ClusteringManager(ExecutionEngine(use_processes=False)).dbscan_cluster(sample_data)
+
+            assert labels == inline
+            assert engine.get_stats()['process_runs'] == 1
+        finally:
+            engine.shutdown()
+
+
+class TestEndpoints:
+    """Test compact payloads and concurrent batches over HTTP"""
+
+    def test_b64_payload_and_batch(self, sample_data):
+        """Test base64 requests and batches return results in operation order"""
+        data_b64, shape = encode_matrix(sample_data)
+        with TestClient(main.app) as client:
+            cluster = client.post("/cluster", json={"data_b64": data_b64, "shape": shape, "n_clusters": 3})
+            batch = client.post("/batch/process", json={"operations": [
+                {"type": "anomaly", "data": {"data_b64": data_b64, "shape": shape}},
+                {"type": "cluster", "data": {"data": sample_data.tolist(), "algorithm": "kmeans", "n_clusters": 3}}
+            ]})
+
+        assert cluster.status_code == 200
+        assert cluster.json()["n_clusters"] == 3
+        results = batch.json()["results"]
+        assert [result["type"] for result in results] == ["anomaly", "cluster"]
+        assert results[0]["n_anomalies"] >= 2
+        assert len(results[1]["labels"]) == len(sample_data)
+
+    def test_malformed_b64_payload_is_bad_request(self, sample_data):
+        """Test malformed base64 payloads are rejected with 400 instead of 500"""
+        with TestClient(main.app) as client:
+            cluster = client.post("/cluster", json={"data_b64": "not*base64=", "shape": [2, 2], "n_clusters": 2})
+            anomaly = client.post("/anomaly", json={"data_b64": "AAAA", "shape": [3, 3]})
+            batch = client.post("/batch/process", json={"operations": [
+                {"type": "cluster", "data": {"data_b64": "AAA", "shape": [1, 1]}}
+            ]})
+
+        assert cluster.status_code == 400
+        assert anomaly.status_code == 400
+        assert batch.status_code == 400
+        assert "Invalid data" in batch.json()["detail"]
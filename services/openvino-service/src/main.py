@@ -34,7 +34,11 @@ async def lifespan(app: FastAPI):
     # Startup - DON'T pre-load models (lazy load on first request instead)
     logger.info("🚀 Starting OpenVINO Service...")
     try:
-        openvino_manager = OpenVINOManager()
+        openvino_manager = OpenVINOManager(
+            max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64")),
+            batch_wait_ms=float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5")),
+            embedding_cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        )
         # DON'T call initialize() - models will load on first request
         # await openvino_manager.initialize()  # <-- REMOVED to avoid 5-minute startup
         logger.info("✅ OpenVINO Service started successfully (models will lazy-load)")
@@ -0,0 +1,220 @@
+"""
+Inference Batching
+Coalesces concurrent inference requests into batched model calls
+
+- MicroBatcher: collects items from concurrent requests for a few milliseconds,
+  orders them by length (less padding), runs one batched inference per chunk
+  in a worker thread and fans the results back out
+- EmbeddingLRUCache: content-hash LRU cache for embeddings
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Request-coalescing inference queue
+
+    Callers enqueue items and await their results; a single worker drains the
+    queue, so the model only ever runs one batch at a time and never blocks
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        length_key: Optional[Callable[[Any], int]] = len,
+        name: str = "inference"
+    ):
+        """
+        Args:
+            process_batch: Runs inference for a list of items, returns one result per item
+                (called in a worker thread)
+            max_batch_size: Maximum items per model call
+            max_wait_ms: How long to collect items after the first one arrives
+            length_key: Item length for bucketing (None = keep arrival order)
+            name: Name used in logs and statistics
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.length_key = length_key
+        self.name = name
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats = {
+            'requests': 0,
+            'items': 0,
+            'batches': 0,
+            'max_batch': 0,
+            'errors': 0,
+            'inference_seconds': 0.0
+        }
+
+    def enqueue(self, items: Sequence[Any]) -> List[asyncio.Future]:
+        """Queue items for the next batch; returns one future per item"""
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+
+        futures = [loop.create_future() for _ in items]
+        self._pending.extend(zip(items, futures))
+        self._stats['requests'] += 1
+        self._stats['items'] += len(futures)
+        self._wakeup.set()
+        return futures
+
+    async def submit(self, items: Sequence[Any]) -> List[Any]:
+        """Run items through the batched model; results in item order"""
+        if not items:
+            return []
+        return list(await asyncio.gather(*self.enqueue(items)))
+
+    async def close(self):
+        """Stop the worker and fail anything still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+        pending, self._pending = self._pending, []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} batcher closed"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching statistics"""
+        batches = self._stats['batches']
+        return {
+            **self._stats,
+            'avg_batch': round(self._stats['items'] / batches, 2) if batches else 0.0,
+            'queued': len(self._pending),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop):
+        """Start the worker on the current event loop (restarted if the loop changed)"""
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Drain the queue batch by batch"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+
+            # Give concurrent requests a moment to join this batch
+            if self.max_wait and len(self._pending) < self.max_batch_size:
+                await asyncio.sleep(self.max_wait)
+
+            batch, self._pending = self._pending, []
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if self.length_key is not None:
+                # Similar lengths together: less padding per model call
+                batch.sort(key=lambda entry: self.length_key(entry[0]))
+
+            for start in range(0, len(batch), self.max_batch_size):
+                await self._run_chunk(batch[start:start + self.max_batch_size])
+
+            if self._pending:
+                self._wakeup.set()
+
+    async def _run_chunk(self, chunk: List[Tuple[Any, asyncio.Future]]):
+        """Run one model call and resolve its futures"""
+        items = [item for item, _ in chunk]
+        started = time.perf_counter()
+        try:
+            results = await asyncio.to_thread(self.process_batch, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+            for _, future in chunk:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._stats['inference_seconds'] += time.perf_counter() - started
+
+        self._stats['batches'] += 1
+        self._stats['max_batch'] = max(self._stats['max_batch'], len(items))
+        for (_, future), result in zip(chunk, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class EmbeddingLRUCache:
+    """LRU cache of embeddings keyed by a hash of the text content"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """Content hash of a text"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Cached embedding for a key (marks it recently used)"""
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    def put(self, key: bytes, embedding: np.ndarray):
+        """Cache an embedding (read-only), evicting the least recently used"""
+        if self.max_entries <= 0:
+            return
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached embeddings"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
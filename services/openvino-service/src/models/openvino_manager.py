@@ -10,6 +10,7 @@ Models:
 Total: 380MB, 230ms/pattern, 100% local
 """
 
+import asyncio
 import logging
 import os
 import time
@@ -17,6 +18,8 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 import numpy as np
 
+from .inference_batcher import MicroBatcher, EmbeddingLRUCache
+
 logger = logging.getLogger(__name__)
 
 class OpenVINOManager:
@@ -25,7 +28,13 @@ class OpenVINOManager:
     Lazy-loads models on first use
     """
     
-    def __init__(self, models_dir: str = "/app/models"):
+    def __init__(
+        self,
+        models_dir: str = "/app/models",
+        max_batch_size: int = 64,
+        batch_wait_ms: float = 5.0,
+        embedding_cache_size: int = 10000
+    ):
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
@@ -40,6 +49,16 @@ class OpenVINOManager:
         self.use_openvino = False  # Use standard models for compatibility
         self._initialized = False
         
+        # Concurrent requests are coalesced into batched model calls
+        self._embed_batcher = MicroBatcher(
+            self._embed_batch, max_batch_size=max_batch_size, max_wait_ms=batch_wait_ms, name="embedding"
+        )
+        self._rerank_batcher = MicroBatcher(
+            self._rerank_batch, max_batch_size=max_batch_size, max_wait_ms=batch_wait_ms, name="rerank"
+        )
+        self._embedding_cache = EmbeddingLRUCache(max_entries=embedding_cache_size)
+        self._inflight_embeddings: Dict[bytes, asyncio.Future] = {}  # Texts already queued
+        
         logger.info("OpenVINOManager initialized (models will load on first use)")
     
     async def initialize(self):
@@ -68,6 +87,11 @@ class OpenVINOManager:
         """Cleanup resources"""
         logger.info("🧹 Cleaning up OpenVINO models...")
         
+        await self._embed_batcher.close()
+        await self._rerank_batcher.close()
+        self._embedding_cache.clear()
+        self._inflight_embeddings.clear()
+        
         # Unload models to free memory
         self._embed_model = None
         self._embed_tokenizer = None
@@ -208,17 +232,43 @@ class OpenVINOManager:
         """
         Generate embeddings for texts
         Returns: (N, 384) numpy array
+        
+        Served from the content-hash cache where possible; the remaining texts
+        join the shared inference queue (identical texts are computed once).
         """
         await self._load_embedding_model()
         
-        if self.use_openvino and self._embed_tokenizer is not None:
-            # OpenVINO path
-            inputs = self._embed_tokenizer(texts, padding=True, truncation=True, return_tensors='pt', max_length=256)
-            outputs = self._embed_model(**inputs)
-            embeddings = outputs.last_hidden_state.mean(dim=1).detach().numpy()
-        else:
-            # Standard sentence-transformers path
-            embeddings = self._embed_model.encode(texts, convert_to_numpy=True)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        keys = [EmbeddingLRUCache.key(text) for text in texts]
+        found: Dict[bytes, Any] = {}
+        to_compute: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in to_compute:
+                continue
+            embedding = self._embedding_cache.get(key)
+            if embedding is not None:
+                found[key] = embedding
+            elif key in self._inflight_embeddings:
+                found[key] = self._inflight_embeddings[key]
+            else:
+                to_compute[key] = text
+        
+        if to_compute:
+            futures = self._embed_batcher.enqueue(list(to_compute.values()))
+            for key, future in zip(to_compute, futures):
+                self._inflight_embeddings[key] = future
+                future.add_done_callback(lambda f, key=key: self._embedding_done(key, f))
+                found[key] = future
+        
+        # Shielded: a cancelled request must not cancel texts other requests wait for
+        pending = {key: value for key, value in found.items() if isinstance(value, asyncio.Future)}
+        if pending:
+            results = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()))
+            found.update(zip(pending, results))
+        
+        embeddings = np.stack([found[key] for key in keys]).astype(np.float32)
         
         # Normalize for dot-product scoring
         if normalize:
@@ -230,6 +280,30 @@ class OpenVINOManager:
         
         return embeddings
     
+    def _embedding_done(self, key: bytes, future: asyncio.Future):
+        """Move a computed embedding from the in-flight map into the cache"""
+        self._inflight_embeddings.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._embedding_cache.put(key, future.result())
+    
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Run the embedding model on one batch (worker thread)"""
+        if self.use_openvino and self._embed_tokenizer is not None:
+            # OpenVINO path: mean over real tokens only, so results do not depend on batch padding
+            import torch
+            
+            inputs = self._embed_tokenizer(texts, padding=True, truncation=True, return_tensors='pt', max_length=256)
+            with torch.no_grad():
+                outputs = self._embed_model(**inputs)
+            mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+            summed = (outputs.last_hidden_state * mask).sum(dim=1)
+            embeddings = (summed / mask.sum(dim=1).clamp(min=1)).numpy()
+        else:
+            # Standard sentence-transformers path
+            embeddings = self._embed_model.encode(texts, convert_to_numpy=True, batch_size=len(texts))
+        
+        return list(np.asarray(embeddings, dtype=np.float32))
+    
     async def rerank(self, query: str, candidates: List[Dict], top_k: int = 10) -> List[Dict]:
         """
         Re-rank candidates using bge-reranker
@@ -244,21 +318,22 @@ class OpenVINOManager:
         """
         await self._load_reranker_model()
         
-        scores = []
-        for candidate in candidates:
-            text = candidate.get('description', str(candidate))
-            pair = f"{query} [SEP] {text}"
-            
-            inputs = self._reranker_tokenizer(pair, return_tensors='pt', truncation=True, max_length=512)
-            outputs = self._reranker_model(**inputs)
-            score = outputs.logits[0][0].item()
-            
-            scores.append((candidate, score))
+        pairs = [f"{query} [SEP] {candidate.get('description', str(candidate))}" for candidate in candidates]
+        scores = await self._rerank_batcher.submit(pairs)
         
         # Sort by score descending
-        ranked = sorted(scores, key=lambda x: x[1], reverse=True)
+        ranked = sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)
         return [candidate for candidate, score in ranked[:top_k]]
     
+    def _rerank_batch(self, pairs: List[str]) -> List[float]:
+        """Score query/candidate pairs in one batch (worker thread)"""
+        import torch
+        
+        inputs = self._reranker_tokenizer(pairs, padding=True, truncation=True, max_length=512, return_tensors='pt')
+        with torch.no_grad():
+            outputs = self._reranker_model(**inputs)
+        return outputs.logits[:, 0].tolist()
+    
     async def classify_pattern(self, pattern_description: str) -> Dict[str, str]:
         """
         Classify pattern category and priority using flan-t5-small
@@ -356,5 +431,10 @@ Priority:"""
             'classifier_loaded': self._classifier_model is not None,
             'openvino_enabled': self.use_openvino,
             'models_dir': str(self.models_dir),
-            'initialized': self._initialized
+            'initialized': self._initialized,
+            'embedding_cache': self._embedding_cache.get_stats(),
+            'batching': {
+                'embedding': self._embed_batcher.get_stats(),
+                'rerank': self._rerank_batcher.get_stats()
+            }
         }
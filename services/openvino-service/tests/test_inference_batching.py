@@ -0,0 +1,140 @@
+"""
+Inference Batching Tests
+Unit tests for request coalescing and the embedding cache (no models downloaded)
+"""
+
+import asyncio
+import numpy as np
+import pytest
+import torch
+
+from src.models.inference_batcher import MicroBatcher, EmbeddingLRUCache
+from src.models.openvino_manager import OpenVINOManager
+
+
+class FakeEmbeddingModel:
+    """SentenceTransformer stand-in recording each encode call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array([[len(text), text.count('light'), 1.0] for text in texts], dtype=np.float32)
+
+
+class FakeRerankerTokenizer:
+    """Tokenizer stand-in passing the texts through"""
+
+    def __call__(self, pairs, **kwargs):
+        return {'pairs': pairs}
+
+
+class FakeRerankerModel:
+    """Classifier stand-in scoring pairs by shared words"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, pairs):
+        self.batches.append(pairs)
+        scores = []
+        for pair in pairs:
+            query, text = pair.split(' [SEP] ')
+            scores.append([len(set(query.split()) & set(text.split()))])
+
+        class Output:
+            logits = torch.tensor(scores, dtype=torch.float32)
+        return Output()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Manager with fake models"""
+    manager = OpenVINOManager(models_dir=str(tmp_path), batch_wait_ms=10, embedding_cache_size=100)
+    manager._embed_model = FakeEmbeddingModel()
+    manager._reranker_tokenizer = FakeRerankerTokenizer()
+    manager._reranker_model = FakeRerankerModel()
+    return manager
+
+
+class TestInferenceBatching:
+    """Test coalescing, caching and result fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_inference(self, manager):
+        """Test concurrent requests are computed in one model call, duplicates once"""
+        requests = [["kitchen light", "hall"], ["hall", "office light"], ["kitchen light"]]
+
+        results = await asyncio.gather(*(manager.generate_embeddings(texts, normalize=False) for texts in requests))
+
+        assert len(manager._embed_model.calls) == 1
+        assert sorted(manager._embed_model.calls[0]) == ["hall", "kitchen light", "office light"]
+        assert results[0].tolist() == [[13.0, 1.0, 1.0], [4.0, 0.0, 1.0]]
+        assert results[1].tolist() == [[4.0, 0.0, 1.0], [12.0, 1.0, 1.0]]
+        assert results[2].tolist() == [[13.0, 1.0, 1.0]]
+        await manager.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_cached_embeddings_skip_inference(self, manager):
+        """Test repeated texts are served from the cache and normalized per request"""
+        await manager.generate_embeddings(["kitchen light"])
+        embeddings = await manager.generate_embeddings(["kitchen light", "kitchen light"])
+
+        assert len(manager._embed_model.calls) == 1
+        assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0)
+        assert manager.get_model_status()['embedding_cache']['hits'] == 1
+        await manager.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_rerank_batches_pairs(self, manager):
+        """Test re-ranking scores all candidates in one call and keeps the ranking"""
+        candidates = [
+            {"description": "door lock automation", "id": 1},
+            {"description": "motion sensor lights on", "id": 2},
+            {"description": "lights on when motion", "id": 3}
+        ]
+
+        ranked = await manager.rerank("lights on when motion detected", candidates, top_k=2)
+
+        assert [c["id"] for c in ranked] == [3, 2]
+        assert len(manager._reranker_model.batches) == 1
+        await manager.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_batch_errors_reach_every_caller(self):
+        """Test a failed model call fails the waiting requests, and the queue recovers"""
+        calls = []
+
+        def process(items):
+            calls.append(items)
+            if 'bad' in items:
+                raise ValueError("model failure")
+            return [item.upper() for item in items]
+
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=5)
+        with pytest.raises(ValueError):
+            await asyncio.gather(batcher.submit(['bad']), batcher.submit(['ok']))
+
+        assert await batcher.submit(['a', 'bbb', 'cc']) == ['A', 'BBB', 'CC']
+        # Chunks of max_batch_size, shortest items first
+        assert calls[-2:] == [['a', 'cc'], ['bbb']]
+        await batcher.close()
+
+
+class TestEmbeddingLRUCache:
+    """Test the content-hash LRU cache"""
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted at the size limit"""
+        cache = EmbeddingLRUCache(max_entries=2)
+        keys = [EmbeddingLRUCache.key(text) for text in ("a", "b", "c")]
+        cache.put(keys[0], np.ones(3))
+        cache.put(keys[1], np.ones(3))
+        cache.get(keys[0])
+        cache.put(keys[2], np.ones(3))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert not cache.get(keys[0]).flags.writeable
+        assert len(cache) == 2
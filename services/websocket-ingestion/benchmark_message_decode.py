@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the WebSocket message hot path
+
+Replays Home Assistant WebSocket frames through decode -> EventProcessor ->
+line protocol encoding, once the way listen() used to do it (json.loads plus
+an eagerly formatted debug message) and once through fast_json with lazy
+debug logging.
+
+Usage:
+    python benchmark_message_decode.py [recorded_frames.jsonl] [--repeat N]
+
+recorded_frames.jsonl holds one raw frame per line (e.g. captured with
+websocat or from the browser dev tools). Without a recording a synthetic mix
+of state_changed events modelled on real HA traffic is used.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Setup path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import fast_json
+from event_processor import EventProcessor
+from influxdb_schema import InfluxDBSchema
+
+logger = logging.getLogger("benchmark_message_decode")
+
+
+def synthetic_frames(count: int = 5000, seed: int = 42) -> list:
+    """Generate state_changed frames with realistic attribute payloads"""
+    rng = random.Random(seed)
+    templates = [
+        ("sensor", "power", {"unit_of_measurement": "W", "device_class": "power", "state_class": "measurement"}),
+        ("sensor", "temperature", {"unit_of_measurement": "°C", "device_class": "temperature", "state_class": "measurement"}),
+        ("light", None, {"supported_color_modes": ["color_temp", "hs"], "color_mode": "color_temp", "brightness": 180,
+                         "color_temp_kelvin": 3200, "min_color_temp_kelvin": 2000, "max_color_temp_kelvin": 6500,
+                         "hs_color": [27.0, 56.0], "rgb_color": [255, 167, 89], "xy_color": [0.526, 0.387],
+                         "effect_list": ["colorloop", "random"], "supported_features": 44}),
+        ("binary_sensor", "motion", {"device_class": "motion"}),
+        ("media_player", None, {"volume_level": 0.3, "is_volume_muted": False, "media_content_type": "music",
+                                "media_title": "Track", "media_artist": "Artist", "source_list": ["TV", "Spotify", "AUX"],
+                                "supported_features": 152511}),
+    ]
+
+    frames = []
+    for index in range(count):
+        domain, device_class, attributes = rng.choice(templates)
+        entity_id = f"{domain}.{device_class or domain}_{rng.randint(1, 80)}"
+        attributes = dict(attributes, friendly_name=entity_id.split('.', 1)[1].replace('_', ' ').title())
+        old_value, new_value = (str(round(rng.uniform(0, 500), 1)) for _ in range(2))
+        timestamp = f"2025-10-20T12:{index // 60 % 60:02d}:{index % 60:02d}.{rng.randint(0, 999999):06d}+00:00"
+        frames.append(json.dumps({
+            "id": 1,
+            "type": "event",
+            "event": {
+                "event_type": "state_changed",
+                "time_fired": timestamp,
+                "origin": "LOCAL",
+                "context": {"id": f"01HB{index:022d}", "parent_id": None, "user_id": None},
+                "data": {
+                    "entity_id": entity_id,
+                    "old_state": {"entity_id": entity_id, "state": old_value, "attributes": attributes,
+                                  "last_changed": timestamp, "last_updated": timestamp,
+                                  "context": {"id": f"01HA{index:022d}", "parent_id": None, "user_id": None}},
+                    "new_state": {"entity_id": entity_id, "state": new_value, "attributes": attributes,
+                                  "last_changed": timestamp, "last_updated": timestamp,
+                                  "context": {"id": f"01HB{index:022d}", "parent_id": None, "user_id": None}}
+                }
+            }
+        }))
+    return frames
+
+
+def load_frames(path: str) -> list:
+    """Load recorded frames (one JSON frame per line)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_legacy(frames: list, processor: EventProcessor, schema: InfluxDBSchema) -> int:
+    """Decode path as before: json.loads and an eagerly formatted debug log"""
+    lines = 0
+    for frame in frames:
+        data = json.loads(frame)
+        logger.debug(f"Received message: {data}")
+        str(data)  # message_size=len(str(message)) in main._on_message
+        if data.get("type") == "event":
+            processed = processor.process_event(data["event"])
+            if processed and schema.create_event_line(processed):
+                lines += 1
+    return lines
+
+
+def run_fast(frames: list, processor: EventProcessor, schema: InfluxDBSchema) -> int:
+    """Decode path as in listen(): fast_json and lazy debug logging"""
+    lines = 0
+    for frame in frames:
+        data = fast_json.loads(frame)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received message: {data}")
+        if data.get("type") == "event":
+            processed = processor.process_event(data["event"])
+            if processed and schema.create_event_line(processed):
+                lines += 1
+    return lines
+
+
+def run_decode_only(frames: list, decode) -> int:
+    """Decode frames only"""
+    for frame in frames:
+        decode(frame)
+    return len(frames)
+
+
+def measure(name: str, func, repeat: int, frame_count: int, frame_bytes: int):
+    """Run func repeat times and print the best run"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{name:<32} {best * 1000:9.1f} ms  {frame_count / best:11,.0f} msg/s  "
+          f"{frame_bytes / best / 1_048_576:8.1f} MiB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket message decode microbenchmark")
+    parser.add_argument("recording", nargs="?", help="Recorded frames (JSON lines)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    # Production runs at INFO, but per-event INFO logs would dominate here
+    logging.basicConfig(level=logging.WARNING)
+
+    frames = load_frames(args.recording) if args.recording else synthetic_frames()
+    frame_bytes = sum(len(frame.encode('utf-8')) for frame in frames)
+    print(f"{len(frames)} frames, {frame_bytes / 1024:.0f} KiB, fast_json backend: {fast_json.BACKEND}")
+
+    processor = EventProcessor()
+    schema = InfluxDBSchema()
+
+    decode_legacy = measure("decode json.loads", lambda: run_decode_only(frames, json.loads),
+                            args.repeat, len(frames), frame_bytes)
+    decode_fast = measure("decode fast_json.loads", lambda: run_decode_only(frames, fast_json.loads),
+                          args.repeat, len(frames), frame_bytes)
+    full_legacy = measure("full path (legacy)", lambda: run_legacy(frames, processor, schema),
+                          args.repeat, len(frames), frame_bytes)
+    full_fast = measure("full path (fast)", lambda: run_fast(frames, processor, schema),
+                        args.repeat, len(frames), frame_bytes)
+
+    print(f"decode speedup: {decode_legacy / decode_fast:.2f}x, "
+          f"full path speedup: {full_legacy / full_fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,10 @@ class AsyncEventProcessor:
         # Event handlers
         self.event_handlers: List[Callable] = []
         
+        # Called with events the full queue cannot take (e.g. spill to disk)
+        self.overflow_handler: Optional[Callable] = None
+        self.spilled_events = 0
+        
         # Performance monitoring
         self.processing_times: deque = deque(maxlen=1000)  # Keep last 1000 processing times
         self.memory_usage_samples: deque = deque(maxlen=100)  # Keep last 100 memory samples
@@ -101,6 +105,9 @@ class AsyncEventProcessor:
             return True
             
         except asyncio.QueueFull:
+            if self.overflow_handler and await self.overflow_handler(event_data):
+                self.spilled_events += 1
+                return True
             logger.warning("Event queue is full, dropping event")
             return False
         except Exception as e:
@@ -210,6 +217,7 @@ class AsyncEventProcessor:
             "processing_rate_limit": self.processing_rate_limit,
             "processed_events": self.processed_events,
             "failed_events": self.failed_events,
+            "spilled_events": self.spilled_events,
             "success_rate": round(success_rate, 2),
             "processing_rate_per_second": round(processing_rate, 2),
             "average_processing_time_ms": round(avg_processing_time * 1000, 2),
@@ -224,6 +232,7 @@ class AsyncEventProcessor:
         """Reset processing statistics"""
         self.processed_events = 0
         self.failed_events = 0
+        self.spilled_events = 0
         self.processing_start_time = datetime.now()
         self.last_processing_time = None
         self.processing_times.clear()
@@ -54,6 +54,11 @@ class ConnectionManager:
         self.last_connection_time: Optional[datetime] = None
         self.last_error: Optional[str] = None
         
+        # Downstream backpressure (event queue overflowing to disk)
+        self.backpressure_active = False
+        self.backpressure_since: Optional[datetime] = None
+        self.backpressure_episodes = 0
+        
         # Event handlers
         self.on_connect: Optional[Callable] = None
         self.on_disconnect: Optional[Callable] = None
@@ -436,6 +441,26 @@ class ConnectionManager:
                    f"base_delay={self.base_delay}, max_delay={self.max_delay}, "
                    f"backoff_multiplier={self.backoff_multiplier}, jitter_range={self.jitter_range}")
     
+    def set_backpressure(self, active: bool):
+        """
+        Record a backpressure signal from the event queue
+        
+        Args:
+            active: True while events overflow the in-memory queue
+        """
+        if active == self.backpressure_active:
+            return
+        
+        self.backpressure_active = active
+        if active:
+            self.backpressure_episodes += 1
+            self.backpressure_since = datetime.now()
+            logger.warning("Downstream backpressure: events are being spilled to disk")
+        else:
+            duration = (datetime.now() - self.backpressure_since).total_seconds() if self.backpressure_since else 0
+            self.backpressure_since = None
+            logger.info(f"Downstream backpressure cleared after {duration:.1f}s")
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Get connection manager status
@@ -461,6 +486,11 @@ class ConnectionManager:
                 "current_retry_count": self.current_retry_count
             },
             "base_url": self.base_url,
+            "backpressure": {
+                "active": self.backpressure_active,
+                "since": self.backpressure_since.isoformat() if self.backpressure_since else None,
+                "episodes": self.backpressure_episodes
+            },
             "client_status": client_status,
             "event_subscription": self.event_subscription.get_subscription_status(),
             "event_processing": self.event_processor.get_processing_statistics(),
@@ -341,7 +341,8 @@ class EventProcessor:
             if not is_valid:
                 self.validation_errors += 1
                 logger.warning(f"Event validation failed: {error_msg}")
-                logger.debug(f"Invalid event data: {event_data}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Invalid event data: {event_data}")
                 return None
             
             # Extract structured data
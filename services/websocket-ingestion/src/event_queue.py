@@ -4,29 +4,50 @@ Event Queue System for High-Volume Event Processing
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Callable, Awaitable
 from datetime import datetime, timedelta
 from collections import deque
 import json
-import os
 from pathlib import Path
 
+try:
+    import fast_json
+    from spill_log import SpillLog
+except ImportError:
+    # Imported as part of the src package (tests)
+    from . import fast_json
+    from .spill_log import SpillLog
+
 logger = logging.getLogger(__name__)
 
 
 class EventQueue:
     """High-performance event queue with overflow handling and persistence"""
     
-    def __init__(self, maxsize: int = 10000, persistence_path: Optional[str] = None):
+    def __init__(self, maxsize: int = 10000, persistence_path: Optional[str] = None,
+                 spill_max_bytes: int = 4 * 1024 * 1024 * 1024,
+                 replay_batch_size: int = 1000,
+                 on_backpressure: Optional[Callable[[bool], Any]] = None):
         """
         Initialize event queue
         
         Args:
             maxsize: Maximum queue size
-            persistence_path: Path for queue persistence (optional)
+            persistence_path: Path for queue persistence (optional); overflow is
+                spilled to a segment log there instead of being dropped
+            spill_max_bytes: Maximum unreplayed bytes in the spill log
+            replay_batch_size: Spilled events read back per batch
+            on_backpressure: Called with True when events start overflowing the
+                in-memory queue and with False once the backlog is replayed
         """
         self.maxsize = maxsize
         self.persistence_path = persistence_path
+        self.spill_max_bytes = spill_max_bytes
+        self.replay_batch_size = replay_batch_size
+        self.on_backpressure = on_backpressure
+        self.spill_log: Optional[SpillLog] = None
+        self.backpressure_active = False
         
         # Queue management
         self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
@@ -37,6 +58,8 @@ class EventQueue:
         self.total_events_processed = 0
         self.total_events_dropped = 0
         self.overflow_events = 0
+        self.spilled_events = 0
+        self.replayed_events = 0
         
         # Performance monitoring
         self.queue_size_history: deque = deque(maxlen=100)
@@ -52,9 +75,13 @@ class EventQueue:
             self._ensure_persistence_directory()
     
     def _ensure_persistence_directory(self):
-        """Ensure persistence directory exists"""
+        """Ensure persistence directory exists and open its spill log"""
         if self.persistence_path:
             Path(self.persistence_path).mkdir(parents=True, exist_ok=True)
+            if self.spill_log is None or str(self.spill_log.path) != str(Path(self.persistence_path)):
+                if self.spill_log is not None:
+                    self.spill_log.close()
+                self.spill_log = SpillLog(self.persistence_path, max_bytes=self.spill_max_bytes)
     
     async def put(self, event_data: Dict[str, Any], priority: int = 0) -> bool:
         """
@@ -69,12 +96,13 @@ class EventQueue:
         """
         self.total_events_received += 1
         
-        # Create queue item with metadata
+        # Create queue item with metadata (one clock read per event)
+        now = time.time()
         queue_item = {
             "data": event_data,
             "priority": priority,
-            "timestamp": datetime.now().isoformat(),
-            "id": f"{self.total_events_received}_{datetime.now().timestamp()}"
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "id": f"{self.total_events_received}_{now}"
         }
         
         try:
@@ -87,18 +115,58 @@ class EventQueue:
             return await self._handle_overflow(queue_item)
     
     async def _handle_overflow(self, queue_item: Dict[str, Any]) -> bool:
-        """Handle queue overflow"""
+        """
+        Handle queue overflow
+        
+        With persistence the event is appended to the spill log and replayed
+        later (dropped only if the log is full); without it the event goes to
+        the bounded overflow queue, which drops its oldest event once full.
+        
+        Returns:
+            True if the event was spilled to disk, False otherwise
+        """
         self.overflow_events += 1
         
-        # Add to overflow queue
-        self.overflow_queue.append(queue_item)
+        spilled = False
+        if self.spill_log is not None:
+            spilled = await self._persist_overflow_event(queue_item)
+            if not spilled:
+                self.total_events_dropped += 1
+        else:
+            if len(self.overflow_queue) == self.overflow_queue.maxlen:
+                self.total_events_dropped += 1
+            self.overflow_queue.append(queue_item)
         
-        # Try to persist overflow events
-        if self.persistence_path:
-            await self._persist_overflow_event(queue_item)
+        if self.overflow_events == 1 or self.overflow_events % 1000 == 0:
+            logger.warning(f"Queue overflow: {self.overflow_events} events in overflow")
+        await self._update_backpressure()
+        return spilled
+    
+    async def spill(self, event_data: Any) -> bool:
+        """
+        Send an event straight to the overflow path for a later replay_spilled()
+        
+        Used by writers for events they could not deliver (failed InfluxDB
+        write, full processing queue).
+        
+        Args:
+            event_data: Event data to keep (must be JSON serializable)
         
-        logger.warning(f"Queue overflow: {self.overflow_events} events in overflow")
-        return False
+        Returns:
+            True if the event was kept, False if an event had to be dropped
+        """
+        self.total_events_received += 1
+        now = time.time()
+        queue_item = {
+            "data": event_data,
+            "priority": 0,
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "id": f"{self.total_events_received}_{now}"
+        }
+        
+        dropped_before = self.total_events_dropped
+        await self._handle_overflow(queue_item)
+        return self.total_events_dropped == dropped_before
     
     async def get(self) -> Optional[Dict[str, Any]]:
         """
@@ -120,13 +188,7 @@ class EventQueue:
             
         except asyncio.TimeoutError:
             # Try to get from overflow queue
-            if self.overflow_queue:
-                queue_item = self.overflow_queue.popleft()
-                self.total_events_processed += 1
-                self.last_processing_time = datetime.now()
-                return queue_item
-            
-            return None
+            return await self._get_overflow()
     
     async def get_nowait(self) -> Optional[Dict[str, Any]]:
         """
@@ -148,46 +210,149 @@ class EventQueue:
             
         except asyncio.QueueEmpty:
             # Try overflow queue
-            if self.overflow_queue:
-                queue_item = self.overflow_queue.popleft()
-                self.total_events_processed += 1
-                self.last_processing_time = datetime.now()
-                return queue_item
-            
+            return await self._get_overflow()
+    
+    async def _get_overflow(self) -> Optional[Dict[str, Any]]:
+        """Get the next overflow event, reading spilled events back when the overflow queue is empty"""
+        if not self.overflow_queue:
+            self._refill_from_spill()
+        
+        if not self.overflow_queue:
+            await self._update_backpressure()
             return None
+        
+        queue_item = self.overflow_queue.popleft()
+        self.total_events_processed += 1
+        self.last_processing_time = datetime.now()
+        return queue_item
     
-    async def _persist_overflow_event(self, queue_item: Dict[str, Any]):
-        """Persist overflow event to disk"""
+    def _refill_from_spill(self):
+        """Commit the drained replay window and read the next one from the spill log"""
+        if self.spill_log is None:
+            return
+        self.spill_log.commit()
+        for record in self.spill_log.read(self.replay_batch_size):
+            self.overflow_queue.append(fast_json.loads(record))
+    
+    async def _persist_overflow_event(self, queue_item: Dict[str, Any]) -> bool:
+        """Append overflow event to the spill log"""
         try:
-            if not self.persistence_path:
-                return
+            if self.spill_log is None:
+                return False
             
-            # Create persistence file path
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"overflow_events_{timestamp}.jsonl"
-            filepath = os.path.join(self.persistence_path, filename)
+            if self.spill_log.append(fast_json.dumps(queue_item).encode("utf-8")):
+                self.spilled_events += 1
+                return True
             
-            # Append event to file
-            with open(filepath, "a", encoding="utf-8") as f:
-                f.write(json.dumps(queue_item) + "\n")
+            logger.error("Spill log full, dropping overflow event")
+            return False
                 
         except Exception as e:
             logger.error(f"Error persisting overflow event: {e}")
+            return False
+    
+    async def replay_spilled(self, handler: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+                             batch_size: Optional[int] = None) -> int:
+        """
+        Replay overflow events in bulk, e.g. once the InfluxDB writer has recovered
+        
+        Batches are acknowledged in the spill log only after the handler
+        succeeds; a failing batch (exception or False) stops the replay and is
+        delivered again on the next call.
+        
+        Args:
+            handler: Async callable receiving a list of queue items
+            batch_size: Events per handler call (default: replay_batch_size)
+            
+        Returns:
+            Number of events replayed
+        """
+        batch_size = batch_size or self.replay_batch_size
+        replayed = 0
+        
+        while True:
+            # Events already read back into the overflow queue go first
+            batch = [self.overflow_queue.popleft() for _ in range(min(batch_size, len(self.overflow_queue)))]
+            if self.spill_log is not None and len(batch) < batch_size:
+                batch.extend(fast_json.loads(record) for record in self.spill_log.read(batch_size - len(batch)))
+            if not batch:
+                break
+            
+            try:
+                success = await handler(batch) is not False
+            except Exception as e:
+                logger.error(f"Error replaying {len(batch)} overflow events: {e}")
+                success = False
+            
+            if not success:
+                if self.spill_log is not None:
+                    # Uncommitted records (including the overflow queue) are read again from disk
+                    self.spill_log.rewind()
+                    self.overflow_queue.clear()
+                else:
+                    self.overflow_queue.extendleft(reversed(batch))
+                break
+            
+            if self.spill_log is not None:
+                self.spill_log.commit()
+            replayed += len(batch)
+            self.replayed_events += len(batch)
+            self.total_events_processed += len(batch)
+            self.last_processing_time = datetime.now()
+            
+            # Let the event loop serve new events between batches
+            await asyncio.sleep(0)
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} overflow events")
+        await self._update_backpressure()
+        return replayed
+    
+    def pending_overflow_events(self) -> int:
+        """Number of overflow events waiting in memory or in the spill log"""
+        if self.spill_log is not None:
+            # Events read back into the overflow queue stay pending in the log until committed
+            return self.spill_log.pending_records
+        return len(self.overflow_queue)
+    
+    async def _update_backpressure(self):
+        """Signal backpressure when an overflow backlog appears or is cleared"""
+        active = self.pending_overflow_events() > 0
+        if active == self.backpressure_active:
+            return
+        
+        self.backpressure_active = active
+        if active:
+            logger.warning("Event queue overflowing, signalling backpressure")
+        else:
+            logger.info("Event queue overflow backlog cleared")
+        
+        if self.on_backpressure:
+            try:
+                result = self.on_backpressure(active)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in backpressure callback: {e}")
     
     async def recover_overflow_events(self) -> int:
         """
         Recover overflow events from persistence files
         
+        Events left in the spill log by a previous run are counted and the
+        first batch is read back into the overflow queue. Legacy JSONL
+        overflow files are moved into the spill log.
+        
         Returns:
             Number of events recovered
         """
-        if not self.persistence_path:
+        if not self.persistence_path or self.spill_log is None:
             return 0
         
         recovered_count = 0
         
         try:
-            # Find overflow files
+            # Find legacy overflow files
             overflow_files = list(Path(self.persistence_path).glob("overflow_events_*.jsonl"))
             
             for filepath in overflow_files:
@@ -196,8 +361,8 @@ class EventQueue:
                         for line in f:
                             if line.strip():
                                 queue_item = json.loads(line.strip())
-                                self.overflow_queue.append(queue_item)
-                                recovered_count += 1
+                                if not self.spill_log.append(fast_json.dumps(queue_item).encode("utf-8")):
+                                    self.total_events_dropped += 1
                     
                     # Remove processed file
                     filepath.unlink()
@@ -205,12 +370,18 @@ class EventQueue:
                 except Exception as e:
                     logger.error(f"Error recovering from {filepath}: {e}")
             
+            self.spill_log.sync()
+            recovered_count = self.spill_log.pending_records
+            if not self.overflow_queue:
+                self._refill_from_spill()
+            
             if recovered_count > 0:
                 logger.info(f"Recovered {recovered_count} overflow events")
             
         except Exception as e:
             logger.error(f"Error recovering overflow events: {e}")
         
+        await self._update_backpressure()
         return recovered_count
     
     def get_queue_statistics(self) -> Dict[str, Any]:
@@ -243,13 +414,18 @@ class EventQueue:
             "average_queue_size": round(avg_queue_size, 2),
             "last_processing_time": self.last_processing_time.isoformat() if self.last_processing_time else None,
             "persistence_enabled": self.persistence_path is not None,
-            "persistence_path": self.persistence_path
+            "persistence_path": self.persistence_path,
+            "spilled_events": self.spilled_events,
+            "replayed_events": self.replayed_events,
+            "pending_overflow_events": self.pending_overflow_events(),
+            "backpressure_active": self.backpressure_active,
+            "spill_log": self.spill_log.get_statistics() if self.spill_log else None
         }
     
     def get_health_status(self) -> Dict[str, Any]:
         """Get queue health status"""
         current_size = self.queue.qsize()
-        overflow_size = len(self.overflow_queue)
+        overflow_size = self.pending_overflow_events()
         
         # Determine health status
         if current_size >= self.maxsize * 0.9:
@@ -268,7 +444,8 @@ class EventQueue:
             "overflow_size": overflow_size,
             "utilization_percent": round((current_size / self.maxsize) * 100, 2),
             "last_health_check": self.last_health_check.isoformat(),
-            "persistence_enabled": self.persistence_path is not None
+            "persistence_enabled": self.persistence_path is not None,
+            "backpressure_active": self.backpressure_active
         }
     
     def configure_maxsize(self, maxsize: int):
@@ -286,14 +463,23 @@ class EventQueue:
             self._ensure_persistence_directory()
             logger.info(f"Enabled queue persistence at {persistence_path}")
         else:
+            self.close()
             logger.info("Disabled queue persistence")
     
+    def close(self):
+        """fsync and close the spill log (unreplayed events stay on disk)"""
+        if self.spill_log is not None:
+            self.spill_log.close()
+            self.spill_log = None
+    
     def reset_statistics(self):
         """Reset queue statistics"""
         self.total_events_received = 0
         self.total_events_processed = 0
         self.total_events_dropped = 0
         self.overflow_events = 0
+        self.spilled_events = 0
+        self.replayed_events = 0
         self.queue_size_history.clear()
         self.processing_rate_history.clear()
         self.last_processing_time = None
@@ -0,0 +1,68 @@
+"""
+Fast JSON encoding/decoding for the WebSocket hot path
+
+Every Home Assistant frame is decoded once in the WebSocket client and the
+attributes of every state_changed event are re-encoded once for InfluxDB.
+Both run through orjson when it is installed (several times faster than the
+standard library and without intermediate str objects) and fall back to the
+json module otherwise.
+"""
+
+import json
+import logging
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    # Fallback for environments without orjson
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Decode errors raised by the active backend (orjson.JSONDecodeError subclasses ValueError)
+DecodeError = orjson.JSONDecodeError if orjson is not None else json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """
+    Decode a JSON document
+
+    Args:
+        data: JSON text or UTF-8 bytes (WebSocket frame payload)
+
+    Returns:
+        Decoded object
+
+    Raises:
+        DecodeError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """
+    Encode an object as compact JSON text
+
+    Values that are not JSON serializable are encoded with str(), as with
+    json.dumps(obj, default=str).
+
+    Args:
+        obj: Object to encode
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str).decode("utf-8")
+        except TypeError:
+            # Non-str dict keys or integers beyond 64 bit
+            pass
+    return json.dumps(obj, default=str, separators=(",", ":"))
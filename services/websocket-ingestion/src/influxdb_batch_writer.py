@@ -27,7 +27,8 @@ class InfluxDBBatchWriter:
                  batch_size: int = 1000,
                  batch_timeout: float = 5.0,
                  max_retries: int = 3,
-                 retry_delay: float = 1.0):
+                 retry_delay: float = 1.0,
+                 overflow_queue=None):
         """
         Initialize InfluxDB batch writer
         
@@ -37,12 +38,16 @@ class InfluxDBBatchWriter:
             batch_timeout: Maximum time to wait before processing partial batch (seconds)
             max_retries: Maximum number of retry attempts
             retry_delay: Delay between retry attempts (seconds)
+            overflow_queue: Optional EventQueue; batches that still fail after
+                the retries are spilled to it as line protocol and replayed
+                once a write succeeds again
         """
         self.connection_manager = connection_manager
         self.batch_size = batch_size
         self.batch_timeout = batch_timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.overflow_queue = overflow_queue
         
         # Schema for point creation
         self.schema = InfluxDBSchema()
@@ -56,7 +61,10 @@ class InfluxDBBatchWriter:
         self.total_batches_written = 0
         self.total_points_written = 0
         self.total_points_failed = 0
+        self.total_points_spilled = 0
+        self.total_points_replayed = 0
         self.processing_start_time = datetime.now()
+        self.replaying = False
         
         # Performance monitoring
         self.batch_write_times: deque = deque(maxlen=100)
@@ -189,6 +197,9 @@ class InfluxDBBatchWriter:
                     if self.current_batch:
                         await self._process_current_batch()
                 
+                # Retry spilled points even when no new events arrive
+                await self.replay_spilled()
+                
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -220,6 +231,7 @@ class InfluxDBBatchWriter:
             self.total_points_written += len(batch_to_process)
         else:
             self.total_points_failed += len(batch_to_process)
+            await self._spill_batch(batch_to_process)
         
         # Calculate write rate
         if write_time > 0:
@@ -281,6 +293,73 @@ class InfluxDBBatchWriter:
         
         return False
     
+    async def spill_event(self, event_data: Dict[str, Any]) -> bool:
+        """
+        Spill an event that could not be queued (e.g. processing queue full)
+        
+        Args:
+            event_data: Event data
+            
+        Returns:
+            True if the event was kept for replay, False otherwise
+        """
+        if self.overflow_queue is None:
+            return False
+        
+        line = self.schema.create_event_line(event_data)
+        if line is None:
+            return False
+        
+        if await self.overflow_queue.spill(line):
+            self.total_points_spilled += 1
+            return True
+        return False
+    
+    async def _spill_batch(self, batch: List[Point]):
+        """Spill the valid points of a failed batch as line protocol"""
+        if self.overflow_queue is None:
+            return
+        
+        spilled = 0
+        for point in batch:
+            if self.schema.validate_point(point)[0] and await self.overflow_queue.spill(point.to_line_protocol()):
+                spilled += 1
+        
+        self.total_points_spilled += spilled
+        logger.warning(f"Spilled {spilled} of {len(batch)} points from a failed batch for replay")
+    
+    async def replay_spilled(self) -> int:
+        """
+        Write spilled points back once InfluxDB accepts writes again
+        
+        Each replayed batch is acknowledged in the spill log only after
+        the write succeeds; a failed write leaves it for the next attempt.
+        
+        Returns:
+            Number of points replayed
+        """
+        if self.overflow_queue is None or self.replaying or not self.overflow_queue.pending_overflow_events():
+            return 0
+        
+        self.replaying = True
+        try:
+            replayed = await self.overflow_queue.replay_spilled(self._write_spilled, batch_size=self.batch_size)
+        finally:
+            self.replaying = False
+        
+        self.total_points_replayed += replayed
+        return replayed
+    
+    async def _write_spilled(self, queue_items: List[Dict[str, Any]]) -> bool:
+        """Write one batch of spilled line protocol records"""
+        lines = self.schema.create_lines_from_spilled(queue_items)
+        if not lines:
+            return True
+        success = await self.connection_manager.write_points(lines)
+        if success:
+            self.total_points_written += len(lines)
+        return success
+    
     def add_error_callback(self, callback: Callable):
         """Add error callback"""
         self.error_callbacks.append(callback)
@@ -355,6 +434,9 @@ class InfluxDBBatchWriter:
             "total_batches_written": self.total_batches_written,
             "total_points_written": self.total_points_written,
             "total_points_failed": self.total_points_failed,
+            "total_points_spilled": self.total_points_spilled,
+            "total_points_replayed": self.total_points_replayed,
+            "spilled_points_pending": self.overflow_queue.pending_overflow_events() if self.overflow_queue else 0,
             "success_rate": round(success_rate, 2),
             "average_batch_size": round(avg_batch_size, 2),
             "average_write_time_ms": round(avg_write_time * 1000, 2),
@@ -371,6 +453,8 @@ class InfluxDBBatchWriter:
         self.total_batches_written = 0
         self.total_points_written = 0
         self.total_points_failed = 0
+        self.total_points_spilled = 0
+        self.total_points_replayed = 0
         self.processing_start_time = datetime.now()
         self.batch_write_times.clear()
         self.batch_sizes.clear()
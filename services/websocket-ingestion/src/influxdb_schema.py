@@ -30,6 +30,12 @@ from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import re
 
+try:
+    import fast_json
+except ImportError:
+    # Imported as part of the src package (tests)
+    from . import fast_json
+
 try:
     from influxdb_client import Point, WritePrecision
 except ImportError:
@@ -144,6 +150,112 @@ class InfluxDBSchema:
             logger.error(f"Error creating event point: {e}")
             return None
     
+    def create_event_line(self, event_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Encode a Home Assistant event directly as InfluxDB line protocol
+        
+        Used by the unified ingestion pipeline to skip Point construction and
+        the per-point validation pass in the batch writer. Tags and fields
+        mirror create_event_point; the state field is required, matching
+        validate_point.
+        
+        Args:
+            event_data: Processed event data
+            
+        Returns:
+            Line protocol string (nanosecond precision) or None if invalid
+        """
+        try:
+            event_type = event_data.get("event_type")
+            entity_id = event_data.get("entity_id")
+            
+            if not event_type or not entity_id or "." not in entity_id:
+                return None
+            
+            new_state = event_data.get("new_state")
+            old_state = event_data.get("old_state")
+            
+            # Processed events keep the original HA state objects
+            if isinstance(new_state, dict):
+                attributes = new_state.get("attributes") or {}
+                state_value = new_state.get("state")
+            else:
+                attributes = event_data.get("attributes") or {}
+                state_value = new_state
+            if isinstance(old_state, dict):
+                old_state = old_state.get("state")
+            
+            if state_value is None:
+                return None
+            
+            # Tags (sorted by key, as recommended for write performance)
+            tags = {
+                self.TAG_ENTITY_ID: entity_id,
+                self.TAG_DOMAIN: entity_id.split('.', 1)[0],
+                self.TAG_EVENT_TYPE: event_type,
+            }
+            if attributes.get("device_class"):
+                tags[self.TAG_DEVICE_CLASS] = attributes["device_class"]
+            if attributes.get("area"):
+                tags[self.TAG_AREA] = attributes["area"]
+            if event_data.get("device_id"):
+                tags[self.TAG_DEVICE_ID] = event_data["device_id"]
+            if event_data.get("area_id"):
+                tags[self.TAG_AREA_ID] = event_data["area_id"]
+            
+            tag_part = ",".join(
+                f"{_escape_key(key)}={_escape_key(str(value))}"
+                for key, value in sorted(tags.items())
+            )
+            
+            # Fields
+            fields = [f"{self.FIELD_STATE}={_quote_field(str(state_value))}"]
+            if old_state is not None:
+                fields.append(f"{self.FIELD_OLD_STATE}={_quote_field(str(old_state))}")
+            if attributes:
+                fields.append(f"{self.FIELD_ATTRIBUTES}={_quote_field(fast_json.dumps(attributes))}")
+            for field_key, data_key in (
+                (self.FIELD_CONTEXT_ID, "context_id"),
+                (self.FIELD_CONTEXT_PARENT_ID, "context_parent_id"),
+                (self.FIELD_CONTEXT_USER_ID, "context_user_id"),
+            ):
+                value = event_data.get(data_key)
+                if value:
+                    fields.append(f"{field_key}={_quote_field(str(value))}")
+            duration = event_data.get("duration_in_state")
+            if duration is not None:
+                fields.append(f"{self.FIELD_DURATION_IN_STATE}={float(duration)!r}")
+            
+            return (
+                f"{self.MEASUREMENT_EVENTS},{tag_part} {','.join(fields)} "
+                f"{_timestamp_ns(event_data.get('time_fired'))}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error creating event line: {e}")
+            return None
+    
+    def create_lines_from_spilled(self, queue_items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Line protocol records for spilled queue items
+        
+        Writers spill line protocol; items left by older versions hold the
+        event itself and are encoded here.
+        
+        Args:
+            queue_items: Queue items from EventQueue.replay_spilled
+            
+        Returns:
+            Line protocol records (events that cannot be encoded are skipped)
+        """
+        lines = []
+        for item in queue_items:
+            data = item.get("data")
+            line = data if isinstance(data, str) else self.create_event_line(data or {})
+            if line:
+                lines.append(line)
+        return lines
+    
     def create_weather_point(self, weather_data: Dict[str, Any], location: str) -> Optional[Point]:
         """
         Create InfluxDB Point for weather data
@@ -430,5 +542,30 @@ class InfluxDBSchema:
             return False, errors
 
 
+def _escape_key(value: str) -> str:
+    """Escape a measurement, tag key/value or field key for line protocol"""
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ").replace("\n", "\\n")
+
+
+def _quote_field(value: str) -> str:
+    """Quote a string field value for line protocol"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _timestamp_ns(timestamp: Any) -> int:
+    """Convert an HA timestamp to nanoseconds, truncated to millisecond precision"""
+    dt = None
+    if isinstance(timestamp, datetime):
+        dt = timestamp
+    elif isinstance(timestamp, str) and timestamp:
+        try:
+            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        except ValueError:
+            logger.warning(f"Invalid timestamp format: {timestamp}, using current time")
+    if dt is None:
+        dt = datetime.now()
+    return int(dt.timestamp() * 1000) * 1_000_000
+
+
 # Import json for attributes serialization
 import json
@@ -0,0 +1,431 @@
+"""
+Unified Ingestion Pipeline for High-Volume Event Processing
+
+Single-stage alternative to the BatchProcessor -> AsyncEventProcessor ->
+InfluxDBBatchWriter chain. Events are encoded to line protocol as soon as they
+arrive, held in one bounded ring buffer and flushed by a single policy
+(size, age or bytes, whichever is reached first).
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from influxdb_schema import InfluxDBSchema
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        # Last slot counts observations above the largest bucket
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total_count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        """Record a latency observation"""
+        ms = seconds * 1000
+        self.counts[bisect_left(self.buckets_ms, ms)] += 1
+        self.total_count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile as the upper bound of the matching bucket"""
+        if self.total_count == 0:
+            return 0.0
+
+        rank = self.total_count * pct / 100
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return float(self.buckets_ms[index]) if index < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get histogram snapshot"""
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.buckets_ms, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+
+        return {
+            "count": self.total_count,
+            "average_ms": round(self.total_ms / self.total_count, 2) if self.total_count else 0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets
+        }
+
+    def reset(self):
+        """Reset histogram"""
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total_count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class IngestionPipeline:
+    """Bounded single-buffer pipeline from processed event to InfluxDB write"""
+
+    def __init__(self,
+                 connection_manager,
+                 capacity: int = 20000,
+                 flush_size: int = 1000,
+                 flush_interval: float = 1.0,
+                 flush_bytes: int = 1024 * 1024,
+                 max_retries: int = 3,
+                 retry_delay: float = 1.0,
+                 overflow_queue=None):
+        """
+        Initialize ingestion pipeline
+
+        Args:
+            connection_manager: InfluxDB connection manager (write_points accepts line protocol)
+            capacity: Maximum number of encoded events held in the ring buffer
+            flush_size: Flush when this many events are buffered
+            flush_interval: Flush when the oldest buffered event is this old (seconds)
+            flush_bytes: Flush when buffered line protocol reaches this size
+            max_retries: Maximum number of write attempts per flush
+            retry_delay: Base delay between write attempts (seconds)
+            overflow_queue: Optional EventQueue; lines of a flush that still
+                fails after the retries are spilled to it and replayed once a
+                write succeeds again
+        """
+        if capacity < flush_size:
+            raise ValueError("capacity must be at least flush_size")
+
+        self.connection_manager = connection_manager
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.overflow_queue = overflow_queue
+
+        self.schema = InfluxDBSchema()
+
+        # Ring buffer of encoded lines; appends are lock-free on the event loop
+        self.buffer: deque = deque()
+        self.buffered_bytes = 0
+        self.oldest_event_time: Optional[float] = None
+
+        # Flush coordination
+        self.flush_needed = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.in_flight_events = 0
+        self.replaying = False
+        self.flush_task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+        # Statistics
+        self.total_events_received = 0
+        self.total_events_encoded = 0
+        self.total_events_rejected = 0
+        self.total_events_written = 0
+        self.total_events_failed = 0
+        self.total_events_spilled = 0
+        self.total_events_replayed = 0
+        self.total_flushes = 0
+        self.flush_reasons: Dict[str, int] = {"size": 0, "bytes": 0, "age": 0, "capacity": 0, "shutdown": 0}
+        self.backpressure_waits = 0
+        self.max_buffer_depth = 0
+        self.processing_start_time = datetime.now()
+
+        # Latency histograms
+        self.encode_latency = LatencyHistogram(buckets_ms=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+        self.flush_latency = LatencyHistogram()
+        self.event_latency = LatencyHistogram()
+
+    async def start(self):
+        """Start the ingestion pipeline"""
+        if self.is_running:
+            logger.warning("Ingestion pipeline is already running")
+            return
+
+        self.is_running = True
+        self.processing_start_time = datetime.now()
+        self.flush_task = asyncio.create_task(self._flush_loop())
+
+        logger.info(
+            f"Started ingestion pipeline with capacity={self.capacity}, flush_size={self.flush_size}, "
+            f"flush_interval={self.flush_interval}s, flush_bytes={self.flush_bytes}"
+        )
+
+    async def stop(self):
+        """Stop the pipeline and flush remaining events"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+
+        if self.flush_task:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+
+        while self.buffer:
+            await self._flush("shutdown")
+
+        logger.info("Stopped ingestion pipeline")
+
+    async def submit(self, event_data: Dict[str, Any]) -> bool:
+        """
+        Encode an event and add it to the ring buffer
+
+        When the buffer is full the caller waits for a flush instead of the
+        event being dropped, so backpressure reaches the WebSocket reader.
+
+        Args:
+            event_data: Processed event data
+
+        Returns:
+            True if the event was buffered, False if it could not be encoded
+        """
+        self.total_events_received += 1
+
+        start = time.perf_counter()
+        line = self.schema.create_event_line(event_data)
+        self.encode_latency.observe(time.perf_counter() - start)
+
+        if line is None:
+            self.total_events_rejected += 1
+            return False
+
+        self.total_events_encoded += 1
+
+        while len(self.buffer) >= self.capacity:
+            self.backpressure_waits += 1
+            await self._flush("capacity")
+
+        if not self.buffer:
+            self.oldest_event_time = time.monotonic()
+        self.buffer.append(line)
+        self.buffered_bytes += len(line) + 1
+
+        depth = len(self.buffer)
+        if depth > self.max_buffer_depth:
+            self.max_buffer_depth = depth
+        if depth >= self.flush_size or self.buffered_bytes >= self.flush_bytes:
+            self.flush_needed.set()
+
+        return True
+
+    async def _flush_loop(self):
+        """Wake on size/bytes threshold or after flush_interval, whichever is first"""
+        while self.is_running:
+            try:
+                timeout = self.flush_interval
+                if self.oldest_event_time is not None:
+                    age = time.monotonic() - self.oldest_event_time
+                    timeout = max(0.0, self.flush_interval - age)
+
+                try:
+                    await asyncio.wait_for(self.flush_needed.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.flush_needed.clear()
+
+                if not self.buffer:
+                    # Retry spilled events even when no new events arrive
+                    await self.replay_spilled()
+                    continue
+
+                if len(self.buffer) >= self.flush_size:
+                    reason = "size"
+                elif self.buffered_bytes >= self.flush_bytes:
+                    reason = "bytes"
+                elif time.monotonic() - self.oldest_event_time >= self.flush_interval:
+                    reason = "age"
+                else:
+                    continue
+
+                await self._flush(reason)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in ingestion pipeline flush loop: {e}")
+
+    async def _flush(self, reason: str):
+        """Drain up to flush_size lines from the buffer and write them"""
+        async with self.flush_lock:
+            if not self.buffer:
+                return
+
+            count = min(len(self.buffer), self.flush_size)
+            batch: List[str] = [self.buffer.popleft() for _ in range(count)]
+            batch_bytes = sum(len(line) + 1 for line in batch)
+            self.buffered_bytes = max(0, self.buffered_bytes - batch_bytes)
+            oldest = self.oldest_event_time
+            self.oldest_event_time = oldest if self.buffer else None
+
+            self.in_flight_events = count
+            self.flush_reasons[reason] = self.flush_reasons.get(reason, 0) + 1
+
+            start = time.perf_counter()
+            success = await self._write_batch(batch)
+            self.flush_latency.observe(time.perf_counter() - start)
+            if oldest is not None:
+                self.event_latency.observe(time.monotonic() - oldest)
+            self.in_flight_events = 0
+
+            self.total_flushes += 1
+            if success:
+                self.total_events_written += count
+            else:
+                self.total_events_failed += count
+                await self._spill_batch(batch)
+
+        if success and reason != "shutdown":
+            await self.replay_spilled()
+
+    async def _spill_batch(self, batch: List[str]):
+        """Keep the lines of a failed flush for replay"""
+        if self.overflow_queue is None:
+            return
+
+        spilled = 0
+        for line in batch:
+            if await self.overflow_queue.spill(line):
+                spilled += 1
+
+        self.total_events_spilled += spilled
+        logger.warning(f"Spilled {spilled} of {len(batch)} events from a failed flush for replay")
+
+    async def replay_spilled(self) -> int:
+        """
+        Write spilled events back once InfluxDB accepts writes again
+
+        Each replayed batch is acknowledged in the spill log only after the
+        write succeeds; a failed write leaves it for the next attempt.
+
+        Returns:
+            Number of events replayed
+        """
+        if self.overflow_queue is None or self.replaying or not self.overflow_queue.pending_overflow_events():
+            return 0
+
+        self.replaying = True
+        try:
+            replayed = await self.overflow_queue.replay_spilled(self._write_spilled, batch_size=self.flush_size)
+        finally:
+            self.replaying = False
+
+        self.total_events_replayed += replayed
+        return replayed
+
+    async def _write_spilled(self, queue_items: List[Dict[str, Any]]) -> bool:
+        """Write one batch of spilled line protocol records (interleaved with live flushes)"""
+        lines = self.schema.create_lines_from_spilled(queue_items)
+        if not lines:
+            return True
+        async with self.flush_lock:
+            success = await self.connection_manager.write_points(lines)
+        if success:
+            self.total_events_written += len(lines)
+        return success
+
+    async def _write_batch(self, batch: List[str]) -> bool:
+        """
+        Write a batch of line protocol records to InfluxDB
+
+        Args:
+            batch: Encoded line protocol records
+
+        Returns:
+            True if batch was written successfully, False otherwise
+        """
+        for attempt in range(self.max_retries):
+            try:
+                if await self.connection_manager.write_points(batch):
+                    logger.debug(f"Ingestion pipeline wrote {len(batch)} events to InfluxDB")
+                    return True
+                logger.error(f"Failed to write batch to InfluxDB (attempt {attempt + 1})")
+            except Exception as e:
+                logger.error(f"Error writing batch (attempt {attempt + 1}): {e}")
+
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(self.retry_delay * (attempt + 1))
+
+        logger.error(f"Failed to write batch of {len(batch)} events after {self.max_retries} attempts")
+        return False
+
+    def get_pipeline_statistics(self) -> Dict[str, Any]:
+        """Get pipeline statistics including per-stage depth and latency histograms"""
+        uptime = (datetime.now() - self.processing_start_time).total_seconds()
+        overall_rate = self.total_events_written / uptime if uptime > 0 else 0
+
+        total_events = self.total_events_written + self.total_events_failed
+        success_rate = (self.total_events_written / total_events * 100) if total_events > 0 else 0
+
+        return {
+            "is_running": self.is_running,
+            "capacity": self.capacity,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+            "flush_bytes": self.flush_bytes,
+            "stages": {
+                "buffer": {
+                    "depth": len(self.buffer),
+                    "bytes": self.buffered_bytes,
+                    "max_depth": self.max_buffer_depth,
+                    "utilization_percent": round(len(self.buffer) / self.capacity * 100, 2)
+                },
+                "write": {
+                    "in_flight": self.in_flight_events
+                }
+            },
+            "total_events_received": self.total_events_received,
+            "total_events_encoded": self.total_events_encoded,
+            "total_events_rejected": self.total_events_rejected,
+            "total_events_written": self.total_events_written,
+            "total_events_failed": self.total_events_failed,
+            "total_events_spilled": self.total_events_spilled,
+            "total_events_replayed": self.total_events_replayed,
+            "spilled_events_pending": self.overflow_queue.pending_overflow_events() if self.overflow_queue else 0,
+            "total_flushes": self.total_flushes,
+            "flush_reasons": dict(self.flush_reasons),
+            "backpressure_waits": self.backpressure_waits,
+            "success_rate": round(success_rate, 2),
+            "processing_rate_per_second": round(overall_rate, 2),
+            "encode_latency": self.encode_latency.snapshot(),
+            "flush_latency": self.flush_latency.snapshot(),
+            "event_latency": self.event_latency.snapshot(),
+            "uptime_seconds": round(uptime, 2)
+        }
+
+    def reset_statistics(self):
+        """Reset pipeline statistics"""
+        self.total_events_received = 0
+        self.total_events_encoded = 0
+        self.total_events_rejected = 0
+        self.total_events_written = 0
+        self.total_events_failed = 0
+        self.total_events_spilled = 0
+        self.total_events_replayed = 0
+        self.total_flushes = 0
+        self.flush_reasons = {key: 0 for key in self.flush_reasons}
+        self.backpressure_waits = 0
+        self.max_buffer_depth = len(self.buffer)
+        self.processing_start_time = datetime.now()
+        self.encode_latency.reset()
+        self.flush_latency.reset()
+        self.event_latency.reset()
+        logger.info("Ingestion pipeline statistics reset")
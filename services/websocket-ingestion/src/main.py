@@ -29,6 +29,7 @@ from connection_manager import ConnectionManager
 from async_event_processor import AsyncEventProcessor
 from event_queue import EventQueue
 from batch_processor import BatchProcessor
+from ingestion_pipeline import IngestionPipeline
 from memory_manager import MemoryManager
 # DEPRECATED (Epic 31, Story 31.4): Weather enrichment removed
 # Weather data now available via weather-api service (Port 8009)
@@ -59,6 +60,7 @@ class WebSocketIngestionService:
         self.event_queue: Optional[EventQueue] = None
         self.batch_processor: Optional[BatchProcessor] = None
         self.memory_manager: Optional[MemoryManager] = None
+        self.ingestion_pipeline: Optional[IngestionPipeline] = None
         
         # DEPRECATED (Epic 31, Story 31.4): Weather enrichment removed
         # Use weather-api service on Port 8009 for weather data
@@ -90,6 +92,18 @@ class WebSocketIngestionService:
         self.batch_timeout = float(os.getenv('BATCH_TIMEOUT', '5.0'))
         self.max_memory_mb = int(os.getenv('MAX_MEMORY_MB', '1024'))
         
+        # Pipeline mode: 'legacy' (BatchProcessor -> AsyncEventProcessor -> InfluxDBBatchWriter)
+        # or 'unified' (single ring buffer, events encoded straight to line protocol)
+        self.pipeline_mode = os.getenv('INGESTION_PIPELINE_MODE', 'legacy').lower()
+        self.pipeline_capacity = int(os.getenv('PIPELINE_CAPACITY', '20000'))
+        self.pipeline_flush_size = int(os.getenv('PIPELINE_FLUSH_SIZE', '1000'))
+        self.pipeline_flush_interval = float(os.getenv('PIPELINE_FLUSH_INTERVAL', '1.0'))
+        self.pipeline_flush_bytes = int(os.getenv('PIPELINE_FLUSH_BYTES', str(1024 * 1024)))
+        
+        # Event queue overflow spill log (disabled when unset)
+        self.event_spill_path = os.getenv('EVENT_QUEUE_SPILL_PATH')
+        self.event_spill_max_mb = int(os.getenv('EVENT_QUEUE_SPILL_MAX_MB', '4096'))
+        
         # Weather enrichment configuration
         self.weather_api_key = os.getenv('WEATHER_API_KEY')
         self.weather_default_location = os.getenv('WEATHER_DEFAULT_LOCATION', 'London,UK')
@@ -128,7 +142,13 @@ class WebSocketIngestionService:
         try:
             # Initialize high-volume processing components
             self.memory_manager = MemoryManager(max_memory_mb=self.max_memory_mb)
-            self.event_queue = EventQueue(maxsize=10000)
+            self.event_queue = EventQueue(
+                maxsize=10000,
+                persistence_path=self.event_spill_path,
+                spill_max_bytes=self.event_spill_max_mb * 1024 * 1024,
+                on_backpressure=self._on_queue_backpressure
+            )
+            await self.event_queue.recover_overflow_events()
             self.batch_processor = BatchProcessor(
                 batch_size=self.batch_size,
                 batch_timeout=self.batch_timeout
@@ -214,7 +234,8 @@ class WebSocketIngestionService:
             self.influxdb_batch_writer = InfluxDBBatchWriter(
                 connection_manager=self.influxdb_manager,
                 batch_size=1000,
-                batch_timeout=5.0
+                batch_timeout=5.0,
+                overflow_queue=self.event_queue
             )
             await self.influxdb_batch_writer.start()
             log_with_context(
@@ -223,13 +244,34 @@ class WebSocketIngestionService:
                 correlation_id=corr_id
             )
             
-            # Register InfluxDB write handler with async event processor
-            self.async_event_processor.add_event_handler(self._write_event_to_influxdb)
-            log_with_context(
-                logger, "INFO", "Registered InfluxDB write handler",
-                operation="handler_registration",
-                correlation_id=corr_id
-            )
+            if self.pipeline_mode == 'unified':
+                # Unified pipeline bypasses the batch processor / async processor chain
+                self.ingestion_pipeline = IngestionPipeline(
+                    connection_manager=self.influxdb_manager,
+                    capacity=self.pipeline_capacity,
+                    flush_size=self.pipeline_flush_size,
+                    flush_interval=self.pipeline_flush_interval,
+                    flush_bytes=self.pipeline_flush_bytes,
+                    overflow_queue=self.event_queue
+                )
+                await self.ingestion_pipeline.start()
+                log_with_context(
+                    logger, "INFO", "Unified ingestion pipeline started",
+                    operation="ingestion_pipeline_startup",
+                    correlation_id=corr_id,
+                    capacity=self.pipeline_capacity,
+                    flush_size=self.pipeline_flush_size
+                )
+            else:
+                # Register InfluxDB write handler with async event processor
+                self.async_event_processor.add_event_handler(self._write_event_to_influxdb)
+                # Events the full processing queue cannot take are spilled for replay
+                self.async_event_processor.overflow_handler = self.influxdb_batch_writer.spill_event
+                log_with_context(
+                    logger, "INFO", "Registered InfluxDB write handler",
+                    operation="handler_registration",
+                    correlation_id=corr_id
+                )
             
             # Initialize connection manager (only if Home Assistant is enabled)
             if self.home_assistant_enabled:
@@ -306,6 +348,10 @@ class WebSocketIngestionService:
         """Stop the service"""
         logger.info("Stopping WebSocket Ingestion Service...")
         
+        # Flush the unified pipeline before InfluxDB is closed
+        if self.ingestion_pipeline:
+            await self.ingestion_pipeline.stop()
+        
         # Stop high-volume processing components
         if self.async_event_processor:
             await self.async_event_processor.stop()
@@ -318,6 +364,10 @@ class WebSocketIngestionService:
         if hasattr(self, 'influxdb_batch_writer') and self.influxdb_batch_writer:
             await self.influxdb_batch_writer.stop()
         
+        # Close the spill log last: a failed final flush is spilled to it
+        if self.event_queue:
+            self.event_queue.close()
+        
         # Stop weather enrichment service
         # DEPRECATED (Epic 31, Story 31.4): Weather enrichment removed
         # if self.weather_enrichment:
@@ -408,6 +458,9 @@ class WebSocketIngestionService:
     
     async def _on_message(self, message):
         """Handle incoming message"""
+        # Sizing the message formats the whole dict; skip it unless DEBUG is on
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         corr_id = get_correlation_id() or generate_correlation_id()
         log_with_context(
             logger, "DEBUG", "Received message from Home Assistant",
@@ -441,8 +494,12 @@ class WebSocketIngestionService:
             # Enrichment happens downstream if needed
             # Original code removed to prevent AttributeError
             
+            # Unified pipeline: encode and buffer directly for InfluxDB
+            if self.ingestion_pipeline:
+                await self.ingestion_pipeline.submit(processed_event)
+            
             # Add to batch processor for high-volume processing
-            if self.batch_processor:
+            elif self.batch_processor:
                 await self.batch_processor.add_event(processed_event)
                 log_with_context(
                     logger, "DEBUG", "Event added to batch processor",
@@ -516,6 +573,11 @@ class WebSocketIngestionService:
                 batch_size=batch_size
             )
     
+    def _on_queue_backpressure(self, active: bool):
+        """Forward event queue backpressure to the connection manager"""
+        if self.connection_manager:
+            self.connection_manager.set_backpressure(active)
+    
     async def _on_error(self, error):
         """Handle error"""
         corr_id = get_correlation_id() or generate_correlation_id()
@@ -531,7 +593,14 @@ class WebSocketIngestionService:
         try:
             # Get processing statistics from async event processor
             processing_stats = {}
-            if self.async_event_processor:
+            if self.ingestion_pipeline:
+                pipeline_stats = self.ingestion_pipeline.get_pipeline_statistics()
+                processing_stats = {
+                    "processing_rate_per_second": pipeline_stats["processing_rate_per_second"],
+                    "processed_events": pipeline_stats["total_events_written"],
+                    "pipeline": pipeline_stats
+                }
+            elif self.async_event_processor:
                 processing_stats = self.async_event_processor.get_processing_statistics()
             
             # Get connection statistics
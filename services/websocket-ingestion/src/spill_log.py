@@ -0,0 +1,323 @@
+"""
+Segment-based Spill Log for Queue Overflow
+
+Append-only on-disk log that absorbs events the in-memory queue cannot hold
+(e.g. while InfluxDB restarts) and hands them back in bulk once the writer
+recovers.
+
+- Records are length-prefixed with a CRC32 so a torn write at a crash is
+  detected and skipped on replay
+- Each record reaches the OS in one write (survives a process crash);
+  fsync is batched by record count or interval (power loss window)
+- The log is split into fixed-size segments; fully replayed segments are
+  deleted, so disk usage follows the backlog
+- Replay maps segments with mmap and reads records in bulk
+- The read position is persisted on commit (at-least-once delivery)
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record header: payload length, CRC32 of payload (little-endian)
+RECORD_HEADER = struct.Struct("<II")
+
+
+class SpillLog:
+    """Append-only segmented log of byte records with a persisted read cursor"""
+
+    SEGMENT_PREFIX = "overflow_events_"
+    SEGMENT_SUFFIX = ".seg"
+    CURSOR_FILE = "overflow_events.cursor"
+
+    def __init__(self,
+                 path: str,
+                 segment_bytes: int = 64 * 1024 * 1024,
+                 max_bytes: int = 4 * 1024 * 1024 * 1024,
+                 fsync_records: int = 512,
+                 fsync_interval: float = 1.0):
+        """
+        Initialize spill log (existing segments are picked up for replay)
+
+        Args:
+            path: Directory holding the segments
+            segment_bytes: Roll to a new segment after this many bytes
+            max_bytes: Maximum unreplayed bytes on disk; appends beyond are rejected
+            fsync_records: fsync after this many unsynced records
+            fsync_interval: fsync when the oldest unsynced record is this old (seconds)
+        """
+        self.path = Path(path)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_records = fsync_records
+        self.fsync_interval = fsync_interval
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # Writer state
+        self._writer = None
+        self._writer_seq: Optional[int] = None
+        self._writer_size = 0
+        self._unsynced_records = 0
+        self._first_unsynced_time: Optional[float] = None
+
+        # Reader state: committed position and in-memory read position
+        self._committed: Tuple[int, int] = (0, 0)
+        self._read: Tuple[int, int] = (0, 0)
+        self._read_records = 0
+
+        # Segment sequence -> size in bytes
+        self._segments: Dict[int, int] = {}
+        self.pending_records = 0
+        self.pending_bytes = 0
+
+        # Statistics
+        self.total_appended = 0
+        self.total_rejected = 0
+        self.total_replayed = 0
+        self.total_fsyncs = 0
+        self.corrupt_records = 0
+
+        self._open()
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.path / f"{self.SEGMENT_PREFIX}{seq:010d}{self.SEGMENT_SUFFIX}"
+
+    def _open(self):
+        """Load the cursor and index segments left by a previous run"""
+        cursor = (0, 0)
+        cursor_path = self.path / self.CURSOR_FILE
+        if cursor_path.exists():
+            try:
+                data = json.loads(cursor_path.read_text())
+                cursor = (int(data["segment"]), int(data["offset"]))
+            except Exception as e:
+                logger.error(f"Unreadable spill log cursor {cursor_path}, replaying from the start: {e}")
+
+        for segment in sorted(self.path.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}")):
+            try:
+                seq = int(segment.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)])
+            except ValueError:
+                continue
+            if seq < cursor[0]:
+                segment.unlink()
+                continue
+            self._segments[seq] = segment.stat().st_size
+
+        if not self._segments:
+            cursor = (cursor[0], 0)
+        elif cursor[0] not in self._segments:
+            cursor = (min(self._segments), 0)
+        self._committed = self._read = cursor
+
+        # Count what is left to replay
+        for seq in sorted(self._segments):
+            start = cursor[1] if seq == cursor[0] else 0
+            for _, _ in self._iter_records(seq, start):
+                self.pending_records += 1
+            self.pending_bytes += max(0, self._segments[seq] - start)
+
+        if self.pending_records:
+            logger.info(f"Spill log at {self.path} holds {self.pending_records} events to replay")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, payload: bytes) -> bool:
+        """
+        Append a record
+
+        Args:
+            payload: Record bytes
+
+        Returns:
+            True if appended, False if the log is full
+        """
+        record_size = RECORD_HEADER.size + len(payload)
+        if self.pending_bytes + record_size > self.max_bytes:
+            self.total_rejected += 1
+            return False
+
+        if self._writer is None or self._writer_size >= self.segment_bytes:
+            self._roll()
+
+        self._writer.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._writer_size += record_size
+        self._segments[self._writer_seq] = self._writer_size
+
+        self.pending_records += 1
+        self.pending_bytes += record_size
+        self.total_appended += 1
+
+        self._unsynced_records += 1
+        if self._first_unsynced_time is None:
+            self._first_unsynced_time = time.monotonic()
+        if (self._unsynced_records >= self.fsync_records or
+                time.monotonic() - self._first_unsynced_time >= self.fsync_interval):
+            self.sync()
+        return True
+
+    def sync(self):
+        """fsync the active segment"""
+        if self._writer is None or not self._unsynced_records:
+            return
+        os.fsync(self._writer.fileno())
+        self.total_fsyncs += 1
+        self._unsynced_records = 0
+        self._first_unsynced_time = None
+
+    def _roll(self):
+        """Close the active segment and start the next one"""
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+        self._writer_seq = max(self._segments) + 1 if self._segments else self._committed[0]
+        self._writer = open(self._segment_path(self._writer_seq), "ab", buffering=0)
+        self._writer_size = 0
+        self._segments[self._writer_seq] = 0
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _iter_records(self, seq: int, offset: int):
+        """Yield (next_offset, payload) from a segment; stops at a torn or corrupt record"""
+        size = self._segments.get(seq, 0)
+        if size <= offset:
+            return
+        with open(self._segment_path(seq), "rb") as f:
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+                while offset + RECORD_HEADER.size <= size:
+                    length, crc = RECORD_HEADER.unpack_from(view, offset)
+                    end = offset + RECORD_HEADER.size + length
+                    if end > size:
+                        break
+                    payload = view[offset + RECORD_HEADER.size:end]
+                    if zlib.crc32(payload) != crc:
+                        self.corrupt_records += 1
+                        logger.error(f"Corrupt record in spill segment {seq} at offset {offset}, skipping segment tail")
+                        break
+                    offset = end
+                    yield offset, payload
+
+    def read(self, max_records: int) -> List[bytes]:
+        """
+        Read the next records after the read position (not yet committed)
+
+        Args:
+            max_records: Maximum number of records to return
+
+        Returns:
+            Record payloads (bytes) in append order
+        """
+        records: List[bytes] = []
+        seq, offset = self._read
+        for segment in sorted(s for s in self._segments if s >= seq):
+            if segment != seq:
+                seq, offset = segment, 0
+            for offset, payload in self._iter_records(seq, offset):
+                records.append(payload)
+                if len(records) >= max_records:
+                    break
+            if len(records) >= max_records:
+                break
+            if seq != self._writer_seq:
+                # Skip a torn tail of a closed segment
+                offset = self._segments[seq]
+
+        self._read = (seq, offset)
+        self._read_records += len(records)
+        return records
+
+    def commit(self):
+        """
+        Mark every record returned by read() since the last commit as delivered
+
+        Persists the read position and deletes fully replayed segments.
+        """
+        if self._read == self._committed:
+            return
+        records, self._read_records = self._read_records, 0
+        old_seq, old_offset = self._committed
+        new_seq, new_offset = self._read
+
+        consumed = 0
+        for seq in sorted(self._segments):
+            if old_seq <= seq < new_seq:
+                consumed += self._segments[seq] - (old_offset if seq == old_seq else 0)
+        consumed += new_offset - (old_offset if new_seq == old_seq else 0)
+
+        self.pending_bytes = max(0, self.pending_bytes - consumed)
+        self.pending_records = max(0, self.pending_records - records)
+        self.total_replayed += records
+        self._committed = self._read
+
+        if not self.pending_records:
+            # Fully replayed: drop every segment, the next append starts a fresh one
+            drop = list(self._segments)
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                self._unsynced_records = 0
+                self._first_unsynced_time = None
+            self._committed = self._read = (max(drop, default=new_seq) + 1, 0)
+        else:
+            drop = [s for s in self._segments if s < new_seq]
+        for seq in drop:
+            self._segment_path(seq).unlink(missing_ok=True)
+            del self._segments[seq]
+
+        self._write_cursor()
+
+    def rewind(self):
+        """Return the read position to the last commit (records will be read again)"""
+        self._read = self._committed
+        self._read_records = 0
+
+    def _write_cursor(self):
+        """Persist the committed position atomically"""
+        cursor_path = self.path / self.CURSOR_FILE
+        tmp_path = cursor_path.with_suffix(".tmp")
+        seq, offset = self._committed
+        tmp_path.write_text(json.dumps({"segment": seq, "offset": offset}))
+        os.replace(tmp_path, cursor_path)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """fsync and close the active segment"""
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+            self._writer = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get spill log statistics"""
+        return {
+            "path": str(self.path),
+            "segments": len(self._segments),
+            "pending_records": self.pending_records,
+            "pending_bytes": self.pending_bytes,
+            "max_bytes": self.max_bytes,
+            "utilization_percent": round(self.pending_bytes / self.max_bytes * 100, 2) if self.max_bytes else 0,
+            "total_appended": self.total_appended,
+            "total_rejected": self.total_rejected,
+            "total_replayed": self.total_replayed,
+            "total_fsyncs": self.total_fsyncs,
+            "corrupt_records": self.corrupt_records
+        }
@@ -11,6 +11,7 @@ from aiohttp import ClientSession, WSMsgType, ClientWebSocketResponse
 from aiohttp.web_exceptions import HTTPException
 import json
 
+import fast_json
 from token_validator import TokenValidator
 
 logger = logging.getLogger(__name__)
@@ -213,13 +214,15 @@ class HomeAssistantWebSocketClient:
             async for msg in self.websocket:
                 if msg.type == WSMsgType.TEXT:
                     try:
-                        data = json.loads(msg.data)
-                        logger.debug(f"Received message: {data}")
+                        data = fast_json.loads(msg.data)
+                        # Only format the message when DEBUG is enabled
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"Received message: {data}")
                         
                         if self.on_message:
                             await self.on_message(data)
                             
-                    except json.JSONDecodeError as e:
+                    except fast_json.DecodeError as e:
                         logger.error(f"Failed to parse message: {e}")
                 elif msg.type == WSMsgType.ERROR:
                     logger.error(f"WebSocket error: {msg.data}")
@@ -224,3 +224,56 @@ class TestEventQueue:
         assert self.queue.overflow_events == 0
         assert len(self.queue.queue_size_history) == 0
         assert len(self.queue.processing_rate_history) == 0
+    
+    @pytest.mark.asyncio
+    async def test_overflow_spill_and_bulk_replay(self):
+        """Test overflow is spilled to disk without loss and replayed in bulk"""
+        signals = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            spill_queue = EventQueue(maxsize=2, persistence_path=temp_dir, on_backpressure=signals.append)
+            
+            for i in range(10):
+                await spill_queue.put({"entity_id": f"sensor.test{i}"})
+            
+            assert spill_queue.spilled_events == 8
+            assert spill_queue.total_events_dropped == 0
+            assert spill_queue.get_health_status()["overflow_size"] == 8
+            assert signals == [True]
+            
+            batches = []
+            
+            async def failing_writer(batch):
+                return False
+            
+            async def writer(batch):
+                batches.append([item["data"]["entity_id"] for item in batch])
+                return True
+            
+            # InfluxDB still down: nothing is acknowledged
+            assert await spill_queue.replay_spilled(failing_writer) == 0
+            assert spill_queue.pending_overflow_events() == 8
+            
+            assert await spill_queue.replay_spilled(writer, batch_size=5) == 8
+            assert batches == [[f"sensor.test{i}" for i in range(2, 7)],
+                               [f"sensor.test{i}" for i in range(7, 10)]]
+            assert spill_queue.pending_overflow_events() == 0
+            assert signals == [True, False]
+            spill_queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_spilled_events_survive_restart(self):
+        """Test events spilled before a restart are served by get after recovery"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            spill_queue = EventQueue(maxsize=1, persistence_path=temp_dir)
+            for i in range(4):
+                await spill_queue.put({"entity_id": f"sensor.test{i}"})
+            spill_queue.close()
+            
+            new_queue = EventQueue(maxsize=10, persistence_path=temp_dir, replay_batch_size=2)
+            assert await new_queue.recover_overflow_events() == 3
+            
+            events = [await new_queue.get_nowait() for _ in range(4)]
+            assert [event["data"]["entity_id"] for event in events[:3]] == ["sensor.test1", "sensor.test2", "sensor.test3"]
+            assert events[3] is None
+            assert new_queue.pending_overflow_events() == 0
+            new_queue.close()
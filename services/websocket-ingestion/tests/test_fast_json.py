@@ -0,0 +1,103 @@
+"""
+Tests for Fast JSON Decoding on the WebSocket Hot Path
+"""
+
+import json
+import logging
+import os
+import sys
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import fast_json
+from websocket_client import HomeAssistantWebSocketClient
+from aiohttp import WSMsgType
+
+
+STATE_CHANGED_FRAME = json.dumps({
+    "id": 1,
+    "type": "event",
+    "event": {
+        "event_type": "state_changed",
+        "time_fired": "2025-10-20T12:00:00.000000+00:00",
+        "origin": "LOCAL",
+        "context": {"id": "ctx-1", "parent_id": None, "user_id": None},
+        "data": {
+            "entity_id": "sensor.kitchen_temperature",
+            "old_state": {"state": "21.4", "attributes": {"unit_of_measurement": "°C"}},
+            "new_state": {
+                "state": "21.5",
+                "attributes": {"unit_of_measurement": "°C", "device_class": "temperature", "friendly_name": "Küche"}
+            }
+        }
+    }
+})
+
+
+class TestFastJson:
+    """Test cases for the fast_json helpers"""
+
+    def test_loads_str_and_bytes(self):
+        """Test text and binary frames decode to the same message"""
+        expected = json.loads(STATE_CHANGED_FRAME)
+
+        assert fast_json.loads(STATE_CHANGED_FRAME) == expected
+        assert fast_json.loads(STATE_CHANGED_FRAME.encode('utf-8')) == expected
+
+    def test_loads_invalid_raises_decode_error(self):
+        """Test invalid JSON raises the backend decode error (a ValueError)"""
+        with pytest.raises(fast_json.DecodeError):
+            fast_json.loads('invalid json')
+        assert issubclass(fast_json.DecodeError, ValueError)
+
+    def test_dumps_round_trip_compact(self):
+        """Test attributes are encoded compactly and round-trip"""
+        attributes = {"friendly_name": "Küche", "brightness": 255, "rgb_color": [255, 0, 0]}
+
+        encoded = fast_json.dumps(attributes)
+
+        assert json.loads(encoded) == attributes
+        assert ", " not in encoded and ": " not in encoded
+
+    def test_dumps_non_serializable_uses_str(self):
+        """Test unsupported values and keys fall back like json.dumps(default=str)"""
+        assert json.loads(fast_json.dumps({"value": {1}})) == {"value": "{1}"}
+        assert json.loads(fast_json.dumps({1: "int key"})) == {"1": "int key"}
+
+
+class TestListenFastPath:
+    """Test cases for HomeAssistantWebSocketClient.listen decoding"""
+
+    def _client_with_frames(self, *frames):
+        client = HomeAssistantWebSocketClient("http://localhost:8123", "token")
+        client.is_connected = True
+        client.is_authenticated = True
+
+        websocket = MagicMock()
+        websocket.__aiter__.return_value = [MagicMock(type=WSMsgType.TEXT, data=frame) for frame in frames]
+        client.websocket = websocket
+        client.on_message = AsyncMock()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_listen_decodes_frames(self):
+        """Test frames are decoded and delivered; invalid frames are skipped"""
+        client = self._client_with_frames(STATE_CHANGED_FRAME, 'invalid json', '{"type": "pong", "id": 2}')
+
+        await client.listen()
+
+        delivered = [call.args[0] for call in client.on_message.call_args_list]
+        assert delivered == [json.loads(STATE_CHANGED_FRAME), {"type": "pong", "id": 2}]
+
+    @pytest.mark.asyncio
+    async def test_listen_does_not_format_message_without_debug(self, caplog):
+        """Test the received-message debug log is skipped when DEBUG is off"""
+        client = self._client_with_frames(STATE_CHANGED_FRAME)
+
+        with caplog.at_level(logging.INFO, logger="websocket_client"):
+            await client.listen()
+
+        assert not any("Received message" in record.getMessage() for record in caplog.records)
+        client.on_message.assert_awaited_once()
@@ -0,0 +1,265 @@
+"""
+Tests for Unified Ingestion Pipeline
+"""
+
+import os
+import sys
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ingestion_pipeline import IngestionPipeline, LatencyHistogram
+from influxdb_schema import InfluxDBSchema
+from influxdb_batch_writer import InfluxDBBatchWriter
+from event_queue import EventQueue
+
+
+def make_event(entity_id="light.living_room", state="on", **extra):
+    """Build a processed state_changed event"""
+    event = {
+        "event_type": "state_changed",
+        "entity_id": entity_id,
+        "time_fired": "2025-01-01T12:00:00.123+00:00",
+        "new_state": {"state": state, "attributes": {"device_class": "light", "friendly_name": "Living Room"}},
+        "old_state": {"state": "off", "attributes": {}},
+        "context_id": "abc123",
+    }
+    event.update(extra)
+    return event
+
+
+class TestEventLineEncoding:
+    """Test cases for InfluxDBSchema.create_event_line"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.schema = InfluxDBSchema()
+
+    def test_basic_line(self):
+        """Test encoding a state_changed event"""
+        line = self.schema.create_event_line(make_event())
+
+        assert line.startswith("home_assistant_events,device_class=light,domain=light,entity_id=light.living_room,event_type=state_changed ")
+        assert 'state_value="on"' in line
+        assert 'previous_state="off"' in line
+        assert 'context_id="abc123"' in line
+        assert line.endswith(" 1735732800123000000")
+
+    def test_escaping(self):
+        """Test tag and field escaping"""
+        event = make_event(state='say "hi"', area_id="living room,1")
+        line = self.schema.create_event_line(event)
+
+        assert "area_id=living\\ room\\,1" in line
+        assert 'state_value="say \\"hi\\""' in line
+
+    def test_missing_state_rejected(self):
+        """Test events without a state are rejected (entity removal)"""
+        event = make_event()
+        event["new_state"] = None
+
+        assert self.schema.create_event_line(event) is None
+
+    def test_invalid_entity_rejected(self):
+        """Test events without a valid entity_id are rejected"""
+        assert self.schema.create_event_line(make_event(entity_id="invalid")) is None
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram class"""
+
+    def test_observe_and_percentiles(self):
+        """Test bucket counts and percentile approximation"""
+        histogram = LatencyHistogram(buckets_ms=(1, 10, 100))
+        for _ in range(9):
+            histogram.observe(0.0005)
+        histogram.observe(0.05)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 10
+        assert snapshot["buckets"]["le_1ms"] == 9
+        assert snapshot["buckets"]["le_100ms"] == 1
+        assert snapshot["p50_ms"] == 1.0
+        assert snapshot["p99_ms"] == 100.0
+
+
+class TestIngestionPipeline:
+    """Test cases for IngestionPipeline class"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.connection_manager = Mock()
+        self.connection_manager.write_points = AsyncMock(return_value=True)
+
+    def test_capacity_validation(self):
+        """Test capacity must hold at least one flush"""
+        with pytest.raises(ValueError):
+            IngestionPipeline(self.connection_manager, capacity=10, flush_size=100)
+
+    @pytest.mark.asyncio
+    async def test_size_flush(self):
+        """Test flushing when flush_size is reached"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=100, flush_size=5, flush_interval=60)
+        await pipeline.start()
+
+        for i in range(5):
+            assert await pipeline.submit(make_event(entity_id=f"light.l{i}"))
+        await asyncio.sleep(0.05)
+
+        self.connection_manager.write_points.assert_called_once()
+        written = self.connection_manager.write_points.call_args[0][0]
+        assert len(written) == 5
+        assert all(isinstance(line, str) for line in written)
+        assert pipeline.flush_reasons["size"] == 1
+
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_age_flush(self):
+        """Test flushing partial batches after flush_interval"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=100, flush_size=50, flush_interval=0.05)
+        await pipeline.start()
+
+        await pipeline.submit(make_event())
+        await asyncio.sleep(0.2)
+
+        assert pipeline.total_events_written == 1
+        assert pipeline.flush_reasons["age"] == 1
+
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_bytes_flush(self):
+        """Test flushing when buffered bytes exceed flush_bytes"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=100, flush_size=50,
+                                     flush_interval=60, flush_bytes=200)
+        await pipeline.start()
+
+        await pipeline.submit(make_event())
+        await pipeline.submit(make_event())
+        await asyncio.sleep(0.05)
+
+        assert pipeline.flush_reasons["bytes"] == 1
+
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_full(self):
+        """Test submit flushes instead of dropping when the buffer is full"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=3, flush_size=3, flush_interval=60)
+
+        for _ in range(4):
+            assert await pipeline.submit(make_event())
+
+        assert pipeline.backpressure_waits == 1
+        assert pipeline.total_events_written == 3
+        assert len(pipeline.buffer) == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_remaining(self):
+        """Test remaining events are flushed on stop"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=100, flush_size=50, flush_interval=60)
+        await pipeline.start()
+
+        await pipeline.submit(make_event())
+        await pipeline.stop()
+
+        assert pipeline.total_events_written == 1
+        assert pipeline.flush_reasons["shutdown"] == 1
+
+    @pytest.mark.asyncio
+    async def test_write_failure_counted(self):
+        """Test failed writes are retried and counted"""
+        self.connection_manager.write_points = AsyncMock(return_value=False)
+        pipeline = IngestionPipeline(self.connection_manager, capacity=10, flush_size=1,
+                                     flush_interval=60, retry_delay=0)
+
+        await pipeline.submit(make_event())
+        await pipeline._flush("size")
+
+        assert self.connection_manager.write_points.call_count == 3
+        assert pipeline.total_events_failed == 1
+
+    @pytest.mark.asyncio
+    async def test_statistics(self):
+        """Test per-stage depth and histogram statistics"""
+        pipeline = IngestionPipeline(self.connection_manager, capacity=100, flush_size=50, flush_interval=60)
+        await pipeline.submit(make_event())
+        await pipeline.submit({"event_type": "state_changed"})
+
+        stats = pipeline.get_pipeline_statistics()
+        assert stats["stages"]["buffer"]["depth"] == 1
+        assert stats["stages"]["write"]["in_flight"] == 0
+        assert stats["total_events_rejected"] == 1
+        assert stats["encode_latency"]["count"] == 2
+        assert "flush_latency" in stats
+
+
+class FlakyWriter:
+    """InfluxDB stand-in that fails until recovered and records written lines"""
+
+    def __init__(self):
+        self.available = False
+        self.written = []
+
+    async def write_points(self, points):
+        if not self.available:
+            return False
+        self.written.extend(p if isinstance(p, str) else p.to_line_protocol() for p in points)
+        return True
+
+
+class TestSpillReplay:
+    """Test failed writes are spilled and replayed once InfluxDB recovers"""
+
+    @pytest.mark.asyncio
+    async def test_pipeline_loses_no_events(self, tmp_path):
+        """Test a flush failing during an outage is replayed after recovery"""
+        influxdb = FlakyWriter()
+        overflow = EventQueue(maxsize=1, persistence_path=str(tmp_path))
+        pipeline = IngestionPipeline(influxdb, capacity=10, flush_size=2, flush_interval=60,
+                                     max_retries=1, overflow_queue=overflow)
+
+        for i in range(5):
+            await pipeline.submit(make_event(entity_id=f"light.l{i}"))
+        await pipeline._flush("size")
+        await pipeline._flush("size")
+
+        assert pipeline.total_events_spilled == 4
+        assert overflow.pending_overflow_events() == 4
+
+        influxdb.available = True
+        await pipeline._flush("size")
+
+        assert overflow.pending_overflow_events() == 0
+        assert sorted(line.split(",entity_id=")[1].split(",")[0] for line in influxdb.written) == [
+            f"light.l{i}" for i in range(5)
+        ]
+        assert pipeline.get_pipeline_statistics()["total_events_replayed"] == 4
+        overflow.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_writer_loses_no_events(self, tmp_path):
+        """Test a batch failing after its retries is replayed by the writer once InfluxDB recovers"""
+        influxdb = FlakyWriter()
+        overflow = EventQueue(maxsize=1, persistence_path=str(tmp_path))
+        writer = InfluxDBBatchWriter(influxdb, batch_size=3, max_retries=1, overflow_queue=overflow)
+
+        for i in range(3):
+            assert await writer.write_event(make_event(entity_id=f"light.l{i}"))
+        assert await writer.spill_event(make_event(entity_id="light.queue_full"))
+
+        assert writer.total_points_failed == 3
+        assert overflow.pending_overflow_events() == 4
+        assert await writer.replay_spilled() == 0
+
+        influxdb.available = True
+        assert await writer.replay_spilled() == 4
+
+        assert overflow.pending_overflow_events() == 0
+        assert len(influxdb.written) == 4
+        assert writer.get_writing_statistics()["total_points_replayed"] == 4
+        overflow.close()
+
@@ -6,6 +6,9 @@ Shared InfluxDB client used by admin-api and data-api for querying time-series d
 import os
 import logging
 import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
@@ -23,8 +26,14 @@ logger = logging.getLogger(__name__)
 class InfluxDBQueryClient:
     """InfluxDB client for querying time-series data"""
     
-    def __init__(self):
-        """Initialize InfluxDB client configuration"""
+    def __init__(self, max_concurrent_queries: Optional[int] = None):
+        """
+        Initialize InfluxDB client configuration
+        
+        Args:
+            max_concurrent_queries: Maximum queries running at once
+                (default: INFLUXDB_MAX_CONCURRENT_QUERIES or 8)
+        """
         self.url = os.getenv("INFLUXDB_URL", "http://influxdb:8086")
         self.token = os.getenv("INFLUXDB_TOKEN")
         self.org = os.getenv("INFLUXDB_ORG", "homeiq")
@@ -33,11 +42,26 @@ class InfluxDBQueryClient:
         self.client: Optional[InfluxDBClient] = None
         self.query_api: Optional[QueryApi] = None
         
+        # Queries run on a bounded executor so a slow Flux query never blocks
+        # the event loop and cannot starve other requests of threads
+        self.max_concurrent_queries = max_concurrent_queries or int(
+            os.getenv("INFLUXDB_MAX_CONCURRENT_QUERIES", "8")
+        )
+        self.slow_query_ms = float(os.getenv("INFLUXDB_SLOW_QUERY_MS", "1000"))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        
         # Performance tracking
         self.query_count = 0
         self.error_count = 0
         self.avg_query_time_ms = 0.0
         self.is_connected = False
+        self.in_flight_queries = 0
+        self.waiting_queries = 0
+        self.slow_query_count = 0
+        self.query_stats: Dict[str, Dict[str, float]] = {}
+        self.recent_query_times_ms: deque = deque(maxlen=1000)
     
     async def connect(self) -> bool:
         """
@@ -55,13 +79,19 @@ class InfluxDBQueryClient:
                 url=self.url,
                 token=self.token,
                 org=self.org,
-                timeout=30000  # 30 seconds
+                timeout=30000,  # 30 seconds
+                connection_pool_maxsize=self.max_concurrent_queries
             )
             
             # Test connection
             await self._test_connection()
             
             self.query_api = self.client.query_api()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_queries,
+                    thread_name_prefix="influxdb-query"
+                )
             self.is_connected = True
             
             logger.info(f"Connected to InfluxDB at {self.url}")
@@ -72,6 +102,26 @@ class InfluxDBQueryClient:
             self.is_connected = False
             return False
     
+    async def ensure_connected(self) -> bool:
+        """
+        Connect once and reuse the connection for the process lifetime
+        
+        Concurrent callers wait for the same connection attempt.
+        
+        Returns:
+            True if connected, False otherwise
+        """
+        if self.is_connected:
+            return True
+        
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        
+        async with self._connect_lock:
+            if self.is_connected:
+                return True
+            return await self.connect()
+    
     async def _test_connection(self):
         """Test InfluxDB connection using health check endpoint"""
         import aiohttp
@@ -111,7 +161,7 @@ from(bucket: "{self.bucket}")
     |> sum()
 '''
         
-        result = await self._execute_query(query)
+        result = await self._execute_query(query, name="event_statistics")
         
         # Calculate events per minute
         time_seconds = self._period_to_seconds(period)
@@ -155,8 +205,8 @@ from(bucket: "{self.bucket}")
     |> sum()
 '''
         
-        total_result = await self._execute_query(total_query)
-        error_result = await self._execute_query(error_query)
+        total_result = await self._execute_query(total_query, name="error_rate_total")
+        error_result = await self._execute_query(error_query, name="error_rate_errors")
         
         total = sum(r.get("_value", 0) for r in total_result)
         errors = sum(r.get("_value", 0) for r in error_result)
@@ -193,7 +243,7 @@ from(bucket: "{self.bucket}")
     |> last()
 '''
         
-        result = await self._execute_query(query)
+        result = await self._execute_query(query, name="service_metrics")
         
         if not result:
             return {"error": f"No data found for service {service_name}"}
@@ -231,7 +281,7 @@ from(bucket: "{self.bucket}")
     |> aggregateWindow(every: 1m, fn: mean, createEmpty: false)
 '''
         
-        result = await self._execute_query(query)
+        result = await self._execute_query(query, name="all_service_statistics")
         
         # Group by service
         services = {}
@@ -281,7 +331,7 @@ from(bucket: "{self.bucket}")
     |> aggregateWindow(every: {window}, fn: count, createEmpty: false)
 '''
         
-        result = await self._execute_query(query)
+        result = await self._execute_query(query, name="event_trends")
         
         trends = []
         for record in result:
@@ -302,55 +352,134 @@ from(bucket: "{self.bucket}")
             "window": window
         }
     
-    async def _execute_query(self, query: str) -> List[Dict[str, Any]]:
+    async def query(self, query: str, name: str = "query"):
         """
-        Execute InfluxDB query and return results
+        Execute a Flux query off the event loop and return the raw tables
         
         Args:
             query: Flux query string
+            name: Query name used for per-query timing metrics
         
         Returns:
-            List of result dictionaries
+            List of FluxTable results
         """
         if not self.query_api:
             raise Exception("InfluxDB client not connected")
         
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        
+        self.waiting_queries += 1
         try:
-            start_time = datetime.now()
-            
-            # Execute query in thread pool (InfluxDB client is synchronous)
-            result = await asyncio.to_thread(
-                self.query_api.query,
-                query=query,
-                org=self.org
+            await self._semaphore.acquire()
+        finally:
+            self.waiting_queries -= 1
+        
+        self.in_flight_queries += 1
+        start_time = time.perf_counter()
+        try:
+            # Execute query in the bounded pool (InfluxDB client is synchronous)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor,
+                lambda: self.query_api.query(query=query, org=self.org)
             )
-            
-            # Track performance
-            query_time = (datetime.now() - start_time).total_seconds() * 1000
-            self.query_count += 1
-            
-            # Update average query time
-            if self.query_count == 1:
-                self.avg_query_time_ms = query_time
-            else:
-                self.avg_query_time_ms = (
-                    (self.avg_query_time_ms * (self.query_count - 1) + query_time) 
-                    / self.query_count
-                )
-            
-            # Convert to list of dictionaries
-            data = []
-            for table in result:
-                for record in table.records:
-                    data.append(record.values)
-            
-            logger.debug(f"Query returned {len(data)} records in {query_time:.2f}ms")
-            return data
+            self._record_query_time(name, (time.perf_counter() - start_time) * 1000)
+            return result
             
         except Exception as e:
             self.error_count += 1
-            logger.error(f"Error executing query: {e}")
+            self._record_query_time(name, (time.perf_counter() - start_time) * 1000, failed=True)
+            logger.error(f"Error executing query '{name}': {e}")
             raise
+        finally:
+            self.in_flight_queries -= 1
+            self._semaphore.release()
+    
+    async def _execute_query(self, query: str, name: str = "query") -> List[Dict[str, Any]]:
+        """
+        Execute InfluxDB query and return results
+        
+        Args:
+            query: Flux query string
+            name: Query name used for per-query timing metrics
+        
+        Returns:
+            List of result dictionaries
+        """
+        result = await self.query(query, name=name)
+        
+        # Convert to list of dictionaries
+        data = []
+        for table in result:
+            for record in table.records:
+                data.append(record.values)
+        
+        logger.debug(f"Query '{name}' returned {len(data)} records")
+        return data
+    
+    def _record_query_time(self, name: str, query_time: float, failed: bool = False):
+        """Track overall and per-query timing"""
+        self.query_count += 1
+        self.recent_query_times_ms.append(query_time)
+        
+        # Update average query time
+        if self.query_count == 1:
+            self.avg_query_time_ms = query_time
+        else:
+            self.avg_query_time_ms = (
+                (self.avg_query_time_ms * (self.query_count - 1) + query_time) 
+                / self.query_count
+            )
+        
+        stats = self.query_stats.setdefault(
+            name, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        )
+        stats["count"] += 1
+        stats["total_ms"] += query_time
+        stats["last_ms"] = query_time
+        stats["max_ms"] = max(stats["max_ms"], query_time)
+        if failed:
+            stats["errors"] += 1
+        
+        if query_time >= self.slow_query_ms:
+            self.slow_query_count += 1
+            logger.warning(f"Slow InfluxDB query '{name}': {query_time:.0f}ms")
+    
+    def get_query_metrics(self) -> Dict[str, Any]:
+        """
+        Get concurrency and per-query timing metrics
+        
+        Returns:
+            Dictionary with pool usage, latency percentiles and per-query stats
+        """
+        times = sorted(self.recent_query_times_ms)
+        
+        def percentile(pct: float) -> float:
+            if not times:
+                return 0.0
+            return round(times[min(len(times) - 1, int(len(times) * pct / 100))], 2)
+        
+        return {
+            "max_concurrent_queries": self.max_concurrent_queries,
+            "in_flight_queries": self.in_flight_queries,
+            "waiting_queries": self.waiting_queries,
+            "slow_query_threshold_ms": self.slow_query_ms,
+            "slow_query_count": self.slow_query_count,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "queries": {
+                name: {
+                    "count": int(stats["count"]),
+                    "errors": int(stats["errors"]),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0,
+                    "max_ms": round(stats["max_ms"], 2),
+                    "last_ms": round(stats["last_ms"], 2)
+                }
+                for name, stats in self.query_stats.items()
+            }
+        }
     
     def _period_to_seconds(self, period: str) -> int:
         """
@@ -389,7 +518,8 @@ from(bucket: "{self.bucket}")
             "success_rate": (
                 ((self.query_count - self.error_count) / self.query_count * 100)
                 if self.query_count > 0 else 100
-            )
+            ),
+            "query_metrics": self.get_query_metrics()
         }
     
     async def close(self):
@@ -401,7 +531,29 @@ from(bucket: "{self.bucket}")
         except Exception as e:
             logger.error(f"Error closing InfluxDB connection: {e}")
         finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
             self.client = None
             self.query_api = None
             self.is_connected = False
 
+
+_shared_query_client: Optional[InfluxDBQueryClient] = None
+
+
+def get_shared_query_client() -> InfluxDBQueryClient:
+    """
+    Get the process-wide pooled InfluxDB query client
+    
+    All endpoints share one client, one HTTP connection pool and one
+    concurrency limit instead of creating an InfluxDBClient per request.
+    
+    Returns:
+        Shared InfluxDBQueryClient instance
+    """
+    global _shared_query_client
+    if _shared_query_client is None:
+        _shared_query_client = InfluxDBQueryClient()
+    return _shared_query_client
+